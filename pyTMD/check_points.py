@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 check_points.py
-Written by Tyler Sutterley (09/2024)
+Written by Tyler Sutterley (10/2024)
 Check if points are within a tide model domain
 
 OTIS format tidal solutions provided by Oregon State University and ESR
@@ -27,6 +27,8 @@ OPTIONS:
         spline: scipy bivariate spline interpolation
         linear, nearest: scipy regular grid interpolations
 
+    VALIDITY_FILE: file for caching the model validity raster
+
 OUTPUTS:
     valid: array describing if input coordinate is within model domain
 
@@ -51,6 +53,12 @@ PROGRAM DEPENDENCIES:
     interpolate.py: interpolation routines for spatial data
 
 UPDATE HISTORY:
+    Updated 10/2024: use cached transformers for coordinate conversions
+        use a bit-packed validity raster cached in memory or to a file
+        combine the masks of all constituents for GOT and FES models
+        vectorize checking points as lookups of the validity raster
+        limit the number of cached validity rasters
+        verify that validity raster files match the model grid
     Updated 09/2024: use JSON database for known model parameters
         drop support for the ascii definition file format
     Updated 07/2024: renamed format for ATLAS to ATLAS-compact
@@ -78,20 +86,27 @@ from __future__ import print_function, annotations
 
 import logging
 import pathlib
+import threading
 import numpy as np
-import scipy.interpolate
 import pyTMD.crs
 import pyTMD.io
 import pyTMD.io.model
-import pyTMD.interpolate
 import pyTMD.utilities
 # attempt imports
 pyproj = pyTMD.utilities.import_dependency('pyproj')
 
 __all__ = [
-    'check_points'
+    'check_points',
+    'validity'
 ]
 
+# cached validity rasters of tide models
+_validity_cache = {}
+# lock for accessing the cached validity rasters from multiple threads
+_validity_lock = threading.Lock()
+# maximum number of cached validity rasters
+_max_validity_cache_size = 8
+
 # PURPOSE: compute tides at points and times using tide model algorithms
 def check_points(x: np.ndarray, y: np.ndarray,
         DIRECTORY: str | pathlib.Path | None = None,
@@ -99,7 +114,8 @@ def check_points(x: np.ndarray, y: np.ndarray,
         GZIP: bool = False,
         DEFINITION_FILE: str | pathlib.Path | None = None,
         EPSG: str | int = 3031,
-        METHOD: str = 'spline'
+        METHOD: str = 'spline',
+        VALIDITY_FILE: str | pathlib.Path | None = None
     ):
     """
     Check if points are within a tide model domain
@@ -126,6 +142,11 @@ def check_points(x: np.ndarray, y: np.ndarray,
             - ```bilinear```: quick bilinear interpolation
             - ```spline```: scipy bivariate spline interpolation
             - ```linear```, ```nearest```: scipy regular grid interpolations
+    VALIDITY_FILE: str, pathlib.Path or NoneType, default None
+        File for caching the validity raster of the tide model
+
+        Read if existing or created if non-existent. Existing files
+        must match the shape, extent and spacing of the model grid
 
     Returns
     -------
@@ -145,80 +166,315 @@ def check_points(x: np.ndarray, y: np.ndarray,
     else:
         model = pyTMD.io.model(DIRECTORY, compressed=GZIP).elevation(MODEL)
 
+    # get the validity raster of the tide model
+    # from the cache, from a file or from the model files
+    key = (model.name, str(model.grid_file), str(model.model_file))
+    with _validity_lock:
+        raster = _validity_cache.get(key)
+    if raster is not None:
+        pass
+    elif VALIDITY_FILE and pathlib.Path(VALIDITY_FILE).expanduser().exists():
+        raster = validity.from_file(VALIDITY_FILE)
+        # verify that the raster file is for the model grid
+        gx, gy, gshape = _model_grid(model)
+        if not raster.matches(gx, gy, gshape):
+            raise ValueError(f'Validity raster {str(VALIDITY_FILE)} '
+                f'does not match the {model.name} grid')
+    else:
+        raster = validity.from_model(model)
+    # save validity raster to file
+    if VALIDITY_FILE and not pathlib.Path(VALIDITY_FILE).expanduser().exists():
+        raster.to_file(VALIDITY_FILE)
+    # save validity raster to cache
+    with _validity_lock:
+        # remove the oldest cached raster if at capacity
+        while (key not in _validity_cache) and \
+            (len(_validity_cache) >= _max_validity_cache_size):
+            _validity_cache.pop(next(iter(_validity_cache)))
+        _validity_cache[key] = raster
+
     # input shape of data
     idim = np.shape(x)
     # converting x,y from input coordinate reference system
-    crs1 = pyTMD.crs().from_input(EPSG)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
+    transformer = pyTMD.crs().get_transformer(EPSG, 4326)
     lon, lat = transformer.transform(
         np.atleast_1d(x).flatten(), np.atleast_1d(y).flatten()
     )
+    # convert coordinates to the model coordinate system
+    if model.format in ('OTIS','ATLAS-compact','TMD3'):
+        # run wrapper function to convert coordinate systems of input lat/lon
+        X, Y = pyTMD.crs().convert(lon, lat, model.projection, 'F')
+    else:
+        # copy latitude and longitude and adjust longitudes
+        X, Y = np.copy([lon,lat]).astype(np.float64)
+        if (np.max(raster.x) > 180.0):
+            X[X < 0] += 360.0
+
+    # check points using the validity raster
+    valid = raster(X, Y, nearest=(METHOD == 'nearest'))
+    # return the valid mask in the original dimensions
+    return valid.reshape(idim)
+
+# PURPOSE: read the coordinates of a tide model grid
+def _model_grid(model):
+    """
+    Read the coordinates and dimensions of a tide model grid
 
-    # read tidal constants and interpolate to grid points
+    Reads the grid file for OTIS and ATLAS models and the first
+    model file for GOT and FES models
+
+    Parameters
+    ----------
+    model: obj
+        ``pyTMD.io.model`` object
+
+    Returns
+    -------
+    x: np.ndarray
+        x-coordinates of tide model grid
+    y: np.ndarray
+        y-coordinates of tide model grid
+    shape: tuple
+        dimensions of tide model grid
+    """
     if model.format in ('OTIS','ATLAS-compact','TMD3'):
-        # if reading a single OTIS solution
         xi, yi, hz, mz, iob, dt = pyTMD.io.OTIS.read_otis_grid(
             pathlib.Path(model.grid_file).expanduser())
-        # invert model mask
-        mz = np.logical_not(mz)
-        # adjust dimensions of input coordinates to be iterable
-        # run wrapper function to convert coordinate systems of input lat/lon
-        X, Y = pyTMD.crs().convert(lon, lat, model.projection, 'F')
     elif (model.format == 'ATLAS-netcdf'):
-        # if reading a netCDF OTIS atlas solution
         xi, yi, hz = pyTMD.io.ATLAS.read_netcdf_grid(
             pathlib.Path(model.grid_file).expanduser(),
             compressed=model.compressed, type=model.type)
-        # copy bathymetry mask
-        mz = np.copy(hz.mask)
-        # copy latitude and longitude and adjust longitudes
-        X,Y = np.copy([lon,lat]).astype(np.float64)
-        lt0, = np.nonzero(X < 0)
-        X[lt0] += 360.0
     elif model.format in ('GOT-ascii', 'GOT-netcdf'):
-        # if reading a NASA GOT solution
-        hc, xi, yi, c = pyTMD.io.GOT.read_ascii_file(
-            pathlib.Path(model.model_file[0]).expanduser(),
+        reader = getattr(pyTMD.io.GOT, f'read_{model.file_format}_file')
+        hz, xi, yi, c = reader(pathlib.Path(model.model_file[0]).expanduser(),
             compressed=model.compressed)
-        # copy tidal constituent mask
-        mz = np.copy(hc.mask)
-        # copy latitude and longitude and adjust longitudes
-        X, Y = np.copy([lon,lat]).astype(np.float64)
-        lt0, = np.nonzero(X < 0)
-        X[lt0] += 360.0
-    elif (model.format == 'FES-netcdf'):
-        # if reading a FES netCDF solution
-        hc, xi, yi = pyTMD.io.FES.read_netcdf_file(
-            pathlib.Path(model.model_file[0]).expanduser(),
+    elif model.format in ('FES-ascii', 'FES-netcdf'):
+        reader = getattr(pyTMD.io.FES, f'read_{model.file_format}_file')
+        hz, xi, yi = reader(pathlib.Path(model.model_file[0]).expanduser(),
             compressed=model.compressed, type=model.type,
             version=model.version)
-        # copy tidal constituent mask
-        mz = np.copy(hc.mask)
-        # copy latitude and longitude and adjust longitudes
-        X, Y = np.copy([lon,lat]).astype(np.float64)
-        lt0, = np.nonzero(X < 0)
-        X[lt0] += 360.0
-
-    # interpolate masks
-    if (METHOD == 'bilinear'):
-        # replace invalid values with nan
-        mz1 = pyTMD.interpolate.bilinear(xi, yi, mz, X, Y)
-        mask = np.floor(mz1).astype(mz.dtype)
-    elif (METHOD == 'spline'):
-        f1 = scipy.interpolate.RectBivariateSpline(xi, yi, mz.T,
-            kx=1, ky=1)
-        mask = np.floor(f1.ev(X, Y)).astype(mz.dtype)
-    else:
-        # use scipy regular grid to interpolate values
-        r1 = scipy.interpolate.RegularGridInterpolator((yi, xi), mz,
-            method=METHOD, bounds_error=False, fill_value=1)
-        mask = np.floor(r1.__call__(np.c_[y, x])).astype(mz.dtype)
-
-    # reshape to original dimensions
-    valid = np.logical_not(mask).reshape(idim).astype(mz.dtype)
-    # replace points outside model domain with invalid
-    valid &= (X >= xi.min()) & (X <= xi.max())
-    valid &= (Y >= yi.min()) & (Y <= yi.max())
-    # return the valid mask
-    return valid
+    return (xi, yi, np.shape(hz))
+
+# PURPOSE: bit-packed raster of valid tide model grid cells
+class validity:
+    """
+    Bit-packed raster of valid tide model data for checking
+    if points are within a tide model domain
+
+    Parameters
+    ----------
+    x: np.ndarray
+        x-coordinates of tide model grid
+    y: np.ndarray
+        y-coordinates of tide model grid
+    valid: np.ndarray
+        valid tide model data at grid nodes
+
+    Attributes
+    ----------
+    x: np.ndarray
+        x-coordinates of tide model grid
+    y: np.ndarray
+        y-coordinates of tide model grid
+    shape: tuple
+        dimensions of tide model grid
+    is_global: bool
+        tide model grid is global in longitude
+    nodes: np.ndarray
+        bit-packed raster of valid grid nodes
+    cells: np.ndarray
+        bit-packed raster of grid cells with any valid corners
+    """
+    def __init__(self,
+            x: np.ndarray,
+            y: np.ndarray,
+            valid: np.ndarray
+        ):
+        self.x = np.copy(x)
+        self.y = np.copy(y)
+        self.shape = np.shape(valid)
+        # grid spacing
+        dx = self.x[1] - self.x[0]
+        self.is_global = bool(np.isclose(self.x[-1] - self.x[0], 360.0 - dx))
+        # add a wrapped column for global grids
+        valid = np.array(valid, dtype=bool)
+        if self.is_global:
+            valid = np.c_[valid, valid[:,0]]
+        # grid cells with any valid corners
+        cells = valid[:-1,:-1] | valid[1:,:-1] | valid[:-1,1:] | valid[1:,1:]
+        # bit-pack rasters of valid grid nodes and cells
+        self.nodes = np.packbits(valid, axis=None)
+        self.cells = np.packbits(cells, axis=None)
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        Create the validity raster from the files of a tide model
+
+        Combines the masks of all constituents for GOT and FES models
+
+        Parameters
+        ----------
+        model: obj
+            ``pyTMD.io.model`` object
+        """
+        if model.format in ('OTIS','ATLAS-compact','TMD3'):
+            # if reading a single OTIS solution
+            xi, yi, hz, mz, iob, dt = pyTMD.io.OTIS.read_otis_grid(
+                pathlib.Path(model.grid_file).expanduser())
+            valid = mz.astype(bool)
+        elif (model.format == 'ATLAS-netcdf'):
+            # if reading a netCDF OTIS atlas solution
+            xi, yi, hz = pyTMD.io.ATLAS.read_netcdf_grid(
+                pathlib.Path(model.grid_file).expanduser(),
+                compressed=model.compressed, type=model.type)
+            valid = np.logical_not(np.ma.getmaskarray(hz))
+        elif model.format in ('GOT-ascii', 'GOT-netcdf'):
+            # if reading a NASA GOT solution
+            reader = getattr(pyTMD.io.GOT, f'read_{model.file_format}_file')
+            valid = True
+            for model_file in model.model_file:
+                hc, xi, yi, c = reader(pathlib.Path(model_file).expanduser(),
+                    compressed=model.compressed)
+                valid &= np.logical_not(np.ma.getmaskarray(hc))
+        elif model.format in ('FES-ascii', 'FES-netcdf'):
+            # if reading a FES solution
+            reader = getattr(pyTMD.io.FES, f'read_{model.file_format}_file')
+            valid = True
+            for model_file in model.model_file:
+                hc, xi, yi = reader(pathlib.Path(model_file).expanduser(),
+                    compressed=model.compressed, type=model.type,
+                    version=model.version)
+                valid &= np.logical_not(np.ma.getmaskarray(hc))
+        # return the validity raster
+        return cls(xi, yi, valid)
+
+    @classmethod
+    def from_file(cls, input_file: str | pathlib.Path):
+        """
+        Read a validity raster from a file
+
+        Parameters
+        ----------
+        input_file: str or pathlib.Path
+            input validity raster file
+        """
+        input_file = pathlib.Path(input_file).expanduser().absolute()
+        logging.info(f'Reading validity raster: {str(input_file)}')
+        temp = cls.__new__(cls)
+        with np.load(input_file) as d:
+            temp.x = d['x']
+            temp.y = d['y']
+            temp.shape = tuple(d['shape'])
+            temp.is_global = bool(d['is_global'])
+            temp.nodes = d['nodes']
+            temp.cells = d['cells']
+        return temp
+
+    def to_file(self, output_file: str | pathlib.Path):
+        """
+        Write the validity raster to a file
+
+        Parameters
+        ----------
+        output_file: str or pathlib.Path
+            output validity raster file
+        """
+        output_file = pathlib.Path(output_file).expanduser().absolute()
+        logging.info(f'Writing validity raster: {str(output_file)}')
+        with output_file.open(mode='wb') as fid:
+            np.savez_compressed(fid, x=self.x, y=self.y,
+                shape=np.array(self.shape), is_global=self.is_global,
+                nodes=self.nodes, cells=self.cells)
+
+    def matches(self,
+            x: np.ndarray,
+            y: np.ndarray,
+            shape: tuple
+        ):
+        """
+        Check if the validity raster matches the shape, extent
+        and spacing of a tide model grid
+
+        Parameters
+        ----------
+        x: np.ndarray
+            x-coordinates of tide model grid
+        y: np.ndarray
+            y-coordinates of tide model grid
+        shape: tuple
+            dimensions of tide model grid
+
+        Returns
+        -------
+        matches: bool
+            validity raster is for the tide model grid
+        """
+        # check dimensions of the grid
+        if (tuple(shape) != tuple(self.shape)) or \
+            (len(x) != len(self.x)) or (len(y) != len(self.y)):
+            return False
+        # check extent and spacing of the grid
+        return bool(np.isclose(x[0], self.x[0]) &
+            np.isclose(x[-1], self.x[-1]) &
+            np.isclose(y[0], self.y[0]) &
+            np.isclose(y[-1], self.y[-1]) &
+            np.isclose(x[1] - x[0], self.x[1] - self.x[0]) &
+            np.isclose(y[1] - y[0], self.y[1] - self.y[0]))
+
+    def __call__(self,
+            X: np.ndarray,
+            Y: np.ndarray,
+            nearest: bool = False
+        ):
+        """
+        Check if points are within the valid tide model domain
+
+        Parameters
+        ----------
+        X: np.ndarray
+            x-coordinates in the tide model coordinate system
+        Y: np.ndarray
+            y-coordinates in the tide model coordinate system
+        nearest: bool, default False
+            Check the nearest grid node rather than the grid cell
+
+        Returns
+        -------
+        valid: np.ndarray
+            points are within the valid tide model domain
+        """
+        X = np.atleast_1d(X).astype(np.float64).flatten()
+        Y = np.atleast_1d(Y).astype(np.float64).flatten()
+        ny, nx = self.shape
+        # number of columns including wrapped column for global grids
+        nc = (nx + 1) if self.is_global else nx
+        # grid spacing
+        dx = self.x[1] - self.x[0]
+        dy = self.y[1] - self.y[0]
+        # wrap longitudes to the tide model convention
+        if self.is_global:
+            X = self.x[0] + np.mod(X - self.x[0], 360.0)
+        # fractional indices of points within the grid
+        with np.errstate(invalid='ignore'):
+            fi = (Y - self.y[0])/dy
+            fj = (X - self.x[0])/dx
+        if nearest:
+            # indices of the nearest grid nodes
+            i, j = np.round(fi), np.round(fj)
+            nrows, ncols, bits = (ny, nc, self.nodes)
+        else:
+            # indices of the grid cells
+            # points on the last grid node are in the last grid cell
+            i = np.floor(np.where(np.isclose(fi, 0.0), 0.0, fi))
+            j = np.floor(np.where(np.isclose(fj, 0.0), 0.0, fj))
+            i = np.where(np.isclose(fi, ny - 1), ny - 2, i)
+            j = np.where(np.isclose(fj, nc - 1), nc - 2, j)
+            nrows, ncols, bits = (ny - 1, nc - 1, self.cells)
+        # points within the grid
+        valid = np.isfinite(i) & np.isfinite(j) & \
+            (i >= 0) & (i < nrows) & (j >= 0) & (j < ncols)
+        # gather bits for points within the grid
+        ind = (i[valid]*ncols + j[valid]).astype(np.int64)
+        valid[valid] = (bits[ind >> 3] >> (7 - (ind & 7))) & 1
+        return valid
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 compute.py
-Written by Tyler Sutterley (09/2024)
+Written by Tyler Sutterley (10/2024)
 Calculates tidal elevations for correcting elevation or imagery data
 Calculates tidal currents at locations and times
 
@@ -43,6 +43,10 @@ PYTHON DEPENDENCIES:
         https://unidata.github.io/netcdf4-python/netCDF4/index.html
     pyproj: Python interface to PROJ library
         https://pypi.org/project/pyproj/
+    xarray: N-D labeled arrays and datasets in Python
+        https://docs.xarray.dev/en/stable/
+    dask: Parallel computing with task scheduling
+        https://docs.dask.org/en/stable/
 
 PROGRAM DEPENDENCIES:
     time.py: utilities for calculating time operations
@@ -60,6 +64,20 @@ PROGRAM DEPENDENCIES:
     interpolate.py: interpolation routines for spatial data
 
 UPDATE HISTORY:
+    Updated 10/2024: compute solid earth tides for grids and time series
+        by broadcasting points against times in tiled blocks
+        add geometry class for sharing geocentric coordinates and
+        rotation factors between solid Earth corrections
+        add function for computing multiple corrections sharing
+        coordinate transformations, timescales and geometry
+        use cached transformers for coordinate conversions
+        add predictor class with preloaded model constituents for
+        low-latency predictions at points and times
+        add options for weighted extrapolation of model data
+        add option to sort points spatially before interpolation
+        add lazy predictions for chunks of xarray and dask arrays
+        verify that precomputed geometries match the points and ellipsoid
+        reuse fitted splines of the preloaded model between predictions
     Updated 09/2024: use JSON database for known model parameters
         drop support for the ascii definition file format
         use model class attributes for file format and corrections
@@ -143,19 +161,27 @@ import timescale.eop
 import timescale.time
 # attempt imports
 pyproj = pyTMD.utilities.import_dependency('pyproj')
+xr = pyTMD.utilities.import_dependency('xarray')
+dask = pyTMD.utilities.import_dependency('dask')
+dask.array = pyTMD.utilities.import_dependency('dask.array')
 
 __all__ = [
     "corrections",
+    "all_corrections",
     "tide_elevations",
+    "predictor",
     "tide_currents",
     "LPET_elevations",
     "LPT_displacements",
     "OPT_displacements",
-    "SET_displacements"
+    "SET_displacements",
+    "geometry"
 ]
 
 # number of days between the Julian day epoch and MJD
 _jd_mjd = 2400000.5
+# maximum number of elements in a tiled block of points and times
+_max_block_size = 2**18
 
 # PURPOSE: wrapper function for computing values
 def corrections(
@@ -204,6 +230,131 @@ def corrections(
     else:
         raise ValueError(f'Unrecognized correction type: {CORRECTION}')
 
+# PURPOSE: compute multiple corrections with a single pass over the input
+def all_corrections(
+        x: np.ndarray, y: np.ndarray, delta_time: np.ndarray,
+        CORRECTION: list | tuple | None = None,
+        MODEL: dict | None = None,
+        EPSG: str | int = 3031,
+        EPOCH: list | tuple = (2000, 1, 1, 0, 0, 0),
+        TYPE: str | None = 'drift',
+        TIME: str = 'UTC',
+        ELLIPSOID: str = 'WGS84',
+        **kwargs
+    ):
+    """
+    Compute multiple tide corrections at points and times, sharing
+    coordinate transformations, timescales and geometry of the points
+    between corrections
+
+    Parameters
+    ----------
+    x: np.ndarray
+        x-coordinates in projection EPSG
+    y: np.ndarray
+        y-coordinates in projection EPSG
+    delta_time: np.ndarray
+        seconds since EPOCH or datetime array
+    CORRECTION: list, tuple or NoneType, default None
+        Correction types to compute
+
+        Defaults to ``'ocean'`` and ``'load'`` for the tide models
+        in ``MODEL`` and to ``'LPET'``, ``'LPT'``, ``'OPT'`` and ``'SET'``
+
+            - ``'ocean'``: ocean tide from model constituents
+            - ``'load'``: load tide from model constituents
+            - ``'LPET'``: long-period equilibrium tide
+            - ``'LPT'``: solid earth load pole tide
+            - ``'OPT'``: ocean pole tide
+            - ``'SET'``: solid earth tide
+    MODEL: dict or NoneType, default None
+        Tide models to use for ``'ocean'`` and ``'load'`` corrections
+    EPSG: int, default: 3031 (Polar Stereographic South, WGS84)
+        Input coordinate system
+    EPOCH: tuple, default (2000,1,1,0,0,0)
+        Time period for calculating delta times
+    TYPE: str or NoneType, default 'drift'
+        Input data type
+
+            - ``None``: determined from input variable dimensions
+            - ``'drift'``: drift buoys or satellite/airborne altimetry
+            - ``'grid'``: spatial grids or images
+            - ``'time series'``: time series at a single point
+    TIME: str, default 'UTC'
+        Time type if need to compute leap seconds to convert to UTC
+
+            - ``'GPS'``: leap seconds needed
+            - ``'LORAN'``: leap seconds needed (LORAN = GPS + 9 seconds)
+            - ``'TAI'``: leap seconds needed (TAI = GPS + 19 seconds)
+            - ``'UTC'``: no leap seconds needed
+            - ``'datetime'``: numpy datatime array in UTC
+    ELLIPSOID: str, default 'WGS84'
+        Ellipsoid for calculating Earth parameters
+    **kwargs: dict
+        keyword arguments for correction functions
+
+    Returns
+    -------
+    output: dict
+        tidal corrections at coordinates and time in meters
+    """
+    # validate input arguments
+    assert TIME.lower() in ('gps', 'loran', 'tai', 'utc', 'datetime')
+    assert ELLIPSOID.upper() in pyTMD._ellipsoids
+    # tide models for ocean and load tide corrections
+    MODEL = MODEL or {}
+    # default to all corrections that can be calculated
+    if CORRECTION is None:
+        CORRECTION = [c for c in ('ocean', 'load') if c in MODEL]
+        CORRECTION.extend(['LPET', 'LPT', 'OPT', 'SET'])
+    for c in CORRECTION:
+        if c.lower() in ('ocean', 'load') and (c.lower() not in MODEL):
+            raise ValueError(f'No tide model for correction type: {c}')
+        elif c.lower() not in ('ocean', 'load', 'lpet', 'lpt', 'opt', 'set'):
+            raise ValueError(f'Unrecognized correction type: {c}')
+    # determine input data type based on variable dimensions
+    if not TYPE:
+        TYPE = pyTMD.spatial.data_type(x, y, delta_time)
+    assert TYPE.lower() in ('grid', 'drift', 'time series')
+    # reform coordinate dimensions for input grids
+    # or verify coordinate dimension shapes
+    if (TYPE.lower() == 'grid') and (np.size(x) != np.size(y)):
+        x,y = np.meshgrid(np.copy(x),np.copy(y))
+    elif (TYPE.lower() == 'grid'):
+        x = np.atleast_2d(x)
+        y = np.atleast_2d(y)
+    elif TYPE.lower() in ('time series', 'drift'):
+        x = np.atleast_1d(x)
+        y = np.atleast_1d(y)
+
+    # calculate geocentric geometry of the points
+    GEOMETRY = geometry.from_input(x, y, EPSG=EPSG, ELLIPSOID=ELLIPSOID)
+
+    # verify that delta time is an array
+    delta_time = np.atleast_1d(delta_time)
+    # convert delta times or datetimes objects to timescale
+    if (TIME.lower() == 'datetime'):
+        ts = timescale.time.Timescale().from_datetime(
+            delta_time.flatten())
+    else:
+        ts = timescale.time.Timescale().from_deltatime(delta_time,
+            epoch=EPOCH, standard=TIME)
+
+    # shared keyword arguments for correction functions
+    kwargs.update(EPSG=EPSG, EPOCH=EPOCH, TYPE=TYPE, TIME=TIME,
+        ELLIPSOID=ELLIPSOID, TIMESCALE=ts, GEOMETRY=GEOMETRY)
+    # compute each correction type
+    output = {}
+    for c in CORRECTION:
+        if c.lower() in ('ocean', 'load'):
+            output[c] = tide_elevations(x, y, delta_time,
+                MODEL=MODEL[c.lower()], **kwargs)
+        else:
+            output[c] = corrections(x, y, delta_time,
+                CORRECTION=c, **kwargs)
+    # return the tidal corrections
+    return output
+
 # PURPOSE: compute tides at points and times using tide model algorithms
 def tide_elevations(
         x: np.ndarray, y: np.ndarray, delta_time: np.ndarray,
@@ -220,10 +371,15 @@ def tide_elevations(
         METHOD: str = 'spline',
         EXTRAPOLATE: bool = False,
         CUTOFF: int | float = 10.0,
+        EXTRAPOLATION: str = 'nearest',
+        NEIGHBORS: int = 4,
         CORRECTIONS: str | None = None,
         INFER_MINOR: bool = True,
         MINOR_CONSTITUENTS: list | None = None,
         APPLY_FLEXURE: bool = False,
+        TIMESCALE: object | None = None,
+        GEOMETRY: geometry | None = None,
+        SORT: bool = False,
         FILL_VALUE: float = np.nan,
         **kwargs
     ):
@@ -283,6 +439,14 @@ def tide_elevations(
         Extrapolation cutoff in kilometers
 
         Set to ``np.inf`` to extrapolate for all points
+    EXTRAPOLATION: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    NEIGHBORS: int, default 4
+        Number of nearest neighbors for weighted extrapolation
     CORRECTIONS: str or None, default None
         Nodal correction type, default based on model
     INFER_MINOR: bool, default True
@@ -293,6 +457,13 @@ def tide_elevations(
         Apply ice flexure scaling factor to height values
 
         Only valid for models containing flexure fields
+    TIMESCALE: object or NoneType, default None
+        Precomputed timescale object of the times to reuse between corrections
+    GEOMETRY: pyTMD.compute.geometry or NoneType, default None
+        Precomputed geometry of the points to reuse between corrections
+    SORT: bool, default False
+        Sort points along a Morton curve before interpolating
+        to improve the locality of reading model values
     FILL_VALUE: float, default np.nan
         Output invalid value
 
@@ -311,6 +482,7 @@ def tide_elevations(
     # validate input arguments
     assert TIME.lower() in ('gps', 'loran', 'tai', 'utc', 'datetime')
     assert METHOD.lower() in ('bilinear', 'spline', 'linear', 'nearest')
+    assert EXTRAPOLATION.lower() in ('nearest', 'idw', 'gaussian')
 
     # get parameters for tide model
     if DEFINITION_FILE is not None:
@@ -334,15 +506,20 @@ def tide_elevations(
         y = np.atleast_1d(y)
 
     # converting x,y from EPSG to latitude/longitude
-    crs1 = pyTMD.crs().from_input(EPSG)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
-    lon, lat = transformer.transform(x.flatten(), y.flatten())
+    if GEOMETRY is not None:
+        # verify that the geometry matches the input points
+        assert GEOMETRY.npts == np.size(x)
+        lon, lat = GEOMETRY.lon, GEOMETRY.lat
+    else:
+        transformer = pyTMD.crs().get_transformer(EPSG, 4326)
+        lon, lat = transformer.transform(x.flatten(), y.flatten())
 
     # verify that delta time is an array
     delta_time = np.atleast_1d(delta_time)
     # convert delta times or datetimes objects to timescale
-    if (TIME.lower() == 'datetime'):
+    if TIMESCALE is not None:
+        ts = TIMESCALE
+    elif (TIME.lower() == 'datetime'):
         ts = timescale.time.Timescale().from_datetime(
             delta_time.flatten())
     else:
@@ -351,38 +528,52 @@ def tide_elevations(
     # number of time points
     nt = len(ts)
 
+    # sort points spatially to improve locality of interpolation
+    if SORT:
+        isort = pyTMD.spatial.morton_order(lon, lat)
+        lon, lat = lon[isort], lat[isort]
+
     # read tidal constants and interpolate to grid points
     if model.format in ('OTIS', 'ATLAS-compact', 'TMD3'):
         amp,ph,D,c = pyTMD.io.OTIS.extract_constants(lon, lat, model.grid_file,
             model.model_file, model.projection, type=model.type,
             grid=model.file_format, crop=CROP, bounds=BOUNDS, method=METHOD,
-            extrapolate=EXTRAPOLATE, cutoff=CUTOFF, apply_flexure=APPLY_FLEXURE)
+            extrapolate=EXTRAPOLATE, cutoff=CUTOFF,
+            extrapolation=EXTRAPOLATION, neighbors=NEIGHBORS,
+            apply_flexure=APPLY_FLEXURE)
         # use delta time at 2000.0 to match TMD outputs
         deltat = np.zeros((nt), dtype=np.float64)
     elif model.format in ('ATLAS-netcdf',):
         amp,ph,D,c = pyTMD.io.ATLAS.extract_constants(lon, lat, model.grid_file,
             model.model_file, type=model.type, crop=CROP, bounds=BOUNDS,
             method=METHOD, extrapolate=EXTRAPOLATE, cutoff=CUTOFF,
+            extrapolation=EXTRAPOLATION, neighbors=NEIGHBORS,
             scale=model.scale, compressed=model.compressed)
         # use delta time at 2000.0 to match TMD outputs
         deltat = np.zeros((nt), dtype=np.float64)
     elif model.format in ('GOT-ascii', 'GOT-netcdf'):
         amp,ph,c = pyTMD.io.GOT.extract_constants(lon, lat, model.model_file,
             grid=model.file_format, crop=CROP, bounds=BOUNDS, method=METHOD,
-            extrapolate=EXTRAPOLATE, cutoff=CUTOFF, scale=model.scale,
-            compressed=model.compressed)
+            extrapolate=EXTRAPOLATE, cutoff=CUTOFF,
+            extrapolation=EXTRAPOLATION, neighbors=NEIGHBORS,
+            scale=model.scale, compressed=model.compressed)
         # delta time (TT - UT1)
         deltat = ts.tt_ut1
     elif model.format in ('FES-ascii', 'FES-netcdf'):
         amp,ph = pyTMD.io.FES.extract_constants(lon, lat, model.model_file,
             type=model.type, version=model.version, crop=CROP, bounds=BOUNDS,
             method=METHOD, extrapolate=EXTRAPOLATE, cutoff=CUTOFF,
+            extrapolation=EXTRAPOLATION, neighbors=NEIGHBORS,
             scale=model.scale, compressed=model.compressed)
         # available model constituents
         c = model.constituents
         # delta time (TT - UT1)
         deltat = ts.tt_ut1
 
+    # restore the original order of the points
+    if SORT:
+        amp, ph = _unsort(isort, amp, ph)
+
     # calculate complex phase in radians for Euler's
     cph = -1j*ph*np.pi/180.0
     # calculate constituent oscillation
@@ -444,6 +635,359 @@ def tide_elevations(
     # return the ocean or load tide correction
     return tide
 
+# PURPOSE: preload tide model constituents for repeated predictions
+class predictor:
+    """
+    Preloaded ocean or load tide model for repeatedly predicting
+    tidal elevations at points and times with low latency
+
+    Parameters
+    ----------
+    DIRECTORY: str or NoneType, default None
+        working data directory for tide models
+    MODEL: str or NoneType, default None
+        Tide model to use in correction
+    GZIP: bool, default False
+        Tide model files are gzip compressed
+    DEFINITION_FILE: str, pathlib.Path, io.IOBase or NoneType, default None
+        Tide model definition file for use
+    CROP: bool, default False
+        Crop tide model data to (buffered) bounds
+    BOUNDS: list, np.ndarray or NoneType, default None
+        Boundaries for cropping tide model data
+    EPSG: int, default: 3031 (Polar Stereographic South, WGS84)
+        Input coordinate system
+    EPOCH: tuple, default (2000,1,1,0,0,0)
+        Time period for calculating delta times
+    TIME: str, default 'UTC'
+        Time type if need to compute leap seconds to convert to UTC
+
+            - ``'GPS'``: leap seconds needed
+            - ``'LORAN'``: leap seconds needed (LORAN = GPS + 9 seconds)
+            - ``'TAI'``: leap seconds needed (TAI = GPS + 19 seconds)
+            - ``'UTC'``: no leap seconds needed
+            - ``'datetime'``: numpy datatime array in UTC
+    METHOD: str, default 'bilinear'
+        Interpolation method
+
+            - ```bilinear```: quick bilinear interpolation
+            - ```spline```: scipy bivariate spline interpolation
+            - ```linear```, ```nearest```: scipy regular grid interpolations
+
+    EXTRAPOLATE: bool, default False
+        Extrapolate with nearest-neighbors
+    CUTOFF: int or float, default 10.0
+        Extrapolation cutoff in kilometers
+
+        Set to ``np.inf`` to extrapolate for all points
+    EXTRAPOLATION: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    NEIGHBORS: int, default 4
+        Number of nearest neighbors for weighted extrapolation
+    CORRECTIONS: str or None, default None
+        Nodal correction type, default based on model
+    INFER_MINOR: bool, default True
+        Infer the height values for minor tidal constituents
+    MINOR_CONSTITUENTS: list or None, default None
+        Specify constituents to infer
+    APPLY_FLEXURE: bool, default False
+        Apply ice flexure scaling factor to height values
+
+        Only valid for models containing flexure fields
+    FILL_VALUE: float, default np.nan
+        Output invalid value
+
+    Attributes
+    ----------
+    model: obj
+        Tide model parameters
+    constituents: obj
+        Tide model constituents (complex form)
+    transformer: obj
+        ``pyproj`` transformer from EPSG to latitude and longitude
+    """
+    def __init__(self,
+            DIRECTORY: str | pathlib.Path | None = None,
+            MODEL: str | None = None,
+            GZIP: bool = False,
+            DEFINITION_FILE: str | pathlib.Path | IOBase | None = None,
+            CROP: bool = False,
+            BOUNDS: list | np.ndarray | None = None,
+            EPSG: str | int = 3031,
+            EPOCH: list | tuple = (2000, 1, 1, 0, 0, 0),
+            TIME: str = 'UTC',
+            METHOD: str = 'bilinear',
+            EXTRAPOLATE: bool = False,
+            CUTOFF: int | float = 10.0,
+            EXTRAPOLATION: str = 'nearest',
+            NEIGHBORS: int = 4,
+            CORRECTIONS: str | None = None,
+            INFER_MINOR: bool = True,
+            MINOR_CONSTITUENTS: list | None = None,
+            APPLY_FLEXURE: bool = False,
+            FILL_VALUE: float = np.nan,
+            **kwargs
+        ):
+        # check that tide directory is accessible
+        if DIRECTORY is not None:
+            DIRECTORY = pathlib.Path(DIRECTORY).expanduser()
+            if not DIRECTORY.exists():
+                raise FileNotFoundError("Invalid tide directory")
+
+        # validate input arguments
+        assert TIME.lower() in ('gps', 'loran', 'tai', 'utc', 'datetime')
+        assert METHOD.lower() in ('bilinear', 'spline', 'linear', 'nearest')
+        assert EXTRAPOLATION.lower() in ('nearest', 'idw', 'gaussian')
+
+        # get parameters for tide model
+        if DEFINITION_FILE is not None:
+            self.model = pyTMD.io.model(DIRECTORY).from_file(DEFINITION_FILE)
+        else:
+            self.model = pyTMD.io.model(DIRECTORY,
+                compressed=GZIP).elevation(MODEL)
+
+        # save input options for predictions
+        self.epsg = EPSG
+        self.epoch = EPOCH
+        self.time = TIME
+        self.method = METHOD.lower()
+        self.extrapolate = EXTRAPOLATE
+        self.cutoff = CUTOFF
+        self.extrapolation = EXTRAPOLATION
+        self.neighbors = NEIGHBORS
+        self.infer_minor = INFER_MINOR
+        self.fill_value = FILL_VALUE
+        # nodal corrections to apply
+        self.corrections = CORRECTIONS or self.model.corrections
+        # minor constituents to infer
+        self.minor = MINOR_CONSTITUENTS or self.model.minor
+
+        # build transformer for converting from EPSG to latitude/longitude
+        self.transformer = pyTMD.crs().get_transformer(EPSG, 4326)
+
+        # read tidal constants from the tide model
+        if self.model.format in ('OTIS', 'ATLAS-compact', 'TMD3'):
+            self.constituents = pyTMD.io.OTIS.read_constants(
+                self.model.grid_file, self.model.model_file,
+                self.model.projection, type=self.model.type,
+                grid=self.model.file_format, crop=CROP, bounds=BOUNDS,
+                apply_flexure=APPLY_FLEXURE)
+        elif self.model.format in ('ATLAS-netcdf',):
+            self.constituents = pyTMD.io.ATLAS.read_constants(
+                self.model.grid_file, self.model.model_file,
+                type=self.model.type, compressed=self.model.compressed,
+                crop=CROP, bounds=BOUNDS)
+        elif self.model.format in ('GOT-ascii', 'GOT-netcdf'):
+            self.constituents = pyTMD.io.GOT.read_constants(
+                self.model.model_file, grid=self.model.file_format,
+                compressed=self.model.compressed, crop=CROP, bounds=BOUNDS)
+        elif self.model.format in ('FES-ascii', 'FES-netcdf'):
+            self.constituents = pyTMD.io.FES.read_constants(
+                self.model.model_file, type=self.model.type,
+                version=self.model.version, compressed=self.model.compressed,
+                crop=CROP, bounds=BOUNDS)
+
+    @property
+    def c(self) -> list:
+        """Tidal constituents of the model
+        """
+        # available model constituents
+        if self.model.format in ('FES-ascii', 'FES-netcdf'):
+            return self.model.constituents
+        else:
+            return self.constituents.fields
+
+    def interpolate(self, lon: np.ndarray, lat: np.ndarray):
+        """
+        Interpolates the preloaded constituents to points
+
+        Parameters
+        ----------
+        lon: np.ndarray
+            longitude (degrees east)
+        lat: np.ndarray
+            latitude (degrees north)
+
+        Returns
+        -------
+        hc: np.ndarray
+            complex form of tidal constituents at points
+        """
+        if self.model.format in ('OTIS', 'ATLAS-compact', 'TMD3'):
+            amp,ph,D = pyTMD.io.OTIS.interpolate_constants(lon, lat,
+                self.constituents, type=self.model.type,
+                method=self.method, extrapolate=self.extrapolate,
+                cutoff=self.cutoff, extrapolation=self.extrapolation,
+                neighbors=self.neighbors, cache=True)
+        elif self.model.format in ('ATLAS-netcdf',):
+            amp,ph,D = pyTMD.io.ATLAS.interpolate_constants(lon, lat,
+                self.constituents, type=self.model.type,
+                method=self.method, extrapolate=self.extrapolate,
+                cutoff=self.cutoff, extrapolation=self.extrapolation,
+                neighbors=self.neighbors, scale=self.model.scale,
+                cache=True)
+        elif self.model.format in ('GOT-ascii', 'GOT-netcdf'):
+            amp,ph = pyTMD.io.GOT.interpolate_constants(lon, lat,
+                self.constituents, method=self.method,
+                extrapolate=self.extrapolate, cutoff=self.cutoff,
+                extrapolation=self.extrapolation, neighbors=self.neighbors,
+                scale=self.model.scale, cache=True)
+        elif self.model.format in ('FES-ascii', 'FES-netcdf'):
+            amp,ph = pyTMD.io.FES.interpolate_constants(lon, lat,
+                self.constituents, method=self.method,
+                extrapolate=self.extrapolate, cutoff=self.cutoff,
+                extrapolation=self.extrapolation, neighbors=self.neighbors,
+                scale=self.model.scale, cache=True)
+        # calculate complex phase in radians for Euler's
+        cph = -1j*ph*np.pi/180.0
+        # calculate constituent oscillation
+        hc = amp*np.exp(cph)
+        return hc
+
+    def predict(self,
+            x: np.ndarray,
+            y: np.ndarray,
+            delta_time: np.ndarray,
+            TIMESCALE: object | None = None
+        ):
+        """
+        Predict ocean or load tides at points and times
+
+        Points and times are broadcast against each other
+
+        Parameters
+        ----------
+        x: np.ndarray
+            x-coordinates in projection EPSG
+        y: np.ndarray
+            y-coordinates in projection EPSG
+        delta_time: np.ndarray
+            seconds since EPOCH or datetime array
+        TIMESCALE: object or NoneType, default None
+            Precomputed timescale object of the broadcast times
+
+        Returns
+        -------
+        tide: np.ndarray
+            tidal elevation at coordinates and time in meters
+        """
+        # broadcast coordinates and times to a common shape
+        x, y, delta_time = np.broadcast_arrays(x, y, delta_time)
+        shape = np.shape(x)
+        # converting x,y from EPSG to latitude/longitude
+        lon, lat = self.transformer.transform(x.flatten(), y.flatten())
+        # convert delta times or datetimes objects to timescale
+        if TIMESCALE is not None:
+            ts = TIMESCALE
+        elif (self.time.lower() == 'datetime'):
+            ts = timescale.time.Timescale().from_datetime(
+                delta_time.flatten())
+        else:
+            ts = timescale.time.Timescale().from_deltatime(
+                delta_time.flatten(), epoch=self.epoch, standard=self.time)
+        # number of points
+        npts = len(lon)
+        # delta time (TT - UT1)
+        if self.model.format in ('OTIS', 'ATLAS-compact', 'TMD3',
+            'ATLAS-netcdf'):
+            # use delta time at 2000.0 to match TMD outputs
+            deltat = np.zeros((npts), dtype=np.float64)
+        else:
+            deltat = ts.tt_ut1
+        # interpolate preloaded constituents to points
+        hc = self.interpolate(lon, lat)
+        # predict tidal elevations at points and times
+        tide = np.ma.zeros((npts), fill_value=self.fill_value)
+        tide.mask = np.any(hc.mask, axis=1)
+        tide.data[:] = pyTMD.predict.drift(ts.tide, hc, self.c,
+            deltat=deltat, corrections=self.corrections)
+        # calculate values for minor constituents by inferrence
+        if self.infer_minor:
+            minor = pyTMD.predict.infer_minor(ts.tide, hc, self.c,
+                deltat=deltat, corrections=self.corrections,
+                minor=self.minor)
+            tide.data[:] += minor.data[:]
+        # replace invalid values with fill value
+        tide.data[tide.mask] = tide.fill_value
+        # return the tide prediction in the broadcast shape
+        return np.ma.reshape(tide, shape)
+
+    def map_blocks(self,
+            x: np.ndarray,
+            y: np.ndarray,
+            delta_time: np.ndarray,
+            chunks: int | tuple | str = 'auto'
+        ):
+        """
+        Lazily predict ocean or load tides for chunks of points and times
+
+        Points and times are broadcast against each other and predicted
+        for each chunk with ``dask``.  The preloaded model is shared
+        between chunks as a single object in the task graph
+
+        Parameters
+        ----------
+        x: xarray.DataArray, dask.array.Array or np.ndarray
+            x-coordinates in projection EPSG
+        y: xarray.DataArray, dask.array.Array or np.ndarray
+            y-coordinates in projection EPSG
+        delta_time: xarray.DataArray, dask.array.Array or np.ndarray
+            seconds since EPOCH or datetime array
+        chunks: int, tuple or str, default 'auto'
+            chunk sizes for inputs that are not ``dask`` arrays
+
+        Returns
+        -------
+        tide: xarray.DataArray or dask.array.Array
+            tidal elevation at coordinates and time in meters
+        """
+        # broadcast labeled arrays against their named dimensions
+        labeled = any(isinstance(v, xr.DataArray) for v in (x, y, delta_time))
+        if labeled:
+            x, y, delta_time = xr.broadcast(*[v if isinstance(v, xr.DataArray)
+                else xr.DataArray(v) for v in (x, y, delta_time)])
+            template = x
+            x, y, delta_time = (x.data, y.data, delta_time.data)
+        # convert to dask arrays and broadcast to a common shape
+        x, y, delta_time = dask.array.broadcast_arrays(
+            *[v if isinstance(v, dask.array.Array)
+            else dask.array.from_array(v, chunks=chunks)
+            for v in (x, y, delta_time)])
+        # share the preloaded model between chunks as a single task
+        # (without hashing the model constituents)
+        model = dask.delayed(self, pure=False)
+        tide = dask.array.map_blocks(_predict_block, x, y, delta_time,
+            model, dtype=np.float64, meta=np.array((), dtype=np.float64))
+        # return the tide prediction as a labeled array
+        if labeled:
+            attrs = dict(units='meters', long_name=self.model.long_name)
+            return xr.DataArray(tide, dims=template.dims,
+                coords=template.coords, name=self.model.variable,
+                attrs=attrs)
+        return tide
+
+    def __call__(self, *args, **kwargs):
+        return self.predict(*args, **kwargs)
+
+    def __getstate__(self):
+        # rebuild the cached transformer after unpickling
+        state = self.__dict__.copy()
+        state.pop('transformer', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.transformer = pyTMD.crs().get_transformer(self.epsg, 4326)
+
+# PURPOSE: predict tides for a chunk of points and times
+def _predict_block(x, y, delta_time, model):
+    tide = model.predict(x, y, delta_time)
+    return np.ma.filled(tide, fill_value=model.fill_value).astype(np.float64)
+
 # PURPOSE: compute tides at points and times using tide model algorithms
 def tide_currents(
         x: np.ndarray, y: np.ndarray, delta_time: np.ndarray,
@@ -460,9 +1004,12 @@ def tide_currents(
         METHOD: str = 'spline',
         EXTRAPOLATE: bool = False,
         CUTOFF: int | float = 10.0,
+        EXTRAPOLATION: str = 'nearest',
+        NEIGHBORS: int = 4,
         CORRECTIONS: str | None = None,
         INFER_MINOR: bool = True,
         MINOR_CONSTITUENTS: list | None = None,
+        SORT: bool = False,
         FILL_VALUE: float = np.nan,
         **kwargs
     ):
@@ -522,12 +1069,23 @@ def tide_currents(
         Extrapolation cutoff in kilometers
 
         Set to ``np.inf`` to extrapolate for all points
+    EXTRAPOLATION: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    NEIGHBORS: int, default 4
+        Number of nearest neighbors for weighted extrapolation
     CORRECTIONS: str or None, default None
         Nodal correction type, default based on model
     INFER_MINOR: bool, default True
         Infer the height values for minor tidal constituents
     MINOR_CONSTITUENTS: list or None, default None
         Specify constituents to infer
+    SORT: bool, default False
+        Sort points along a Morton curve before interpolating
+        to improve the locality of reading model values
     FILL_VALUE: float, default np.nan
         Output invalid value
 
@@ -546,6 +1104,7 @@ def tide_currents(
     # validate input arguments
     assert TIME.lower() in ('gps', 'loran', 'tai', 'utc', 'datetime')
     assert METHOD.lower() in ('bilinear', 'spline', 'linear', 'nearest')
+    assert EXTRAPOLATION.lower() in ('nearest', 'idw', 'gaussian')
 
     # get parameters for tide model
     if DEFINITION_FILE is not None:
@@ -569,9 +1128,7 @@ def tide_currents(
         y = np.atleast_1d(y)
 
     # converting x,y from EPSG to latitude/longitude
-    crs1 = pyTMD.crs().from_input(EPSG)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
+    transformer = pyTMD.crs().get_transformer(EPSG, 4326)
     lon, lat = transformer.transform(x.flatten(), y.flatten())
 
     # verify that delta time is an array
@@ -586,6 +1143,11 @@ def tide_currents(
     # number of time points
     nt = len(ts)
 
+    # sort points spatially to improve locality of interpolation
+    if SORT:
+        isort = pyTMD.spatial.morton_order(lon, lat)
+        lon, lat = lon[isort], lat[isort]
+
     # python dictionary with tide model data
     tide = {}
     # iterate over u and v currents
@@ -595,13 +1157,15 @@ def tide_currents(
             amp,ph,D,c = pyTMD.io.OTIS.extract_constants(lon, lat, model.grid_file,
                 model.model_file['u'], model.projection, type=t,
                 grid=model.file_format, crop=CROP, bounds=BOUNDS,
-                method=METHOD, extrapolate=EXTRAPOLATE, cutoff=CUTOFF)
+                method=METHOD, extrapolate=EXTRAPOLATE, cutoff=CUTOFF,
+                extrapolation=EXTRAPOLATION, neighbors=NEIGHBORS)
             # use delta time at 2000.0 to match TMD outputs
             deltat = np.zeros((nt), dtype=np.float64)
         elif model.format in ('ATLAS-netcdf',):
             amp,ph,D,c = pyTMD.io.ATLAS.extract_constants(lon, lat, model.grid_file,
                 model.model_file[t], type=t, crop=CROP, bounds=BOUNDS,
                 method=METHOD, extrapolate=EXTRAPOLATE, cutoff=CUTOFF,
+                extrapolation=EXTRAPOLATION, neighbors=NEIGHBORS,
                 scale=model.scale, compressed=model.compressed)
             # use delta time at 2000.0 to match TMD outputs
             deltat = np.zeros((nt), dtype=np.float64)
@@ -609,12 +1173,17 @@ def tide_currents(
             amp,ph = pyTMD.io.FES.extract_constants(lon, lat, model.model_file[t],
                 type=t, version=model.version, crop=CROP, bounds=BOUNDS,
                 method=METHOD, extrapolate=EXTRAPOLATE, cutoff=CUTOFF,
+                extrapolation=EXTRAPOLATION, neighbors=NEIGHBORS,
                 scale=model.scale, compressed=model.compressed)
             # available model constituents
             c = model.constituents
             # delta time (TT - UT1)
             deltat = ts.tt_ut1
 
+        # restore the original order of the points
+        if SORT:
+            amp, ph = _unsort(isort, amp, ph)
+
         # calculate complex phase in radians for Euler's
         cph = -1j*ph*np.pi/180.0
         # calculate constituent oscillation
@@ -677,6 +1246,28 @@ def tide_currents(
     # return the ocean tide currents
     return tide
 
+# PURPOSE: restore the original order of spatially sorted points
+def _unsort(indices: np.ndarray, *args):
+    """
+    Restore the original order of arrays of sorted points
+
+    Parameters
+    ----------
+    indices: np.ndarray
+        indices used to sort the points
+    *args: np.ndarray
+        arrays of sorted points
+
+    Returns
+    -------
+    outputs: tuple
+        arrays in the original order of the points
+    """
+    # calculate the inverse permutation of the sorting indices
+    inverse = np.empty_like(indices)
+    inverse[indices] = np.arange(len(indices))
+    return tuple(arr[inverse,...] for arr in args)
+
 # PURPOSE: compute long-period equilibrium tidal elevations
 def LPET_elevations(
         x: np.ndarray, y: np.ndarray, delta_time: np.ndarray,
@@ -684,6 +1275,8 @@ def LPET_elevations(
         EPOCH: list | tuple = (2000, 1, 1, 0, 0, 0),
         TYPE: str | None = 'drift',
         TIME: str = 'UTC',
+        TIMESCALE: object | None = None,
+        GEOMETRY: geometry | None = None,
         **kwargs
     ):
     """
@@ -716,6 +1309,10 @@ def LPET_elevations(
             - ``'TAI'``: leap seconds needed (TAI = GPS + 19 seconds)
             - ``'UTC'``: no leap seconds needed
             - ``'datetime'``: numpy datatime array in UTC
+    TIMESCALE: object or NoneType, default None
+        Precomputed timescale object of the times to reuse between corrections
+    GEOMETRY: pyTMD.compute.geometry or NoneType, default None
+        Precomputed geometry of the points to reuse between corrections
     FILL_VALUE: float, default np.nan
         Output invalid value
 
@@ -743,15 +1340,20 @@ def LPET_elevations(
         y = np.atleast_1d(y)
 
     # converting x,y from EPSG to latitude/longitude
-    crs1 = pyTMD.crs().from_input(EPSG)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
-    lon, lat = transformer.transform(x.flatten(), y.flatten())
+    if GEOMETRY is not None:
+        # verify that the geometry matches the input points
+        assert GEOMETRY.npts == np.size(x)
+        lon, lat = GEOMETRY.lon, GEOMETRY.lat
+    else:
+        transformer = pyTMD.crs().get_transformer(EPSG, 4326)
+        lon, lat = transformer.transform(x.flatten(), y.flatten())
 
     # verify that delta time is an array
     delta_time = np.atleast_1d(delta_time)
     # convert delta times or datetimes objects to timescale
-    if (TIME.lower() == 'datetime'):
+    if TIMESCALE is not None:
+        ts = TIMESCALE
+    elif (TIME.lower() == 'datetime'):
         ts = timescale.time.Timescale().from_datetime(
             delta_time.flatten())
     else:
@@ -791,6 +1393,8 @@ def LPT_displacements(
         TIME: str = 'UTC',
         ELLIPSOID: str = 'WGS84',
         CONVENTION: str = '2018',
+        TIMESCALE: object | None = None,
+        GEOMETRY: geometry | None = None,
         FILL_VALUE: float = np.nan,
         **kwargs
     ):
@@ -834,6 +1438,10 @@ def LPT_displacements(
             - ``'2010'``
             - ``'2015'``
             - ``'2018'``
+    TIMESCALE: object or NoneType, default None
+        Precomputed timescale object of the times to reuse between corrections
+    GEOMETRY: pyTMD.compute.geometry or NoneType, default None
+        Precomputed geometry of the points to reuse between corrections
     FILL_VALUE: float, default np.nan
         Output invalid value
 
@@ -862,16 +1470,19 @@ def LPT_displacements(
         x = np.atleast_1d(x)
         y = np.atleast_1d(y)
 
-    # converting x,y from EPSG to latitude/longitude
-    crs1 = pyTMD.crs().from_input(EPSG)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
-    lon,lat = transformer.transform(x.flatten(), y.flatten())
+    # calculate geocentric geometry of the points
+    if GEOMETRY is None:
+        GEOMETRY = geometry.from_input(x, y, EPSG=EPSG, ELLIPSOID=ELLIPSOID)
+    # verify that the geometry matches the input points and ellipsoid
+    assert GEOMETRY.npts == np.size(x)
+    assert GEOMETRY.ellipsoid.upper() == ELLIPSOID.upper()
 
     # verify that delta time is an array
     delta_time = np.atleast_1d(delta_time)
     # convert delta times or datetimes objects to timescale
-    if (TIME.lower() == 'datetime'):
+    if TIMESCALE is not None:
+        ts = TIMESCALE
+    elif (TIME.lower() == 'datetime'):
         ts = timescale.time.Timescale().from_datetime(
             delta_time.flatten())
     else:
@@ -881,49 +1492,24 @@ def LPT_displacements(
     # number of time points
     nt = len(ts)
 
-    # degrees to radians
-    dtr = np.pi/180.0
     # earth and physical parameters for ellipsoid
     units = pyTMD.datum(ellipsoid=ELLIPSOID, units='MKS')
     # tidal love/shida numbers appropriate for the load tide
     hb2 = 0.6207
     lb2 = 0.0836
 
-    # convert from geodetic latitude to geocentric latitude
-    # calculate X, Y and Z from geodetic latitude and longitude
-    X,Y,Z = pyTMD.spatial.to_cartesian(lon.flatten(), lat.flatten(),
-        a_axis=units.a_axis, flat=units.flat)
-    # calculate geocentric latitude and convert to degrees
-    latitude_geocentric = np.arctan(Z / np.sqrt(X**2.0 + Y**2.0))/dtr
-    npts = len(latitude_geocentric)
-    # geocentric colatitude and longitude in radians
-    theta = dtr*(90.0 - latitude_geocentric)
-    phi = dtr*lon.flatten()
-
     # compute normal gravity at spatial location
     # p. 80, Eqn.(2-199)
-    gamma_0 = units.gamma_0(theta)
-
-    # rotation matrix for converting from cartesian coordinates
-    R = np.zeros((npts, 3, 3))
-    R[:,0,0] = np.cos(phi)*np.cos(theta)
-    R[:,1,0] = -np.sin(phi)
-    R[:,2,0] = np.cos(phi)*np.sin(theta)
-    R[:,0,1] = np.sin(phi)*np.cos(theta)
-    R[:,1,1] = np.cos(phi)
-    R[:,2,1] = np.sin(phi)*np.sin(theta)
-    R[:,0,2] = -np.sin(theta)
-    R[:,2,2] = np.cos(theta)
+    gamma_0 = units.gamma_0(GEOMETRY.theta)
 
     # calculate radial displacement at time
     if (TYPE == 'grid'):
         ny,nx = np.shape(x)
         Srad = np.ma.zeros((ny,nx,nt), fill_value=FILL_VALUE)
         Srad.mask = np.zeros((ny,nx,nt),dtype=bool)
-        XYZ = np.c_[X, Y, Z]
         for i in range(nt):
             # calculate load pole tides in cartesian coordinates
-            dxi = pyTMD.predict.load_pole_tide(ts.tide[i], XYZ,
+            dxi = pyTMD.predict.load_pole_tide(ts.tide[i], GEOMETRY.XYZ,
                 deltat=ts.tt_ut1[i],
                 gamma_0=gamma_0,
                 omega=units.omega,
@@ -931,15 +1517,14 @@ def LPT_displacements(
                 l2=lb2,
                 convention=CONVENTION
             )
-            # calculate components of load pole tides
-            S = np.einsum('ti...,tji...->tj...', dxi, R)
+            # calculate radial component of load pole tides
+            S = GEOMETRY.to_radial(dxi)
             # reshape to output dimensions
-            Srad.data[:,:,i] = np.reshape(S[:,2], (ny,nx))
+            Srad.data[:,:,i] = np.reshape(S, (ny,nx))
             Srad.mask[:,:,i] = np.isnan(Srad.data[:,:,i])
     elif (TYPE == 'drift'):
         # calculate load pole tides in cartesian coordinates
-        XYZ = np.c_[X, Y, Z]
-        dxi = pyTMD.predict.load_pole_tide(ts.tide, XYZ,
+        dxi = pyTMD.predict.load_pole_tide(ts.tide, GEOMETRY.XYZ,
             deltat=ts.tt_ut1,
             gamma_0=gamma_0,
             omega=units.omega,
@@ -947,11 +1532,11 @@ def LPT_displacements(
             l2=lb2,
             convention=CONVENTION
         )
-        # calculate components of load pole tides
-        S = np.einsum('ti...,tji...->tj...', dxi, R)
+        # calculate radial component of load pole tides
+        S = GEOMETRY.to_radial(dxi)
         # reshape to output dimensions
         Srad = np.ma.zeros((nt), fill_value=FILL_VALUE)
-        Srad.data[:] = S[:,2].copy()
+        Srad.data[:] = S.copy()
         Srad.mask = np.isnan(Srad.data)
     elif (TYPE == 'time series'):
         nstation = len(x)
@@ -959,7 +1544,7 @@ def LPT_displacements(
         Srad.mask = np.zeros((nstation,nt),dtype=bool)
         for s in range(nstation):
             # convert coordinates to column arrays
-            XYZ = np.repeat(np.c_[X[s], Y[s], Z[s]], nt, axis=0)
+            XYZ = np.repeat(GEOMETRY.XYZ[s,None,:], nt, axis=0)
             # calculate load pole tides in cartesian coordinates
             dxi = pyTMD.predict.load_pole_tide(ts.tide, XYZ,
                 deltat=ts.tt_ut1,
@@ -969,10 +1554,10 @@ def LPT_displacements(
                 l2=lb2,
                 convention=CONVENTION
             )
-            # calculate components of load pole tides
-            S = np.einsum('ti...,ji...->tj...', dxi, R[s,:,:])
+            # calculate radial component of load pole tides
+            S = GEOMETRY.to_radial(dxi, indices=s)
             # reshape to output dimensions
-            Srad.data[s,:] = S[:,2].copy()
+            Srad.data[s,:] = S.copy()
             Srad.mask[s,:] = np.isnan(Srad.data[s,:])
 
     # replace invalid data with fill values
@@ -992,6 +1577,8 @@ def OPT_displacements(
         ELLIPSOID: str = 'WGS84',
         CONVENTION: str = '2018',
         METHOD: str = 'spline',
+        TIMESCALE: object | None = None,
+        GEOMETRY: geometry | None = None,
         FILL_VALUE: float = np.nan,
         **kwargs
     ):
@@ -1041,6 +1628,10 @@ def OPT_displacements(
             - ```bilinear```: quick bilinear interpolation
             - ```spline```: scipy bivariate spline interpolation
             - ```linear```, ```nearest```: scipy regular grid interpolations
+    TIMESCALE: object or NoneType, default None
+        Precomputed timescale object of the times to reuse between corrections
+    GEOMETRY: pyTMD.compute.geometry or NoneType, default None
+        Precomputed geometry of the points to reuse between corrections
     FILL_VALUE: float, default np.nan
         Output invalid value
 
@@ -1070,16 +1661,19 @@ def OPT_displacements(
         x = np.atleast_1d(x)
         y = np.atleast_1d(y)
 
-    # converting x,y from EPSG to latitude/longitude
-    crs1 = pyTMD.crs().from_input(EPSG)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
-    lon,lat = transformer.transform(x.flatten(), y.flatten())
+    # calculate geocentric geometry of the points
+    if GEOMETRY is None:
+        GEOMETRY = geometry.from_input(x, y, EPSG=EPSG, ELLIPSOID=ELLIPSOID)
+    # verify that the geometry matches the input points and ellipsoid
+    assert GEOMETRY.npts == np.size(x)
+    assert GEOMETRY.ellipsoid.upper() == ELLIPSOID.upper()
 
     # verify that delta time is an array
     delta_time = np.atleast_1d(delta_time)
     # convert delta times or datetimes objects to timescale
-    if (TIME.lower() == 'datetime'):
+    if TIMESCALE is not None:
+        ts = TIMESCALE
+    elif (TIME.lower() == 'datetime'):
         ts = timescale.time.Timescale().from_datetime(
             delta_time.flatten())
     else:
@@ -1096,8 +1690,6 @@ def OPT_displacements(
     # number of time points
     nt = len(time_decimal)
 
-    # degrees to radians
-    dtr = np.pi/180.0
     # earth and physical parameters for ellipsoid
     units = pyTMD.datum(ellipsoid=ELLIPSOID, units='MKS')
     # mean equatorial gravitational acceleration [m/s^2]
@@ -1107,45 +1699,23 @@ def OPT_displacements(
     # tidal love number differential (1 + kl - hl) for pole tide frequencies
     gamma = 0.6870 + 0.0036j
 
-    # convert from geodetic latitude to geocentric latitude
-    # calculate X, Y and Z from geodetic latitude and longitude
-    X,Y,Z = pyTMD.spatial.to_cartesian(lon.flatten(), lat.flatten(),
-        a_axis=units.a_axis, flat=units.flat)
-    # calculate geocentric latitude and convert to degrees
-    latitude_geocentric = np.arctan(Z / np.sqrt(X**2.0 + Y**2.0))/dtr
-    npts = len(latitude_geocentric)
-    # geocentric colatitude and longitude in radians
-    theta = dtr*(90.0 - latitude_geocentric)
-    phi = dtr*lon.flatten()
-
     # read and interpolate ocean pole tide map from Desai (2002)
-    ur, un, ue = pyTMD.io.IERS.extract_coefficients(lon.flatten(),
-        latitude_geocentric, method=METHOD)
-    # rotation matrix for converting to/from cartesian coordinates
-    R = np.zeros((npts, 3, 3))
-    R[:,0,0] = np.cos(phi)*np.cos(theta)
-    R[:,0,1] = -np.sin(phi)
-    R[:,0,2] = np.cos(phi)*np.sin(theta)
-    R[:,1,0] = np.sin(phi)*np.cos(theta)
-    R[:,1,1] = np.cos(phi)
-    R[:,1,2] = np.sin(phi)*np.sin(theta)
-    R[:,2,0] = -np.sin(theta)
-    R[:,2,2] = np.cos(theta)
-    Rinv = np.linalg.inv(R)
+    ur, un, ue = pyTMD.io.IERS.extract_coefficients(GEOMETRY.lon,
+        GEOMETRY.latitude_geocentric, method=METHOD)
 
     # calculate pole tide displacements in Cartesian coordinates
     # coefficients reordered to N, E, R to match IERS rotation matrix
-    UXYZ = np.einsum('ti...,tji...->tj...', np.c_[un, ue, ur], R)
+    UXYZ = GEOMETRY.from_local(un, ue, ur)
 
     # calculate radial displacement at time
     if (TYPE == 'grid'):
         ny,nx = np.shape(x)
         Urad = np.ma.zeros((ny,nx,nt), fill_value=FILL_VALUE)
         Urad.mask = np.zeros((ny,nx,nt),dtype=bool)
-        XYZ = np.c_[X, Y, Z]
         for i in range(nt):
             # calculate ocean pole tides in cartesian coordinates
-            dxi = pyTMD.predict.ocean_pole_tide(ts.tide[i], XYZ, UXYZ,
+            dxi = pyTMD.predict.ocean_pole_tide(ts.tide[i],
+                GEOMETRY.XYZ, UXYZ,
                 deltat=ts.tt_ut1[i],
                 a_axis=units.a_axis,
                 gamma_0=ge,
@@ -1155,15 +1725,14 @@ def OPT_displacements(
                 g2=gamma,
                 convention=CONVENTION
             )
-            # calculate components of ocean pole tides
-            U = np.einsum('ti...,tji...->tj...', dxi, Rinv)
+            # calculate radial component of ocean pole tides
+            U = GEOMETRY.to_radial(dxi)
             # reshape to output dimensions
-            Urad.data[:,:,i] = np.reshape(U[:,2], (ny,nx))
+            Urad.data[:,:,i] = np.reshape(U, (ny,nx))
             Urad.mask[:,:,i] = np.isnan(Urad.data[:,:,i])
     elif (TYPE == 'drift'):
         # calculate ocean pole tides in cartesian coordinates
-        XYZ = np.c_[X, Y, Z]
-        dxi = pyTMD.predict.ocean_pole_tide(ts.tide, XYZ, UXYZ,
+        dxi = pyTMD.predict.ocean_pole_tide(ts.tide, GEOMETRY.XYZ, UXYZ,
             deltat=ts.tt_ut1,
             a_axis=units.a_axis,
             gamma_0=ge,
@@ -1173,11 +1742,11 @@ def OPT_displacements(
             g2=gamma,
             convention=CONVENTION
         )
-        # calculate components of ocean pole tides
-        U = np.einsum('ti...,tji...->tj...', dxi, Rinv)
+        # calculate radial component of ocean pole tides
+        U = GEOMETRY.to_radial(dxi)
         # convert to masked array
         Urad = np.ma.zeros((nt), fill_value=FILL_VALUE)
-        Urad.data[:] = U[:,2].copy()
+        Urad.data[:] = U.copy()
         Urad.mask = np.isnan(Urad.data)
     elif (TYPE == 'time series'):
         nstation = len(x)
@@ -1185,7 +1754,7 @@ def OPT_displacements(
         Urad.mask = np.zeros((nstation,nt),dtype=bool)
         for s in range(nstation):
             # convert coordinates to column arrays
-            XYZ = np.repeat(np.c_[X[s], Y[s], Z[s]], nt, axis=0)
+            XYZ = np.repeat(GEOMETRY.XYZ[s,None,:], nt, axis=0)
             uxyz = np.repeat(np.atleast_2d(UXYZ[s,:]), nt, axis=0)
             # calculate ocean pole tides in cartesian coordinates
             dxi = pyTMD.predict.ocean_pole_tide(ts.tide, XYZ, uxyz,
@@ -1198,10 +1767,10 @@ def OPT_displacements(
                 g2=gamma,
                 convention=CONVENTION
             )
-            # calculate components of ocean pole tides
-            U = np.einsum('ti...,ji...->tj...', dxi, Rinv[s,:,:])
+            # calculate radial component of ocean pole tides
+            U = GEOMETRY.to_radial(dxi, indices=s)
             # reshape to output dimensions
-            Urad.data[s,:] = U[:,2].copy()
+            Urad.data[s,:] = U.copy()
             Urad.mask[s,:] = np.isnan(Urad.data[s,:])
 
     # replace invalid data with fill values
@@ -1220,6 +1789,8 @@ def SET_displacements(
         ELLIPSOID: str = 'WGS84',
         TIDE_SYSTEM='tide_free',
         EPHEMERIDES='approximate',
+        TIMESCALE: object | None = None,
+        GEOMETRY: geometry | None = None,
         **kwargs
     ):
     """
@@ -1265,6 +1836,10 @@ def SET_displacements(
 
             - ``'approximate'``: approximate lunisolar parameters
             - ``'JPL'``: computed from JPL ephmerides kernel
+    TIMESCALE: object or NoneType, default None
+        Precomputed timescale object of the times to reuse between corrections
+    GEOMETRY: pyTMD.compute.geometry or NoneType, default None
+        Precomputed geometry of the points to reuse between corrections
 
     Returns
     -------
@@ -1291,16 +1866,19 @@ def SET_displacements(
         x = np.atleast_1d(x)
         y = np.atleast_1d(y)
 
-    # converting x,y from EPSG to latitude/longitude
-    crs1 = pyTMD.crs().from_input(EPSG)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
-    lon, lat = transformer.transform(x.flatten(), y.flatten())
+    # calculate geocentric geometry of the points
+    if GEOMETRY is None:
+        GEOMETRY = geometry.from_input(x, y, EPSG=EPSG, ELLIPSOID=ELLIPSOID)
+    # verify that the geometry matches the input points and ellipsoid
+    assert GEOMETRY.npts == np.size(x)
+    assert GEOMETRY.ellipsoid.upper() == ELLIPSOID.upper()
 
     # verify that delta time is an array
     delta_time = np.atleast_1d(delta_time)
     # convert delta times or datetimes objects to timescale
-    if (TIME.lower() == 'datetime'):
+    if TIMESCALE is not None:
+        ts = TIMESCALE
+    elif (TIME.lower() == 'datetime'):
         ts = timescale.time.Timescale().from_datetime(
             delta_time.flatten())
     else:
@@ -1314,81 +1892,203 @@ def SET_displacements(
     # earth and physical parameters for ellipsoid
     units = pyTMD.datum(ellipsoid=ELLIPSOID, units='MKS')
 
-    # convert input coordinates to cartesian
-    X, Y, Z = pyTMD.spatial.to_cartesian(lon, lat,
-        a_axis=units.a_axis, flat=units.flat)
     # compute ephemerides for lunisolar coordinates
     SX, SY, SZ = pyTMD.astro.solar_ecef(ts.MJD, ephemerides=EPHEMERIDES)
     LX, LY, LZ = pyTMD.astro.lunar_ecef(ts.MJD, ephemerides=EPHEMERIDES)
 
-    # geocentric latitude (radians)
-    latitude_geocentric = np.arctan(Z / np.sqrt(X**2.0 + Y**2.0))
-    npts = len(latitude_geocentric)
-    # geocentric colatitude (radians)
-    theta = (np.pi/2.0 - latitude_geocentric)
-    # calculate longitude (radians)
-    phi = np.arctan2(Y, X)
-    # rotation matrix for converting from cartesian coordinates
-    R = np.zeros((npts, 3, 3))
-    R[:,0,0] = np.cos(phi)*np.cos(theta)
-    R[:,1,0] = -np.sin(phi)
-    R[:,2,0] = np.cos(phi)*np.sin(theta)
-    R[:,0,1] = np.sin(phi)*np.cos(theta)
-    R[:,1,1] = np.cos(phi)
-    R[:,2,1] = np.sin(phi)*np.sin(theta)
-    R[:,0,2] = -np.sin(theta)
-    R[:,2,2] = np.cos(theta)
+    # number of points
+    npts = GEOMETRY.npts
 
     # calculate radial displacement at time
-    if (TYPE == 'grid'):
-        ny,nx = np.shape(x)
-        tide_se = np.zeros((ny,nx,nt))
+    if TYPE in ('grid', 'time series'):
+        # allocate for output radial displacements
+        tide_se = np.zeros((npts,nt))
         # convert coordinates to column arrays
-        XYZ = np.c_[X, Y, Z]
-        for i in range(nt):
-            # reshape time to match spatial
-            t = tide_time[i] + np.ones((ny*nx))
-            # convert coordinates to column arrays
-            SXYZ = np.repeat(np.c_[SX[i], SY[i], SZ[i]], ny*nx, axis=0)
-            LXYZ = np.repeat(np.c_[LX[i], LY[i], LZ[i]], ny*nx, axis=0)
+        SXYZ = np.c_[SX, SY, SZ]
+        LXYZ = np.c_[LX, LY, LZ]
+        # broadcast points against times over tiled blocks
+        for p, t in _tiles(npts, nt):
             # predict solid earth tides (cartesian)
-            dxi = pyTMD.predict.solid_earth_tide(t,
-                XYZ, SXYZ, LXYZ, a_axis=units.a_axis,
-                tide_system=TIDE_SYSTEM)
-            # calculate components of solid earth tides
-            SE = np.einsum('ti...,tji...->tj...', dxi, R)
-            # reshape to output dimensions
-            tide_se[:,:,i] = np.reshape(SE[:,2], (ny,nx))
+            dxi = pyTMD.predict.solid_earth_tide(tide_time[None,t],
+                GEOMETRY.XYZ[p,None,:], SXYZ[None,t,:], LXYZ[None,t,:],
+                a_axis=units.a_axis, tide_system=TIDE_SYSTEM)
+            # calculate radial component of solid earth tides
+            tide_se[p,t] = GEOMETRY.to_radial(dxi, indices=p)
+        # reshape to output dimensions
+        tide_se = np.reshape(tide_se, (*np.shape(x), nt))
     elif (TYPE == 'drift'):
         # convert coordinates to column arrays
-        XYZ = np.c_[X, Y, Z]
         SXYZ = np.c_[SX, SY, SZ]
         LXYZ = np.c_[LX, LY, LZ]
         # predict solid earth tides (cartesian)
         dxi = pyTMD.predict.solid_earth_tide(tide_time,
-            XYZ, SXYZ, LXYZ, a_axis=units.a_axis,
+            GEOMETRY.XYZ, SXYZ, LXYZ, a_axis=units.a_axis,
             tide_system=TIDE_SYSTEM)
-        # calculate components of solid earth tides
-        SE = np.einsum('ti...,tji...->tj...', dxi, R)
-        # reshape to output dimensions
-        tide_se = SE[:,2].copy()
-    elif (TYPE == 'time series'):
-        nstation = len(x)
-        tide_se = np.zeros((nstation,nt))
-        # convert coordinates to column arrays
-        SXYZ = np.c_[SX, SY, SZ]
-        LXYZ = np.c_[LX, LY, LZ]
-        for s in range(nstation):
-            # convert coordinates to column arrays
-            XYZ = np.repeat(np.c_[X[s], Y[s], Z[s]], nt, axis=0)
-            # predict solid earth tides (cartesian)
-            dxi = pyTMD.predict.solid_earth_tide(tide_time,
-                XYZ, SXYZ, LXYZ, a_axis=units.a_axis,
-                tide_system=TIDE_SYSTEM)
-            # calculate components of solid earth tides
-            SE = np.einsum('ti...,ji...->tj...', dxi, R[s,:,:])
-            # reshape to output dimensions
-            tide_se[s,:] = SE[:,2].copy()
+        # calculate radial component of solid earth tides
+        tide_se = GEOMETRY.to_radial(dxi)
 
     # return the solid earth tide displacements
     return tide_se
+
+# PURPOSE: iterate over tiled blocks of points and times
+def _tiles(npts: int, nt: int, size: int = _max_block_size):
+    """
+    Yields slices for tiled blocks of points and times
+
+    Parameters
+    ----------
+    npts: int
+        Number of spatial points
+    nt: int
+        Number of time points
+    size: int, default 262144
+        Maximum number of elements in each block
+
+    Yields
+    ------
+    p: slice
+        Slice of spatial points in the block
+    t: slice
+        Slice of time points in the block
+    """
+    # number of times and points in each block
+    tstep = int(np.clip(size // np.maximum(npts, 1), 1, np.maximum(nt, 1)))
+    pstep = int(np.clip(size // tstep, 1, np.maximum(npts, 1)))
+    # iterate over blocks
+    for t0 in range(0, nt, tstep):
+        for p0 in range(0, npts, pstep):
+            yield slice(p0, p0 + pstep), slice(t0, t0 + tstep)
+
+# PURPOSE: geocentric geometry of points for solid Earth corrections
+class geometry:
+    """
+    Cartesian coordinates, geocentric angles and rotation factors
+    of points for computing solid Earth corrections
+
+    Parameters
+    ----------
+    lon: np.ndarray
+        longitude (degrees east)
+    lat: np.ndarray
+        latitude (degrees north)
+    ELLIPSOID: str, default 'WGS84'
+        Ellipsoid for calculating Earth parameters
+    """
+    def __init__(self,
+            lon: np.ndarray,
+            lat: np.ndarray,
+            ELLIPSOID: str = 'WGS84'
+        ):
+        # flattened geodetic coordinates
+        self.lon = np.ravel(lon)
+        self.lat = np.ravel(lat)
+        # earth and physical parameters for ellipsoid
+        self.ellipsoid = ELLIPSOID
+        self.units = pyTMD.datum(ellipsoid=ELLIPSOID, units='MKS')
+        # calculate X, Y and Z from geodetic latitude and longitude
+        self.X, self.Y, self.Z = pyTMD.spatial.to_cartesian(
+            self.lon, self.lat, a_axis=self.units.a_axis,
+            flat=self.units.flat)
+
+    @classmethod
+    def from_input(cls,
+            x: np.ndarray,
+            y: np.ndarray,
+            EPSG: str | int = 3031,
+            ELLIPSOID: str = 'WGS84'
+        ):
+        """
+        Calculates the geometry of points in a coordinate system
+
+        Parameters
+        ----------
+        x: np.ndarray
+            x-coordinates in projection EPSG
+        y: np.ndarray
+            y-coordinates in projection EPSG
+        EPSG: int, default: 3031 (Polar Stereographic South, WGS84)
+            Input coordinate system
+        ELLIPSOID: str, default 'WGS84'
+            Ellipsoid for calculating Earth parameters
+        """
+        # converting x,y from EPSG to latitude/longitude
+        transformer = pyTMD.crs().get_transformer(EPSG, 4326)
+        lon, lat = transformer.transform(np.ravel(x), np.ravel(y))
+        return cls(lon, lat, ELLIPSOID=ELLIPSOID)
+
+    @property
+    def npts(self) -> int:
+        """Number of points"""
+        return len(self.X)
+
+    @pyTMD.utilities.reify
+    def XYZ(self) -> np.ndarray:
+        """Cartesian coordinates as column arrays"""
+        return np.c_[self.X, self.Y, self.Z]
+
+    @pyTMD.utilities.reify
+    def latitude_geocentric(self) -> np.ndarray:
+        """Geocentric latitude (degrees)"""
+        return np.arctan(self.Z/np.sqrt(self.X**2 + self.Y**2))*180.0/np.pi
+
+    @pyTMD.utilities.reify
+    def theta(self) -> np.ndarray:
+        """Geocentric colatitude (radians)"""
+        return np.pi*(90.0 - self.latitude_geocentric)/180.0
+
+    @pyTMD.utilities.reify
+    def phi(self) -> np.ndarray:
+        """Longitude (radians)"""
+        return np.arctan2(self.Y, self.X)
+
+    @pyTMD.utilities.reify
+    def _factors(self) -> tuple:
+        """Sines and cosines of the geocentric angles"""
+        return (np.sin(self.theta), np.cos(self.theta),
+            np.sin(self.phi), np.cos(self.phi))
+
+    @pyTMD.utilities.reify
+    def radial(self) -> np.ndarray:
+        """Radial unit vectors in Cartesian coordinates"""
+        sintheta, costheta, sinphi, cosphi = self._factors
+        return np.c_[cosphi*sintheta, sinphi*sintheta, costheta]
+
+    def to_radial(self, dxi: np.ndarray, indices=slice(None)):
+        """
+        Calculates the radial component of Cartesian displacements
+
+        Parameters
+        ----------
+        dxi: np.ndarray
+            Cartesian displacements at points
+        indices: int, slice or np.ndarray, default slice(None)
+            Points to select for calculating radial components
+        """
+        r = self.radial[indices,:]
+        # expand dimensions to broadcast with displacements
+        r = np.expand_dims(r, axis=tuple(range(r.ndim - 1, dxi.ndim - 1)))
+        return np.sum(dxi*r, axis=-1)
+
+    def from_local(self,
+            north: np.ndarray,
+            east: np.ndarray,
+            radial: np.ndarray
+        ):
+        """
+        Rotates local components at points to Cartesian coordinates
+
+        Parameters
+        ----------
+        north: np.ndarray
+            Colatitudinal component (IERS convention)
+        east: np.ndarray
+            Longitudinal component
+        radial: np.ndarray
+            Radial component
+        """
+        sintheta, costheta, sinphi, cosphi = self._factors
+        # rotation matrix is orthonormal so the inverse is its transpose
+        DX = north*cosphi*costheta - east*sinphi + radial*cosphi*sintheta
+        DY = north*sinphi*costheta + east*cosphi + radial*sinphi*sintheta
+        DZ = -north*sintheta + radial*costheta
+        return np.c_[DX, DY, DZ]
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 crs.py
-Written by Tyler Sutterley (09/2024)
+Written by Tyler Sutterley (10/2024)
 Coordinates Reference System (CRS) routines
 
 CALLING SEQUENCE:
@@ -30,6 +30,8 @@ PYTHON DEPENDENCIES:
         https://pyproj4.github.io/pyproj/
 
 UPDATE HISTORY:
+    Updated 10/2024: cache coordinate reference systems and transformers
+        using thread-local storage to reduce the cost of repeated calls
     Updated 09/2024: added function for idealized Arctic Azimuthal projection
         complete refactor to use JSON dictionary format for model projections
     Updated 07/2024: added function to get the CRS transform
@@ -55,7 +57,9 @@ UPDATE HISTORY:
 
 from __future__ import annotations
 
+import json
 import logging
+import threading
 import numpy as np
 from pyTMD.utilities import import_dependency
 # attempt imports
@@ -66,6 +70,11 @@ __all__ = [
     'datum'
 ]
 
+# thread-local caches of coordinate reference systems and transformers
+_cache = threading.local()
+# maximum number of cached objects for each thread
+_max_cache_size = 64
+
 class crs:
     """Coordinate Reference System transformations for tide models
 
@@ -172,18 +181,60 @@ class crs:
         # set the direction of the transformation
         kwargs.setdefault('direction', self.direction)
         # get the coordinate reference system and transform
-        source_crs = self.from_input(EPSG)
-        self.transformer = pyproj.Transformer.from_crs(
-            source_crs, self.crs, always_xy=True)
+        self.transformer = self.get_transformer(EPSG, self.crs)
         # convert coordinate reference system
         o1, o2 = self.transformer.transform(i1, i2, **kwargs)
         # return the transformed coordinates
         return (o1, o2)
 
+    # PURPOSE: get a cached transformer between coordinate systems
+    def get_transformer(self,
+            source: int | str | dict,
+            target: int | str | dict = 4326,
+            always_xy: bool = True
+        ):
+        """
+        Get a (cached) ``pyproj`` transformer between two
+        Coordinate Reference Systems
+
+        Parameters
+        ----------
+        source: int, str or dict
+            Source Coordinate Reference System
+        target: int, str or dict, default 4326 (WGS84 Latitude/Longitude)
+            Target Coordinate Reference System
+        always_xy: bool, default True
+            Use traditional GIS order for coordinates
+        """
+        key = (_hashable(source), _hashable(target), always_xy)
+        transformer = _get_cached('transformers', key)
+        if transformer is None:
+            transformer = pyproj.Transformer.from_crs(
+                self.from_input(source), self.from_input(target),
+                always_xy=always_xy)
+            _set_cached('transformers', key, transformer)
+        return transformer
+
     # PURPOSE: try to get the projection information
     def from_input(self, PROJECTION: int | str | dict):
         """
-        Attempt to retrieve the Coordinate Reference System
+        Attempt to retrieve the (cached) Coordinate Reference System
+
+        Parameters
+        ----------
+        PROJECTION: int, str or dict
+            Coordinate Reference System
+        """
+        key = _hashable(PROJECTION)
+        CRS = _get_cached('crs', key)
+        if CRS is None:
+            CRS = self._from_input(PROJECTION)
+            _set_cached('crs', key, CRS)
+        return CRS
+
+    def _from_input(self, PROJECTION: int | str | dict):
+        """
+        Attempt to parse the Coordinate Reference System
 
         Parameters
         ----------
@@ -247,6 +298,62 @@ class crs:
     def __setitem__(self, key, value):
         setattr(self, key, value)
 
+# PURPOSE: get a hashable key for a coordinate reference system
+def _hashable(PROJECTION: int | str | dict):
+    """
+    Get a hashable key for a Coordinate Reference System
+
+    Parameters
+    ----------
+    PROJECTION: int, str, dict or obj
+        Coordinate Reference System
+    """
+    if isinstance(PROJECTION, dict):
+        return json.dumps(PROJECTION, sort_keys=True, default=str)
+    return PROJECTION
+
+# PURPOSE: get an object from the thread-local cache
+def _get_cached(name: str, key):
+    """
+    Get an object from the thread-local cache
+
+    Parameters
+    ----------
+    name: str
+        Name of the cache
+    key: obj
+        Key of the cached object
+    """
+    try:
+        return getattr(_cache, name, {}).get(key)
+    except TypeError:
+        return None
+
+# PURPOSE: add an object to the thread-local cache
+def _set_cached(name: str, key, value):
+    """
+    Add an object to the thread-local cache
+
+    Parameters
+    ----------
+    name: str
+        Name of the cache
+    key: obj
+        Key of the cached object
+    value: obj
+        Object to cache
+    """
+    if not hasattr(_cache, name):
+        setattr(_cache, name, {})
+    cache = getattr(_cache, name)
+    # remove the oldest cached object if at capacity
+    if (len(cache) >= _max_cache_size):
+        cache.pop(next(iter(cache)))
+    try:
+        cache[key] = value
+    except TypeError:
+        pass
+
 _ellipsoids = ['CLK66', 'GRS67', 'GRS80', 'WGS72', 'WGS84', 'ATS77',
     'NAD27', 'NAD83', 'INTER', 'KRASS', 'MAIRY', 'HGH80', 'TOPEX',
     'EGM96', 'IERS']
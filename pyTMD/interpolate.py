@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 interpolate.py
-Written by Tyler Sutterley (09/2024)
+Written by Tyler Sutterley (10/2024)
 Interpolators for spatial data
 
 PYTHON DEPENDENCIES:
@@ -12,12 +12,31 @@ PYTHON DEPENDENCIES:
         https://docs.scipy.org/doc/
 
 UPDATE HISTORY:
+    Updated 10/2024: cache KD-trees of valid model points for extrapolation
+        reuse nearest neighbor queries between tidal constituents
+        added functions for saving and loading the cached KD-trees
+        added inverse-distance and Gaussian weighted extrapolation
+        cache fitted spline objects for reuse between calls
+        added option to fit splines to only the sub-grid covering points
+        interpolate using local windows of the model grid around points
+        use plain data and mask arrays within the interpolation routines
+        use a lock for the KD-tree cache and thread-local query caches
+        save and load cached KD-trees as numpy arrays instead of pickles
+        only cache fitted splines on request and limit cache by size
+        identify cached splines by model data object and grid window
+        option to identify cached splines by the stored model field
+        fit splines to windows of the model grid by default
+        use nearest neighbors where all extrapolation weights underflow
     Updated 09/2024: deprecation fix case where an array is output to scalars
     Updated 07/2024: changed projection flag in extrapolation to is_geographic
     Written 12/2022
 """
 from __future__ import annotations
 
+import hashlib
+import pathlib
+import weakref
+import threading
 import numpy as np
 import scipy.spatial
 import scipy.interpolate
@@ -28,9 +47,27 @@ __all__ = [
     "spline",
     "regulargrid",
     "extrapolate",
+    "nearest_neighbors",
+    "save_index",
+    "load_index",
     "_distance"
 ]
 
+# cached KD-trees of valid model points
+_tree_cache = {}
+# lock for accessing the cached KD-trees from multiple threads
+_tree_lock = threading.Lock()
+# thread-local storage of the most recent nearest neighbor query
+_query_cache = threading.local()
+# maximum number of cached KD-trees
+_max_cache_size = 8
+# cached fitted spline objects and their sizes in bytes
+_spline_cache = {}
+# lock for accessing the cached spline objects from multiple threads
+_spline_lock = threading.Lock()
+# maximum total size of cached spline coefficients in bytes
+_max_spline_cache_bytes = 512*2**20
+
 # PURPOSE: bilinear interpolation of input data to output data
 def bilinear(
         ilon: np.ndarray,
@@ -66,56 +103,53 @@ def bilinear(
     data: np.ndarray
         interpolated data
     """
-    # verify that input data is masked array
-    if not isinstance(idata, np.ma.MaskedArray):
-        idata = np.ma.array(idata)
-        idata.mask = np.zeros_like(idata, dtype=bool)
+    # split input data into data and mask arrays
+    idata, imask = np.ma.getdata(idata), np.ma.getmaskarray(idata)
     # find valid points (within bounds)
     valid, = np.nonzero((lon >= ilon.min()) & (lon <= ilon.max()) &
         (lat > ilat.min()) & (lat < ilat.max()))
     # interpolate gridded data values to data
     npts = len(lon)
-    # allocate to output interpolated data array
-    data = np.ma.zeros((npts), dtype=dtype, fill_value=fill_value)
-    data.mask = np.ones((npts), dtype=bool)
+    # allocate to output interpolated data and mask arrays
     # initially set all data to fill value
-    data.data[:] = data.fill_value
+    data = np.full((npts), fill_value, dtype=dtype)
+    mask = np.ones((npts), dtype=bool)
     # for each valid point
     for i in valid:
         # calculating the indices for the original grid
         ix, = np.nonzero((ilon[0:-1] <= lon[i]) & (ilon[1:] > lon[i]))
         iy, = np.nonzero((ilat[0:-1] <= lat[i]) & (ilat[1:] > lat[i]))
-        # corner data values for adjacent grid cells
-        IM = np.ma.zeros((4), fill_value=fill_value, dtype=dtype)
-        IM.mask = np.ones((4), dtype=bool)
+        # corner data values and mask for adjacent grid cells
+        IM = np.full((4), fill_value, dtype=dtype)
+        IMmask = np.ones((4), dtype=bool)
         # corner weight values for adjacent grid cells
         WM = np.zeros((4))
         # build data and weight arrays
         for j,XI,YI in zip([0,1,2,3],[ix,ix+1,ix,ix+1],[iy,iy,iy+1,iy+1]):
-            IM.data[j], = idata.data[YI,XI].astype(dtype)
-            IM.mask[j], = idata.mask[YI,XI]
+            IM[j], = idata[YI,XI].astype(dtype)
+            IMmask[j], = imask[YI,XI]
             WM[3-j], = np.abs(lon[i]-ilon[XI])*np.abs(lat[i]-ilat[YI])
         # if on corner value: use exact
         if (np.isclose(lat[i],ilat[iy]) & np.isclose(lon[i],ilon[ix])):
-            data.data[i] = np.squeeze(idata.data[iy,ix]).astype(dtype)
-            data.mask[i] = np.squeeze(idata.mask[iy,ix])
+            data[i] = np.squeeze(idata[iy,ix]).astype(dtype)
+            mask[i] = np.squeeze(imask[iy,ix])
         elif (np.isclose(lat[i],ilat[iy+1]) & np.isclose(lon[i],ilon[ix])):
-            data.data[i] = np.squeeze(idata.data[iy+1,ix]).astype(dtype)
-            data.mask[i] = np.squeeze(idata.mask[iy+1,ix])
+            data[i] = np.squeeze(idata[iy+1,ix]).astype(dtype)
+            mask[i] = np.squeeze(imask[iy+1,ix])
         elif (np.isclose(lat[i],ilat[iy]) & np.isclose(lon[i],ilon[ix+1])):
-            data.data[i] = np.squeeze(idata.data[iy,ix+1]).astype(dtype)
-            data.mask[i] = np.squeeze(idata.mask[iy,ix+1])
+            data[i] = np.squeeze(idata[iy,ix+1]).astype(dtype)
+            mask[i] = np.squeeze(imask[iy,ix+1])
         elif (np.isclose(lat[i],ilat[iy+1]) & np.isclose(lon[i],ilon[ix+1])):
-            data.data[i] = np.squeeze(idata.data[iy+1,ix+1]).astype(dtype)
-            data.mask[i] = np.squeeze(idata.mask[iy+1,ix+1])
-        elif np.any(np.isfinite(IM) & (~IM.mask)):
+            data[i] = np.squeeze(idata[iy+1,ix+1]).astype(dtype)
+            mask[i] = np.squeeze(imask[iy+1,ix+1])
+        elif np.any(np.isfinite(IM) & (~IMmask)):
             # find valid indices for data summation and weight matrix
-            ii, = np.nonzero(np.isfinite(IM) & (~IM.mask))
+            ii, = np.nonzero(np.isfinite(IM) & (~IMmask))
             # calculate interpolated value for i
-            data.data[i] = np.sum(WM[ii]*IM[ii])/np.sum(WM[ii])
-            data.mask[i] = np.all(IM.mask[ii])
-    # return interpolated values
-    return data
+            data[i] = np.sum(WM[ii]*IM[ii])/np.sum(WM[ii])
+            mask[i] = np.all(IMmask[ii])
+    # return interpolated values as a masked array
+    return np.ma.array(data, mask=mask, fill_value=fill_value)
 
 def spline(
         ilon: np.ndarray,
@@ -126,6 +160,9 @@ def spline(
         fill_value: float = None,
         dtype: str | np.dtype = np.float64,
         reducer=np.ceil,
+        crop: bool = True,
+        cache: bool = False,
+        source: object | None = None,
         **kwargs
     ):
     """
@@ -152,6 +189,21 @@ def spline(
         output data type
     reducer: obj, default np.ceil
         operation for converting mask to boolean
+    crop: bool, default True
+        fit splines to only the windows of the model grid
+        covering the output coordinates
+    cache: bool, default False
+        reuse fitted splines from previous calls with the same
+        model data object and window of the model grid
+
+        Cached splines are limited to a total size of
+        ``_max_spline_cache_bytes``. The model data should not be
+        modified in place while cached splines are in use
+    source: object or NoneType, default None
+        object identifying the model data for cached splines
+
+        Defaults to the input data. Can be set to the stored model
+        field when interpolating a copy of the field
     kx: int, default 1
         degree of the bivariate spline in the x-dimension
     ky: int, default 1
@@ -167,37 +219,122 @@ def spline(
     # set default keyword arguments
     kwargs.setdefault('kx', 1)
     kwargs.setdefault('ky', 1)
-    # verify that input data is masked array
-    if not isinstance(idata, np.ma.MaskedArray):
-        idata = np.ma.array(idata)
-        idata.mask = np.zeros_like(idata, dtype=bool)
+    # model data object for identifying cached splines
+    source = (idata if source is None else source) if cache else None
+    # split input data into data and mask arrays
+    idata, imask = np.ma.getdata(idata), np.ma.getmaskarray(idata)
+    # verify output dimensions
+    lon = np.atleast_1d(lon)
+    lat = np.atleast_1d(lat)
     # interpolate gridded data values to data
     npts = len(lon)
-    # allocate to output interpolated data array
-    data = np.ma.zeros((npts), dtype=dtype, fill_value=fill_value)
-    data.mask = np.ones((npts), dtype=bool)
+    # allocate to output interpolated data and mask arrays
+    data = np.zeros((npts), dtype=dtype)
+    mask = np.ones((npts), dtype=bool)
+    # fit splines to the full grid or to windows covering the output points
+    if crop:
+        # buffer the windows by the degrees of the spline
+        halo = np.maximum(kwargs['kx'], kwargs['ky']) + 1
+        windows = _windows(ilon, ilat, lon, lat, halo=halo)
+    else:
+        windows = [(slice(None), slice(None), slice(None))]
+    for ind, xs, ys in windows:
+        # get splines for input data and mask
+        splines = _get_splines(ilon[xs], ilat[ys], idata[ys, xs],
+            imask[ys, xs], source=source, window=(xs, ys), **kwargs)
+        # evaluate the spline at input coordinates
+        if np.iscomplexobj(idata):
+            s1, s2, s3 = splines
+            data.real[ind] = s1.ev(lon[ind], lat[ind])
+            data.imag[ind] = s2.ev(lon[ind], lat[ind])
+            mask[ind] = reducer(s3.ev(lon[ind], lat[ind])).astype(bool)
+        else:
+            s1, s2 = splines
+            data[ind] = s1.ev(lon[ind], lat[ind]).astype(dtype)
+            mask[ind] = reducer(s2.ev(lon[ind], lat[ind])).astype(bool)
+    # return interpolated values as a masked array
+    return np.ma.array(data, mask=mask, fill_value=fill_value)
+
+# PURPOSE: fit or retrieve splines of input data and mask
+def _get_splines(
+        ilon: np.ndarray,
+        ilat: np.ndarray,
+        idata: np.ndarray,
+        imask: np.ndarray,
+        source: np.ndarray | None = None,
+        window: tuple = (slice(None), slice(None)),
+        **kwargs
+    ):
+    """
+    Get fitted splines of input data and mask from the cache
+    or fit and cache new splines
+
+    Parameters
+    ----------
+    ilon: np.ndarray
+        longitude of tidal model
+    ilat: np.ndarray
+        latitude of tidal model
+    idata: np.ndarray
+        tide model data
+    imask: np.ndarray
+        tide model mask
+    source: np.ndarray or NoneType, default None
+        model data object for retrieving and storing cached splines
+
+        Set to ``None`` to fit splines without the cache
+    window: tuple, default (slice(None), slice(None))
+        column and row slices of the model data
+    kwargs: dict
+        additional arguments for ``scipy.interpolate.RectBivariateSpline``
+
+    Returns
+    -------
+    splines: tuple
+        fitted splines for the real, imaginary and mask components
+        or for the data and mask components
+    """
+    # identity of the model data, window and spline arguments
+    if source is not None:
+        xs, ys = window
+        key = (id(source), xs.start, xs.stop, ys.start, ys.stop,
+            tuple(sorted(kwargs.items())))
+        with _spline_lock:
+            entry = _spline_cache.get(key)
+            # verify that the splines are for the same model data object
+            if entry and (entry[2]() is source):
+                return entry[0]
     # construct splines for input data and mask
     if np.iscomplexobj(idata):
-        s1 = scipy.interpolate.RectBivariateSpline(ilon, ilat,
-            idata.data.real.T, **kwargs)
-        s2 = scipy.interpolate.RectBivariateSpline(ilon, ilat,
-            idata.data.imag.T, **kwargs)
-        s3 = scipy.interpolate.RectBivariateSpline(ilon, ilat,
-            idata.mask.T, **kwargs)
-        # evaluate the spline at input coordinates
-        data.data.real[:] = s1.ev(lon, lat)
-        data.data.imag[:] = s2.ev(lon, lat)
-        data.mask[:] = reducer(s3.ev(lon, lat)).astype(bool)
+        splines = (
+            scipy.interpolate.RectBivariateSpline(ilon, ilat,
+                idata.real.T, **kwargs),
+            scipy.interpolate.RectBivariateSpline(ilon, ilat,
+                idata.imag.T, **kwargs),
+            scipy.interpolate.RectBivariateSpline(ilon, ilat,
+                imask.T, **kwargs)
+        )
     else:
-        s1 = scipy.interpolate.RectBivariateSpline(ilon, ilat,
-            idata.data.T, **kwargs)
-        s2 = scipy.interpolate.RectBivariateSpline(ilon, ilat,
-            idata.mask.T, **kwargs)
-        # evaluate the spline at input coordinates
-        data.data[:] = s1.ev(lon, lat).astype(dtype)
-        data.mask[:] = reducer(s2.ev(lon, lat)).astype(bool)
-    # return interpolated values
-    return data
+        splines = (
+            scipy.interpolate.RectBivariateSpline(ilon, ilat,
+                idata.T, **kwargs),
+            scipy.interpolate.RectBivariateSpline(ilon, ilat,
+                imask.T, **kwargs)
+        )
+    # size of the spline knots and coefficients in bytes
+    nbytes = sum(arr.nbytes for s in splines for arr in s.tck)
+    # only cache splines that are smaller than the maximum size
+    if (source is not None) and (nbytes <= _max_spline_cache_bytes):
+        with _spline_lock:
+            # remove splines of model data that no longer exists
+            for k in [k for k,v in _spline_cache.items() if v[2]() is None]:
+                _spline_cache.pop(k)
+            # remove the oldest cached splines if at capacity
+            while _spline_cache and ((nbytes + sum(v[1] for v in
+                _spline_cache.values())) > _max_spline_cache_bytes):
+                _spline_cache.pop(next(iter(_spline_cache)))
+            _spline_cache[key] = (splines, nbytes, weakref.ref(source))
+    return splines
 
 def regulargrid(
         ilon: np.ndarray,
@@ -208,6 +345,7 @@ def regulargrid(
         fill_value: float = None,
         dtype: str | np.dtype = np.float64,
         reducer=np.ceil,
+        window: bool = True,
         **kwargs
     ):
     """
@@ -234,6 +372,9 @@ def regulargrid(
         output data type
     reducer: obj, default np.ceil
         operation for converting mask to boolean
+    window: bool, default True
+        interpolate using only the windows of the model grid
+        covering the output coordinates
     bounds_error: bool, default False
         raise Exception when values are requested outside domain
     method: str, default 'linear'
@@ -255,25 +396,137 @@ def regulargrid(
     # set default keyword arguments
     kwargs.setdefault('bounds_error', False)
     kwargs.setdefault('method', 'linear')
-    # verify that input data is masked array
-    if not isinstance(idata, np.ma.MaskedArray):
-        idata = np.ma.array(idata)
-        idata.mask = np.zeros_like(idata, dtype=bool)
+    # split input data into data and mask arrays
+    idata, imask = np.ma.getdata(idata), np.ma.getmaskarray(idata)
+    # verify output dimensions
+    lon = np.atleast_1d(lon)
+    lat = np.atleast_1d(lat)
     # interpolate gridded data values to data
     npts = len(lon)
-    # allocate to output interpolated data array
-    data = np.ma.zeros((npts), dtype=dtype, fill_value=fill_value)
-    data.mask = np.ones((npts), dtype=bool)
-    # use scipy regular grid to interpolate values for a given method
-    r1 = scipy.interpolate.RegularGridInterpolator((ilat, ilon),
-        idata.data, fill_value=fill_value, **kwargs)
-    r2 = scipy.interpolate.RegularGridInterpolator((ilat, ilon),
-        idata.mask, fill_value=1, **kwargs)
-    # evaluate the interpolator at input coordinates
-    data.data[:] = r1.__call__(np.c_[lat, lon])
-    data.mask[:] = reducer(r2.__call__(np.c_[lat, lon])).astype(bool)
-    # return interpolated values
-    return data
+    # allocate to output interpolated data and mask arrays
+    data = np.zeros((npts), dtype=dtype)
+    mask = np.ones((npts), dtype=bool)
+    # use windows of the model grid covering the output coordinates
+    if window:
+        # buffer the windows by the stencil of the method
+        halo = dict(nearest=1, linear=1, slinear=1, cubic=4, quintic=6)
+        windows = _windows(ilon, ilat, lon, lat,
+            halo=halo.get(kwargs['method'], 1))
+    else:
+        windows = [(slice(None), slice(None), slice(None))]
+    for ind, xs, ys in windows:
+        # use scipy regular grid to interpolate values for a given method
+        r1 = scipy.interpolate.RegularGridInterpolator((ilat[ys], ilon[xs]),
+            idata[ys, xs], fill_value=fill_value, **kwargs)
+        r2 = scipy.interpolate.RegularGridInterpolator((ilat[ys], ilon[xs]),
+            imask[ys, xs], fill_value=1, **kwargs)
+        # evaluate the interpolator at input coordinates
+        data[ind] = r1.__call__(np.c_[lat[ind], lon[ind]])
+        mask[ind] = reducer(r2.__call__(
+            np.c_[lat[ind], lon[ind]])).astype(bool)
+    # return interpolated values as a masked array
+    return np.ma.array(data, mask=mask, fill_value=fill_value)
+
+# PURPOSE: find windows of a model grid covering output points
+def _windows(
+        ilon: np.ndarray,
+        ilat: np.ndarray,
+        lon: np.ndarray,
+        lat: np.ndarray,
+        halo: int = 1
+    ):
+    """
+    Find windows of a model grid that cover output coordinates
+
+    Points are split into two windows at the largest gap in longitude
+    if the gap is wider than the window buffers (such as for points on
+    either side of the dateline of a global model)
+
+    Parameters
+    ----------
+    ilon: np.ndarray
+        longitude of tidal model
+    ilat: np.ndarray
+        latitude of tidal model
+    lon: np.ndarray
+        output longitude
+    lat: np.ndarray
+        output latitude
+    halo: int, default 1
+        number of grid cells to buffer each window
+
+    Returns
+    -------
+    windows: list
+        indices of the output points with the column and row
+        slices of the model grid for each window
+    """
+    # verify output dimensions
+    lon = np.atleast_1d(lon)
+    lat = np.atleast_1d(lat)
+    # use the full grid if there are no valid points
+    valid = np.isfinite(lon) & np.isfinite(lat)
+    if not np.any(valid):
+        return [(slice(None), slice(None), slice(None))]
+    # split points at the largest gap in longitude
+    groups = [np.copy(valid)]
+    ux = np.unique(lon[valid])
+    if (len(ux) > 1) and (len(ilon) > 1):
+        gaps = np.diff(ux)
+        imax = np.argmax(gaps)
+        dx = np.median(np.abs(np.diff(ilon)))
+        if (gaps[imax] > 2.0*(halo + 1)*dx):
+            groups = [valid & (lon <= ux[imax]), valid & (lon > ux[imax])]
+    # include invalid points in the first window
+    groups[0] |= np.logical_not(valid)
+    # calculate the column and row slices for each window
+    windows = []
+    for group in groups:
+        x, y = (lon[group & valid], lat[group & valid])
+        xs = _window(ilon, np.min(x), np.max(x), halo)
+        ys = _window(ilat, np.min(y), np.max(y), halo)
+        ind, = np.nonzero(group)
+        windows.append((ind, xs, ys))
+    return windows
+
+# PURPOSE: find the slice of a coordinate axis covering a range
+def _window(
+        x: np.ndarray,
+        xmin: float,
+        xmax: float,
+        halo: int = 1
+    ):
+    """
+    Find the slice of a monotonic coordinate axis covering a range
+
+    Parameters
+    ----------
+    x: np.ndarray
+        coordinate axis
+    xmin: float
+        minimum of range
+    xmax: float
+        maximum of range
+    halo: int, default 1
+        number of grid cells to buffer the slice
+
+    Returns
+    -------
+    window: slice
+        slice of the coordinate axis
+    """
+    n = len(x)
+    if (n > 1) and (x[0] > x[-1]):
+        # descending coordinate axis
+        i0 = n - np.searchsorted(x[::-1], xmax, side='right')
+        i1 = n - np.searchsorted(x[::-1], xmin, side='left')
+    else:
+        # ascending coordinate axis
+        i0 = np.searchsorted(x, xmin, side='left')
+        i1 = np.searchsorted(x, xmax, side='right')
+    # keep at least one grid cell for ranges outside of the axis
+    i0, i1 = np.minimum(i0, n - 1), np.maximum(i1, 1)
+    return slice(int(np.maximum(i0 - halo, 0)), int(np.minimum(i1 + halo, n)))
 
 # PURPOSE: Nearest-neighbor extrapolation of valid data to output data
 def extrapolate(
@@ -286,6 +539,10 @@ def extrapolate(
         dtype: str | np.dtype = np.float64,
         cutoff: int | float = np.inf,
         is_geographic: bool = True,
+        method: str = 'nearest',
+        k: int = 4,
+        power: float = 2.0,
+        sigma: float | None = None,
         **kwargs
     ):
     """
@@ -293,6 +550,8 @@ def extrapolate(
     <https://docs.scipy.org/doc/scipy/reference/generated/
     scipy.spatial.cKDTree.html>`_
 
+    Can optionally use a weighted average of the `k` nearest neighbors
+
     Parameters
     ----------
     x: np.ndarray
@@ -315,6 +574,23 @@ def extrapolate(
         Set to ``np.inf`` to extrapolate for all points
     is_geographic: bool, default True
         input grid is in geographic coordinates
+    method: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    k: int, default 4
+        Number of nearest neighbors for weighted extrapolation
+    power: float, default 2.0
+        Power parameter for inverse-distance weighting
+    sigma: float or NoneType, default None
+        Length scale for Gaussian weighting [km]
+
+        Defaults to half the distance of the farthest neighbor for each
+        point, so that weights decrease from 1 to ``exp(-2)``
+
+        Points where all weights underflow use the nearest neighbor
 
     Returns
     -------
@@ -341,83 +617,260 @@ def extrapolate(
 
     # create combined valid mask
     valid_mask = (~idata.mask) & np.isfinite(idata.data)
-    # reduce to model points within bounds of input points
-    valid_bounds = np.ones_like(idata.mask, dtype=bool)
+    # check if there are any valid points
+    if not np.any(valid_mask):
+        # return filled masked array
+        return data
+
+    # number of neighbors to query
+    assert method.lower() in ('nearest', 'idw', 'gaussian')
+    k = 1 if (method.lower() == 'nearest') else k
+    # query output data points and find nearest neighbors within cutoff
+    dd, ii = nearest_neighbors(ilon, ilat, valid_mask, lon, lat,
+        k=k, cutoff=cutoff, is_geographic=is_geographic)
+    # reshape to be (npts, k)
+    dd = np.reshape(dd, (npts, k))
+    ii = np.reshape(ii, (npts, k))
+    # points with valid neighbors
+    valid = np.isfinite(dd)
+    ind, = np.nonzero(np.any(valid, axis=1))
+    if (len(ind) == 0):
+        return data
+    # spatially extrapolate using nearest neighbors
+    if (method.lower() == 'nearest'):
+        data.data[ind] = idata.data.flat[ii[ind,0]]
+        data.mask[ind] = False
+        return data
+    # calculate weights for each neighbor
+    if (method.lower() == 'gaussian'):
+        # use half the distance to the farthest valid neighbor
+        # as the default length scale
+        if sigma is None:
+            sigma = 0.5*np.max(np.where(valid, dd, 0.0), axis=1,
+                keepdims=True)
+            sigma[sigma == 0] = 1.0
+        with np.errstate(invalid='ignore', over='ignore'):
+            w = np.exp(-0.5*(dd/sigma)**2)
+    elif (method.lower() == 'idw'):
+        with np.errstate(divide='ignore'):
+            w = 1.0/dd**power
+        # use exact values for coincident points
+        coincident = np.any(dd == 0, axis=1)
+        w[coincident,:] = (dd[coincident,:] == 0)
+    # neighbors outside of the cutoff have no weight
+    w[~valid] = 0.0
+    # use the nearest neighbor if all weights have underflowed
+    underflow = (np.sum(w, axis=1) == 0)
+    w[underflow,0] = 1.0
+    # model values for each neighbor
+    values = np.zeros((npts, k), dtype=idata.dtype)
+    values[valid] = idata.data.flat[ii[valid]]
+    # spatially extrapolate using weighted nearest neighbors
+    data.data[ind] = np.sum(w[ind,:]*values[ind,:], axis=1)/ \
+        np.sum(w[ind,:], axis=1)
+    data.mask[ind] = False
+    # return extrapolated values
+    return data
+
+# PURPOSE: find nearest valid model points to output data
+def nearest_neighbors(
+        ilon: np.ndarray,
+        ilat: np.ndarray,
+        valid: np.ndarray,
+        lon: np.ndarray,
+        lat: np.ndarray,
+        k: int = 1,
+        cutoff: int | float = np.inf,
+        is_geographic: bool = True
+    ):
+    """
+    Find the nearest valid model points to output coordinates using a
+    cached `kd-tree <https://docs.scipy.org/doc/scipy/reference/generated/
+    scipy.spatial.cKDTree.html>`_
+
+    The neighbor indices can be reused for all constituents of a model
+    that share the same valid mask
 
+    Parameters
+    ----------
+    ilon: np.ndarray
+        x-coordinates of tidal model
+    ilat: np.ndarray
+        y-coordinates of tidal model
+    valid: np.ndarray
+        valid mask of tide model data
+    lon: np.ndarray
+        output x-coordinates
+    lat: np.ndarray
+        output y-coordinates
+    k: int, default 1
+        number of nearest neighbors
+    cutoff: float, default np.inf
+        return only neighbors within distance [km]
+
+        Set to ``np.inf`` to extrapolate for all points
+    is_geographic: bool, default True
+        input grid is in geographic coordinates
+
+    Returns
+    -------
+    dd: np.ndarray
+        distance to the nearest neighbors
+
+        Infinite if there are no neighbors within the cutoff
+    ii: np.ndarray
+        flattened indices of the nearest neighbors within the model grid
+    """
+    # verify output dimensions
+    lon = np.atleast_1d(lon)
+    lat = np.atleast_1d(lat)
+    # get KD-tree of valid model points
+    key, tree, indices = _get_tree(ilon, ilat, valid,
+        is_geographic=is_geographic)
+    # reuse the previous query of this thread if it was for the same points
+    query = (key, _fingerprint(lon, lat), k, cutoff)
+    previous = getattr(_query_cache, 'query', None)
+    if previous and (previous[0] == query):
+        return previous[1], previous[2]
     # calculate coordinates for nearest-neighbors
     if is_geographic:
-        # global or regional equirectangular model
-        # calculate meshgrid of model coordinates
-        gridlon, gridlat = np.meshgrid(ilon, ilat)
-        # ellipsoidal major axis in kilometers
-        a_axis = 6378.137
-        # calculate Cartesian coordinates of input grid
-        gridx, gridy, gridz = pyTMD.spatial.to_cartesian(
-            gridlon, gridlat, a_axis=a_axis)
         # calculate Cartesian coordinates of output coordinates
-        xs, ys, zs = pyTMD.spatial.to_cartesian(
-            lon, lat, a_axis=a_axis)
-        # range of output points in cartesian coordinates
-        xmin, xmax = (np.min(xs), np.max(xs))
-        ymin, ymax = (np.min(ys), np.max(ys))
-        zmin, zmax = (np.min(zs), np.max(zs))
-        # reduce to model points within bounds of input points
-        valid_bounds = np.ones_like(idata.mask, dtype=bool)
-        valid_bounds &= (gridx >= (xmin - 2.0*cutoff))
-        valid_bounds &= (gridx <= (xmax + 2.0*cutoff))
-        valid_bounds &= (gridy >= (ymin - 2.0*cutoff))
-        valid_bounds &= (gridy <= (ymax + 2.0*cutoff))
-        valid_bounds &= (gridz >= (zmin - 2.0*cutoff))
-        valid_bounds &= (gridz <= (zmax + 2.0*cutoff))
-        # check if there are any valid points within the input bounds
-        if not np.any(valid_mask & valid_bounds):
-            # return filled masked array
-            return data
-        # find where input grid is valid and close to output points
-        indy, indx = np.nonzero(valid_mask & valid_bounds)
-        # create KD-tree of valid points
-        tree = scipy.spatial.cKDTree(np.c_[gridx[indy, indx],
-            gridy[indy, indx], gridz[indy, indx]])
-        # flattened valid data array
-        flattened = idata.data[indy, indx]
-        # output coordinates
+        xs, ys, zs = pyTMD.spatial.to_cartesian(lon, lat, a_axis=6378.137)
         points = np.c_[xs, ys, zs]
     else:
-        # projected model
-        # calculate meshgrid of model coordinates
-        gridx, gridy = np.meshgrid(ilon, ilat)
-        # range of output points
-        xmin, xmax = (np.min(lon), np.max(lon))
-        ymin, ymax = (np.min(lat), np.max(lat))
-        # reduce to model points within bounds of input points
-        valid_bounds = np.ones_like(idata.mask, dtype=bool)
-        valid_bounds &= (gridx >= (xmin - 2.0*cutoff))
-        valid_bounds &= (gridx <= (xmax + 2.0*cutoff))
-        valid_bounds &= (gridy >= (ymin - 2.0*cutoff))
-        valid_bounds &= (gridy <= (ymax + 2.0*cutoff))
-        # check if there are any valid points within the input bounds
-        if not np.any(valid_mask & valid_bounds):
-            # return filled masked array
-            return data
-        # find where input grid is valid and close to output points
-        indy, indx = np.nonzero(valid_mask & valid_bounds)
-        # flattened model coordinates
-        tree = scipy.spatial.cKDTree(np.c_[gridx[indy, indx],
-            gridy[indy, indx]])
-        # flattened valid data array
-        flattened = idata.data[indy, indx]
-        # output coordinates
         points = np.c_[lon, lat]
+    # query output data points and find nearest neighbors within cutoff
+    dd, ii = tree.query(points, k=k, distance_upper_bound=cutoff)
+    # convert to indices within the model grid
+    # points without neighbors are set to the size of the grid
+    ii = np.append(indices, valid.size)[ii]
+    # save the query for reuse by this thread
+    _query_cache.query = (query, dd, ii)
+    return dd, ii
 
-    # query output data points and find nearest neighbor within cutoff
-    dd, ii = tree.query(points, k=1, distance_upper_bound=cutoff)
-    # spatially extrapolate using nearest neighbors
-    if np.any(np.isfinite(dd)):
-        ind, = np.nonzero(np.isfinite(dd))
-        data.data[ind] = flattened[ii[ind]]
-        data.mask[ind] = False
-    # return extrapolated values
-    return data
+# PURPOSE: get a unique key for a set of arrays
+def _fingerprint(*args):
+    """
+    Calculate a hash of a set of arrays
+
+    Parameters
+    ----------
+    *args: np.ndarray
+        arrays to hash
+    """
+    h = hashlib.blake2b(digest_size=20)
+    for arr in args:
+        arr = np.ascontiguousarray(arr)
+        h.update(str((arr.dtype, arr.shape)).encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+# PURPOSE: build or retrieve a KD-tree of valid model points
+def _get_tree(
+        ilon: np.ndarray,
+        ilat: np.ndarray,
+        valid: np.ndarray,
+        is_geographic: bool = True
+    ):
+    """
+    Get a KD-tree of valid model points from the cache
+    or build and cache a new KD-tree
+
+    Parameters
+    ----------
+    ilon: np.ndarray
+        x-coordinates of tidal model
+    ilat: np.ndarray
+        y-coordinates of tidal model
+    valid: np.ndarray
+        valid mask of tide model data
+    is_geographic: bool, default True
+        input grid is in geographic coordinates
+
+    Returns
+    -------
+    key: str
+        hash of the model coordinates and valid mask
+    tree: obj
+        KD-tree of valid model points
+    indices: np.ndarray
+        flattened indices of the valid model points
+    """
+    # hash of model coordinates and valid mask
+    key = _fingerprint(ilon, ilat, np.packbits(valid),
+        np.array(valid.shape), np.array(is_geographic))
+    with _tree_lock:
+        if key in _tree_cache:
+            return (key, *_tree_cache[key])
+    # calculate meshgrid of model coordinates
+    gridx, gridy = np.meshgrid(ilon, ilat)
+    # find where input grid is valid
+    indices, = np.nonzero(valid.flatten())
+    if is_geographic:
+        # global or regional equirectangular model
+        # calculate Cartesian coordinates of valid points
+        # using the ellipsoidal major axis in kilometers
+        X, Y, Z = pyTMD.spatial.to_cartesian(
+            gridx.flat[indices], gridy.flat[indices], a_axis=6378.137)
+        tree = scipy.spatial.cKDTree(np.c_[X, Y, Z])
+    else:
+        # projected model
+        tree = scipy.spatial.cKDTree(np.c_[gridx.flat[indices],
+            gridy.flat[indices]])
+    # remove the oldest cached tree if at capacity
+    with _tree_lock:
+        while (len(_tree_cache) >= _max_cache_size):
+            _tree_cache.pop(next(iter(_tree_cache)))
+        _tree_cache[key] = (tree, indices)
+    return key, tree, indices
+
+# PURPOSE: save cached KD-trees to file
+def save_index(filename: str | pathlib.Path):
+    """
+    Save the cached KD-trees of valid model points to a
+    numpy ``.npz`` file
+
+    Parameters
+    ----------
+    filename: str or pathlib.Path
+        output index file
+    """
+    # coordinates and model indices of the valid points for each tree
+    arrays = {}
+    with _tree_lock:
+        for key, (tree, indices) in _tree_cache.items():
+            arrays[f'{key}_points'] = tree.data
+            arrays[f'{key}_indices'] = indices
+    filename = pathlib.Path(filename).expanduser().absolute()
+    with filename.open(mode='wb') as fid:
+        np.savez(fid, **arrays)
+
+# PURPOSE: load cached KD-trees from file
+def load_index(filename: str | pathlib.Path):
+    """
+    Load cached KD-trees of valid model points from a
+    numpy ``.npz`` file
+
+    The KD-trees are rebuilt from the stored coordinates of the
+    valid model points
+
+    Parameters
+    ----------
+    filename: str or pathlib.Path
+        input index file
+    """
+    filename = pathlib.Path(filename).expanduser().absolute()
+    # read the coordinates and indices without unpickling objects
+    with np.load(filename, allow_pickle=False) as fileID:
+        keys = [f[:-len('_points')] for f in fileID.files
+            if f.endswith('_points')]
+        for key in keys:
+            tree = scipy.spatial.cKDTree(fileID[f'{key}_points'])
+            indices = fileID[f'{key}_indices']
+            with _tree_lock:
+                while (len(_tree_cache) >= _max_cache_size):
+                    _tree_cache.pop(next(iter(_tree_cache)))
+                _tree_cache[key] = (tree, indices)
 
 # PURPOSE: calculate Euclidean distances between points
 def _distance(c1: np.ndarray, c2: np.ndarray):
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 ATLAS.py
-Written by Tyler Sutterley (07/2024)
+Written by Tyler Sutterley (10/2024)
 
 Reads files for a tidal model and makes initial calculations to run tide program
 Includes functions to extract tidal harmonic constants from OTIS tide models for
@@ -55,6 +55,9 @@ PROGRAM DEPENDENCIES:
     interpolate.py: interpolation routines for spatial data
 
 UPDATE HISTORY:
+    Updated 10/2024: added weighted options for extrapolating model data
+        only interpolate points within the model domain with valid bathymetry
+        add option to reuse fitted splines of preloaded constituents
     Updated 07/2024: added crop and bounds keywords for trimming model data
     Updated 02/2024: changed variable for setting global grid flag to is_global
     Updated 10/2023: add generic wrapper function for reading constituents
@@ -175,6 +178,14 @@ def extract_constants(
         Extrapolation cutoff in kilometers
 
         Set to ``np.inf`` to extrapolate for all points
+    extrapolation: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    neighbors: int, default 4
+        Number of nearest neighbors for weighted extrapolation
     compressed: bool, default False
         Input files are gzip compressed
     scale: float, default 1.0
@@ -197,6 +208,8 @@ def extract_constants(
     kwargs.setdefault('method', 'spline')
     kwargs.setdefault('extrapolate', False)
     kwargs.setdefault('cutoff', 10.0)
+    kwargs.setdefault('extrapolation', 'nearest')
+    kwargs.setdefault('neighbors', 4)
     kwargs.setdefault('compressed', True)
     kwargs.setdefault('scale', 1.0)
     # raise warnings for deprecated keyword arguments
@@ -294,15 +307,25 @@ def extract_constants(
     elif kwargs['type'] in ('z','V','U'):
         unit_conv = 1.0
 
+    # find points within the model domain to interpolate
+    # points with invalid bathymetry are only kept if extrapolating
+    if kwargs['extrapolate']:
+        valid, = np.nonzero(np.logical_not(invalid))
+    else:
+        valid, = np.nonzero(np.logical_not(invalid | np.ma.getmaskarray(D)))
+    lonv, latv, Dmask = ilon[valid], ilat[valid], np.ma.getmaskarray(D)[valid]
+    if np.ndim(unit_conv):
+        unit_conv = unit_conv[valid]
+
     # number of constituents
     nc = len(model_files)
     # list of constituents
     constituents = []
     # amplitude and phase
     ampl = np.ma.zeros((npts, nc))
-    ampl.mask = np.zeros((npts, nc), dtype=bool)
+    ampl.mask = np.ones((npts, nc), dtype=bool)
     ph = np.ma.zeros((npts, nc))
-    ph.mask = np.zeros((npts, nc), dtype=bool)
+    ph.mask = np.ones((npts, nc), dtype=bool)
     # read and interpolate each constituent
     for i, model_file in enumerate(model_files):
         # check that model file is accessible
@@ -329,29 +352,29 @@ def extract_constants(
         if (kwargs['method'] == 'bilinear'):
             # replace invalid values with nan
             hc.data[hc.mask] = np.nan
-            hci = pyTMD.interpolate.bilinear(lon, lat, hc, ilon, ilat,
+            hci = pyTMD.interpolate.bilinear(lon, lat, hc, lonv, latv,
                 dtype=hc.dtype)
             # mask invalid values
-            hci.mask[:] |= np.copy(D.mask)
+            hci.mask[:] |= np.copy(Dmask)
             hci.data[hci.mask] = hci.fill_value
         elif (kwargs['method'] == 'spline'):
             # use scipy bivariate splines to interpolate values
-            hci = pyTMD.interpolate.spline(lon, lat, hc, ilon, ilat,
+            hci = pyTMD.interpolate.spline(lon, lat, hc, lonv, latv,
                 dtype=hc.dtype,
                 reducer=np.ceil,
                 kx=1, ky=1)
             # mask invalid values
-            hci.mask[:] |= np.copy(D.mask)
+            hci.mask[:] |= np.copy(Dmask)
             hci.data[hci.mask] = hci.fill_value
         else:
             # use scipy regular grid to interpolate values
-            hci = pyTMD.interpolate.regulargrid(lon, lat, hc, ilon, ilat,
+            hci = pyTMD.interpolate.regulargrid(lon, lat, hc, lonv, latv,
                 dtype=hc.dtype,
                 method=kwargs['method'],
                 reducer=np.ceil,
                 bounds_error=False)
             # mask invalid values
-            hci.mask[:] |= np.copy(D.mask)
+            hci.mask[:] |= np.copy(Dmask)
             hci.data[hci.mask] = hci.fill_value
         # extrapolate data using nearest-neighbors
         if kwargs['extrapolate'] and np.any(hci.mask):
@@ -361,17 +384,16 @@ def extract_constants(
             hc.data[hc.mask] = np.nan
             # extrapolate points within cutoff of valid model points
             hci[inv] = pyTMD.interpolate.extrapolate(lon, lat, hc,
-                ilon[inv], ilat[inv], dtype=hc.dtype,
-                cutoff=kwargs['cutoff'])
+                lonv[inv], latv[inv], dtype=hc.dtype,
+                cutoff=kwargs['cutoff'],
+                method=kwargs['extrapolation'],
+                k=kwargs['neighbors'])
         # convert units
         # amplitude and phase of the constituent
-        ampl.data[:,i] = np.abs(hci.data)/unit_conv
-        ampl.mask[:,i] = np.copy(hci.mask)
-        ph.data[:,i] = np.arctan2(-np.imag(hci.data), np.real(hci.data))
-        ph.mask[:,i] = np.copy(hci.mask)
-        # update mask to invalidate points outside model domain
-        ampl.mask[:,i] |= invalid
-        ph.mask[:,i] |= invalid
+        ampl.data[valid,i] = np.abs(hci.data)/unit_conv
+        ampl.mask[valid,i] = np.copy(hci.mask)
+        ph.data[valid,i] = np.arctan2(-np.imag(hci.data), np.real(hci.data))
+        ph.mask[valid,i] = np.copy(hci.mask)
 
     # convert amplitude from input units to meters
     amplitude = ampl*kwargs['scale']
@@ -523,6 +545,16 @@ def interpolate_constants(
         Extrapolation cutoff in kilometers
 
         Set to ``np.inf`` to extrapolate for all points
+    extrapolation: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    neighbors: int, default 4
+        Number of nearest neighbors for weighted extrapolation
+    cache: bool, default False
+        Reuse fitted splines of the constituents between calls
     scale: float, default 1.0
         Scaling factor for converting to output units
 
@@ -540,6 +572,9 @@ def interpolate_constants(
     kwargs.setdefault('method', 'spline')
     kwargs.setdefault('extrapolate', False)
     kwargs.setdefault('cutoff', 10.0)
+    kwargs.setdefault('extrapolation', 'nearest')
+    kwargs.setdefault('neighbors', 4)
+    kwargs.setdefault('cache', False)
     kwargs.setdefault('scale', 1.0)
     # verify that constituents are valid class instance
     assert isinstance(constituents, pyTMD.io.constituents)
@@ -627,7 +662,9 @@ def interpolate_constants(
                 fill_value=fill_value,
                 dtype=hc.dtype,
                 reducer=np.ceil,
-                kx=1, ky=1)
+                kx=1, ky=1,
+                cache=kwargs['cache'],
+                source=getattr(constituents, c))
             # mask invalid values
             hci.mask[:] |= np.copy(D.mask)
             hci.data[hci.mask] = hci.fill_value
@@ -653,7 +690,9 @@ def interpolate_constants(
             # extrapolate points within cutoff of valid model points
             hci[inv] = pyTMD.interpolate.extrapolate(lon, lat, hc,
                 ilon[inv], ilat[inv], dtype=hc.dtype,
-                cutoff=kwargs['cutoff'])
+                cutoff=kwargs['cutoff'],
+                method=kwargs['extrapolation'],
+                k=kwargs['neighbors'])
         # convert units
         # amplitude and phase of the constituent
         ampl.data[:,i] = np.abs(hci.data)/unit_conv
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 FES.py
-Written by Tyler Sutterley (07/2024)
+Written by Tyler Sutterley (10/2024)
 
 Reads files for a tidal model and makes initial calculations to run tide program
 Includes functions to extract tidal harmonic constants from the
@@ -57,6 +57,10 @@ PROGRAM DEPENDENCIES:
     interpolate.py: interpolation routines for spatial data
 
 UPDATE HISTORY:
+    Updated 10/2024: added weighted options for extrapolating model data
+        add option to output provenance of model values
+        fix amplitude variable name when writing currents
+        add option to reuse fitted splines of preloaded constituents
     Updated 07/2024: added new FES2022 to available known model versions
         FES2022 have masked longitudes, only extract longitude data
         FES2022 extrapolated data have zeroed out inland water bodies
@@ -186,6 +190,14 @@ def extract_constants(
         Extrapolation cutoff in kilometers
 
         Set to ``np.inf`` to extrapolate for all points
+    extrapolation: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    neighbors: int, default 4
+        Number of nearest neighbors for weighted extrapolation
     scale: float, default 1.0
         Scaling factor for converting to output units
 
@@ -204,6 +216,8 @@ def extract_constants(
     kwargs.setdefault('method', 'spline')
     kwargs.setdefault('extrapolate', False)
     kwargs.setdefault('cutoff', 10.0)
+    kwargs.setdefault('extrapolation', 'nearest')
+    kwargs.setdefault('neighbors', 4)
     kwargs.setdefault('scale', 1.0)
     # raise warnings for deprecated keyword arguments
     deprecated_keywords = dict(TYPE='type',VERSION='version',
@@ -316,7 +330,9 @@ def extract_constants(
             # extrapolate points within cutoff of valid model points
             hci[inv] = pyTMD.interpolate.extrapolate(lon, lat, hc,
                 ilon[inv], ilat[inv], dtype=hc.dtype,
-                cutoff=kwargs['cutoff'])
+                cutoff=kwargs['cutoff'],
+                method=kwargs['extrapolation'],
+                k=kwargs['neighbors'])
         # convert amplitude from input units to meters
         amplitude.data[:,i] = np.abs(hci.data)*kwargs['scale']
         amplitude.mask[:,i] = np.copy(hci.mask)
@@ -460,6 +476,16 @@ def interpolate_constants(
         Extrapolation cutoff in kilometers
 
         Set to ``np.inf`` to extrapolate for all points
+    extrapolation: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    neighbors: int, default 4
+        Number of nearest neighbors for weighted extrapolation
+    cache: bool, default False
+        Reuse fitted splines of the constituents between calls
     scale: float, default 1.0
         Scaling factor for converting to output units
 
@@ -474,6 +500,9 @@ def interpolate_constants(
     kwargs.setdefault('method', 'spline')
     kwargs.setdefault('extrapolate', False)
     kwargs.setdefault('cutoff', 10.0)
+    kwargs.setdefault('extrapolation', 'nearest')
+    kwargs.setdefault('neighbors', 4)
+    kwargs.setdefault('cache', False)
     kwargs.setdefault('scale', 1.0)
     # verify that constituents are valid class instance
     assert isinstance(constituents, pyTMD.io.constituents)
@@ -533,7 +562,9 @@ def interpolate_constants(
                 fill_value=fill_value,
                 dtype=hc.dtype,
                 reducer=np.ceil,
-                kx=1, ky=1)
+                kx=1, ky=1,
+                cache=kwargs['cache'],
+                source=getattr(constituents, c))
             # replace invalid values with fill_value
             hci.data[hci.mask] = hci.fill_value
         else:
@@ -559,7 +590,9 @@ def interpolate_constants(
             # extrapolate points within cutoff of valid model points
             hci[inv] = pyTMD.interpolate.extrapolate(lon, lat, hc,
                 ilon[inv], ilat[inv], dtype=hc.dtype,
-                cutoff=kwargs['cutoff'])
+                cutoff=kwargs['cutoff'],
+                method=kwargs['extrapolation'],
+                k=kwargs['neighbors'])
         # convert amplitude from input units to meters
         amplitude.data[:,i] = np.abs(hci.data)*kwargs['scale']
         amplitude.mask[:,i] = np.copy(hci.mask)
@@ -776,9 +809,16 @@ def output_netcdf_file(
             - ``'z'``: heights
             - ``'u'``: horizontal transport velocities
             - ``'v'``: vertical transport velocities
+    provenance: np.ndarray or NoneType, default None
+        Provenance of model values
+
+            - ``0``: invalid
+            - ``1``: original model value
+            - ``2``: extrapolated value
     """
     # set default keyword arguments
     kwargs.setdefault('type', None)
+    kwargs.setdefault('provenance', None)
     # tilde-expand output file
     FILE = pathlib.Path(FILE).expanduser()
     # opening NetCDF file for writing
@@ -821,7 +861,7 @@ def output_netcdf_file(
     # filling the NetCDF variables
     nc['lon'][:] = lon[:]
     nc['lat'][:] = lat[:]
-    nc['amplitude'][:] = amp[:]
+    nc[amp_key][:] = amp[:]
     nc[phase_key][:] = ph[:]
     # set variable attributes for coordinates
     nc['lon'].setncattr('axis', 'X')
@@ -843,6 +883,15 @@ def output_netcdf_file(
     long_name = f'Tide phase at {constituent} frequency'
     nc[phase_key].setncattr('long_name', long_name)
     nc[phase_key].setncattr('grid_mapping', 'crs')
+    # add provenance of model values
+    if kwargs['provenance'] is not None:
+        nc['provenance'] = fileID.createVariable('provenance', np.uint8,
+            ('lat','lon',), zlib=True)
+        nc['provenance'][:] = kwargs['provenance'][:]
+        nc['provenance'].setncattr('long_name', 'Provenance of model values')
+        nc['provenance'].setncattr('flag_values', np.arange(3, dtype=np.uint8))
+        nc['provenance'].setncattr('flag_meanings',
+            'invalid model extrapolated')
     # define and fill constituent ID
     nc['con'] = fileID.createVariable('con', 'S1', ('nct',))
     con = [char.encode('utf8') for char in constituent.ljust(4)]
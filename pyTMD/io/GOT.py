@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 GOT.py
-Written by Tyler Sutterley (07/2024)
+Written by Tyler Sutterley (10/2024)
 
 Reads files for Richard Ray's Global Ocean Tide (GOT) models and makes initial
     calculations to run the tide program
@@ -42,6 +42,9 @@ PROGRAM DEPENDENCIES:
     interpolate.py: interpolation routines for spatial data
 
 UPDATE HISTORY:
+    Updated 10/2024: added weighted options for extrapolating model data
+        add option to output provenance of model values
+        add option to reuse fitted splines of preloaded constituents
     Updated 07/2024: added crop and bounds keywords for trimming model data
         use parse function from constituents class to extract names
     Updated 04/2023: fix repeated longitudinal convention adjustment
@@ -158,6 +161,14 @@ def extract_constants(
         Extrapolation cutoff in kilometers
 
         Set to ``np.inf`` to extrapolate for all points
+    extrapolation: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    neighbors: int, default 4
+        Number of nearest neighbors for weighted extrapolation
     scale: float, default 1.0
         Scaling factor for converting to output units
 
@@ -177,6 +188,8 @@ def extract_constants(
     kwargs.setdefault('method', 'spline')
     kwargs.setdefault('extrapolate', False)
     kwargs.setdefault('cutoff', 10.0)
+    kwargs.setdefault('extrapolation', 'nearest')
+    kwargs.setdefault('neighbors', 4)
     kwargs.setdefault('scale', 1.0)
     # raise warnings for deprecated keyword arguments
     deprecated_keywords = dict(METHOD='method',
@@ -284,7 +297,9 @@ def extract_constants(
             # extrapolate points within cutoff of valid model points
             hci[inv] = pyTMD.interpolate.extrapolate(lon, lat, hc,
                 ilon[inv], ilat[inv], dtype=hc.dtype,
-                cutoff=kwargs['cutoff'])
+                cutoff=kwargs['cutoff'],
+                method=kwargs['extrapolation'],
+                k=kwargs['neighbors'])
         # convert amplitude from input units to meters
         amplitude.data[:,i] = np.abs(hci.data)*kwargs['scale']
         amplitude.mask[:,i] = np.copy(hci.mask)
@@ -408,6 +423,16 @@ def interpolate_constants(
         Extrapolation cutoff in kilometers
 
         Set to ``np.inf`` to extrapolate for all points
+    extrapolation: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    neighbors: int, default 4
+        Number of nearest neighbors for weighted extrapolation
+    cache: bool, default False
+        Reuse fitted splines of the constituents between calls
     scale: float, default 1.0
         Scaling factor for converting to output units
 
@@ -422,6 +447,9 @@ def interpolate_constants(
     kwargs.setdefault('method', 'spline')
     kwargs.setdefault('extrapolate', False)
     kwargs.setdefault('cutoff', 10.0)
+    kwargs.setdefault('extrapolation', 'nearest')
+    kwargs.setdefault('neighbors', 4)
+    kwargs.setdefault('cache', False)
     kwargs.setdefault('scale', 1.0)
 
     # verify that constituents are valid class instance
@@ -479,7 +507,9 @@ def interpolate_constants(
                 fill_value=fill_value,
                 dtype=hc.dtype,
                 reducer=np.ceil,
-                kx=1, ky=1)
+                kx=1, ky=1,
+                cache=kwargs['cache'],
+                source=getattr(constituents, c))
             # replace invalid values with fill_value
             hci.data[hci.mask] = hci.fill_value
         else:
@@ -505,7 +535,9 @@ def interpolate_constants(
             # extrapolate points within cutoff of valid model points
             hci[inv] = pyTMD.interpolate.extrapolate(lon, lat, hc,
                 ilon[inv], ilat[inv], dtype=hc.dtype,
-                cutoff=kwargs['cutoff'])
+                cutoff=kwargs['cutoff'],
+                method=kwargs['extrapolation'],
+                k=kwargs['neighbors'])
         # convert amplitude from input units to meters
         amplitude.data[:,i] = np.abs(hci.data)*kwargs['scale']
         amplitude.mask[:,i] = np.copy(hci.mask)
@@ -670,7 +702,8 @@ def output_netcdf_file(
         hc: np.ndarray,
         lon: np.ndarray,
         lat: np.ndarray,
-        constituent: str
+        constituent: str,
+        **kwargs
     ):
     """
     Writes tidal constituents to netCDF4 files in GOT format
@@ -687,7 +720,15 @@ def output_netcdf_file(
         latitude coordinates
     constituent: str
         tidal constituent ID
+    provenance: np.ndarray or NoneType, default None
+        Provenance of model values
+
+            - ``0``: invalid
+            - ``1``: original model value
+            - ``2``: extrapolated value
     """
+    # set default keyword arguments
+    kwargs.setdefault('provenance', None)
     # tilde-expand output file
     FILE = pathlib.Path(FILE).expanduser()
     # opening NetCDF file for writing
@@ -729,6 +770,15 @@ def output_netcdf_file(
     nc['amplitude'].setncattr('long_name', 'Tide amplitude')
     nc['phase'].setncattr('units', 'degrees')
     nc['phase'].setncattr('long_name', 'Greenwich tide phase lag')
+    # add provenance of model values
+    if kwargs['provenance'] is not None:
+        nc['provenance'] = fileID.createVariable('provenance', np.uint8,
+            ('latitude','longitude',), zlib=True)
+        nc['provenance'][:] = kwargs['provenance'][:]
+        nc['provenance'].setncattr('long_name', 'Provenance of model values')
+        nc['provenance'].setncattr('flag_values', np.arange(3, dtype=np.uint8))
+        nc['provenance'].setncattr('flag_meanings',
+            'invalid model extrapolated')
     # add global attributes
     fileID.title = 'GOT tide file'
     fileID.authors = 'Richard Ray'
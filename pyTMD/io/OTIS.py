@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 OTIS.py
-Written by Tyler Sutterley (09/2024)
+Written by Tyler Sutterley (10/2024)
 
 Reads files for a tidal model and makes initial calculations to run tide program
 Includes functions to extract tidal harmonic constants from OTIS tide models for
@@ -58,6 +58,9 @@ PROGRAM DEPENDENCIES:
     interpolate.py: interpolation routines for spatial data
 
 UPDATE HISTORY:
+    Updated 10/2024: added weighted options for extrapolating model data
+        only interpolate points within the model domain with valid bathymetry
+        add option to reuse fitted splines of preloaded constituents
     Updated 09/2024: using new JSON dictionary format for model projections
     Updated 08/2024: revert change and assume crop bounds are projected
     Updated 07/2024: added crop and bounds keywords for trimming model data
@@ -222,6 +225,14 @@ def extract_constants(
         Extrapolation cutoff in kilometers
 
         Set to ``np.inf`` to extrapolate for all points
+    extrapolation: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    neighbors: int, default 4
+        Number of nearest neighbors for weighted extrapolation
     apply_flexure: bool, default False
         Apply ice flexure scaling factor to height values
 
@@ -243,6 +254,8 @@ def extract_constants(
     kwargs.setdefault('method', 'spline')
     kwargs.setdefault('extrapolate', False)
     kwargs.setdefault('cutoff', 10.0)
+    kwargs.setdefault('extrapolation', 'nearest')
+    kwargs.setdefault('neighbors', 4)
     kwargs.setdefault('apply_flexure', False)
     # raise warnings for deprecated keyword arguments
     deprecated_keywords = dict(TYPE='type',METHOD='method',
@@ -384,6 +397,16 @@ def extract_constants(
     elif kwargs['type'] in ('z','V','U'):
         unit_conv = 1.0
 
+    # find points within the model domain to interpolate
+    # points with invalid bathymetry are only kept if extrapolating
+    if kwargs['extrapolate']:
+        valid, = np.nonzero(np.logical_not(invalid))
+    else:
+        valid, = np.nonzero(np.logical_not(invalid | np.ma.getmaskarray(D)))
+    xv, yv, Dmask = x[valid], y[valid], np.ma.getmaskarray(D)[valid]
+    if np.ndim(unit_conv):
+        unit_conv = unit_conv[valid]
+
     # read and interpolate each constituent
     if isinstance(model_file,list):
         constituents = [read_constituents(m)[0].pop() for m in model_file]
@@ -394,11 +417,14 @@ def extract_constants(
     # number of output data points
     npts = len(D)
     amplitude = np.ma.zeros((npts,nc))
-    amplitude.mask = np.zeros((npts,nc), dtype=bool)
+    amplitude.mask = np.ones((npts,nc), dtype=bool)
     ph = np.ma.zeros((npts,nc))
-    ph.mask = np.zeros((npts,nc), dtype=bool)
+    ph.mask = np.ones((npts,nc), dtype=bool)
     # read and interpolate each constituent
     for i,c in enumerate(constituents):
+        # skip reading constituents if there are no valid points
+        if not np.any(valid):
+            break
         if (kwargs['type'] == 'z'):
             # read z constituent from elevation file
             if (kwargs['grid'] == 'ATLAS'):
@@ -455,30 +481,30 @@ def extract_constants(
             # replace zero values with nan
             hc.data[(hc==0) | hc.mask] = np.nan
             # use quick bilinear to interpolate values
-            hci = pyTMD.interpolate.bilinear(xi, yi, hc, x, y,
+            hci = pyTMD.interpolate.bilinear(xi, yi, hc, xv, yv,
                 dtype=hc.dtype)
             # replace nan values with fill_value
-            hci.mask = (np.isnan(hci.data) | D.mask)
+            hci.mask = (np.isnan(hci.data) | Dmask)
             hci.data[hci.mask] = hci.fill_value
         elif (kwargs['method'] == 'spline'):
             # use scipy bivariate splines to interpolate values
-            hci = pyTMD.interpolate.spline(xi, yi, hc, x, y,
+            hci = pyTMD.interpolate.spline(xi, yi, hc, xv, yv,
                 dtype=hc.dtype,
                 reducer=np.ceil,
                 kx=1, ky=1)
             # replace zero values with fill_value
-            hci.mask |= D.mask
+            hci.mask |= Dmask
             hci.data[hci.mask] = hci.fill_value
         else:
             # use scipy regular grid to interpolate values
-            hci = pyTMD.interpolate.regulargrid(xi, yi, hc, x, y,
+            hci = pyTMD.interpolate.regulargrid(xi, yi, hc, xv, yv,
                 fill_value=hc.fill_value,
                 dtype=hc.dtype,
                 method=kwargs['method'],
                 reducer=np.ceil,
                 bounds_error=False)
             # replace invalid values with fill_value
-            hci.mask = (hci.data == hci.fill_value) | D.mask
+            hci.mask = (hci.data == hci.fill_value) | Dmask
             hci.data[hci.mask] = hci.fill_value
         # extrapolate data using nearest-neighbors
         if kwargs['extrapolate'] and np.any(hci.mask):
@@ -488,18 +514,17 @@ def extract_constants(
             hc.data[(hc==0) | hc.mask] = np.nan
             # extrapolate points within cutoff of valid model points
             hci[inv] = pyTMD.interpolate.extrapolate(xi, yi, hc,
-                x[inv], y[inv], dtype=hc.dtype,
+                xv[inv], yv[inv], dtype=hc.dtype,
                 cutoff=kwargs['cutoff'],
-                is_geographic=is_geographic)
+                is_geographic=is_geographic,
+                method=kwargs['extrapolation'],
+                k=kwargs['neighbors'])
         # convert units
         # amplitude and phase of the constituent
-        amplitude.data[:,i] = np.abs(hci.data)/unit_conv
-        amplitude.mask[:,i] = np.copy(hci.mask)
-        ph.data[:,i] = np.arctan2(-np.imag(hci), np.real(hci))
-        ph.mask[:,i] = np.copy(hci.mask)
-        # update mask to invalidate points outside model domain
-        ph.mask[:,i] |= invalid
-        amplitude.mask[:,i] |= invalid
+        amplitude.data[valid,i] = np.abs(hci.data)/unit_conv
+        amplitude.mask[valid,i] = np.copy(hci.mask)
+        ph.data[valid,i] = np.arctan2(-np.imag(hci), np.real(hci))
+        ph.mask[valid,i] = np.copy(hci.mask)
 
     # convert phase to degrees
     phase = ph*180.0/np.pi
@@ -755,6 +780,16 @@ def interpolate_constants(
         Extrapolation cutoff in kilometers
 
         Set to ``np.inf`` to extrapolate for all points
+    extrapolation: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    neighbors: int, default 4
+        Number of nearest neighbors for weighted extrapolation
+    cache: bool, default False
+        Reuse fitted splines of the constituents between calls
 
     Returns
     -------
@@ -769,6 +804,9 @@ def interpolate_constants(
     kwargs.setdefault('method', 'spline')
     kwargs.setdefault('extrapolate', False)
     kwargs.setdefault('cutoff', 10.0)
+    kwargs.setdefault('extrapolation', 'nearest')
+    kwargs.setdefault('neighbors', 4)
+    kwargs.setdefault('cache', False)
     # verify that constituents are valid class instance
     assert isinstance(constituents, pyTMD.io.constituents)
     # extract model coordinates
@@ -844,7 +882,9 @@ def interpolate_constants(
                 fill_value=fill_value,
                 dtype=hc.dtype,
                 reducer=np.ceil,
-                kx=1, ky=1)
+                kx=1, ky=1,
+                cache=kwargs['cache'],
+                source=getattr(constituents, c))
             # replace zero values with fill_value
             hci.mask = D.mask
             hci.data[hci.mask] = hci.fill_value
@@ -871,7 +911,9 @@ def interpolate_constants(
             hci[inv] = pyTMD.interpolate.extrapolate(xi, yi, hc,
                 x[inv], y[inv], dtype=hc.dtype,
                 cutoff=kwargs['cutoff'],
-                is_geographic=is_geographic)
+                is_geographic=is_geographic,
+                method=kwargs['extrapolation'],
+                k=kwargs['neighbors'])
         # convert units
         # amplitude and phase of the constituent
         amplitude.data[:,i] = np.abs(hci.data)/unit_conv
@@ -6,5 +6,6 @@ from .FES import *
 from .GOT import *
 from .OTIS import *
 from .IERS import *
+from . import tiles
 from .constituents import constituents
 from .model import model, load_database
@@ -0,0 +1,665 @@
+#!/usr/bin/env python
+u"""
+tiles.py
+Written by Tyler Sutterley (10/2024)
+
+Writes and reads tide model constituents stored in fixed-size tiles
+Includes functions to extract tidal harmonic constants for given locations
+    by reading only the tiles that contain the locations
+
+INPUTS:
+    ilon: longitude to interpolate
+    ilat: latitude to interpolate
+    input_file: tiled tide model file
+
+OPTIONS:
+    method: interpolation method
+        bilinear: quick bilinear interpolation
+        spline: scipy bivariate spline interpolation
+        linear, nearest: scipy regular grid interpolations
+    extrapolate: extrapolate model using nearest-neighbors
+    cutoff: extrapolation cutoff in kilometers
+        set to np.inf to extrapolate for all points
+    scale: scaling factor for converting to output units
+
+OUTPUTS:
+    amplitude: amplitudes of tidal constituents
+    phase: phases of tidal constituents
+    constituents: list of model constituents
+
+PYTHON DEPENDENCIES:
+    numpy: Scientific Computing Tools For Python
+        https://numpy.org
+        https://numpy.org/doc/stable/user/numpy-for-matlab-users.html
+    scipy: Scientific Tools for Python
+        https://docs.scipy.org/doc/
+    netCDF4: Python interface to the netCDF C library
+        https://unidata.github.io/netcdf4-python/netCDF4/index.html
+
+PROGRAM DEPENDENCIES:
+    interpolate.py: interpolation routines for spatial data
+
+Tiled storage is only supported for models on geographic grids
+
+UPDATE HISTORY:
+    Updated 10/2024: raise an exception for models on projected grids
+        read the full grid once if extrapolating for all points
+        cache the model coordinates of each tiled file
+    Written 10/2024
+"""
+from __future__ import division, annotations
+
+import logging
+import pathlib
+import datetime
+import collections
+import numpy as np
+import scipy.ndimage
+import pyTMD.version
+import pyTMD.interpolate
+from pyTMD.utilities import import_dependency
+
+# attempt imports
+netCDF4 = import_dependency('netCDF4')
+
+__all__ = [
+    "extract_constants",
+    "read_header",
+    "read_tile",
+    "output_tiles",
+]
+
+# cached tiles of model constituents
+_tile_cache = collections.OrderedDict()
+# maximum number of cached tiles
+_max_tile_cache_size = 16
+# cached coordinates of tiled model files
+_axes_cache = {}
+
+# PURPOSE: extract harmonic constants from tiled models at coordinates
+def extract_constants(
+        ilon: np.ndarray,
+        ilat: np.ndarray,
+        input_file: str | pathlib.Path,
+        **kwargs
+    ):
+    """
+    Reads tiled tide model files
+
+    Spatially interpolates tidal constituents to input coordinates
+    using only the tiles that contain the coordinates
+
+    Parameters
+    ----------
+    ilon: np.ndarray
+        longitude to interpolate
+    ilat: np.ndarray
+        latitude to interpolate
+    input_file: str or pathlib.Path
+        tiled tide model file
+    method: str, default 'spline'
+        Interpolation method
+
+            - ``'bilinear'``: quick bilinear interpolation
+            - ``'spline'``: scipy bivariate spline interpolation
+            - ``'linear'``, ``'nearest'``: scipy regular grid interpolations
+    extrapolate: bool, default False
+        Extrapolate model using nearest-neighbors
+    cutoff: float, default 10.0
+        Extrapolation cutoff in kilometers
+
+        Set to ``np.inf`` to extrapolate for all points
+    extrapolation: str, default 'nearest'
+        Extrapolation method
+
+            - ``'nearest'``: nearest-neighbor
+            - ``'idw'``: inverse-distance weighting of nearest neighbors
+            - ``'gaussian'``: Gaussian weighting of nearest neighbors
+    neighbors: int, default 4
+        Number of nearest neighbors for weighted extrapolation
+    scale: float, default 1.0
+        Scaling factor for converting to output units
+
+    Returns
+    -------
+    amplitude: np.ndarray
+        amplitudes of tidal constituents
+    phase: np.ndarray
+        phases of tidal constituents
+    constituents: list
+        list of model constituents
+    """
+    # set default keyword arguments
+    kwargs.setdefault('method', 'spline')
+    kwargs.setdefault('extrapolate', False)
+    kwargs.setdefault('cutoff', 10.0)
+    kwargs.setdefault('extrapolation', 'nearest')
+    kwargs.setdefault('neighbors', 4)
+    kwargs.setdefault('scale', 1.0)
+
+    # check that model file is accessible
+    input_file = pathlib.Path(input_file).expanduser().absolute()
+    if not input_file.exists():
+        raise FileNotFoundError(str(input_file))
+    # read the tile index of the model file
+    header = read_header(input_file)
+    lon, lat = header['longitude'], header['latitude']
+    ny, nx = len(lat), len(lon)
+    tile_size = header['tile_size']
+    constituents = header['constituents']
+
+    # adjust dimensions of input coordinates to be iterable
+    ilon = np.atleast_1d(np.copy(ilon))
+    ilat = np.atleast_1d(np.copy(ilat))
+    # adjust longitudinal convention of input latitude and longitude
+    # to fit tide model convention
+    if (np.min(ilon) < 0.0) & (np.max(lon) > 180.0):
+        # input points convention (-180:180)
+        # tide model convention (0:360)
+        ilon[ilon<0.0] += 360.0
+    elif (np.max(ilon) > 180.0) & (np.min(lon) < 0.0):
+        # input points convention (0:360)
+        # tide model convention (-180:180)
+        ilon[ilon>180.0] -= 360.0
+    # number of points
+    npts = len(ilon)
+    # number of constituents
+    nc = len(constituents)
+
+    # number of grid cells to buffer each tile
+    halo = (2, 2)
+    if kwargs['extrapolate'] and np.isfinite(kwargs['cutoff']):
+        # buffer tiles to include all points within the cutoff
+        # using the smallest grid spacing in kilometers
+        dlon = np.abs(lon[1] - lon[0])
+        dlat = np.abs(lat[1] - lat[0])
+        coslat = np.cos(np.radians(np.clip(np.max(np.abs(ilat)), 0, 89)))
+        hy = int(np.ceil(kwargs['cutoff']/(111.2*dlat))) + 2
+        hx = int(np.ceil(kwargs['cutoff']/(111.2*dlon*coslat))) + 2
+        halo = (min(hy, ny), min(hx, nx))
+    elif kwargs['extrapolate']:
+        # use the full grid if extrapolating for all points
+        halo = None
+
+    # find the tiles containing each point
+    iy = np.clip(np.searchsorted(lat, ilat, side='right') - 1, 0, ny - 1)
+    ix = np.clip(np.searchsorted(lon, ilon, side='right') - 1, 0, nx - 1)
+    ntx = header['valid'].shape[1]
+    tiles = (iy // tile_size)*ntx + (ix // tile_size)
+    # read the full grid once if extrapolating for all points
+    if halo is None:
+        tiles[:] = -1
+    # tiles with valid model data within the tile or adjacent tiles
+    occupied = scipy.ndimage.maximum_filter(header['valid'] > 0, size=3,
+        mode=('wrap' if header['is_global'] else 'constant'))
+
+    # amplitude and phase
+    amplitude = np.ma.zeros((npts,nc))
+    amplitude.mask = np.ones((npts,nc),dtype=bool)
+    ph = np.ma.zeros((npts,nc))
+    ph.mask = np.ones((npts,nc),dtype=bool)
+    # for each tile containing points
+    for tile in np.unique(tiles):
+        # indices of points within the tile
+        ind, = np.nonzero(tiles == tile)
+        if (tile < 0):
+            # read the full grid of model constituents
+            hc, tlon, tlat = _read_grid(input_file)
+        else:
+            row, col = divmod(int(tile), ntx)
+            # skip tiles without valid model data
+            if not kwargs['extrapolate'] and not occupied[row, col]:
+                continue
+            # read the buffered tile of model constituents
+            hc, tlon, tlat = read_tile(input_file, row, col, halo=halo)
+        # interpolate each constituent
+        for i in range(nc):
+            hci = _interpolate(tlon, tlat, np.ma.copy(hc[i,:,:]),
+                ilon[ind], ilat[ind], **kwargs)
+            # convert amplitude from input units to meters
+            amplitude.data[ind,i] = np.abs(hci.data)*kwargs['scale']
+            amplitude.mask[ind,i] = np.copy(hci.mask)
+            # phase of the constituent in radians
+            ph.data[ind,i] = np.arctan2(-np.imag(hci.data),np.real(hci.data))
+            ph.mask[ind,i] = np.copy(hci.mask)
+
+    # convert phase to degrees
+    phase = ph*180.0/np.pi
+    phase.data[phase.data < 0] += 360.0
+    # replace data for invalid mask values
+    amplitude.data[amplitude.mask] = amplitude.fill_value
+    phase.data[phase.mask] = phase.fill_value
+    # return the interpolated values
+    return (amplitude, phase, constituents)
+
+# PURPOSE: interpolate a tile of a model constituent to points
+def _interpolate(
+        lon: np.ndarray,
+        lat: np.ndarray,
+        hc: np.ndarray,
+        ilon: np.ndarray,
+        ilat: np.ndarray,
+        **kwargs
+    ):
+    """
+    Interpolate a tile of a tidal constituent to input coordinates
+
+    Parameters
+    ----------
+    lon: np.ndarray
+        longitude of tile
+    lat: np.ndarray
+        latitude of tile
+    hc: np.ndarray
+        tile of tidal constituent (complex form)
+    ilon: np.ndarray
+        longitude to interpolate
+    ilat: np.ndarray
+        latitude to interpolate
+    **kwargs: dict
+        keyword arguments for interpolation and extrapolation
+
+    Returns
+    -------
+    hci: np.ndarray
+        interpolated tidal constituent (complex form)
+    """
+    # default complex fill value
+    fill_value = np.ma.default_fill_value(np.dtype(complex))
+    # interpolate complex form of the constituent
+    if (kwargs['method'] == 'bilinear'):
+        # replace invalid values with nan
+        hc.data[hc.mask] = np.nan
+        # use quick bilinear to interpolate values
+        hci = pyTMD.interpolate.bilinear(lon, lat, hc, ilon, ilat,
+            fill_value=fill_value, dtype=hc.dtype)
+        # replace nan values with fill_value
+        hci.mask[:] |= np.isnan(hci.data)
+        hci.data[hci.mask] = hci.fill_value
+    elif (kwargs['method'] == 'spline'):
+        # replace invalid values with fill value
+        hc.data[hc.mask] = fill_value
+        # use scipy splines to interpolate values
+        hci = pyTMD.interpolate.spline(lon, lat, hc, ilon, ilat,
+            fill_value=fill_value, dtype=hc.dtype, reducer=np.ceil,
+            kx=1, ky=1)
+        # replace invalid values with fill_value
+        hci.data[hci.mask] = hci.fill_value
+    else:
+        # replace invalid values with fill value
+        hc.data[hc.mask] = fill_value
+        # use scipy regular grid to interpolate values
+        hci = pyTMD.interpolate.regulargrid(lon, lat, hc, ilon, ilat,
+            fill_value=fill_value, dtype=hc.dtype,
+            method=kwargs['method'], reducer=np.ceil,
+            bounds_error=False)
+        # replace invalid values with fill_value
+        hci.mask[:] |= (hci.data == hci.fill_value)
+        hci.data[hci.mask] = hci.fill_value
+    # extrapolate data using nearest-neighbors
+    if kwargs['extrapolate'] and np.any(hci.mask):
+        # find invalid data points
+        inv, = np.nonzero(hci.mask)
+        # replace invalid values with nan
+        hc.data[hc.mask] = np.nan
+        # extrapolate points within cutoff of valid model points
+        hci[inv] = pyTMD.interpolate.extrapolate(lon, lat, hc,
+            ilon[inv], ilat[inv], dtype=hc.dtype,
+            cutoff=kwargs['cutoff'],
+            method=kwargs['extrapolation'],
+            k=kwargs['neighbors'])
+    # return the interpolated constituent
+    return hci
+
+# PURPOSE: read the tile index of a tiled model file
+def read_header(input_file: str | pathlib.Path):
+    """
+    Read the coordinates and tile index of a tiled tide model file
+
+    Parameters
+    ----------
+    input_file: str or pathlib.Path
+        tiled tide model file
+
+    Returns
+    -------
+    header: dict
+        model coordinates, constituents and tile index
+
+            - ``'longitude'``: longitude of tidal model
+            - ``'latitude'``: latitude of tidal model
+            - ``'constituents'``: list of model constituents
+            - ``'tile_size'``: number of grid cells in each tile dimension
+            - ``'is_global'``: model is global in longitude
+            - ``'valid'``: number of valid grid cells in each tile
+    """
+    # tilde-expand input file
+    input_file = pathlib.Path(input_file).expanduser()
+    header = {}
+    with netCDF4.Dataset(input_file, 'r') as fileID:
+        header['longitude'] = fileID.variables['lon'][:].data
+        header['latitude'] = fileID.variables['lat'][:].data
+        header['constituents'] = fileID.constituents.split()
+        header['tile_size'] = int(fileID.tile_size)
+        header['is_global'] = bool(fileID.is_global)
+        header['valid'] = fileID.variables['valid'][:].data
+    return header
+
+# PURPOSE: read a buffered tile of model constituents
+def read_tile(
+        input_file: str | pathlib.Path,
+        row: int,
+        col: int,
+        halo: int | tuple = 2
+    ):
+    """
+    Read a tile of tide model constituents with a buffer of adjacent
+    grid cells from the tile cache or from a tiled tide model file
+
+    Parameters
+    ----------
+    input_file: str or pathlib.Path
+        tiled tide model file
+    row: int
+        row of tile in the tile index
+    col: int
+        column of tile in the tile index
+    halo: int or tuple, default 2
+        number of grid cells to buffer the tile in each dimension
+
+    Returns
+    -------
+    hc: np.ndarray
+        tile of tidal constituents (complex form)
+    lon: np.ndarray
+        longitude of tile
+    lat: np.ndarray
+        latitude of tile
+    """
+    # number of grid cells to buffer in each dimension
+    hy, hx = (halo, halo) if np.isscalar(halo) else halo
+    # use the cached tile if available
+    input_file = pathlib.Path(input_file).expanduser().absolute()
+    key = (str(input_file), row, col, hy, hx)
+    if key in _tile_cache:
+        _tile_cache.move_to_end(key)
+        return _tile_cache[key]
+    # read the model axes from the axes cache
+    lon, lat, tile_size, is_global = _read_axes(input_file)
+    ny, nx = len(lat), len(lon)
+    # rows of the buffered tile
+    y0 = max(row*tile_size - hy, 0)
+    y1 = min((row + 1)*tile_size + hy, ny)
+    # columns of the buffered tile
+    # wrap columns around the grid for global models
+    if is_global:
+        # width of the tile and buffer limited to the grid size
+        width = min((col + 1)*tile_size, nx) - col*tile_size
+        x0 = col*tile_size - min(hx, (nx - width)//2)
+        x1 = x0 + min(width + 2*hx, nx)
+    else:
+        x0 = max(col*tile_size - hx, 0)
+        x1 = min((col + 1)*tile_size + hx, nx)
+    # read the buffered tile from the model file
+    tile = _read_block(input_file, y0, y1, np.arange(x0, x1))
+    _cache_tile(key, tile)
+    return tile
+
+# PURPOSE: read the full grid of model constituents
+def _read_grid(input_file: pathlib.Path):
+    """
+    Read the full grid of tide model constituents from the tile
+    cache or from a tiled tide model file
+
+    Global models are extended by a column on each side to wrap
+    across the edges of the grid
+
+    Parameters
+    ----------
+    input_file: pathlib.Path
+        tiled tide model file
+
+    Returns
+    -------
+    hc: np.ndarray
+        tidal constituents (complex form)
+    lon: np.ndarray
+        longitude of model
+    lat: np.ndarray
+        latitude of model
+    """
+    # use the cached grid if available
+    key = (str(input_file), None, None, None, None)
+    if key in _tile_cache:
+        _tile_cache.move_to_end(key)
+        return _tile_cache[key]
+    # read the model axes from the axes cache
+    lon, lat, tile_size, is_global = _read_axes(input_file)
+    ny, nx = len(lat), len(lon)
+    # extend global models by a column on each side
+    columns = np.arange(-1, nx + 1) if is_global else np.arange(nx)
+    tile = _read_block(input_file, 0, ny, columns)
+    _cache_tile(key, tile)
+    return tile
+
+# PURPOSE: read the coordinates of a tiled model file
+def _read_axes(input_file: pathlib.Path):
+    """
+    Read the coordinates and tile attributes of a tiled tide model
+    file from the axes cache or from the file
+
+    Parameters
+    ----------
+    input_file: pathlib.Path
+        tiled tide model file
+
+    Returns
+    -------
+    lon: np.ndarray
+        longitude of tidal model
+    lat: np.ndarray
+        latitude of tidal model
+    tile_size: int
+        number of grid cells in each tile dimension
+    is_global: bool
+        model is global in longitude
+    """
+    # use the cached axes if the file has not been modified
+    key = (str(input_file), input_file.stat().st_mtime_ns)
+    if key not in _axes_cache:
+        with netCDF4.Dataset(input_file, 'r') as fileID:
+            lon = fileID.variables['lon'][:].data
+            lat = fileID.variables['lat'][:].data
+            tile_size = int(fileID.tile_size)
+            is_global = bool(fileID.is_global)
+        # remove axes of previous versions of the file
+        for k in [k for k in _axes_cache if (k[0] == key[0])]:
+            _axes_cache.pop(k)
+        _axes_cache[key] = (lon, lat, tile_size, is_global)
+    return _axes_cache[key]
+
+# PURPOSE: read a block of model constituents
+def _read_block(
+        input_file: pathlib.Path,
+        y0: int,
+        y1: int,
+        columns: np.ndarray
+    ):
+    """
+    Read a block of tide model constituents from a tiled tide model
+    file with columns wrapped around the grid
+
+    Parameters
+    ----------
+    input_file: pathlib.Path
+        tiled tide model file
+    y0: int
+        first row of the block
+    y1: int
+        last row of the block (exclusive)
+    columns: np.ndarray
+        columns of the block (may extend beyond the grid)
+
+    Returns
+    -------
+    hc: np.ndarray
+        block of tidal constituents (complex form)
+    lon: np.ndarray
+        longitude of block
+    lat: np.ndarray
+        latitude of block
+    """
+    lon, lat, tile_size, is_global = _read_axes(input_file)
+    nx = len(lon)
+    # read contiguous runs of columns
+    indices = np.mod(columns, nx)
+    breaks, = np.nonzero(np.diff(indices) != 1)
+    real, imag = ([], [])
+    with netCDF4.Dataset(input_file, 'r') as fileID:
+        for run in np.split(indices, breaks + 1):
+            real.append(fileID.variables['real'][:, y0:y1, run[0]:run[-1]+1])
+            imag.append(fileID.variables['imag'][:, y0:y1, run[0]:run[-1]+1])
+    # combine runs into the complex form of the constituents
+    real = np.ma.concatenate(real, axis=2)
+    imag = np.ma.concatenate(imag, axis=2)
+    mask = np.ma.getmaskarray(real) | np.ma.getmaskarray(imag) | \
+        np.isnan(real.data) | np.isnan(imag.data)
+    hc = np.ma.array(real.data + 1j*imag.data, mask=mask,
+        fill_value=np.ma.default_fill_value(np.dtype(complex)))
+    hc.data[hc.mask] = hc.fill_value
+    # coordinates of the block
+    # adjust longitudes of wrapped columns
+    blon = lon[indices] + 360.0*np.floor_divide(columns, nx)
+    blat = lat[y0:y1]
+    return (hc, blon, blat)
+
+# PURPOSE: add a tile to the tile cache
+def _cache_tile(key: tuple, tile: tuple):
+    """
+    Add a tile of model constituents to the tile cache
+
+    Parameters
+    ----------
+    key: tuple
+        file, row, column and buffer of the tile
+    tile: tuple
+        tile of constituents and coordinates
+    """
+    # remove the least recently used tile if at capacity
+    if (len(_tile_cache) >= _max_tile_cache_size):
+        _tile_cache.popitem(last=False)
+    _tile_cache[key] = tile
+
+# PURPOSE: output tide model constituents in fixed-size tiles
+def output_tiles(
+        FILE: str | pathlib.Path,
+        constituents,
+        tile_size: int = 128
+    ):
+    """
+    Writes tide model constituents to a netCDF4 file in fixed-size
+    tiles with a tile index of the number of valid grid cells
+
+    Only models on geographic (longitude and latitude) grids are
+    supported
+
+    Parameters
+    ----------
+    FILE: str or pathlib.Path
+        output tiled tide model file
+    constituents: obj
+        Tide model constituents (complex form)
+
+        such as from the ``read_constants`` functions of the model readers
+    tile_size: int, default 128
+        number of grid cells in each tile dimension
+    """
+    # verify that the model is on a geographic grid
+    # such as projected OTIS models of the polar oceans
+    crs = getattr(constituents, 'crs', None)
+    if (crs is not None) and not crs.is_geographic:
+        raise ValueError('Tiled storage requires a geographic model grid')
+    # tilde-expand output file
+    FILE = pathlib.Path(FILE).expanduser()
+    # extract model coordinates
+    # OTIS models store geographic coordinates as x and y
+    if hasattr(constituents, 'longitude'):
+        lon = np.copy(constituents.longitude)
+        lat = np.copy(constituents.latitude)
+    else:
+        lon = np.copy(constituents.x)
+        lat = np.copy(constituents.y)
+    # grid step size of tide model
+    dlon = np.abs(lon[1] - lon[0])
+    # remove columns from extended global matrices
+    columns = slice(None)
+    if np.isclose(lon[-1] - lon[0], 360.0 + 2.0*dlon):
+        lon, columns = lon[1:-2], slice(1, -2)
+    is_global = np.isclose(lon[-1] - lon[0], 360.0 - dlon)
+    # use ascending latitudes
+    rows = slice(None, None, -1) if (lat[0] > lat[-1]) else slice(None)
+    lat = lat[rows]
+    ny, nx = len(lat), len(lon)
+    nc = len(constituents)
+    # number of tiles in each dimension
+    nty = int(np.ceil(ny/tile_size))
+    ntx = int(np.ceil(nx/tile_size))
+    # opening NetCDF file for writing
+    fileID = netCDF4.Dataset(FILE, 'w', format="NETCDF4")
+    # define the NetCDF dimensions
+    fileID.createDimension('constituent', nc)
+    fileID.createDimension('lat', ny)
+    fileID.createDimension('lon', nx)
+    fileID.createDimension('tile_y', nty)
+    fileID.createDimension('tile_x', ntx)
+    # defining the NetCDF variables
+    nc_vars = {}
+    nc_vars['lon'] = fileID.createVariable('lon', lon.dtype, ('lon',))
+    nc_vars['lat'] = fileID.createVariable('lat', lat.dtype, ('lat',))
+    for key in ('real', 'imag'):
+        nc_vars[key] = fileID.createVariable(key, np.float64,
+            ('constituent','lat','lon',), fill_value=np.nan, zlib=True,
+            chunksizes=(1, min(tile_size, ny), min(tile_size, nx)))
+    nc_vars['valid'] = fileID.createVariable('valid', np.int32,
+        ('tile_y','tile_x',))
+    # filling the NetCDF variables
+    nc_vars['lon'][:] = lon[:]
+    nc_vars['lat'][:] = lat[:]
+    valid = np.ones((ny, nx), dtype=bool)
+    for i, c in enumerate(constituents.fields):
+        hc = constituents.get(c)[rows, columns]
+        mask = np.ma.getmaskarray(hc) | np.isnan(hc.data)
+        nc_vars['real'][i,:,:] = np.where(mask, np.nan, hc.data.real)
+        nc_vars['imag'][i,:,:] = np.where(mask, np.nan, hc.data.imag)
+        valid &= np.logical_not(mask)
+    # count the valid grid cells in each tile
+    count = np.zeros((nty*tile_size, ntx*tile_size), dtype=np.int32)
+    count[:ny, :nx] = valid
+    count = count.reshape(nty, tile_size, ntx, tile_size).sum(axis=(1,3))
+    nc_vars['valid'][:] = count
+    # set variable attributes
+    nc_vars['lon'].setncattr('units', 'degrees_east')
+    nc_vars['lon'].setncattr('long_name', 'longitude')
+    nc_vars['lat'].setncattr('units', 'degrees_north')
+    nc_vars['lat'].setncattr('long_name', 'latitude')
+    nc_vars['real'].setncattr('long_name',
+        'Real component of tidal constituents')
+    nc_vars['imag'].setncattr('long_name',
+        'Imaginary component of tidal constituents')
+    nc_vars['valid'].setncattr('long_name',
+        'Number of valid grid cells in each tile')
+    # add global attributes
+    fileID.title = 'Tiled tide model constituents'
+    fileID.constituents = ' '.join(constituents.fields)
+    fileID.tile_size = np.int32(tile_size)
+    fileID.is_global = np.int8(is_global)
+    # add software information
+    fileID.software_reference = pyTMD.version.project_name
+    fileID.software_version = pyTMD.version.full_version
+    # date created
+    fileID.date_created = datetime.datetime.now().isoformat()
+    # Output NetCDF structure information
+    logging.info(str(FILE))
+    logging.info(list(fileID.variables.keys()))
+    # Closing the NetCDF file
+    fileID.close()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 predict.py
-Written by Tyler Sutterley (09/2024)
+Written by Tyler Sutterley (10/2024)
 Prediction routines for ocean, load, equilibrium and solid earth tides
 
 REFERENCES:
@@ -20,6 +20,11 @@ PROGRAM DEPENDENCIES:
     spatial.py: utilities for working with geospatial data
 
 UPDATE HISTORY:
+    Updated 10/2024: broadcast solid earth tide calculations over the leading
+        dimensions of the coordinates and ephemerides
+        use plain arrays and validity masks for predictions and inference
+        and only convert to masked arrays on output
+        mask inferred values using the major constituents for inference
     Updated 09/2024: verify order of minor constituents to infer
         fix to use case insensitive assertions of string argument values
         split infer minor function into short and long period calculations
@@ -136,9 +141,11 @@ def map(t: float | np.ndarray,
         deltat=deltat,
         corrections=corrections
     )
+    # harmonic constants and mask of points with invalid constituents
+    hcdata, hcmask = _data_mask(hc)
+    mask = np.any(hcmask, axis=1)
     # allocate for output tidal elevation
-    ht = np.ma.zeros((npts))
-    ht.mask = np.zeros((npts), dtype=bool)
+    ht = np.zeros((npts))
     # for each constituent
     for k,c in enumerate(constituents):
         if corrections in ('OTIS', 'ATLAS', 'TMD3', 'netcdf'):
@@ -150,11 +157,10 @@ def map(t: float | np.ndarray,
         else:
             th = G[0,k]*np.pi/180.0 + pu[0,k]
         # sum over all tides
-        ht.data[:] += pf[0,k]*hc.real[:,k]*np.cos(th) - \
-            pf[0,k]*hc.imag[:,k]*np.sin(th)
-        ht.mask[:] |= (hc.real.mask[:,k] | hc.imag.mask[:,k])
+        ht[:] += pf[0,k]*hcdata.real[:,k]*np.cos(th) - \
+            pf[0,k]*hcdata.imag[:,k]*np.sin(th)
     # return the tidal elevation after removing singleton dimensions
-    return np.squeeze(ht)
+    return np.squeeze(np.ma.array(ht, mask=mask))
 
 # PURPOSE: Predict tides at drift bouys or altimetry points
 def drift(t: float | np.ndarray,
@@ -202,9 +208,10 @@ def drift(t: float | np.ndarray,
         deltat=deltat,
         corrections=corrections
     )
+    # harmonic constants and mask of points with invalid constituents
+    hcdata, hcmask = _data_mask(hc)
     # allocate for output time series
-    ht = np.ma.zeros((nt))
-    ht.mask = np.zeros((nt), dtype=bool)
+    ht = np.zeros((nt))
     # for each constituent
     for k,c in enumerate(constituents):
         if corrections in ('OTIS', 'ATLAS', 'TMD3', 'netcdf'):
@@ -216,11 +223,10 @@ def drift(t: float | np.ndarray,
         else:
             th = G[:,k]*np.pi/180.0 + pu[:,k]
         # sum over all tides
-        ht.data[:] += pf[:,k]*hc.real[:,k]*np.cos(th) - \
-            pf[:,k]*hc.imag[:,k]*np.sin(th)
-        ht.mask[:] |= (hc.real.mask[:,k] | hc.imag.mask[:,k])
+        ht[:] += pf[:,k]*hcdata.real[:,k]*np.cos(th) - \
+            pf[:,k]*hcdata.imag[:,k]*np.sin(th)
     # return tides
-    return ht
+    return np.ma.array(ht, mask=np.any(hcmask, axis=1))
 
 # PURPOSE: Predict a tidal time series at a location
 def time_series(t: float | np.ndarray,
@@ -268,9 +274,10 @@ def time_series(t: float | np.ndarray,
         deltat=deltat,
         corrections=corrections
     )
+    # harmonic constants and mask of points with invalid constituents
+    hcdata, hcmask = _data_mask(hc)
     # allocate for output time series
-    ht = np.ma.zeros((nt))
-    ht.mask = np.zeros((nt), dtype=bool)
+    ht = np.zeros((nt))
     # for each constituent
     for k,c in enumerate(constituents):
         if corrections in ('OTIS', 'ATLAS', 'TMD3', 'netcdf'):
@@ -282,11 +289,13 @@ def time_series(t: float | np.ndarray,
         else:
             th = G[:,k]*np.pi/180.0 + pu[:,k]
         # sum over all tides at location
-        ht.data[:] += pf[:,k]*hc.real[0,k]*np.cos(th) - \
-            pf[:,k]*hc.imag[0,k]*np.sin(th)
-        ht.mask[:] |= np.any(hc.real.mask[0,k] | hc.imag.mask[0,k])
+        ht[:] += pf[:,k]*hcdata.real[0,k]*np.cos(th) - \
+            pf[:,k]*hcdata.imag[0,k]*np.sin(th)
+    # broadcast the mask of the location to the time series
+    mask = np.zeros((nt), dtype=bool)
+    mask[:] = np.any(hcmask[0,:])
     # return the tidal time series
-    return ht
+    return np.ma.array(ht, mask=mask)
 
 # PURPOSE: infer the minor corrections from the major constituents
 def infer_minor(
@@ -344,12 +353,46 @@ def infer_minor(
     kwargs.setdefault('raise_exception', False)
     # list of minor constituents
     kwargs.setdefault('minor', None)
+    # harmonic constants and mask of points with invalid constituents
+    zdata, zmask = _data_mask(zmajor)
+    # number of constituents
+    npts, nc = np.shape(zmajor)
+    nt = len(np.atleast_1d(t))
+    # number of data points to calculate if running time series/drift/map
+    n = nt if ((npts == 1) & (nt > 1)) else npts
     # infer the minor tidal constituents
-    dh = 0.0
-    dh += _infer_short_period(t, zmajor, constituents, **kwargs)
-    dh += _infer_long_period(t, zmajor, constituents, **kwargs)
+    dh = np.zeros((n))
+    dh += _infer_short_period(t, zdata, constituents, **kwargs)
+    dh += _infer_long_period(t, zdata, constituents, **kwargs)
+    # major constituents used for inferring minor tides
+    cindex = ['q1', 'o1', 'p1', 'k1', 'n2', 'm2', 's2', 'k2', '2n2',
+        'node', 'mm', 'mf']
+    major = [j for j,c in enumerate(constituents) if (c.lower() in cindex)]
+    # broadcast the mask of points with invalid major constituents
+    mask = np.zeros((n), dtype=bool)
+    mask[:] = np.any(zmask[:,major], axis=1)
     # return the inferred values
-    return dh
+    return np.ma.array(dh, mask=mask)
+
+# PURPOSE: split harmonic constants into data and mask arrays
+def _data_mask(hc: np.ndarray):
+    """
+    Split harmonic constants into a plain data array and
+    a boolean mask of invalid values
+
+    Parameters
+    ----------
+    hc: np.ndarray
+        harmonic constants
+
+    Returns
+    -------
+    data: np.ndarray
+        harmonic constants without a mask
+    mask: np.ndarray
+        boolean mask of invalid values
+    """
+    return (np.ma.getdata(hc), np.ma.getmaskarray(hc))
 
 # PURPOSE: infer short-period tides for minor constituents
 def _infer_short_period(
@@ -400,17 +443,19 @@ def _infer_short_period(
     kwargs.setdefault('raise_exception', False)
     # list of minor constituents
     kwargs.setdefault('minor', None)
+    # harmonic constants without a mask
+    zmajor = np.ma.getdata(zmajor)
     # number of constituents
     npts, nc = np.shape(zmajor)
     nt = len(np.atleast_1d(t))
     # number of data points to calculate if running time series/drift/map
     n = nt if ((npts == 1) & (nt > 1)) else npts
     # allocate for output elevation correction
-    dh = np.ma.zeros((n))
+    dh = np.zeros((n))
     # major constituents used for inferring minor tides
     cindex = ['q1', 'o1', 'p1', 'k1', 'n2', 'm2', 's2', 'k2', '2n2']
     # re-order major tides to correspond to order of cindex
-    z = np.ma.zeros((n,len(cindex)), dtype=np.complex64)
+    z = np.zeros((n,len(cindex)), dtype=np.complex64)
     nz = 0
     for i,c in enumerate(cindex):
         j = [j for j,val in enumerate(constituents) if (val.lower() == c)]
@@ -535,13 +580,15 @@ def _infer_long_period(
     kwargs.setdefault('corrections', 'OTIS')
     # list of minor constituents
     kwargs.setdefault('minor', None)
+    # harmonic constants without a mask
+    zmajor = np.ma.getdata(zmajor)
     # number of constituents
     npts, nc = np.shape(zmajor)
     nt = len(np.atleast_1d(t))
     # number of data points to calculate if running time series/drift/map
     n = nt if ((npts == 1) & (nt > 1)) else npts
     # allocate for output elevation correction
-    dh = np.ma.zeros((n))
+    dh = np.zeros((n))
     # major constituents used for inferring long period minor tides
     cindex = ['node', 'mm', 'mf']
     # angular frequencies for major constituents
@@ -552,7 +599,7 @@ def _infer_long_period(
     amajor[1] = 0.035184# mm
     amajor[2] = 0.066607# mf
     # re-order major tides to correspond to order of cindex
-    z = np.ma.zeros((n,len(cindex)), dtype=np.complex64)
+    z = np.zeros((n,len(cindex)), dtype=np.complex64)
     nz = 0
     for i,c in enumerate(cindex):
         j = [j for j,val in enumerate(constituents) if (val.lower() == c)]
@@ -977,20 +1024,21 @@ def solid_earth_tide(
     kwargs.setdefault('mass_ratio_lunar', 0.0123000371)
     # validate output tide system
     assert tide_system.lower() in ('tide_free', 'mean_tide')
-    # number of input coordinates
-    nt = len(np.atleast_1d(t))
+    # broadcast shape of input coordinates and times
+    shape = np.broadcast_shapes(np.shape(t), np.shape(XYZ)[:-1],
+        np.shape(SXYZ)[:-1], np.shape(LXYZ)[:-1])
     # convert time to Modified Julian Days (MJD)
     MJD = t + _mjd_tide
     # scalar product of input coordinates with sun/moon vectors
-    radius = np.sqrt(XYZ[:,0]**2 + XYZ[:,1]**2 + XYZ[:,2]**2)
-    solar_radius = np.sqrt(SXYZ[:,0]**2 + SXYZ[:,1]**2 + SXYZ[:,2]**2)
-    lunar_radius = np.sqrt(LXYZ[:,0]**2 + LXYZ[:,1]**2 + LXYZ[:,2]**2)
-    solar_scalar = (XYZ[:,0]*SXYZ[:,0] + XYZ[:,1]*SXYZ[:,1] +
-        XYZ[:,2]*SXYZ[:,2])/(radius*solar_radius)
-    lunar_scalar = (XYZ[:,0]*LXYZ[:,0] + XYZ[:,1]*LXYZ[:,1] +
-        XYZ[:,2]*LXYZ[:,2])/(radius*lunar_radius)
+    radius = np.sqrt(XYZ[...,0]**2 + XYZ[...,1]**2 + XYZ[...,2]**2)
+    solar_radius = np.sqrt(SXYZ[...,0]**2 + SXYZ[...,1]**2 + SXYZ[...,2]**2)
+    lunar_radius = np.sqrt(LXYZ[...,0]**2 + LXYZ[...,1]**2 + LXYZ[...,2]**2)
+    solar_scalar = (XYZ[...,0]*SXYZ[...,0] + XYZ[...,1]*SXYZ[...,1] +
+        XYZ[...,2]*SXYZ[...,2])/(radius*solar_radius)
+    lunar_scalar = (XYZ[...,0]*LXYZ[...,0] + XYZ[...,1]*LXYZ[...,1] +
+        XYZ[...,2]*LXYZ[...,2])/(radius*lunar_radius)
     # compute new h2 and l2 (Mathews et al., 1997)
-    cosphi = np.sqrt(XYZ[:,0]**2 + XYZ[:,1]**2)/radius
+    cosphi = np.sqrt(XYZ[...,0]**2 + XYZ[...,1]**2)/radius
     h2 = kwargs['h2'] - 0.0006*(1.0 - 3.0/2.0*cosphi**2)
     l2 = kwargs['l2'] + 0.0002*(1.0 - 3.0/2.0*cosphi**2)
     # compute P2 terms
@@ -1012,13 +1060,13 @@ def solid_earth_tide(
     F3_solar = kwargs['mass_ratio_solar']*a_axis*(a_axis/solar_radius)**4
     F3_lunar = kwargs['mass_ratio_lunar']*a_axis*(a_axis/lunar_radius)**4
     # compute total displacement (Mathews et al. 1997)
-    dxt = np.zeros((nt, 3))
+    dxt = np.zeros((*shape, 3))
     for i in range(3):
-        S2 = F2_solar*(X2_solar*SXYZ[:,i]/solar_radius+P2_solar*XYZ[:,i]/radius)
-        L2 = F2_lunar*(X2_lunar*LXYZ[:,i]/lunar_radius+P2_lunar*XYZ[:,i]/radius)
-        S3 = F3_solar*(X3_solar*SXYZ[:,i]/solar_radius+P3_solar*XYZ[:,i]/radius)
-        L3 = F3_lunar*(X3_lunar*LXYZ[:,i]/lunar_radius+P3_lunar*XYZ[:,i]/radius)
-        dxt[:,i] = S2 + L2 + S3 + L3
+        S2 = F2_solar*(X2_solar*SXYZ[...,i]/solar_radius+P2_solar*XYZ[...,i]/radius)
+        L2 = F2_lunar*(X2_lunar*LXYZ[...,i]/lunar_radius+P2_lunar*XYZ[...,i]/radius)
+        S3 = F3_solar*(X3_solar*SXYZ[...,i]/solar_radius+P3_solar*XYZ[...,i]/radius)
+        L3 = F3_lunar*(X3_lunar*LXYZ[...,i]/lunar_radius+P3_lunar*XYZ[...,i]/radius)
+        dxt[...,i] = S2 + L2 + S3 + L3
     # corrections for out-of-phase portions of the Love and Shida numbers
     dxt += _out_of_phase_diurnal(XYZ, SXYZ, LXYZ, F2_solar, F2_lunar)
     dxt += _out_of_phase_semidiurnal(XYZ, SXYZ, LXYZ, F2_solar, F2_lunar)
@@ -1061,28 +1109,28 @@ def _out_of_phase_diurnal(
     dhi = -0.0025
     dli = -0.0007
     # Compute the normalized position vector of coordinates
-    radius = np.sqrt(np.sum(XYZ**2, axis=1))
-    sinphi = XYZ[:,2]/radius
-    cosphi = np.sqrt(XYZ[:,0]**2 + XYZ[:,1]**2)/radius
+    radius = np.sqrt(np.sum(XYZ**2, axis=-1))
+    sinphi = XYZ[...,2]/radius
+    cosphi = np.sqrt(XYZ[...,0]**2 + XYZ[...,1]**2)/radius
     cos2phi = cosphi**2 - sinphi**2
-    sinla = XYZ[:,1]/cosphi/radius
-    cosla = XYZ[:,0]/cosphi/radius
+    sinla = XYZ[...,1]/cosphi/radius
+    cosla = XYZ[...,0]/cosphi/radius
     # Compute the normalized position vector of the Sun/Moon
-    solar_radius = np.sqrt(np.sum(SXYZ**2, axis=1))
-    lunar_radius = np.sqrt(np.sum(LXYZ**2, axis=1))
+    solar_radius = np.sqrt(np.sum(SXYZ**2, axis=-1))
+    lunar_radius = np.sqrt(np.sum(LXYZ**2, axis=-1))
     # calculate offsets
-    dr_solar = -3.0*dhi*sinphi*cosphi*F2_solar*SXYZ[:,2]* \
-        (SXYZ[:,0]*sinla-SXYZ[:,1]*cosla)/solar_radius**2
-    dr_lunar = -3.0*dhi*sinphi*cosphi*F2_lunar*LXYZ[:,2]* \
-        (LXYZ[:,0]*sinla-LXYZ[:,1]*cosla)/lunar_radius**2
-    dn_solar = -3.0*dli*cos2phi*F2_solar*SXYZ[:,2]* \
-        (SXYZ[:,0]*sinla-SXYZ[:,1]*cosla)/solar_radius**2
-    dn_lunar = -3.0*dli*cos2phi*F2_lunar*LXYZ[:,2]* \
-        (LXYZ[:,0]*sinla-LXYZ[:,1]*cosla)/lunar_radius**2
-    de_solar = -3.0*dli*sinphi*F2_solar*SXYZ[:,2]* \
-        (SXYZ[:,0]*cosla+SXYZ[:,1]*sinla)/solar_radius**2
-    de_lunar = -3.0*dli*sinphi*F2_lunar*LXYZ[:,2]* \
-        (LXYZ[:,0]*cosla+LXYZ[:,1]*sinla)/lunar_radius**2
+    dr_solar = -3.0*dhi*sinphi*cosphi*F2_solar*SXYZ[...,2]* \
+        (SXYZ[...,0]*sinla-SXYZ[...,1]*cosla)/solar_radius**2
+    dr_lunar = -3.0*dhi*sinphi*cosphi*F2_lunar*LXYZ[...,2]* \
+        (LXYZ[...,0]*sinla-LXYZ[...,1]*cosla)/lunar_radius**2
+    dn_solar = -3.0*dli*cos2phi*F2_solar*SXYZ[...,2]* \
+        (SXYZ[...,0]*sinla-SXYZ[...,1]*cosla)/solar_radius**2
+    dn_lunar = -3.0*dli*cos2phi*F2_lunar*LXYZ[...,2]* \
+        (LXYZ[...,0]*sinla-LXYZ[...,1]*cosla)/lunar_radius**2
+    de_solar = -3.0*dli*sinphi*F2_solar*SXYZ[...,2]* \
+        (SXYZ[...,0]*cosla+SXYZ[...,1]*sinla)/solar_radius**2
+    de_lunar = -3.0*dli*sinphi*F2_lunar*LXYZ[...,2]* \
+        (LXYZ[...,0]*cosla+LXYZ[...,1]*sinla)/lunar_radius**2
     # add solar and lunar offsets
     DR = dr_solar + dr_lunar
     DN = dn_solar + dn_lunar
@@ -1092,7 +1140,7 @@ def _out_of_phase_diurnal(
     DY = DR*sinla*cosphi + DE*cosla - DN*sinla*sinphi
     DZ = DR*sinphi + DN*cosphi
     # return the corrections
-    return np.c_[DX, DY, DZ]
+    return np.stack([DX, DY, DZ], axis=-1)
 
 def _out_of_phase_semidiurnal(
         XYZ: np.ndarray,
@@ -1122,34 +1170,34 @@ def _out_of_phase_semidiurnal(
     dhi = -0.0022
     dli = -0.0007
     # Compute the normalized position vector of coordinates
-    radius = np.sqrt(np.sum(XYZ**2, axis=1))
-    sinphi = XYZ[:,2]/radius
-    cosphi = np.sqrt(XYZ[:,0]**2 + XYZ[:,1]**2)/radius
-    sinla = XYZ[:,1]/cosphi/radius
-    cosla = XYZ[:,0]/cosphi/radius
+    radius = np.sqrt(np.sum(XYZ**2, axis=-1))
+    sinphi = XYZ[...,2]/radius
+    cosphi = np.sqrt(XYZ[...,0]**2 + XYZ[...,1]**2)/radius
+    sinla = XYZ[...,1]/cosphi/radius
+    cosla = XYZ[...,0]/cosphi/radius
     cos2la = cosla**2 - sinla**2
     sin2la = 2.0*cosla*sinla
     # Compute the normalized position vector of the Sun/Moon
-    solar_radius = np.sqrt(np.sum(SXYZ**2, axis=1))
-    lunar_radius = np.sqrt(np.sum(LXYZ**2, axis=1))
+    solar_radius = np.sqrt(np.sum(SXYZ**2, axis=-1))
+    lunar_radius = np.sqrt(np.sum(LXYZ**2, axis=-1))
     # calculate offsets
     dr_solar = -3.0/4.0*dhi*cosphi**2*F2_solar * \
-        ((SXYZ[:,0]**2-SXYZ[:,1]**2)*sin2la-2.0*SXYZ[:,0]*SXYZ[:,1]*cos2la) / \
+        ((SXYZ[...,0]**2-SXYZ[...,1]**2)*sin2la-2.0*SXYZ[...,0]*SXYZ[...,1]*cos2la) / \
         solar_radius**2
     dr_lunar = -3.0/4.0*dhi*cosphi**2*F2_lunar * \
-        ((LXYZ[:,0]**2-LXYZ[:,1]**2)*sin2la-2.0*LXYZ[:,0]*LXYZ[:,1]*cos2la) / \
+        ((LXYZ[...,0]**2-LXYZ[...,1]**2)*sin2la-2.0*LXYZ[...,0]*LXYZ[...,1]*cos2la) / \
         lunar_radius**2
     dn_solar = 3.0/2.0*dli*sinphi*cosphi*F2_solar * \
-        ((SXYZ[:,0]**2-SXYZ[:,1]**2)*sin2la-2.0*SXYZ[:,0]*SXYZ[:,1]*cos2la) / \
+        ((SXYZ[...,0]**2-SXYZ[...,1]**2)*sin2la-2.0*SXYZ[...,0]*SXYZ[...,1]*cos2la) / \
         solar_radius**2
     dn_lunar = 3.0/2.0*dli*sinphi*cosphi*F2_lunar * \
-        ((LXYZ[:,0]**2-LXYZ[:,1]**2)*sin2la-2.0*LXYZ[:,0]*LXYZ[:,1]*cos2la) / \
+        ((LXYZ[...,0]**2-LXYZ[...,1]**2)*sin2la-2.0*LXYZ[...,0]*LXYZ[...,1]*cos2la) / \
         lunar_radius**2
     de_solar = -3.0/2.0*dli*cosphi*F2_solar * \
-        ((SXYZ[:,0]**2-SXYZ[:,1]**2)*cos2la+2.0*SXYZ[:,0]*SXYZ[:,1]*sin2la) / \
+        ((SXYZ[...,0]**2-SXYZ[...,1]**2)*cos2la+2.0*SXYZ[...,0]*SXYZ[...,1]*sin2la) / \
         solar_radius**2
     de_lunar = -3.0/2.0*dli*cosphi*F2_lunar * \
-        ((LXYZ[:,0]**2-LXYZ[:,1]**2)*cos2la+2.0*LXYZ[:,0]*LXYZ[:,1]*sin2la) / \
+        ((LXYZ[...,0]**2-LXYZ[...,1]**2)*cos2la+2.0*LXYZ[...,0]*LXYZ[...,1]*sin2la) / \
         lunar_radius**2
     # add solar and lunar offsets
     DR = dr_solar + dr_lunar
@@ -1160,7 +1208,7 @@ def _out_of_phase_semidiurnal(
     DY = DR*sinla*cosphi + DE*cosla - DN*sinla*sinphi
     DZ = DR*sinphi + DN*cosphi
     # return the corrections
-    return np.c_[DX, DY, DZ]
+    return np.stack([DX, DY, DZ], axis=-1)
 
 def _latitude_dependence(
         XYZ: np.ndarray,
@@ -1190,37 +1238,37 @@ def _latitude_dependence(
     l1d = 0.0012
     l1sd = 0.0024
     # Compute the normalized position vector of coordinates
-    radius = np.sqrt(np.sum(XYZ**2, axis=1))
-    sinphi = XYZ[:,2]/radius
-    cosphi = np.sqrt(XYZ[:,0]**2 + XYZ[:,1]**2)/radius
-    sinla = XYZ[:,1]/cosphi/radius
-    cosla = XYZ[:,0]/cosphi/radius
+    radius = np.sqrt(np.sum(XYZ**2, axis=-1))
+    sinphi = XYZ[...,2]/radius
+    cosphi = np.sqrt(XYZ[...,0]**2 + XYZ[...,1]**2)/radius
+    sinla = XYZ[...,1]/cosphi/radius
+    cosla = XYZ[...,0]/cosphi/radius
     cos2la = cosla**2 - sinla**2
     sin2la = 2.0*cosla*sinla
     # Compute the normalized position vector of the Sun/Moon
-    solar_radius = np.sqrt(np.sum(SXYZ**2, axis=1))
-    lunar_radius = np.sqrt(np.sum(LXYZ**2, axis=1))
+    solar_radius = np.sqrt(np.sum(SXYZ**2, axis=-1))
+    lunar_radius = np.sqrt(np.sum(LXYZ**2, axis=-1))
     # calculate offsets for the diurnal band
-    dn_d_solar = -l1d*sinphi**2*F2_solar*SXYZ[:,2] * \
-        (SXYZ[:,0]*cosla+SXYZ[:,1]*sinla)/solar_radius**2
-    dn_d_lunar = -l1d*sinphi**2*F2_lunar*LXYZ[:,2] * \
-        (LXYZ[:,0]*cosla+LXYZ[:,1]*sinla)/lunar_radius**2
-    de_d_solar = l1d*sinphi*(cosphi**2-sinphi**2)*F2_solar*SXYZ[:,2] * \
-        (SXYZ[:,0]*sinla-SXYZ[:,1]*cosla)/solar_radius**2
-    de_d_lunar = l1d*sinphi*(cosphi**2-sinphi**2)*F2_lunar*LXYZ[:,2] * \
-        (LXYZ[:,0]*sinla-LXYZ[:,1]*cosla)/lunar_radius**2
+    dn_d_solar = -l1d*sinphi**2*F2_solar*SXYZ[...,2] * \
+        (SXYZ[...,0]*cosla+SXYZ[...,1]*sinla)/solar_radius**2
+    dn_d_lunar = -l1d*sinphi**2*F2_lunar*LXYZ[...,2] * \
+        (LXYZ[...,0]*cosla+LXYZ[...,1]*sinla)/lunar_radius**2
+    de_d_solar = l1d*sinphi*(cosphi**2-sinphi**2)*F2_solar*SXYZ[...,2] * \
+        (SXYZ[...,0]*sinla-SXYZ[...,1]*cosla)/solar_radius**2
+    de_d_lunar = l1d*sinphi*(cosphi**2-sinphi**2)*F2_lunar*LXYZ[...,2] * \
+        (LXYZ[...,0]*sinla-LXYZ[...,1]*cosla)/lunar_radius**2
     # calculate offsets for the semi-diurnal band
     dn_s_solar = -l1sd/2.0*sinphi*cosphi*F2_solar * \
-        ((SXYZ[:,0]**2-SXYZ[:,1]**2)*cos2la+2.0*SXYZ[:,0]*SXYZ[:,1]*sin2la) / \
+        ((SXYZ[...,0]**2-SXYZ[...,1]**2)*cos2la+2.0*SXYZ[...,0]*SXYZ[...,1]*sin2la) / \
         solar_radius**2
     dn_s_lunar =-l1sd/2.0*sinphi*cosphi*F2_lunar * \
-        ((LXYZ[:,0]**2-LXYZ[:,1]**2)*cos2la+2.0*LXYZ[:,0]*LXYZ[:,1]*sin2la) / \
+        ((LXYZ[...,0]**2-LXYZ[...,1]**2)*cos2la+2.0*LXYZ[...,0]*LXYZ[...,1]*sin2la) / \
         lunar_radius**2
     de_s_solar =-l1sd/2.0*sinphi**2*cosphi*F2_solar * \
-        ((SXYZ[:,0]**2-SXYZ[:,1]**2)*sin2la-2.0*SXYZ[:,0]*SXYZ[:,1]*cos2la) / \
+        ((SXYZ[...,0]**2-SXYZ[...,1]**2)*sin2la-2.0*SXYZ[...,0]*SXYZ[...,1]*cos2la) / \
         solar_radius**2
     de_s_lunar =-l1sd/2.0*sinphi**2*cosphi*F2_lunar * \
-        ((LXYZ[:,0]**2-LXYZ[:,1]**2)*sin2la-2.0*LXYZ[:,0]*LXYZ[:,1]*cos2la) / \
+        ((LXYZ[...,0]**2-LXYZ[...,1]**2)*sin2la-2.0*LXYZ[...,0]*LXYZ[...,1]*cos2la) / \
         lunar_radius**2
     # add solar and lunar offsets (diurnal and semi-diurnal)
     DN = 3.0*(dn_d_solar + dn_d_lunar + dn_s_solar + dn_s_lunar)
@@ -1230,7 +1278,7 @@ def _latitude_dependence(
     DY = DE*cosla - DN*sinla*sinphi
     DZ = DN*cosphi
     # return the corrections
-    return np.c_[DX, DY, DZ]
+    return np.stack([DX, DY, DZ], axis=-1)
 
 def _frequency_dependence_diurnal(
         XYZ: np.ndarray,
@@ -1247,8 +1295,6 @@ def _frequency_dependence_diurnal(
     MJD: np.ndarray
         Modified Julian Day (MJD)
     """
-    # number of time steps
-    nt = len(np.atleast_1d(MJD))
     # Corrections to Diurnal Tides for Frequency Dependence
     # of Love and Shida Number Parameters
     # table 7.3a of IERS conventions
@@ -1288,31 +1334,35 @@ def _frequency_dependence_diurnal(
     # get phase angles (Doodson arguments)
     TAU, S, H, P, ZNS, PS = pyTMD.astro.doodson_arguments(MJD)
     # Compute the normalized position vector of coordinates
-    radius = np.sqrt(np.sum(XYZ**2, axis=1))
-    sinphi = XYZ[:,2]/radius
-    cosphi = np.sqrt(XYZ[:,0]**2 + XYZ[:,1]**2)/radius
-    sinla = XYZ[:,1]/cosphi/radius
-    cosla = XYZ[:,0]/cosphi/radius
-    zla = np.arctan2(XYZ[:,1], XYZ[:,0])
-    # compute corrections (Mathews et al. 1997)
-    DX = np.zeros((nt))
-    DY = np.zeros((nt))
-    DZ = np.zeros((nt))
+    radius = np.sqrt(np.sum(XYZ**2, axis=-1))
+    sinphi = XYZ[...,2]/radius
+    cosphi = np.sqrt(XYZ[...,0]**2 + XYZ[...,1]**2)/radius
+    sinla = XYZ[...,1]/cosphi/radius
+    cosla = XYZ[...,0]/cosphi/radius
+    zla = np.arctan2(XYZ[...,1], XYZ[...,0])
+    # sum the time-dependent terms over rows in the table
+    # (separated from the longitude terms using angle sum identities)
+    A = np.zeros(np.shape(TAU))
+    B = np.zeros(np.shape(TAU))
+    C = np.zeros(np.shape(TAU))
+    D = np.zeros(np.shape(TAU))
     # iterate over rows in the table
     for i, row in enumerate(table):
         thetaf = TAU + S*row[0] + H*row[1] + P*row[2] + \
             ZNS*row[3] + PS*row[4]
-        dr = 2.0*row[5]*sinphi*cosphi*np.sin(thetaf + zla) + \
-            2.0*row[6]*sinphi*cosphi*np.cos(thetaf + zla)
-        dn = row[7]*(cosphi**2 - sinphi**2)*np.sin(thetaf + zla) + \
-            row[8]*(cosphi**2 - sinphi**2)*np.cos(thetaf + zla)
-        de = row[7]*sinphi*np.cos(thetaf + zla) - \
-            row[8]*sinphi*np.sin(thetaf + zla)
-        DX += 1e-3*(dr*cosla*cosphi - de*sinla - dn*cosla*sinphi)
-        DY += 1e-3*(dr*sinla*cosphi + de*cosla - dn*sinla*sinphi)
-        DZ += 1e-3*(dr*sinphi + dn*cosphi)
+        A += row[5]*np.sin(thetaf) + row[6]*np.cos(thetaf)
+        B += row[5]*np.cos(thetaf) - row[6]*np.sin(thetaf)
+        C += row[7]*np.sin(thetaf) + row[8]*np.cos(thetaf)
+        D += row[7]*np.cos(thetaf) - row[8]*np.sin(thetaf)
+    # compute corrections (Mathews et al. 1997)
+    dr = 2.0*sinphi*cosphi*(A*np.cos(zla) + B*np.sin(zla))
+    dn = (cosphi**2 - sinphi**2)*(C*np.cos(zla) + D*np.sin(zla))
+    de = sinphi*(D*np.cos(zla) - C*np.sin(zla))
+    DX = 1e-3*(dr*cosla*cosphi - de*sinla - dn*cosla*sinphi)
+    DY = 1e-3*(dr*sinla*cosphi + de*cosla - dn*sinla*sinphi)
+    DZ = 1e-3*(dr*sinphi + dn*cosphi)
     # return the corrections
-    return np.c_[DX, DY, DZ]
+    return np.stack([DX, DY, DZ], axis=-1)
 
 def _frequency_dependence_long_period(
         XYZ: np.ndarray,
@@ -1329,8 +1379,6 @@ def _frequency_dependence_long_period(
     MJD: np.ndarray
         Modified Julian Day (MJD)
     """
-    # number of time steps
-    nt = len(np.atleast_1d(MJD))
     # Corrections to Long-Peroid Tides for Frequency Dependence
     # of Love and Shida Number Parameters
     # table 7.3b of IERS conventions
@@ -1344,28 +1392,27 @@ def _frequency_dependence_long_period(
     # get phase angles (Doodson arguments)
     TAU, S, H, P, ZNS, PS = pyTMD.astro.doodson_arguments(MJD)
     # Compute the normalized position vector of coordinates
-    radius = np.sqrt(np.sum(XYZ**2, axis=1))
-    sinphi = XYZ[:,2]/radius
-    cosphi = np.sqrt(XYZ[:,0]**2 + XYZ[:,1]**2)/radius
-    sinla = XYZ[:,1]/cosphi/radius
-    cosla = XYZ[:,0]/cosphi/radius
-    # compute corrections (Mathews et al. 1997)
-    DX = np.zeros((nt))
-    DY = np.zeros((nt))
-    DZ = np.zeros((nt))
+    radius = np.sqrt(np.sum(XYZ**2, axis=-1))
+    sinphi = XYZ[...,2]/radius
+    cosphi = np.sqrt(XYZ[...,0]**2 + XYZ[...,1]**2)/radius
+    sinla = XYZ[...,1]/cosphi/radius
+    cosla = XYZ[...,0]/cosphi/radius
+    # sum the time-dependent terms over rows in the table
+    A = np.zeros(np.shape(S))
+    B = np.zeros(np.shape(S))
     # iterate over rows in the table
     for i, row in enumerate(table):
         thetaf = S*row[0] + H*row[1] + P*row[2] + ZNS*row[3] + PS*row[4]
-        dr = row[5]*(3.0*sinphi**2 - 1.0)*np.cos(thetaf)/2.0 + \
-            row[7]*(3.0*sinphi**2 - 1.0)*np.sin(thetaf)/2.0
-        dn = row[6]*(2.0*cosphi*sinphi)*np.cos(thetaf) + \
-            row[8]*(2.0*cosphi*sinphi)*np.sin(thetaf)
-        de = 0.0
-        DX += 1e-3*(dr*cosla*cosphi - de*sinla - dn*cosla*sinphi)
-        DY += 1e-3*(dr*sinla*cosphi + de*cosla - dn*sinla*sinphi)
-        DZ += 1e-3*(dr*sinphi + dn*cosphi)
+        A += row[5]*np.cos(thetaf) + row[7]*np.sin(thetaf)
+        B += row[6]*np.cos(thetaf) + row[8]*np.sin(thetaf)
+    # compute corrections (Mathews et al. 1997)
+    dr = A*(3.0*sinphi**2 - 1.0)/2.0
+    dn = B*(2.0*cosphi*sinphi)
+    DX = 1e-3*(dr*cosla*cosphi - dn*cosla*sinphi)
+    DY = 1e-3*(dr*sinla*cosphi - dn*sinla*sinphi)
+    DZ = 1e-3*(dr*sinphi + dn*cosphi)
     # return the corrections
-    return np.c_[DX, DY, DZ]
+    return np.stack([DX, DY, DZ], axis=-1)
 
 def _free_to_mean(
         XYZ: np.ndarray,
@@ -1386,11 +1433,11 @@ def _free_to_mean(
         Degree-2 Love (Shida) number of horizontal displacement
     """
     # Compute the normalized position vector of coordinates
-    radius = np.sqrt(np.sum(XYZ**2, axis=1))
-    sinphi = XYZ[:,2]/radius
-    cosphi = np.sqrt(XYZ[:,0]**2 + XYZ[:,1]**2)/radius
-    sinla = XYZ[:,1]/cosphi/radius
-    cosla = XYZ[:,0]/cosphi/radius
+    radius = np.sqrt(np.sum(XYZ**2, axis=-1))
+    sinphi = XYZ[...,2]/radius
+    cosphi = np.sqrt(XYZ[...,0]**2 + XYZ[...,1]**2)/radius
+    sinla = XYZ[...,1]/cosphi/radius
+    cosla = XYZ[...,0]/cosphi/radius
     # time-independent constituent of amplitude (Mathews et al. 1997)
     H0 = -0.31460
     # in Mathews et al. (1997): dR0=-0.1196 m with h2=0.6026
@@ -1405,4 +1452,4 @@ def _free_to_mean(
     DY = dr*sinla*cosphi - dn*sinla*sinphi
     DZ = dr*sinphi + dn*cosphi
     # return the corrections
-    return np.c_[DX, DY, DZ]
+    return np.stack([DX, DY, DZ], axis=-1)
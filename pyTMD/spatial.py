@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 spatial.py
-Written by Tyler Sutterley (09/2024)
+Written by Tyler Sutterley (10/2024)
 
 Utilities for reading, writing and operating on spatial data
 
@@ -30,6 +30,18 @@ PROGRAM DEPENDENCIES:
     crs.py: Coordinate Reference System (CRS) routines
 
 UPDATE HISTORY:
+    Updated 10/2024: added function for sorting points along a Morton curve
+        added iterators for reading ascii, netCDF4 and HDF5 files in chunks
+        added offset option for writing netCDF4 and HDF5 drift files in chunks
+        added arrow-native functions for streaming (geo)parquet files
+        vectorized Newton-Raphson iterations when converting ellipsoids
+        only update unconverged points in iterative geodetic conversions
+        fix real cube roots and partial polar cases in closed-form solution
+        can write time slices of gridded data to netCDF4 and HDF5 files
+        added chunk shape, compression and preallocation options to writers
+        compress netCDF4 data variables by default (not only with fill values)
+        check that netCDF4 compression plugins are available
+        added windowed readers and tiled writers for geotiff files
     Updated 09/2024: deprecation fix case where an array is output to scalars
     Updated 08/2024: changed from 'geotiff' to 'GTiff' and 'cog' formats
         added functions to convert to and from East-North-Up coordinates
@@ -125,11 +137,18 @@ __all__ = [
     "case_insensitive_filename",
     "data_type",
     "from_file",
+    "iter_file",
     "from_ascii",
+    "iter_ascii",
     "from_netCDF4",
+    "iter_netCDF4",
     "from_HDF5",
+    "iter_HDF5",
     "from_geotiff",
+    "iter_geotiff",
     "from_parquet",
+    "iter_parquet",
+    "read_attributes",
     "to_file",
     "to_ascii",
     "to_netCDF4",
@@ -138,13 +157,16 @@ __all__ = [
     "_time_series_netCDF4",
     "to_HDF5",
     "to_geotiff",
+    "to_geotiff_stream",
     "to_parquet",
+    "to_parquet_stream",
     "expand_dims",
     "default_field_mapping",
     "inverse_mapping",
     "convert_ellipsoid",
     "compute_delta_h",
     "wrap_longitudes",
+    "morton_order",
     "to_dms",
     "from_dms",
     "to_cartesian",
@@ -244,6 +266,33 @@ def from_file(filename: str, format: str, **kwargs):
         raise ValueError(f'Invalid format {format}')
     return dinput
 
+def iter_file(filename: str, format: str, chunk_size: int = 100000, **kwargs):
+    """
+    Wrapper function for iterating over chunks of data from an input format
+
+    Parameters
+    ----------
+    filename: str
+        full path of input file
+    format: str
+        format of input file
+    chunk_size: int, default 100000
+        maximum number of records in each chunk
+    **kwargs: dict
+        Keyword arguments for file reader
+    """
+    # iterate over chunks of spatial coordinates and data
+    if (format == 'ascii'):
+        return iter_ascii(filename, chunk_size=chunk_size, **kwargs)
+    elif (format == 'netCDF4'):
+        return iter_netCDF4(filename, chunk_size=chunk_size, **kwargs)
+    elif (format == 'HDF5'):
+        return iter_HDF5(filename, chunk_size=chunk_size, **kwargs)
+    elif (format == 'parquet'):
+        return iter_parquet(filename, chunk_size=chunk_size, **kwargs)
+    else:
+        raise ValueError(f'Invalid format {format} for chunked reading')
+
 def from_ascii(filename: str, **kwargs):
     """
     Read data from an ascii file
@@ -289,10 +338,6 @@ def from_ascii(filename: str, **kwargs):
             file_contents = f.read().splitlines()
     # number of lines in the file
     file_lines = len(file_contents)
-    # compile regular expression operator for extracting numerical values
-    # from input ascii files of spatial data
-    regex_pattern = r'[-+]?(?:(?:\d*\.\d+)|(?:\d+\.?))(?:[EeD][+-]?\d+)?'
-    rx = re.compile(regex_pattern, re.VERBOSE)
     # check if header has a known format
     if (str(kwargs['header']).upper() == 'YAML'):
         # counts the number of lines in the header
@@ -306,35 +351,167 @@ def from_ascii(filename: str, **kwargs):
             YAML = bool(re.search(r"\# End of YAML header", line))
             # add 1 to counter
             count += 1
-        # parse the YAML header (specifying yaml loader)
-        YAML_HEADER = yaml.load('\n'.join(file_contents[:count]),
-           Loader=yaml.BaseLoader)
-        # output spatial data and attributes
-        dinput = {}
-        # copy global attributes
-        dinput['attributes'] = YAML_HEADER['header']['global_attributes']
-        # allocate for each variable and copy variable attributes
-        for c in columns:
-            if (c == 'time') and kwargs['parse_dates']:
-                dinput[c] = np.zeros((file_lines-count), dtype='datetime64[ns]')
-            else:
-                dinput[c] = np.zeros((file_lines-count))
-            dinput['attributes'][c] = YAML_HEADER['header']['variables'][c]
+        # parse the YAML header and get the variable attributes
+        attributes = _yaml_attributes(file_contents[:count], columns)
         # update number of file lines to skip for reading data
         header = int(count)
     else:
-        # allocate for each variable and variable attributes
-        dinput = {}
+        # allocate for variable attributes
         header = int(kwargs['header'])
-        for c in columns:
-            if (c == 'time') and kwargs['parse_dates']:
-                dinput[c] = np.zeros((file_lines-header), dtype='datetime64[ns]')
-            else:
-                dinput[c] = np.zeros((file_lines-header))
-        dinput['attributes'] = {c:dict() for c in columns}
-    # extract spatial data array
+        attributes = {c:dict() for c in columns}
+    # extract spatial data array from each line in the file
+    dinput = _parse_ascii(file_contents[header:], columns, attributes,
+        delimiter=kwargs['delimiter'], parse_dates=kwargs['parse_dates'])
+    # return the spatial variables
+    return dinput
+
+def iter_ascii(filename: str, chunk_size: int = 100000, **kwargs):
+    """
+    Iterate over chunks of data from an ascii file
+
+    Parameters
+    ----------
+    filename: str
+        full path of input ascii file
+    chunk_size: int, default 100000
+        maximum number of lines in each chunk
+    compression: str or NoneType, default None
+        file compression type
+    columns: list, default ['time', 'y', 'x', 'data']
+        column names of ascii file
+    delimiter: str, default ','
+        Delimiter for csv or ascii files
+    header: int, default 0
+        header lines to skip from start of file
+    parse_dates: bool, default False
+        Try parsing the time column
+
+    Yields
+    ------
+    dinput: dict
+        spatial variables for each chunk of lines
+    """
+    # set default keyword arguments
+    kwargs.setdefault('compression', None)
+    kwargs.setdefault('columns', ['time', 'y', 'x', 'data'])
+    kwargs.setdefault('delimiter', ',')
+    kwargs.setdefault('header', 0)
+    kwargs.setdefault('parse_dates', False)
+    # print filename
+    logging.info(str(filename))
+    # get column names
+    columns = copy.copy(kwargs['columns'])
+    # open the ascii file for reading line by line
+    if (kwargs['compression'] == 'gzip'):
+        # read input ascii data from gzip compressed file
+        filename = case_insensitive_filename(filename)
+        fid = gzip.open(filename, mode='rt', encoding='ISO-8859-1')
+    elif (kwargs['compression'] == 'bytes'):
+        # read from input file object
+        fid = filename
+    else:
+        # read input ascii file (.txt, .asc)
+        filename = case_insensitive_filename(filename)
+        fid = open(filename, mode='r', encoding='utf8')
+    # iterate over the lines of the file without decoding newlines
+    lines = (l.decode('ISO-8859-1') if isinstance(l, bytes) else l
+        for l in fid)
+    lines = (l.rstrip('\r\n') for l in lines)
+    try:
+        # check if header has a known format
+        if (str(kwargs['header']).upper() == 'YAML'):
+            # read lines until the end of the YAML header
+            header = []
+            for line in lines:
+                header.append(line)
+                if re.search(r"\# End of YAML header", line):
+                    break
+            # parse the YAML header and get the variable attributes
+            attributes = _yaml_attributes(header, columns)
+        else:
+            # skip header lines
+            for _ in range(int(kwargs['header'])):
+                next(lines, None)
+            attributes = {c:dict() for c in columns}
+        # read and parse fixed-size chunks of lines
+        buffer = []
+        for line in lines:
+            # skip empty lines
+            if not line.strip():
+                continue
+            buffer.append(line)
+            if (len(buffer) == chunk_size):
+                yield _parse_ascii(buffer, columns,
+                    copy.deepcopy(attributes),
+                    delimiter=kwargs['delimiter'],
+                    parse_dates=kwargs['parse_dates'])
+                buffer = []
+        # parse the remaining lines
+        if buffer:
+            yield _parse_ascii(buffer, columns,
+                copy.deepcopy(attributes),
+                delimiter=kwargs['delimiter'],
+                parse_dates=kwargs['parse_dates'])
+    finally:
+        # close the file if opened here
+        if (kwargs['compression'] != 'bytes'):
+            fid.close()
+
+def _yaml_attributes(header: list, columns: list):
+    """
+    Parse attributes from the YAML header of an ascii file
+
+    Parameters
+    ----------
+    header: list
+        lines of the YAML header
+    columns: list
+        column names of ascii file
+    """
+    # parse the YAML header (specifying yaml loader)
+    YAML_HEADER = yaml.load('\n'.join(header), Loader=yaml.BaseLoader)
+    # copy global attributes
+    attributes = YAML_HEADER['header']['global_attributes']
+    # copy variable attributes
+    for c in columns:
+        attributes[c] = YAML_HEADER['header']['variables'][c]
+    return attributes
+
+def _parse_ascii(lines: list, columns: list, attributes: dict, **kwargs):
+    """
+    Extract spatial data from lines of an ascii file
+
+    Parameters
+    ----------
+    lines: list
+        lines of ascii data
+    columns: list
+        column names of ascii file
+    attributes: dict
+        variable attributes
+    delimiter: str, default ','
+        Delimiter for csv or ascii files
+    parse_dates: bool, default False
+        Try parsing the time column
+    """
+    # set default keyword arguments
+    kwargs.setdefault('delimiter', ',')
+    kwargs.setdefault('parse_dates', False)
+    # compile regular expression operator for extracting numerical values
+    # from input ascii files of spatial data
+    regex_pattern = r'[-+]?(?:(?:\d*\.\d+)|(?:\d+\.?))(?:[EeD][+-]?\d+)?'
+    rx = re.compile(regex_pattern, re.VERBOSE)
+    # allocate for each variable
+    dinput = {}
+    nlines = len(lines)
+    for c in columns:
+        if (c == 'time') and kwargs['parse_dates']:
+            dinput[c] = np.zeros((nlines), dtype='datetime64[ns]')
+        else:
+            dinput[c] = np.zeros((nlines))
+    dinput['attributes'] = attributes
     # for each line in the file
-    for i, line in enumerate(file_contents[header:]):
+    for i, line in enumerate(lines):
         # extract columns of interest and assign to dict
         # convert fortran exponentials if applicable
         if kwargs['delimiter']:
@@ -350,10 +527,7 @@ def from_ascii(filename: str, **kwargs):
             else:
                 dinput[c][i] = np.float64(column[c])
     # convert to masked array if fill values
-    if 'data' in dinput.keys() and '_FillValue' in dinput['attributes']['data'].keys():
-        dinput['data'] = np.ma.asarray(dinput['data'])
-        dinput['data'].fill_value = dinput['attributes']['data']['_FillValue']
-        dinput['data'].mask = (dinput['data'].data == dinput['data'].fill_value)
+    _mask_fill_values(dinput)
     # return the spatial variables
     return dinput
 
@@ -361,6 +535,109 @@ def from_netCDF4(filename: str, **kwargs):
     """
     Read data from a netCDF4 file
 
+    Parameters
+    ----------
+    filename: str
+        full path of input netCDF4 file
+    compression: str or NoneType, default None
+        file compression type
+    group: str or NoneType, default None
+        netCDF4 variable group
+    timename: str, default 'time'
+        name for time-dimension variable
+    xname: str, default 'lon'
+        name for x-dimension variable
+    yname: str, default 'lat'
+        name for y-dimension variable
+    varname: str, default 'data'
+        name for data variable
+    field_mapping: dict, default {}
+        mapping between output variables and input netCDF4
+    """
+    # read data from netCDF4 file
+    fileID, group, field_mapping = _open_netCDF4(filename, **kwargs)
+    # create python dictionary for output variables and attributes
+    dinput = {}
+    dinput['attributes'] = _netCDF4_attributes(fileID, group, field_mapping)
+    # for each variable
+    for key, nc in field_mapping.items():
+        # Getting the data from each NetCDF variable
+        dinput[key] = group.variables[nc][:]
+    # convert to masked array if fill values
+    _mask_fill_values(dinput)
+    # Closing the NetCDF file
+    fileID.close()
+    # return the spatial variables
+    return dinput
+
+def iter_netCDF4(filename: str, chunk_size: int = 100000, **kwargs):
+    """
+    Iterate over chunks of drift data from a netCDF4 file
+
+    Variables with the same leading dimension as the x-variable
+    are read in slices of ``chunk_size``, while all other mapped
+    variables are passed through with each chunk
+
+    Parameters
+    ----------
+    filename: str
+        full path of input netCDF4 file
+    chunk_size: int, default 100000
+        maximum number of records in each chunk
+    compression: str or NoneType, default None
+        file compression type
+    group: str or NoneType, default None
+        netCDF4 variable group
+    timename: str, default 'time'
+        name for time-dimension variable
+    xname: str, default 'lon'
+        name for x-dimension variable
+    yname: str, default 'lat'
+        name for y-dimension variable
+    varname: str, default 'data'
+        name for data variable
+    field_mapping: dict, default {}
+        mapping between output variables and input netCDF4
+
+    Yields
+    ------
+    dinput: dict
+        spatial variables for each chunk of records
+    """
+    # open netCDF4 file
+    fileID, group, field_mapping = _open_netCDF4(filename, **kwargs)
+    try:
+        # get attributes for the file and included variables
+        attributes = _netCDF4_attributes(fileID, group, field_mapping)
+        # number of records in the file
+        n_records = group.variables[field_mapping['x']].shape[0]
+        # read variables without a record dimension once
+        static = {}
+        for key, nc in field_mapping.items():
+            shape = group.variables[nc].shape
+            if not shape or (shape[0] != n_records):
+                static[key] = group.variables[nc][:]
+        # for each chunk of records
+        for i in range(0, n_records, chunk_size):
+            # create python dictionary for output variables and attributes
+            dinput = {}
+            dinput['attributes'] = copy.deepcopy(attributes)
+            for key, nc in field_mapping.items():
+                if key in static:
+                    dinput[key] = static[key]
+                else:
+                    dinput[key] = group.variables[nc][i:i+chunk_size]
+            # convert to masked array if fill values
+            _mask_fill_values(dinput)
+            yield dinput
+    finally:
+        # Closing the NetCDF file
+        fileID.close()
+
+def _open_netCDF4(filename: str, **kwargs):
+    """
+    Open a netCDF4 file and get the mapping between variables
+
     Parameters
     ----------
     filename: str
@@ -388,7 +665,6 @@ def from_netCDF4(filename: str, **kwargs):
     kwargs.setdefault('yname', 'lat')
     kwargs.setdefault('varname', 'data')
     kwargs.setdefault('field_mapping', {})
-    # read data from netCDF4 file
     # Open the NetCDF4 file for reading
     if (kwargs['compression'] == 'gzip'):
         # read as in-memory (diskless) netCDF4 dataset
@@ -403,20 +679,6 @@ def from_netCDF4(filename: str, **kwargs):
     # Output NetCDF file information
     logging.info(fileID.filepath())
     logging.info(list(fileID.variables.keys()))
-    # create python dictionary for output variables and attributes
-    dinput = {}
-    dinput['attributes'] = {}
-    # get attributes for the file
-    for attr in ['title', 'description', 'projection']:
-        # try getting the attribute
-        try:
-            ncattr, = [s for s in fileID.ncattrs() if re.match(attr, s, re.I)]
-            dinput['attributes'][attr] = fileID.getncattr(ncattr)
-        except (ValueError, AttributeError):
-            pass
-    # list of attributes to attempt to retrieve from included variables
-    attributes_list = ['description', 'units', 'long_name', 'calendar',
-        'standard_name', 'grid_mapping', '_FillValue']
     # mapping between netCDF4 variable names and output names
     if not kwargs['field_mapping']:
         kwargs['field_mapping']['x'] = copy.copy(kwargs['xname'])
@@ -427,49 +689,172 @@ def from_netCDF4(filename: str, **kwargs):
             kwargs['field_mapping']['time'] = copy.copy(kwargs['timename'])
     # check if reading from root group or sub-group
     group = fileID.groups[kwargs['group']] if kwargs['group'] else fileID
+    # return the file object, group and field mapping
+    return (fileID, group, kwargs['field_mapping'])
+
+def _netCDF4_attributes(fileID, group, field_mapping: dict):
+    """
+    Get file and variable attributes from a netCDF4 file
+
+    Parameters
+    ----------
+    fileID: obj
+        open netCDF4 file object
+    group: obj
+        netCDF4 file object or variable group
+    field_mapping: dict
+        mapping between output variables and input netCDF4
+    """
+    attributes = {}
+    # get attributes for the file
+    for attr in ['title', 'description', 'projection']:
+        # try getting the attribute
+        try:
+            ncattr, = [s for s in fileID.ncattrs() if re.match(attr, s, re.I)]
+            attributes[attr] = fileID.getncattr(ncattr)
+        except (ValueError, AttributeError):
+            pass
+    # list of attributes to attempt to retrieve from included variables
+    attributes_list = ['description', 'units', 'long_name', 'calendar',
+        'standard_name', 'grid_mapping', '_FillValue']
     # for each variable
-    for key, nc in kwargs['field_mapping'].items():
-        # Getting the data from each NetCDF variable
-        dinput[key] = group.variables[nc][:]
+    for key, nc in field_mapping.items():
         # get attributes for the included variables
-        dinput['attributes'][key] = {}
+        attributes[key] = {}
         for attr in attributes_list:
             # try getting the attribute
             try:
                 ncattr, = [s for s in group.variables[nc].ncattrs()
                     if re.match(attr, s, re.I)]
-                dinput['attributes'][key][attr] = \
-                    group.variables[nc].getncattr(ncattr)
+                attributes[key][attr] = group.variables[nc].getncattr(ncattr)
             except (ValueError, AttributeError):
                 pass
     # get projection information if there is a grid_mapping attribute
-    if 'data' in dinput.keys() and 'grid_mapping' in dinput['attributes']['data'].keys():
+    if 'data' in attributes.keys() and 'grid_mapping' in attributes['data'].keys():
         # try getting the attribute
-        grid_mapping = dinput['attributes']['data']['grid_mapping']
+        grid_mapping = attributes['data']['grid_mapping']
         # get coordinate reference system attributes
-        dinput['attributes']['crs'] = {}
+        attributes['crs'] = {}
         for att_name in group[grid_mapping].ncattrs():
-            dinput['attributes']['crs'][att_name] = \
+            attributes['crs'][att_name] = \
                 group.variables[grid_mapping].getncattr(att_name)
         # get the spatial projection reference information from wkt
         # and overwrite the file-level projection attribute (if existing)
         osgeo.osr.UseExceptions()
         srs = osgeo.osr.SpatialReference()
-        srs.ImportFromWkt(dinput['attributes']['crs']['crs_wkt'])
-        dinput['attributes']['projection'] = srs.ExportToProj4()
+        srs.ImportFromWkt(attributes['crs']['crs_wkt'])
+        attributes['projection'] = srs.ExportToProj4()
+    # return the attributes
+    return attributes
+
+def from_HDF5(filename: str | pathlib.Path, **kwargs):
+    """
+    Read data from a HDF5 file
+
+    Parameters
+    ----------
+    filename: str
+        full path of input HDF5 file
+    compression: str or NoneType, default None
+        file compression type
+    group: str or NoneType, default None
+        netCDF4 variable group
+    timename: str, default 'time'
+        name for time-dimension variable
+    xname: str, default 'lon'
+        name for x-dimension variable
+    yname: str, default 'lat'
+        name for y-dimension variable
+    varname: str, default 'data'
+        name for data variable
+    field_mapping: dict, default {}
+        mapping between output variables and input HDF5
+    """
+    # read data from HDF5 file
+    fileID, group, field_mapping = _open_HDF5(filename, **kwargs)
+    # create python dictionary for output variables and attributes
+    dinput = {}
+    dinput['attributes'] = _HDF5_attributes(fileID, group, field_mapping)
+    # for each variable
+    for key, h5 in field_mapping.items():
+        # Getting the data from each HDF5 variable
+        dinput[key] = np.copy(group[h5][:])
     # convert to masked array if fill values
-    if 'data' in dinput.keys() and '_FillValue' in dinput['attributes']['data'].keys():
-        dinput['data'] = np.ma.asarray(dinput['data'])
-        dinput['data'].fill_value = dinput['attributes']['data']['_FillValue']
-        dinput['data'].mask = (dinput['data'].data == dinput['data'].fill_value)
-    # Closing the NetCDF file
+    _mask_fill_values(dinput)
+    # Closing the HDF5 file
     fileID.close()
     # return the spatial variables
     return dinput
 
-def from_HDF5(filename: str | pathlib.Path, **kwargs):
+def iter_HDF5(filename: str | pathlib.Path, chunk_size: int = 100000,
+        **kwargs
+    ):
     """
-    Read data from a HDF5 file
+    Iterate over chunks of drift data from a HDF5 file
+
+    Variables with the same leading dimension as the x-variable
+    are read in slices of ``chunk_size``, while all other mapped
+    variables are passed through with each chunk
+
+    Parameters
+    ----------
+    filename: str
+        full path of input HDF5 file
+    chunk_size: int, default 100000
+        maximum number of records in each chunk
+    compression: str or NoneType, default None
+        file compression type
+    group: str or NoneType, default None
+        netCDF4 variable group
+    timename: str, default 'time'
+        name for time-dimension variable
+    xname: str, default 'lon'
+        name for x-dimension variable
+    yname: str, default 'lat'
+        name for y-dimension variable
+    varname: str, default 'data'
+        name for data variable
+    field_mapping: dict, default {}
+        mapping between output variables and input HDF5
+
+    Yields
+    ------
+    dinput: dict
+        spatial variables for each chunk of records
+    """
+    # open HDF5 file
+    fileID, group, field_mapping = _open_HDF5(filename, **kwargs)
+    try:
+        # get attributes for the file and included variables
+        attributes = _HDF5_attributes(fileID, group, field_mapping)
+        # number of records in the file
+        n_records = group[field_mapping['x']].shape[0]
+        # read variables without a record dimension once
+        static = {}
+        for key, h5 in field_mapping.items():
+            shape = group[h5].shape
+            if not shape or (shape[0] != n_records):
+                static[key] = np.copy(group[h5][()])
+        # for each chunk of records
+        for i in range(0, n_records, chunk_size):
+            # create python dictionary for output variables and attributes
+            dinput = {}
+            dinput['attributes'] = copy.deepcopy(attributes)
+            for key, h5 in field_mapping.items():
+                if key in static:
+                    dinput[key] = static[key]
+                else:
+                    dinput[key] = group[h5][i:i+chunk_size]
+            # convert to masked array if fill values
+            _mask_fill_values(dinput)
+            yield dinput
+    finally:
+        # Closing the HDF5 file
+        fileID.close()
+
+def _open_HDF5(filename: str | pathlib.Path, **kwargs):
+    """
+    Open a HDF5 file and get the mapping between variables
 
     Parameters
     ----------
@@ -498,7 +883,6 @@ def from_HDF5(filename: str | pathlib.Path, **kwargs):
     kwargs.setdefault('yname', 'lat')
     kwargs.setdefault('varname', 'data')
     kwargs.setdefault('field_mapping', {})
-    # read data from HDF5 file
     # Open the HDF5 file for reading
     if (kwargs['compression'] == 'gzip'):
         # read gzip compressed file and extract into in-memory file object
@@ -519,19 +903,6 @@ def from_HDF5(filename: str | pathlib.Path, **kwargs):
     # Output HDF5 file information
     logging.info(fileID.filename)
     logging.info(list(fileID.keys()))
-    # create python dictionary for output variables and attributes
-    dinput = {}
-    dinput['attributes'] = {}
-    # get attributes for the file
-    for attr in ['title', 'description', 'projection']:
-        # try getting the attribute
-        try:
-            dinput['attributes'][attr] = fileID.attrs[attr]
-        except (KeyError, AttributeError):
-            pass
-    # list of attributes to attempt to retrieve from included variables
-    attributes_list = ['description', 'units', 'long_name', 'calendar',
-        'standard_name', 'grid_mapping', '_FillValue']
     # mapping between HDF5 variable names and output names
     if not kwargs['field_mapping']:
         kwargs['field_mapping']['x'] = copy.copy(kwargs['xname'])
@@ -542,40 +913,73 @@ def from_HDF5(filename: str | pathlib.Path, **kwargs):
             kwargs['field_mapping']['time'] = copy.copy(kwargs['timename'])
     # check if reading from root group or sub-group
     group = fileID[kwargs['group']] if kwargs['group'] else fileID
+    # return the file object, group and field mapping
+    return (fileID, group, kwargs['field_mapping'])
+
+def _HDF5_attributes(fileID, group, field_mapping: dict):
+    """
+    Get file and variable attributes from a HDF5 file
+
+    Parameters
+    ----------
+    fileID: obj
+        open HDF5 file object
+    group: obj
+        HDF5 file object or variable group
+    field_mapping: dict
+        mapping between output variables and input HDF5
+    """
+    attributes = {}
+    # get attributes for the file
+    for attr in ['title', 'description', 'projection']:
+        # try getting the attribute
+        try:
+            attributes[attr] = fileID.attrs[attr]
+        except (KeyError, AttributeError):
+            pass
+    # list of attributes to attempt to retrieve from included variables
+    attributes_list = ['description', 'units', 'long_name', 'calendar',
+        'standard_name', 'grid_mapping', '_FillValue']
     # for each variable
-    for key, h5 in kwargs['field_mapping'].items():
-        # Getting the data from each HDF5 variable
-        dinput[key] = np.copy(group[h5][:])
+    for key, h5 in field_mapping.items():
         # get attributes for the included variables
-        dinput['attributes'][key] = {}
+        attributes[key] = {}
         for attr in attributes_list:
             # try getting the attribute
             try:
-                dinput['attributes'][key][attr] = group[h5].attrs[attr]
+                attributes[key][attr] = group[h5].attrs[attr]
             except (KeyError, AttributeError):
                 pass
     # get projection information if there is a grid_mapping attribute
-    if 'data' in dinput.keys() and 'grid_mapping' in dinput['attributes']['data'].keys():
+    if 'data' in attributes.keys() and 'grid_mapping' in attributes['data'].keys():
         # try getting the attribute
-        grid_mapping = dinput['attributes']['data']['grid_mapping']
+        grid_mapping = attributes['data']['grid_mapping']
         # get coordinate reference system attributes
-        dinput['attributes']['crs'] = {}
+        attributes['crs'] = {}
         for att_name, att_val in group[grid_mapping].attrs.items():
-            dinput['attributes']['crs'][att_name] = att_val
+            attributes['crs'][att_name] = att_val
         # get the spatial projection reference information from wkt
         # and overwrite the file-level projection attribute (if existing)
         osgeo.osr.UseExceptions()
         srs = osgeo.osr.SpatialReference()
-        srs.ImportFromWkt(dinput['attributes']['crs']['crs_wkt'])
-        dinput['attributes']['projection'] = srs.ExportToProj4()
-    # convert to masked array if fill values
+        srs.ImportFromWkt(attributes['crs']['crs_wkt'])
+        attributes['projection'] = srs.ExportToProj4()
+    # return the attributes
+    return attributes
+
+def _mask_fill_values(dinput: dict):
+    """
+    Convert the data variable to a masked array if containing fill values
+
+    Parameters
+    ----------
+    dinput: dict
+        spatial variables and attributes
+    """
     if 'data' in dinput.keys() and '_FillValue' in dinput['attributes']['data'].keys():
         dinput['data'] = np.ma.asarray(dinput['data'])
         dinput['data'].fill_value = dinput['attributes']['data']['_FillValue']
         dinput['data'].mask = (dinput['data'].data == dinput['data'].fill_value)
-    # Closing the HDF5 file
-    fileID.close()
-    # return the spatial variables
     return dinput
 
 def from_geotiff(filename: str, **kwargs):
@@ -592,46 +996,17 @@ def from_geotiff(filename: str, **kwargs):
         extent of the file to read: ``[xmin, xmax, ymin, ymax]``
     """
     # set default keyword arguments
-    kwargs.setdefault('compression', None)
     kwargs.setdefault('bounds', None)
     # Open the geotiff file for reading
-    if (kwargs['compression'] == 'gzip'):
-        # read as GDAL gzip virtual geotiff dataset
-        mmap_name = f"/vsigzip/{str(case_insensitive_filename(filename))}"
-        ds = osgeo.gdal.Open(mmap_name)
-    elif (kwargs['compression'] == 'bytes'):
-        # read as GDAL memory-mapped (diskless) geotiff dataset
-        mmap_name = f"/vsimem/{uuid.uuid4().hex}"
-        osgeo.gdal.FileFromMemBuffer(mmap_name, filename.read())
-        ds = osgeo.gdal.Open(mmap_name)
-    else:
-        # read geotiff dataset
-        ds = osgeo.gdal.Open(str(case_insensitive_filename(filename)),
-            osgeo.gdalconst.GA_ReadOnly)
-    # print geotiff file if verbose
-    logging.info(str(filename))
+    ds = _open_geotiff(filename, **kwargs)
     # create python dictionary for output variables and attributes
     dinput = {}
-    dinput['attributes'] = {c:dict() for c in ['x', 'y', 'data']}
-    # get the spatial projection reference information
-    srs = ds.GetSpatialRef()
-    dinput['attributes']['projection'] = srs.ExportToProj4()
-    dinput['attributes']['wkt'] = srs.ExportToWkt()
+    dinput['attributes'], x, y = _geotiff_attributes(ds)
     # get dimensions
-    xsize = ds.RasterXSize
-    ysize = ds.RasterYSize
     bsize = ds.RasterCount
     # get geotiff info
     info_geotiff = ds.GetGeoTransform()
-    dinput['attributes']['spacing'] = (info_geotiff[1], info_geotiff[5])
-    # calculate image extents
-    xmin = info_geotiff[0]
-    ymax = info_geotiff[3]
-    xmax = xmin + (xsize-1)*info_geotiff[1]
-    ymin = ymax + (ysize-1)*info_geotiff[5]
-    # x and y pixel center coordinates (converted from upper left)
-    x = xmin + info_geotiff[1]/2.0 + np.arange(xsize)*info_geotiff[1]
-    y = ymax + info_geotiff[5]/2.0 + np.arange(ysize)*info_geotiff[5]
+    xmin, xmax, ymin, ymax = dinput['attributes']['extent']
     # if reducing to specified bounds
     if kwargs['bounds'] is not None:
         # reduced x and y limits
@@ -664,19 +1039,157 @@ def from_geotiff(filename: str, **kwargs):
     # set default time to zero for each band
     dinput.setdefault('time', np.zeros((bsize)))
     # check if image has fill values
+    _mask_geotiff(dinput, ds.GetRasterBand(1).GetNoDataValue())
+    # close the dataset
+    ds = None
+    # return the spatial variables
+    return dinput
+
+def iter_geotiff(filename: str, block_size: int | tuple = 512, **kwargs):
+    """
+    Iterate over blocks of a geotiff file
+
+    Parameters
+    ----------
+    filename: str
+        full path of input geotiff file
+    block_size: int or tuple, default 512
+        number of rows and columns in each block
+    compression: str or NoneType, default None
+        file compression type
+
+    Yields
+    ------
+    dinput: dict
+        spatial variables for each block with the
+        ``window`` of the block: ``(xoff, yoff, xcount, ycount)``
+    """
+    # Open the geotiff file for reading
+    ds = _open_geotiff(filename, **kwargs)
+    try:
+        # get attributes and pixel center coordinates of the image
+        attributes, x, y = _geotiff_attributes(ds)
+        # get dimensions
+        xsize = ds.RasterXSize
+        ysize = ds.RasterYSize
+        bsize = ds.RasterCount
+        fill_value = ds.GetRasterBand(1).GetNoDataValue()
+        # number of rows and columns in each block
+        by, bx = np.broadcast_to(block_size, (2,))
+        # for each block of the image
+        for yoffset in range(0, ysize, by):
+            ycount = min(by, ysize - yoffset)
+            for xoffset in range(0, xsize, bx):
+                xcount = min(bx, xsize - xoffset)
+                # create python dictionary for output variables
+                dinput = {}
+                dinput['attributes'] = copy.deepcopy(attributes)
+                dinput['x'] = x[xoffset:xoffset + xcount]
+                dinput['y'] = y[yoffset:yoffset + ycount]
+                # read block of image with GDAL
+                dinput['data'] = ds.ReadAsArray(xoff=xoffset, yoff=yoffset,
+                    xsize=xcount, ysize=ycount)
+                # set default time to zero for each band
+                dinput['time'] = np.zeros((bsize))
+                dinput['window'] = (xoffset, yoffset, xcount, ycount)
+                # check if image has fill values
+                _mask_geotiff(dinput, fill_value)
+                yield dinput
+    finally:
+        # close the dataset
+        ds = None
+
+def _open_geotiff(filename: str, **kwargs):
+    """
+    Open a geotiff file with GDAL
+
+    Parameters
+    ----------
+    filename: str
+        full path of input geotiff file
+    compression: str or NoneType, default None
+        file compression type
+    """
+    # set default keyword arguments
+    kwargs.setdefault('compression', None)
+    # Open the geotiff file for reading
+    if (kwargs['compression'] == 'gzip'):
+        # read as GDAL gzip virtual geotiff dataset
+        mmap_name = f"/vsigzip/{str(case_insensitive_filename(filename))}"
+        ds = osgeo.gdal.Open(mmap_name)
+    elif (kwargs['compression'] == 'bytes'):
+        # read as GDAL memory-mapped (diskless) geotiff dataset
+        mmap_name = f"/vsimem/{uuid.uuid4().hex}"
+        osgeo.gdal.FileFromMemBuffer(mmap_name, filename.read())
+        ds = osgeo.gdal.Open(mmap_name)
+    else:
+        # read geotiff dataset
+        ds = osgeo.gdal.Open(str(case_insensitive_filename(filename)),
+            osgeo.gdalconst.GA_ReadOnly)
+    # print geotiff file if verbose
+    logging.info(str(filename))
+    return ds
+
+def _geotiff_attributes(ds):
+    """
+    Get attributes and pixel center coordinates of a geotiff dataset
+
+    Parameters
+    ----------
+    ds: obj
+        open GDAL dataset
+
+    Returns
+    -------
+    attributes: dict
+        image attributes
+    x: np.ndarray
+        x pixel center coordinates
+    y: np.ndarray
+        y pixel center coordinates
+    """
+    attributes = {c:dict() for c in ['x', 'y', 'data']}
+    # get the spatial projection reference information
+    srs = ds.GetSpatialRef()
+    attributes['projection'] = srs.ExportToProj4()
+    attributes['wkt'] = srs.ExportToWkt()
+    # get dimensions
+    xsize = ds.RasterXSize
+    ysize = ds.RasterYSize
+    # get geotiff info
+    info_geotiff = ds.GetGeoTransform()
+    attributes['spacing'] = (info_geotiff[1], info_geotiff[5])
+    # calculate image extents
+    xmin = info_geotiff[0]
+    ymax = info_geotiff[3]
+    xmax = xmin + (xsize-1)*info_geotiff[1]
+    ymin = ymax + (ysize-1)*info_geotiff[5]
+    attributes['extent'] = (xmin, xmax, ymin, ymax)
+    # x and y pixel center coordinates (converted from upper left)
+    x = xmin + info_geotiff[1]/2.0 + np.arange(xsize)*info_geotiff[1]
+    y = ymax + info_geotiff[5]/2.0 + np.arange(ysize)*info_geotiff[5]
+    return (attributes, x, y)
+
+def _mask_geotiff(dinput: dict, fill_value: float | None = None):
+    """
+    Convert geotiff image data to a masked array
+
+    Parameters
+    ----------
+    dinput: dict
+        spatial variables
+    fill_value: float or NoneType, default None
+        invalid value of the image
+    """
     dinput['data'] = np.ma.asarray(dinput['data'])
     dinput['data'].mask = np.zeros_like(dinput['data'], dtype=bool)
-    if ds.GetRasterBand(1).GetNoDataValue():
+    if fill_value:
         # mask invalid values
-        dinput['data'].fill_value = ds.GetRasterBand(1).GetNoDataValue()
+        dinput['data'].fill_value = fill_value
         # create mask array for bad values
         dinput['data'].mask[:] = (dinput['data'].data == dinput['data'].fill_value)
         # set attribute for fill value
         dinput['attributes']['data']['_FillValue'] = dinput['data'].fill_value
-    # close the dataset
-    ds = None
-    # return the spatial variables
-    return dinput
 
 def from_parquet(filename: str, **kwargs):
     """
@@ -706,12 +1219,134 @@ def from_parquet(filename: str, **kwargs):
     # reset the dataframe index if not a range index
     if not isinstance(dinput.index, pd.RangeIndex):
         dinput.reset_index(inplace=True, names=kwargs['index'])
+    # get parquet file metadata
+    metadata = pyarrow.parquet.read_metadata(filename).metadata
+    # output parquet file information
+    attr, primary_column, encoding = _parquet_attributes(metadata,
+        primary_column=kwargs['primary_column'],
+        geometry_encoding=kwargs['geometry_encoding'])
+    # extract x and y coordinates
+    if (encoding == 'WKB') and (primary_column in dinput.keys()):
+        # set as geoparquet file
+        attr['geoparquet'] = True
+        # decode geometry column from WKB
+        geometry = shapely.from_wkb(dinput[primary_column].values)
+        dinput['x'] = shapely.get_x(geometry)
+        dinput['y'] = shapely.get_y(geometry)
+    # remap columns to default names
+    if kwargs['columns'] is not None:
+        field_mapping = default_field_mapping(kwargs['columns'])
+        remap = inverse_mapping(field_mapping)
+        dinput.rename(columns=remap, inplace=True)
+    # return the data and attributes
+    dinput.attrs = copy.copy(attr)
+    return dinput
+
+def iter_parquet(filename: str, chunk_size: int = 100000, **kwargs):
+    """
+    Iterate over record batches from a parquet file
+
+    Point geometries in WKB-encoded (geo)parquet files are decoded
+    into x and y coordinates without creating shapely objects
+
+    Parameters
+    ----------
+    filename: str
+        full path of input parquet file
+    chunk_size: int, default 100000
+        maximum number of rows in each record batch
+    index: str, default 'time'
+        name of index column
+    columns: list or None, default None
+        column names of parquet file
+    primary_column: str, default 'geometry'
+        default geometry column in geoparquet files
+    geometry_encoding: str, default 'WKB'
+        default encoding for geoparquet files
+
+    Yields
+    ------
+    dinput: dict
+        spatial variables for each record batch
+    """
+    # set default keyword arguments
+    kwargs.setdefault('index', 'time')
+    kwargs.setdefault('columns', None)
+    kwargs.setdefault('primary_column', 'geometry')
+    kwargs.setdefault('geometry_encoding', 'WKB')
+    filename = case_insensitive_filename(filename)
+    logging.info(str(filename))
+    # open input parquet file
+    parquet_file = pyarrow.parquet.ParquetFile(filename)
+    try:
+        # output parquet file information
+        attr, primary_column, encoding = _parquet_attributes(
+            parquet_file.metadata.metadata,
+            primary_column=kwargs['primary_column'],
+            geometry_encoding=kwargs['geometry_encoding'])
+        # check if parquet file contains pandas index columns
+        index_columns = [c for c in
+            attr.get('pandas', {}).get('index_columns', [])
+            if isinstance(c, str)]
+        # check if reading geometry from WKB encoded column
+        geoparquet = (encoding == 'WKB') and \
+            (primary_column in parquet_file.schema_arrow.names)
+        attr['geoparquet'] = geoparquet
+        # mapping from parquet columns to default names
+        if kwargs['columns'] is not None:
+            field_mapping = default_field_mapping(kwargs['columns'])
+            remap = inverse_mapping(field_mapping)
+        else:
+            remap = {}
+        # for each record batch
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            dinput = {}
+            for name, column in zip(batch.schema.names, batch.columns):
+                if geoparquet and (name == primary_column):
+                    # decode x and y coordinates from WKB geometry
+                    dinput['x'], dinput['y'] = _from_wkb_points(column)
+                    continue
+                # rename index columns
+                key = kwargs['index'] if (name in index_columns) else name
+                # remap columns to default names
+                key = remap.get(key, key)
+                dinput[key] = column.to_numpy(zero_copy_only=False)
+            # add attributes for batch
+            dinput['attributes'] = copy.deepcopy(attr)
+            yield dinput
+    finally:
+        # close the parquet file
+        parquet_file.close()
+
+def _parquet_attributes(metadata: dict, **kwargs):
+    """
+    Decode attributes from parquet file metadata
+
+    Parameters
+    ----------
+    metadata: dict
+        parquet file key-value metadata
+    primary_column: str, default 'geometry'
+        default geometry column in geoparquet files
+    geometry_encoding: str, default 'WKB'
+        default encoding for geoparquet files
+
+    Returns
+    -------
+    attr: dict
+        decoded parquet file attributes
+    primary_column: str
+        geometry column in geoparquet files
+    encoding: str
+        encoding for geoparquet files
+    """
+    # set default keyword arguments
+    kwargs.setdefault('primary_column', 'geometry')
+    kwargs.setdefault('geometry_encoding', 'WKB')
     # output parquet file information
     attr = {}
-    # get parquet file metadata
-    metadata = pyarrow.parquet.read_metadata(filename).metadata
     # decode parquet metadata from JSON
-    for att_name, val in metadata.items():
+    for att_name, val in (metadata or {}).items():
         try:
             att_val = json.loads(val.decode('utf-8'))
             attr[att_name.decode('utf-8')] = att_val
@@ -724,13 +1359,17 @@ def from_parquet(filename: str, **kwargs):
     if 'geo' in attr.keys():
         # extract crs and encoding from geoparquet metadata
         primary_column = attr['geo']['primary_column']
-        crs_metadata = attr['geo']['columns'][primary_column]['crs']
+        crs_metadata = attr['geo']['columns'][primary_column].get('crs')
         encoding = attr['geo']['columns'][primary_column]['encoding']
         attr['geometry_encoding'] = encoding
         # create spatial reference object from PROJJSON
+        # (default coordinate reference system is OGC:CRS84)
         osgeo.osr.UseExceptions()
         srs = osgeo.osr.SpatialReference()
-        srs.SetFromUserInput(json.dumps(crs_metadata))
+        if crs_metadata is None:
+            srs.SetFromUserInput('OGC:CRS84')
+        else:
+            srs.SetFromUserInput(json.dumps(crs_metadata))
         # add projection information to attributes
         attr['projection'] = srs.ExportToProj4()
         attr['wkt'] = srs.ExportToWkt()
@@ -744,22 +1383,141 @@ def from_parquet(filename: str, **kwargs):
         # add projection information to attributes
         attr['projection'] = srs.ExportToProj4()
         attr['wkt'] = srs.ExportToWkt()
-    # extract x and y coordinates
-    if (encoding == 'WKB') and (primary_column in dinput.keys()):
-        # set as geoparquet file
-        attr['geoparquet'] = True
-        # decode geometry column from WKB
-        geometry = shapely.from_wkb(dinput[primary_column].values)
-        dinput['x'] = shapely.get_x(geometry)
-        dinput['y'] = shapely.get_y(geometry)
-    # remap columns to default names
-    if kwargs['columns'] is not None:
-        field_mapping = default_field_mapping(kwargs['columns'])
-        remap = inverse_mapping(field_mapping)
-        dinput.rename(columns=remap, inplace=True)
-    # return the data and attributes
-    dinput.attrs = copy.copy(attr)
-    return dinput
+    # return the attributes and geometry information
+    return (attr, primary_column, encoding)
+
+# PURPOSE: data type of 2D well-known binary (WKB) point geometries
+def _wkb_point_dtype(byteorder: str = '<'):
+    return np.dtype([('byteorder', 'u1'), ('type', f'{byteorder}u4'),
+        ('x', f'{byteorder}f8'), ('y', f'{byteorder}f8')])
+
+def _from_wkb_points(geometry):
+    """
+    Vectorized decoding of x and y coordinates from
+    well-known binary (WKB) point geometries
+
+    Parameters
+    ----------
+    geometry: obj
+        ``pyarrow`` binary array of WKB geometries
+
+    Returns
+    -------
+    x: np.ndarray
+        x-coordinates of point geometries
+    y: np.ndarray
+        y-coordinates of point geometries
+    """
+    # combine chunked arrays
+    if isinstance(geometry, pyarrow.ChunkedArray):
+        geometry = geometry.combine_chunks()
+    n = len(geometry)
+    # 2D point geometries in WKB are fixed-size records
+    itemsize = _wkb_point_dtype().itemsize
+    # check if array can be decoded directly from its buffers
+    if pyarrow.types.is_large_binary(geometry.type):
+        offset_type = np.int64
+    elif pyarrow.types.is_binary(geometry.type):
+        offset_type = np.int32
+    else:
+        offset_type = None
+    # get offsets and data buffers of the binary array
+    if (offset_type is not None) and (geometry.null_count == 0):
+        _, offset_buffer, data_buffer = geometry.buffers()
+        offsets = np.frombuffer(offset_buffer, dtype=offset_type)
+        offsets = offsets[geometry.offset:geometry.offset + n + 1]
+        data = np.frombuffer(data_buffer, dtype=np.uint8)
+    # decode if all geometries are 2D points
+    if (offset_type is not None) and (geometry.null_count == 0) and \
+        np.all(np.diff(offsets) == itemsize):
+        # gather the bytes of each record
+        indices = offsets[:-1, None] + np.arange(itemsize)
+        records = data[indices]
+        x = np.zeros((n))
+        y = np.zeros((n))
+        valid = np.zeros((n), dtype=bool)
+        # decode little- and big-endian records
+        for flag, byteorder in [(1, '<'), (0, '>')]:
+            i, = np.nonzero(records[:, 0] == flag)
+            points = np.ascontiguousarray(records[i]).view(
+                _wkb_point_dtype(byteorder)).ravel()
+            # only decode point geometries (type 1)
+            valid[i] = (points['type'] == 1)
+            x[i] = points['x']
+            y[i] = points['y']
+        if np.all(valid):
+            return (x, y)
+    # decode geometries using shapely
+    geometry = shapely.from_wkb(geometry.to_numpy(zero_copy_only=False))
+    return (shapely.get_x(geometry), shapely.get_y(geometry))
+
+def _to_wkb_points(x: np.ndarray, y: np.ndarray):
+    """
+    Vectorized encoding of x and y coordinates to
+    well-known binary (WKB) point geometries
+
+    Parameters
+    ----------
+    x: np.ndarray
+        x-coordinates of point geometries
+    y: np.ndarray
+        y-coordinates of point geometries
+
+    Returns
+    -------
+    geometry: obj
+        ``pyarrow`` binary array of WKB geometries
+    """
+    n = len(x)
+    # allocate for little-endian 2D point records
+    points = np.zeros((n), dtype=_wkb_point_dtype('<'))
+    points['byteorder'] = 1
+    points['type'] = 1
+    points['x'] = x
+    points['y'] = y
+    # build binary array from offsets and data buffers
+    itemsize = points.dtype.itemsize
+    offsets = itemsize*np.arange(n + 1, dtype=np.int64)
+    if (offsets[-1] < np.iinfo(np.int32).max):
+        binary_type = pyarrow.binary()
+        offsets = offsets.astype(np.int32)
+    else:
+        binary_type = pyarrow.large_binary()
+    return pyarrow.Array.from_buffers(binary_type, n, [None,
+        pyarrow.py_buffer(offsets), pyarrow.py_buffer(points.view(np.uint8))])
+
+def read_attributes(filename: str | pathlib.Path, format: str):
+    """
+    Read the file-level attributes of a netCDF4, HDF5 or geotiff file
+
+    Parameters
+    ----------
+    filename: str or pathlib.Path
+        full path of input file
+    format: str
+        format of input file
+
+    Returns
+    -------
+    attributes: dict
+        file-level attributes
+    """
+    filename = case_insensitive_filename(filename)
+    if (format == 'netCDF4'):
+        with netCDF4.Dataset(filename, 'r') as fileID:
+            attributes = {k:fileID.getncattr(k) for k in fileID.ncattrs()}
+    elif (format == 'HDF5'):
+        with h5py.File(filename, 'r') as fileID:
+            attributes = dict(fileID.attrs.items())
+    elif format in ('GTiff', 'cog'):
+        ds = _open_geotiff(filename)
+        attributes, x, y = _geotiff_attributes(ds)
+        # image dimensions
+        attributes['shape'] = (ds.RasterYSize, ds.RasterXSize, ds.RasterCount)
+        ds = None
+    else:
+        raise ValueError(f'Invalid format {format}')
+    return attributes
 
 def to_file(
         output: dict,
@@ -895,6 +1653,29 @@ def to_netCDF4(
             - ``'time series'``
             - ``'drift'``
             - ``'grid'``
+    offset: int or NoneType, default None
+        Starting time index for writing a chunk of drift or grid data
+
+            - ``None``: write the complete variables
+            - ``int``: write along an unlimited time dimension
+    size: int or NoneType, default None
+        Total number of time records to preallocate when writing chunks
+    chunks: dict or NoneType, default None
+        Chunk sizes for each named dimension of the output variables
+    compression: str or NoneType, default 'gzip'
+        Compression filter for output variables
+
+            - ``None``: no compression
+            - ``'gzip'``: zlib compression
+            - ``'lz4'``: blosc compression with LZ4
+            - ``'blosc'``: blosc compression with BloscLZ
+            - ``'zstd'``: Zstandard compression
+
+        Filters other than gzip require the netCDF4 compression plugins
+    complevel: int or NoneType, default None
+        Compression level for output variables
+    shuffle: bool, default True
+        Apply the byte shuffle filter before compression
     """
     # default arguments
     kwargs.setdefault('mode', 'w')
@@ -902,6 +1683,12 @@ def to_netCDF4(
     # opening NetCDF file for writing
     filename = pathlib.Path(filename).expanduser().absolute()
     fileID = netCDF4.Dataset(filename, kwargs['mode'], format="NETCDF4")
+    # verify the compression filters before writing variables
+    try:
+        _netCDF4_filters(fileID, **kwargs)
+    except ValueError:
+        fileID.close()
+        raise
     if kwargs['data_type'] in ('drift',):
         kwargs.pop('data_type')
         _drift_netCDF4(fileID, output, attributes, **kwargs)
@@ -941,23 +1728,55 @@ def _drift_netCDF4(fileID, output: dict, attributes: dict, **kwargs):
         python dictionary of output attributes
     """
 
+    # default arguments
+    kwargs.setdefault('offset', None)
+    kwargs.setdefault('size', None)
+    kwargs.setdefault('chunks', None)
+    # compression filters for output variables
+    filters = _netCDF4_filters(fileID, **kwargs)
+    # number of points in the output variables
+    n_time = len(np.atleast_1d(output['time']))
     # Defining the NetCDF dimensions
-    fileID.createDimension('time', len(np.atleast_1d(output['time'])))
+    if (kwargs['offset'] is None):
+        fileID.createDimension('time', n_time)
+    elif 'time' not in fileID.dimensions:
+        # use an unlimited dimension when writing chunks
+        # or preallocate the total number of records
+        fileID.createDimension('time', kwargs['size'])
+    # slice for writing data along the time dimension
+    if (kwargs['offset'] is None):
+        indices = slice(None)
+        chunks = kwargs['chunks']
+    else:
+        indices = slice(kwargs['offset'], kwargs['offset'] + n_time)
+        chunks = kwargs['chunks'] or dict(time=n_time)
+    chunksizes = _netCDF4_chunks(fileID, ('time',), chunks)
     # defining the NetCDF variables
     nc = {}
     for key, val in output.items():
-        if key in fileID.variables:
+        if key in fileID.variables and (kwargs['offset'] is not None):
+            # append the chunk to the existing variable
+            nc[key] = fileID.variables[key]
+            if nc[key].dimensions == ('time',):
+                nc[key][indices] = val
+            continue
+        elif key in fileID.variables:
             nc[key] = fileID.variables[key]
         elif '_FillValue' in attributes[key].keys():
             nc[key] = fileID.createVariable(key, val.dtype, ('time',),
-                fill_value=attributes[key]['_FillValue'], zlib=True)
+                fill_value=attributes[key]['_FillValue'],
+                chunksizes=chunksizes, **filters)
             attributes[key].pop('_FillValue')
         elif val.shape:
-            nc[key] = fileID.createVariable(key, val.dtype, ('time',))
+            nc[key] = fileID.createVariable(key, val.dtype, ('time',),
+                chunksizes=chunksizes, **filters)
         else:
             nc[key] = fileID.createVariable(key, val.dtype, ())
         # filling NetCDF variables
-        nc[key][:] = val
+        if val.shape:
+            nc[key][indices] = val
+        else:
+            nc[key][:] = val
         # Defining attributes for variable
         for att_name, att_val in attributes[key].items():
             nc[key].setncattr(att_name, att_val)
@@ -975,6 +1794,12 @@ def _grid_netCDF4(fileID, output: dict, attributes: dict, **kwargs):
     attributes: dict
         python dictionary of output attributes
     """
+    # default arguments
+    kwargs.setdefault('offset', None)
+    kwargs.setdefault('size', None)
+    kwargs.setdefault('chunks', None)
+    # compression filters for output variables
+    filters = _netCDF4_filters(fileID, **kwargs)
     # output data fields
     dimensions = ['time', 'lon', 'lat', 't', 'x', 'y']
     crs = ['crs', 'crs_wkt', 'crs_proj4', 'projection']
@@ -982,32 +1807,73 @@ def _grid_netCDF4(fileID, output: dict, attributes: dict, **kwargs):
     # Defining the NetCDF dimensions
     reference_fields = [v for v in fields if output[v].ndim == 3]
     ny, nx, nt = output[reference_fields[0]].shape
-    fileID.createDimension('y', ny)
-    fileID.createDimension('x', nx)
-    fileID.createDimension('time', nt)
+    if (kwargs['offset'] is None):
+        fileID.createDimension('y', ny)
+        fileID.createDimension('x', nx)
+        fileID.createDimension('time', nt)
+    elif 'time' not in fileID.dimensions:
+        # use an unlimited time dimension when writing time slices
+        # or preallocate the total number of time slices
+        fileID.createDimension('y', ny)
+        fileID.createDimension('x', nx)
+        fileID.createDimension('time', kwargs['size'])
+    # chunk sizes for each variable dimension
+    chunksizes = {}
+    for dims in [('y','x','time'), ('y','x'), ('y',), ('x',), ('time',)]:
+        chunksizes[dims] = _netCDF4_chunks(fileID, dims, kwargs['chunks'])
+    # slice for writing data along the time dimension
+    if (kwargs['offset'] is None):
+        indices = slice(None)
+    else:
+        indices = slice(kwargs['offset'], kwargs['offset'] + nt)
     # defining the NetCDF variables
     nc = {}
     for key, val in output.items():
-        if key in fileID.variables:
+        if key in fileID.variables and (kwargs['offset'] is not None):
+            # append the time slices to the existing variable
+            nc[key] = fileID.variables[key]
+            if (nc[key].dimensions == ('y', 'x', 'time')):
+                nc[key][:,:,indices] = val
+            elif (nc[key].dimensions == ('time',)):
+                nc[key][indices] = val
+            continue
+        elif (kwargs['offset'] is not None) and (key == 'time'):
+            # create time variable along the unlimited dimension
+            nc[key] = fileID.createVariable(key, val.dtype, ('time',),
+                chunksizes=chunksizes[('time',)])
+            nc[key][indices] = val
+            for att_name, att_val in attributes[key].items():
+                nc[key].setncattr(att_name, att_val)
+            continue
+        elif key in fileID.variables:
             nc[key] = fileID.variables[key]
         elif '_FillValue' in attributes[key].keys():
             nc[key] = fileID.createVariable(key, val.dtype, ('y', 'x', 'time'),
-                fill_value=attributes[key]['_FillValue'], zlib=True)
+                fill_value=attributes[key]['_FillValue'],
+                chunksizes=chunksizes[('y','x','time')], **filters)
             attributes[key].pop('_FillValue')
         elif (val.ndim == 3):
-            nc[key] = fileID.createVariable(key, val.dtype, ('y', 'x', 'time'))
+            nc[key] = fileID.createVariable(key, val.dtype, ('y', 'x', 'time'),
+                chunksizes=chunksizes[('y','x','time')], **filters)
         elif (val.ndim == 2):
-            nc[key] = fileID.createVariable(key, val.dtype, ('y', 'x'))
+            nc[key] = fileID.createVariable(key, val.dtype, ('y', 'x'),
+                chunksizes=chunksizes[('y','x')], **filters)
         elif val.shape and (len(val) == ny):
-            nc[key] = fileID.createVariable(key, val.dtype, ('y',))
+            nc[key] = fileID.createVariable(key, val.dtype, ('y',),
+                chunksizes=chunksizes[('y',)])
         elif val.shape and (len(val) == nx):
-            nc[key] = fileID.createVariable(key, val.dtype, ('x',))
+            nc[key] = fileID.createVariable(key, val.dtype, ('x',),
+                chunksizes=chunksizes[('x',)])
         elif val.shape and (len(val) == nt):
-            nc[key] = fileID.createVariable(key, val.dtype, ('time',))
+            nc[key] = fileID.createVariable(key, val.dtype, ('time',),
+                chunksizes=chunksizes[('time',)])
         else:
             nc[key] = fileID.createVariable(key, val.dtype, ())
         # filling NetCDF variables
-        nc[key][:] = val
+        if (val.ndim == 3):
+            nc[key][:,:,indices] = val
+        else:
+            nc[key][:] = val
         # Defining attributes for variable
         for att_name, att_val in attributes[key].items():
             nc[key].setncattr(att_name, att_val)
@@ -1025,6 +1891,10 @@ def _time_series_netCDF4(fileID, output: dict, attributes: dict, **kwargs):
     attributes: dict
         python dictionary of output attributes
     """
+    # default arguments
+    kwargs.setdefault('chunks', None)
+    # compression filters for output variables
+    filters = _netCDF4_filters(fileID, **kwargs)
     # output data fields
     dimensions = ['time', 'lon', 'lat', 't', 'x', 'y']
     crs = ['crs', 'crs_wkt', 'crs_proj4', 'projection']
@@ -1034,6 +1904,10 @@ def _time_series_netCDF4(fileID, output: dict, attributes: dict, **kwargs):
     nstation, nt = output[reference_fields[0]].shape
     fileID.createDimension('station', nstation)
     fileID.createDimension('time', nt)
+    # chunk sizes for each variable dimension
+    chunksizes = {}
+    for dims in [('station','time'), ('station',), ('time',)]:
+        chunksizes[dims] = _netCDF4_chunks(fileID, dims, kwargs['chunks'])
     # defining the NetCDF variables
     nc = {}
     for key, val in output.items():
@@ -1041,14 +1915,18 @@ def _time_series_netCDF4(fileID, output: dict, attributes: dict, **kwargs):
             nc[key] = fileID.variables[key]
         elif '_FillValue' in attributes[key].keys():
             nc[key] = fileID.createVariable(key, val.dtype, ('station', 'time'),
-                fill_value=attributes[key]['_FillValue'], zlib=True)
+                fill_value=attributes[key]['_FillValue'],
+                chunksizes=chunksizes[('station','time')], **filters)
             attributes[key].pop('_FillValue')
         elif (val.ndim == 2):
-            nc[key] = fileID.createVariable(key, val.dtype, ('station', 'time'))
+            nc[key] = fileID.createVariable(key, val.dtype, ('station', 'time'),
+                chunksizes=chunksizes[('station','time')], **filters)
         elif val.shape and (len(val) == nt):
-            nc[key] = fileID.createVariable(key, val.dtype, ('time',))
+            nc[key] = fileID.createVariable(key, val.dtype, ('time',),
+                chunksizes=chunksizes[('time',)])
         elif val.shape and (len(val) == nstation):
-            nc[key] = fileID.createVariable(key, val.dtype, ('station',))
+            nc[key] = fileID.createVariable(key, val.dtype, ('station',),
+                chunksizes=chunksizes[('station',)])
         else:
             nc[key] = fileID.createVariable(key, val.dtype, ())
         # filling NetCDF variables
@@ -1057,6 +1935,89 @@ def _time_series_netCDF4(fileID, output: dict, attributes: dict, **kwargs):
         for att_name, att_val in attributes[key].items():
             nc[key].setncattr(att_name, att_val)
 
+def _netCDF4_chunks(fileID, dimensions: tuple, chunks: dict | None):
+    """
+    Get the chunk shape of a netCDF4 variable
+
+    Parameters
+    ----------
+    fileID: obj
+        open netCDF4 file object
+    dimensions: tuple
+        dimension names of the variable
+    chunks: dict or NoneType
+        chunk sizes for each named dimension
+
+    Returns
+    -------
+    chunksizes: tuple or NoneType
+        chunk shape of the variable
+    """
+    # use the default chunking if not set for all dimensions
+    if not chunks or not all(dim in chunks for dim in dimensions):
+        return None
+    chunksizes = []
+    for dim in dimensions:
+        # chunks cannot be larger than fixed dimensions
+        if fileID.dimensions[dim].isunlimited():
+            chunksizes.append(int(chunks[dim]))
+        else:
+            size = len(fileID.dimensions[dim])
+            chunksizes.append(int(np.clip(chunks[dim], 1, size)))
+    return tuple(chunksizes)
+
+# PURPOSE: netCDF4 compression filters
+_netCDF4_codecs = dict(lz4='blosc_lz4', blosc='blosc_lz', zstd='zstd')
+# netCDF4 methods for checking the availability of compression plugins
+_netCDF4_plugins = dict(blosc_lz4='has_blosc_filter',
+    blosc_lz='has_blosc_filter', zstd='has_zstd_filter')
+
+def _netCDF4_filters(
+        fileID,
+        compression: str | None = 'gzip',
+        complevel: int | None = None,
+        shuffle: bool = True,
+        **kwargs
+    ):
+    """
+    Get keyword arguments for netCDF4 variable compression filters
+
+    Parameters
+    ----------
+    fileID: obj
+        open netCDF4 file object
+    compression: str or NoneType, default 'gzip'
+        Compression filter for output variables
+    complevel: int or NoneType, default None
+        Compression level for output variables
+    shuffle: bool, default True
+        Apply the byte shuffle filter before compression
+
+    Returns
+    -------
+    filters: dict
+        keyword arguments for ``createVariable``
+    """
+    if compression is None:
+        return {}
+    elif compression in ('gzip', 'zlib'):
+        filters = dict(zlib=True)
+    elif compression in _netCDF4_codecs:
+        codec = _netCDF4_codecs[compression]
+        filters = dict(compression=codec)
+    else:
+        raise ValueError(f'Invalid compression {compression}')
+    # verify that the compression plugin is available
+    plugin = _netCDF4_plugins.get(filters.get('compression'))
+    if plugin and not getattr(fileID, plugin)():
+        raise ValueError(f'netCDF4 {codec} compression filter for '
+            f'{compression} is unavailable')
+    # add compression level and shuffle filter
+    if complevel is not None:
+        filters['complevel'] = complevel
+    filters['shuffle'] = shuffle
+    return filters
+
 def to_HDF5(
         output: dict,
         attributes: dict,
@@ -1076,25 +2037,78 @@ def to_HDF5(
         full path of output HDF5 file
     mode: str, default 'w'
         HDF5 file mode
+    offset: int or NoneType, default None
+        Starting index for writing a chunk of data along the last axis
+
+            - ``None``: write the complete variables
+            - ``int``: write along resizable datasets
+    size: int or NoneType, default None
+        Total length along the last axis to preallocate when writing chunks
+    chunks: bool, tuple, dict or NoneType, default None
+        Chunk shape of the output datasets
+
+            - ``None``: default chunking
+            - ``tuple``: chunk shape for datasets of the same rank
+            - ``dict``: chunk shapes for each named dataset
+    compression: str or NoneType, default 'gzip'
+        Compression filter for output datasets
+
+            - ``None``: no compression
+            - ``'gzip'``: gzip compression
+            - ``'lzf'``: LZF compression
+            - ``'lz4'``: LZ4 compression
+            - ``'blosc'``: blosc compression
+            - ``'zstd'``: Zstandard compression
+    complevel: int or NoneType, default None
+        Compression level for output datasets
+    shuffle: bool, default False
+        Apply the byte shuffle filter before compression
     """
     # set default keyword arguments
     kwargs.setdefault('mode', 'w')
+    kwargs.setdefault('offset', None)
+    kwargs.setdefault('size', None)
+    kwargs.setdefault('chunks', None)
+    # compression filters for output datasets
+    filters = _HDF5_filters(**kwargs)
     # opening HDF5 file for writing
     filename = pathlib.Path(filename).expanduser().absolute()
     fileID = h5py.File(filename, mode=kwargs['mode'])
     # Defining the HDF5 dataset variables
     h5 = {}
     for key, val in output.items():
-        if key in fileID:
+        if (kwargs['offset'] is not None) and val.shape:
+            # write chunk along the last dimension of the dataset
+            start = kwargs['offset']
+            end = start + val.shape[-1]
+            if key in fileID:
+                # resize the existing dataset to fit the chunk
+                h5[key] = fileID[key]
+                if (h5[key].shape[-1] < end):
+                    h5[key].resize(end, axis=val.ndim-1)
+                h5[key][..., start:end] = val
+                continue
+            # create a resizable dataset (preallocated if size is known)
+            fill_value = attributes[key].pop('_FillValue', None)
+            shape = val.shape[:-1] + (max(end, kwargs['size'] or 0),)
+            maxshape = val.shape[:-1] + (None,)
+            chunks = _HDF5_chunks(kwargs['chunks'], key, shape, maxshape)
+            h5[key] = fileID.create_dataset(key, shape,
+                maxshape=maxshape, dtype=val.dtype, fillvalue=fill_value,
+                chunks=chunks or True, **filters)
+            h5[key][..., start:end] = val
+        elif key in fileID:
             fileID[key][...] = val[:]
         elif '_FillValue' in attributes[key].keys():
+            chunks = _HDF5_chunks(kwargs['chunks'], key, val.shape)
             h5[key] = fileID.create_dataset(key, val.shape, data=val,
                 dtype=val.dtype, fillvalue=attributes[key]['_FillValue'],
-                compression='gzip')
+                chunks=chunks, **filters)
             attributes[key].pop('_FillValue')
         elif val.shape:
+            chunks = _HDF5_chunks(kwargs['chunks'], key, val.shape)
             h5[key] = fileID.create_dataset(key, val.shape, data=val,
-                dtype=val.dtype, compression='gzip')
+                dtype=val.dtype, chunks=chunks, **filters)
         else:
             h5[key] = fileID.create_dataset(key, val.shape,
                 dtype=val.dtype)
@@ -1117,6 +2131,90 @@ def to_HDF5(
     # Closing the HDF5 file
     fileID.close()
 
+def _HDF5_chunks(
+        chunks: bool | tuple | dict | None,
+        key: str,
+        shape: tuple,
+        maxshape: tuple | None = None
+    ):
+    """
+    Get the chunk shape of a HDF5 dataset
+
+    Parameters
+    ----------
+    chunks: bool, tuple, dict or NoneType
+        chunk shapes for datasets
+    key: str
+        dataset name
+    shape: tuple
+        shape of the dataset
+    maxshape: tuple or NoneType, default None
+        maximum shape of the dataset
+
+    Returns
+    -------
+    chunks: bool, tuple or NoneType
+        chunk shape of the dataset
+    """
+    # get chunk shape for named dataset
+    if isinstance(chunks, dict):
+        chunks = chunks.get(key, None)
+    if not isinstance(chunks, (tuple, list)):
+        return chunks
+    # use the default chunking if the rank does not match
+    if (len(chunks) != len(shape)):
+        return None
+    # chunks cannot be larger than fixed dimensions
+    maxshape = maxshape or shape
+    return tuple(int(c) if (m is None) else int(np.clip(c, 1, s))
+        for c, s, m in zip(chunks, shape, maxshape))
+
+def _HDF5_filters(
+        compression: str | None = 'gzip',
+        complevel: int | None = None,
+        shuffle: bool = False,
+        **kwargs
+    ):
+    """
+    Get keyword arguments for HDF5 dataset compression filters
+
+    Parameters
+    ----------
+    compression: str or NoneType, default 'gzip'
+        Compression filter for output datasets
+    complevel: int or NoneType, default None
+        Compression level for output datasets
+    shuffle: bool, default False
+        Apply the byte shuffle filter before compression
+
+    Returns
+    -------
+    filters: dict
+        keyword arguments for ``create_dataset``
+    """
+    if compression is None:
+        return {}
+    elif compression in ('gzip', 'lzf'):
+        filters = dict(compression=compression)
+        if (compression == 'gzip') and (complevel is not None):
+            filters['compression_opts'] = complevel
+    elif compression in ('lz4', 'blosc', 'zstd'):
+        # dynamically loaded filters from hdf5plugin
+        hdf5plugin = import_dependency('hdf5plugin', raise_exception=True,
+            extra=f'Required for {compression} compression of HDF5 files')
+        if (compression == 'lz4'):
+            filters = dict(hdf5plugin.LZ4())
+        elif (compression == 'blosc'):
+            filters = dict(hdf5plugin.Blosc(clevel=complevel or 5))
+        elif (compression == 'zstd'):
+            filters = dict(hdf5plugin.Zstd(clevel=complevel or 3))
+    else:
+        raise ValueError(f'Invalid compression {compression}')
+    # add shuffle filter
+    if shuffle:
+        filters['shuffle'] = True
+    return filters
+
 def to_geotiff(
         output: dict,
         attributes: dict,
@@ -1186,6 +2284,119 @@ def to_geotiff(
     # close dataset
     ds.FlushCache()
 
+def to_geotiff_stream(
+        blocks,
+        attributes: dict,
+        filename: str | pathlib.Path,
+        shape: tuple,
+        **kwargs
+    ):
+    """
+    Write blocks of data to a tiled (cloud optimized) geotiff file
+
+    Parameters
+    ----------
+    blocks: iterable
+        python dictionaries of output data for each block with the
+        ``window`` of the block: ``(xoff, yoff, ...)``
+    attributes: dict
+        python dictionary of output attributes
+    filename: str or pathlib.Path
+        full path of output geotiff file
+    shape: tuple
+        number of rows and columns of the output image
+    varname: str, default 'data'
+        output variable name
+    driver: str, default 'cog'
+        GDAL driver
+
+            - ``'GTiff'``: GeoTIFF
+            - ``'cog'``: Cloud Optimized GeoTIFF
+    dtype: obj, default osgeo.gdal.GDT_Float64
+        GDAL data type
+    options: list, default ['COMPRESS=LZW']
+        GDAL driver creation options
+    tile_size: int, default 512
+        size of the internal tiles of the geotiff (multiple of 16)
+
+    Returns
+    -------
+    n_blocks: int
+        number of blocks written
+    """
+    # set default keyword arguments
+    kwargs.setdefault('varname', 'data')
+    kwargs.setdefault('driver', 'cog')
+    kwargs.setdefault('dtype', osgeo.gdal.GDT_Float64)
+    kwargs.setdefault('options', ['COMPRESS=LZW'])
+    kwargs.setdefault('tile_size', 512)
+    varname = copy.copy(kwargs['varname'])
+    ny, nx = shape[:2]
+    filename = pathlib.Path(filename).expanduser().absolute()
+    # cloud optimized geotiffs are copied from a tiled geotiff
+    if (kwargs['driver'].lower() == 'cog'):
+        tiled_file = filename.with_name(f'.{uuid.uuid4().hex}.tif')
+    else:
+        tiled_file = filename
+    # creation options for a tiled geotiff
+    options = ['TILED=YES', 'BIGTIFF=IF_SAFER',
+        f'BLOCKXSIZE={kwargs["tile_size"]:d}',
+        f'BLOCKYSIZE={kwargs["tile_size"]:d}']
+    options.extend(kwargs['options'])
+    driver = osgeo.gdal.GetDriverByName('GTiff')
+    # fill value for bands
+    fill_value = attributes[varname].get('_FillValue', None)
+    ds = None
+    n_blocks = 0
+    try:
+        for block in blocks:
+            # verify grid dimensions to be iterable
+            block = expand_dims(block, varname=varname)
+            xoff, yoff = block['window'][:2]
+            nband = np.shape(block[varname])[2]
+            # set up the dataset with the first block
+            if ds is None:
+                ds = driver.Create(str(tiled_file), nx, ny, nband,
+                    kwargs['dtype'], options)
+                # top left x, w-e pixel resolution, rotation
+                # top left y, rotation, n-s pixel resolution
+                xmin, xmax, ymin, ymax = attributes['extent']
+                dx, dy = attributes['spacing']
+                ds.SetGeoTransform([xmin, dx, 0, ymax, 0, dy])
+                # set the spatial projection reference information
+                osgeo.osr.UseExceptions()
+                srs = osgeo.osr.SpatialReference()
+                srs.ImportFromWkt(attributes['wkt'])
+                ds.SetProjection(srs.ExportToWkt())
+                # set fill value for each band
+                for band in range(nband):
+                    if fill_value is not None:
+                        ds.GetRasterBand(band+1).SetNoDataValue(fill_value)
+            # write block for each band
+            for band in range(nband):
+                data = np.ma.getdata(block[varname][:, :, band])
+                ds.GetRasterBand(band+1).WriteArray(data, xoff, yoff)
+            n_blocks += 1
+        # close the tiled dataset
+        if ds is not None:
+            ds.FlushCache()
+            ds = None
+        # copy tiled geotiff to a cloud optimized geotiff
+        if (n_blocks > 0) and (tiled_file != filename):
+            src = osgeo.gdal.Open(str(tiled_file))
+            cog = osgeo.gdal.GetDriverByName('COG')
+            dst = cog.CreateCopy(str(filename), src, 0, kwargs['options'])
+            dst = None
+            src = None
+    finally:
+        ds = None
+        # remove the intermediate tiled geotiff
+        if (tiled_file != filename) and tiled_file.exists():
+            tiled_file.unlink()
+    # print filename if verbose
+    logging.info(str(filename))
+    return n_blocks
+
 def to_parquet(
         output: dict,
         attributes: dict,
@@ -1228,20 +2439,7 @@ def to_parquet(
     df = pd.DataFrame(output)
     attrs = df.attrs.copy()
     # add coordinate reference system to attributes
-    if kwargs['crs'] and isinstance(kwargs['crs'], int):
-        # create spatial reference object from EPSG code
-        osgeo.osr.UseExceptions()
-        srs = osgeo.osr.SpatialReference()
-        srs.ImportFromEPSG(kwargs['crs'])
-        # add projection information to attributes
-        attributes['crs'] = json.loads(srs.ExportToPROJJSON())
-    elif kwargs['crs'] and isinstance(kwargs['crs'], dict):
-        # create spatial reference object from PROJJSON
-        osgeo.osr.UseExceptions()
-        srs = osgeo.osr.SpatialReference()
-        srs.SetFromUserInput(json.dumps(kwargs['crs']))
-        # add projection information to attributes
-        attributes['crs'] = copy.copy(kwargs['crs'])
+    srs = _parquet_crs(attributes, kwargs['crs'])
     # convert spatial coordinates to WKB encoded geometry
     if kwargs['geoparquet'] and (kwargs['geometry_encoding'] == 'WKB'):
         # get geometry columns
@@ -1300,6 +2498,157 @@ def to_parquet(
         compression=kwargs['compression']
     )
 
+def to_parquet_stream(
+        batches,
+        attributes: dict,
+        filename: str | pathlib.Path,
+        **kwargs
+    ):
+    """
+    Write batches of data to a (geo)parquet file
+
+    Each batch is converted directly to an arrow table and
+    written as a row group with a streaming parquet writer
+
+    Parameters
+    ----------
+    batches: iterable
+        python dictionaries of output data for each batch
+    attributes: dict
+        python dictionary of output attributes
+    filename: str or pathlib.Path,
+        full path of output parquet file
+    crs: int, default None
+        coordinate reference system EPSG code
+    compression: str, default 'snappy'
+        file compression type
+    geoparquet: bool, default False
+        write geoparquet file
+    geometry_encoding: str, default 'WKB'
+        default encoding for geoparquet geometry
+    primary_column: str, default 'geometry'
+        default column name for geoparquet geometry
+
+    Returns
+    -------
+    n_rows: int
+        total number of rows written to file
+    """
+    # set default keyword arguments
+    kwargs.setdefault('crs', None)
+    kwargs.setdefault('compression', 'snappy')
+    kwargs.setdefault('schema_version', '1.1.0')
+    kwargs.setdefault('geoparquet', False)
+    kwargs.setdefault('geometry_encoding', 'WKB')
+    kwargs.setdefault('primary_column', 'geometry')
+    # copy attributes to not modify original
+    attributes = copy.deepcopy(attributes)
+    # add coordinate reference system to attributes
+    srs = _parquet_crs(attributes, kwargs['crs'])
+    # geometry columns
+    geometries = ['lon', 'x', 'lat', 'y']
+    primary_column = kwargs['primary_column']
+    if kwargs['geoparquet'] and (kwargs['geometry_encoding'] != 'WKB'):
+        raise ValueError('geoarrow encodings are currently unsupported')
+    # output parquet file
+    filename = pathlib.Path(filename).expanduser().absolute()
+    logging.info(str(filename))
+    # streaming parquet writer (created with the first batch)
+    writer = None
+    n_rows = 0
+    try:
+        for output in batches:
+            # convert output variables to arrow arrays
+            columns = {}
+            geom_vars = [v for v in geometries if v in output.keys()]
+            for key, val in output.items():
+                if (key == 'attributes'):
+                    continue
+                elif kwargs['geoparquet'] and (key in geom_vars):
+                    continue
+                elif np.ma.isMaskedArray(val):
+                    columns[key] = pyarrow.array(val.data,
+                        mask=np.ma.getmaskarray(val))
+                else:
+                    columns[key] = pyarrow.array(np.asarray(val))
+            # convert spatial coordinates to WKB encoded geometry
+            if kwargs['geoparquet']:
+                columns[primary_column] = _to_wkb_points(
+                    output[geom_vars[0]], output[geom_vars[1]])
+            table = pyarrow.table(columns)
+            # create writer with the schema of the first batch
+            if writer is None:
+                metadata = {}
+                if kwargs['geoparquet']:
+                    # drop attributes for geometry columns
+                    [attributes.pop(v) for v in geom_vars if v in attributes]
+                    # add attributes for geoparquet
+                    geo = {}
+                    geo["version"] = kwargs['schema_version']
+                    geo["primary_column"] = primary_column
+                    geo["columns"] = {primary_column: {
+                            "encoding": 'WKB',
+                            "geometry_types": ["Point"],
+                        }
+                    }
+                    # add coordinate reference system if specified
+                    if srs is not None:
+                        geo["columns"][primary_column]["crs"] = \
+                            json.loads(srs.ExportToPROJJSON())
+                    metadata[b"geo"] = json.dumps(geo).encode('utf-8')
+                # add attribute for date created
+                attributes['date_created'] = datetime.datetime.now().isoformat()
+                # add attributes for software information
+                attributes['software_reference'] = pyTMD.version.project_name
+                attributes['software_version'] = pyTMD.version.full_version
+                # dump the attributes to encoded JSON-format
+                metadata[b"pyTMD"] = json.dumps(attributes).encode('utf-8')
+                schema = table.schema.with_metadata(metadata)
+                writer = pyarrow.parquet.ParquetWriter(filename, schema,
+                    compression=kwargs['compression'])
+            # write batch as a row group
+            writer.write_table(table.cast(writer.schema))
+            n_rows += table.num_rows
+    finally:
+        # close the parquet writer
+        if writer is not None:
+            writer.close()
+    # return the number of rows written
+    return n_rows
+
+def _parquet_crs(attributes: dict, crs: int | dict | None = None):
+    """
+    Add a coordinate reference system to parquet attributes
+
+    Parameters
+    ----------
+    attributes: dict
+        python dictionary of output attributes
+    crs: int, dict or NoneType, default None
+        coordinate reference system EPSG code or PROJJSON
+
+    Returns
+    -------
+    srs: obj or NoneType
+        spatial reference object
+    """
+    srs = None
+    if crs and isinstance(crs, int):
+        # create spatial reference object from EPSG code
+        osgeo.osr.UseExceptions()
+        srs = osgeo.osr.SpatialReference()
+        srs.ImportFromEPSG(crs)
+        # add projection information to attributes
+        attributes['crs'] = json.loads(srs.ExportToPROJJSON())
+    elif crs and isinstance(crs, dict):
+        # create spatial reference object from PROJJSON
+        osgeo.osr.UseExceptions()
+        srs = osgeo.osr.SpatialReference()
+        srs.SetFromUserInput(json.dumps(crs))
+        # add projection information to attributes
+        attributes['crs'] = copy.copy(crs)
+    return srs
+
 def expand_dims(obj: dict, varname: str = 'data'):
     """
     Add a singleton dimension to a spatial dictionary if non-existent
@@ -1415,106 +2764,87 @@ def convert_ellipsoid(
     # semiminor axis of input and output ellipsoid
     b1 = (1.0 - f1)*a1
     b2 = (1.0 - f2)*a2
+    # force phi1 into range -90 <= phi1 <= 90
+    phi1 = np.clip(np.array(phi1, dtype=np.float64), -90.0, 90.0)
+    h1 = np.array(h1, dtype=np.float64)
     # initialize output arrays
-    npts = len(phi1)
-    phi2 = np.zeros((npts))
-    h2 = np.zeros((npts))
-    # for each point
-    for N in range(npts):
-        # force phi1 into range -90 <= phi1 <= 90
-        if (np.abs(phi1[N]) > 90.0):
-            phi1[N] = np.sign(phi1[N])*90.0
-        # handle special case near the equator
-        # phi2 = phi1 (latitudes congruent)
-        # h2 = h1 + a1 - a2
-        if (np.abs(phi1[N]) < eps):
-            phi2[N] = np.copy(phi1[N])
-            h2[N] = h1[N] + a1 - a2
-        # handle special case near the poles
-        # phi2 = phi1 (latitudes congruent)
-        # h2 = h1 + b1 - b2
-        elif ((90.0 - np.abs(phi1[N])) < eps):
-            phi2[N] = np.copy(phi1[N])
-            h2[N] = h1[N] + b1 - b2
-        # handle case if latitude is within 45 degrees of equator
-        elif (np.abs(phi1[N]) <= 45):
-            # convert phi1 to radians
-            phi1r = phi1[N] * np.pi/180.0
-            sinphi1 = np.sin(phi1r)
-            cosphi1 = np.cos(phi1r)
-            # prevent division by very small numbers
-            cosphi1 = np.copy(eps) if (cosphi1 < eps) else cosphi1
-            # calculate tangent
-            tanphi1 = sinphi1 / cosphi1
-            u1 = np.arctan(b1 / a1 * tanphi1)
-            hpr1sin = b1 * np.sin(u1) + h1[N] * sinphi1
-            hpr1cos = a1 * np.cos(u1) + h1[N] * cosphi1
-            # set initial value for u2
-            u2 = np.copy(u1)
-            # setup constants
-            k0 = b2 * b2 - a2 * a2
-            k1 = a2 * hpr1cos
-            k2 = b2 * hpr1sin
-            # perform newton-raphson iteration to solve for u2
-            # cos(u2) will not be close to zero since abs(phi1) <= 45
-            for i in range(0, itmax+1):
-                cosu2 = np.cos(u2)
-                fu2 = k0 * np.sin(u2) + k1 * np.tan(u2) - k2
-                fu2p = k0 * cosu2 + k1 / (cosu2 * cosu2)
-                if (np.abs(fu2p) < eps):
-                    break
-                else:
-                    delta = fu2 / fu2p
-                    u2 -= delta
-                    if (np.abs(delta) < eps):
-                        break
-            # convert latitude to degrees and verify values between +/- 90
-            phi2r = np.arctan(a2 / b2 * np.tan(u2))
-            phi2[N] = phi2r*180.0/np.pi
-            if (np.abs(phi2[N]) > 90.0):
-                phi2[N] = np.sign(phi2[N])*90.0
-            # calculate height
-            h2[N] = (hpr1cos - a2 * np.cos(u2)) / np.cos(phi2r)
-        # handle final case where latitudes are between 45 degrees and pole
-        else:
-            # convert phi1 to radians
-            phi1r = phi1[N] * np.pi/180.0
-            sinphi1 = np.sin(phi1r)
-            cosphi1 = np.cos(phi1r)
-            # prevent division by very small numbers
-            cosphi1 = np.copy(eps) if (cosphi1 < eps) else cosphi1
-            # calculate tangent
-            tanphi1 = sinphi1 / cosphi1
-            u1 = np.arctan(b1 / a1 * tanphi1)
-            hpr1sin = b1 * np.sin(u1) + h1[N] * sinphi1
-            hpr1cos = a1 * np.cos(u1) + h1[N] * cosphi1
-            # set initial value for u2
-            u2 = np.copy(u1)
-            # setup constants
-            k0 = a2 * a2 - b2 * b2
-            k1 = b2 * hpr1sin
-            k2 = a2 * hpr1cos
-            # perform newton-raphson iteration to solve for u2
-            # sin(u2) will not be close to zero since abs(phi1) > 45
-            for i in range(0, itmax+1):
-                sinu2 = np.sin(u2)
-                fu2 = k0 * np.cos(u2) + k1 / np.tan(u2) - k2
-                fu2p = -1 * (k0 * sinu2 + k1 / (sinu2 * sinu2))
-                if (np.abs(fu2p) < eps):
-                    break
-                else:
-                    delta = fu2 / fu2p
-                    u2 -= delta
-                    if (np.abs(delta) < eps):
-                        break
-            # convert latitude to degrees and verify values between +/- 90
-            phi2r = np.arctan(a2 / b2 * np.tan(u2))
-            phi2[N] = phi2r*180.0/np.pi
-            if (np.abs(phi2[N]) > 90.0):
-                phi2[N] = np.sign(phi2[N])*90.0
-            # calculate height
-            h2[N] = (hpr1sin - b2 * np.sin(u2)) / np.sin(phi2r)
-
+    # (latitudes are congruent for special cases)
+    phi2 = np.copy(phi1)
+    h2 = np.zeros_like(h1)
+    # handle special case near the equator
+    # phi2 = phi1 (latitudes congruent)
+    # h2 = h1 + a1 - a2
+    equator = (np.abs(phi1) < eps)
+    h2[equator] = h1[equator] + a1 - a2
+    # handle special case near the poles
+    # phi2 = phi1 (latitudes congruent)
+    # h2 = h1 + b1 - b2
+    poles = ~equator & ((90.0 - np.abs(phi1)) < eps)
+    h2[poles] = h1[poles] + b1 - b2
+    # handle case if latitude is within 45 degrees of equator
+    low, = np.nonzero(~equator & ~poles & (np.abs(phi1) <= 45))
+    # handle final case where latitudes are between 45 degrees and pole
+    high, = np.nonzero(~equator & ~poles & ~(np.abs(phi1) <= 45))
+    # convert phi1 to radians
+    phi1r = phi1 * np.pi/180.0
+    sinphi1 = np.sin(phi1r)
+    cosphi1 = np.cos(phi1r)
+    # prevent division by very small numbers
+    cosphi1 = np.where(cosphi1 < eps, eps, cosphi1)
+    # calculate tangent
+    tanphi1 = sinphi1 / cosphi1
+    u1 = np.arctan(b1 / a1 * tanphi1)
+    hpr1sin = b1 * np.sin(u1) + h1 * sinphi1
+    hpr1cos = a1 * np.cos(u1) + h1 * cosphi1
+    # set initial value for u2
+    u2 = np.copy(u1)
+    # perform newton-raphson iteration to solve for u2 for
+    # all points at once with a shrinking set of active points
+    # cos(u2) will not be close to zero since abs(phi1) <= 45
+    k0 = b2 * b2 - a2 * a2
+    k1 = a2 * hpr1cos[low]
+    k2 = b2 * hpr1sin[low]
+    active = np.arange(len(low))
+    for i in range(0, itmax+1):
+        # calculate function and derivative for active points
+        u = u2[low[active]]
+        cosu2 = np.cos(u)
+        fu2 = k0 * np.sin(u) + k1[active] * np.tan(u) - k2[active]
+        fu2p = k0 * cosu2 + k1[active] / (cosu2 * cosu2)
+        # update points with derivatives that are not close to zero
+        valid = (np.abs(fu2p) >= eps)
+        delta = fu2[valid] / fu2p[valid]
+        u2[low[active[valid]]] -= delta
+        # reduce to points that have not converged
+        active = active[valid][np.abs(delta) >= eps]
+        if (active.size == 0):
+            break
+    # sin(u2) will not be close to zero since abs(phi1) > 45
+    k0 = a2 * a2 - b2 * b2
+    k1 = b2 * hpr1sin[high]
+    k2 = a2 * hpr1cos[high]
+    active = np.arange(len(high))
+    for i in range(0, itmax+1):
+        # calculate function and derivative for active points
+        u = u2[high[active]]
+        sinu2 = np.sin(u)
+        fu2 = k0 * np.cos(u) + k1[active] / np.tan(u) - k2[active]
+        fu2p = -1 * (k0 * sinu2 + k1[active] / (sinu2 * sinu2))
+        # update points with derivatives that are not close to zero
+        valid = (np.abs(fu2p) >= eps)
+        delta = fu2[valid] / fu2p[valid]
+        u2[high[active[valid]]] -= delta
+        # reduce to points that have not converged
+        active = active[valid][np.abs(delta) >= eps]
+        if (active.size == 0):
+            break
+    # convert latitude to degrees and verify values between +/- 90
+    phi2r = np.arctan(a2 / b2 * np.tan(u2))
+    phi2[low] = np.clip(phi2r[low]*180.0/np.pi, -90.0, 90.0)
+    phi2[high] = np.clip(phi2r[high]*180.0/np.pi, -90.0, 90.0)
+    # calculate height
+    h2[low] = (hpr1cos[low] - a2 * np.cos(u2[low])) / np.cos(phi2r[low])
+    h2[high] = (hpr1sin[high] - b2 * np.sin(u2[high])) / np.sin(phi2r[high])
     # return the latitude and height
     return (phi2, h2)
 
@@ -1579,6 +2909,56 @@ def wrap_longitudes(lon: float | np.ndarray):
     # convert phi from radians to degrees
     return phi*180.0/np.pi
 
+def morton_order(
+        x: np.ndarray,
+        y: np.ndarray,
+        bits: int = 16
+    ):
+    """
+    Calculates the indices for sorting points along a
+    `Morton (Z-order) curve <https://en.wikipedia.org/wiki/Z-order_curve>`_
+
+    Points that are close together in space are close together in
+    the sorted order
+
+    Parameters
+    ----------
+    x: np.ndarray
+        x-coordinates
+    y: np.ndarray
+        y-coordinates
+    bits: int, default 16
+        Number of bits for quantizing each coordinate
+
+    Returns
+    -------
+    indices: np.ndarray
+        indices for sorting points along the curve
+    """
+    # verify that bits can be interleaved into a 64-bit code
+    assert (bits > 0) and (bits <= 32)
+    x = np.atleast_1d(x).flatten()
+    y = np.atleast_1d(y).flatten()
+    # quantize coordinates within their range
+    # invalid points are placed at the end of the curve
+    valid = np.isfinite(x) & np.isfinite(y)
+    codes = []
+    for c in (x, y):
+        cmin = np.min(c[valid]) if np.any(valid) else 0.0
+        cmax = np.max(c[valid]) if np.any(valid) else 0.0
+        scale = (2**bits - 1)/(cmax - cmin) if (cmax > cmin) else 0.0
+        q = np.zeros(c.shape, dtype=np.uint64)
+        q[valid] = np.floor((c[valid] - cmin)*scale).astype(np.uint64)
+        # spread the bits of the quantized coordinates
+        for shift, mask in ((16, 0x0000FFFF0000FFFF),
+            (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+            (2, 0x3333333333333333), (1, 0x5555555555555555)):
+            q = (q | (q << np.uint64(shift))) & np.uint64(mask)
+        codes.append(q)
+    # interleave the bits of the x and y coordinates
+    code = codes[0] | (codes[1] << np.uint64(1))
+    return np.lexsort((code, np.logical_not(valid)))
+
 def to_dms(d: np.ndarray):
     """
     Convert decimal degrees to degrees, minutes and seconds
@@ -1834,30 +3214,38 @@ def _moritz_iterative(
     ecc1 = lin_ecc/a_axis
     # degrees to radians
     dtr = np.pi/180.0
+    # flatten input coordinates
+    shape = np.shape(x)
+    x, y, z = np.ravel(x), np.ravel(y), np.ravel(z)
     # calculate longitude
     lon = np.arctan2(y, x)/dtr
     # set initial estimate of height to 0
     h = np.zeros_like(lon)
-    h0 = np.inf*np.ones_like(lon)
     # calculate radius of parallel
     p = np.sqrt(x**2 + y**2)
     # initial estimated value for phi using h=0
     phi = np.arctan(z/(p*(1.0 - ecc1**2)))
     # iterate to tolerance or to maximum number of iterations
+    # only updating the points that have not converged
+    active = np.arange(len(lon))
     i = 0
-    while np.any(np.abs(h - h0) > eps) and (i <= iterations):
+    while active.size and (i <= iterations):
         # copy previous iteration of height
-        h0 = np.copy(h)
+        h0 = h[active]
+        phi0 = phi[active]
         # calculate radius of curvature
-        N = a_axis/np.sqrt(1.0 - ecc1**2 * np.sin(phi)**2)
+        N = a_axis/np.sqrt(1.0 - ecc1**2 * np.sin(phi0)**2)
         # estimate new value of height
-        h = p/np.cos(phi) - N
+        h1 = p[active]/np.cos(phi0) - N
         # estimate new value for latitude using heights
-        phi = np.arctan(z/(p*(1.0 - ecc1**2*N/(N + h))))
+        phi[active] = np.arctan(z[active]/(p[active]*(1.0 - ecc1**2*N/(N + h1))))
+        h[active] = h1
+        # reduce to points that have not converged
+        active = active[np.abs(h1 - h0) > eps]
         # add to iterator
         i += 1
     # return longitude, latitude and height
-    return (lon, phi/dtr, h)
+    return (lon.reshape(shape), phi.reshape(shape)/dtr, h.reshape(shape))
 
 def _bowring_iterative(
         x: np.ndarray,
@@ -1909,6 +3297,9 @@ def _bowring_iterative(
     e22 = lin_ecc**2/b_axis**2
     # degrees to radians
     dtr = np.pi/180.0
+    # flatten input coordinates
+    shape = np.shape(x)
+    x, y, z = np.ravel(x), np.ravel(y), np.ravel(z)
     # calculate longitude
     lon = np.arctan2(y, x)/dtr
     # calculate radius of parallel
@@ -1918,17 +3309,21 @@ def _bowring_iterative(
     # initial estimated value for latitude
     phi = np.arctan((z + e22*b_axis*np.sin(u)**3) /
         (p - e12*a_axis*np.cos(u)**3))
-    phi0 = np.inf*np.ones_like(lon)
     # iterate to tolerance or to maximum number of iterations
+    # only updating the points that have not converged
+    active = np.arange(len(lon))
     i = 0
-    while np.any(np.abs(phi - phi0) > eps) and (i <= iterations):
+    while active.size and (i <= iterations):
         # copy previous iteration of phi
-        phi0 = np.copy(phi)
+        phi0 = phi[active]
         # calculate reduced parametric latitude
-        u = np.arctan(b_axis*np.tan(phi)/a_axis)
+        u = np.arctan(b_axis*np.tan(phi0)/a_axis)
         # estimate new value of latitude
-        phi = np.arctan((z + e22*b_axis*np.sin(u)**3) /
-            (p - e12*a_axis*np.cos(u)**3))
+        phi1 = np.arctan((z[active] + e22*b_axis*np.sin(u)**3) /
+            (p[active] - e12*a_axis*np.cos(u)**3))
+        phi[active] = phi1
+        # reduce to points that have not converged
+        active = active[np.abs(phi1 - phi0) > eps]
         # add to iterator
         i += 1
     # calculate final radius of curvature
@@ -1936,7 +3331,7 @@ def _bowring_iterative(
     # estimate final height (Bowring, 1985)
     h = p*np.cos(phi) + z*np.sin(phi) - a_axis**2/N
     # return longitude, latitude and height
-    return (lon, phi/dtr, h)
+    return (lon.reshape(shape), phi.reshape(shape)/dtr, h.reshape(shape))
 
 def _zhu_closed_form(
         x: np.ndarray,
@@ -1990,7 +3385,7 @@ def _zhu_closed_form(
         ind, = np.nonzero(w == 0)
         h[ind] = np.sign(z[ind])*z[ind] - b_axis
         lat[ind] = 90.0*np.sign(z[ind])
-    else:
+    if np.any(w != 0):
         # all other cases
         ind, = np.nonzero(w != 0)
         l = e12/2.0
@@ -2000,14 +3395,16 @@ def _zhu_closed_form(
         k = (l**2.0 - m - n)*l**2.0
         q = (1.0/216.0)*(m + n - 4.0*l**2)**3.0 + m*n*l**2.0
         D = np.sqrt((2.0*q - m*n*l**2)*m*n*l**2)
-        B = i/3.0 - (q + D)**(1.0/3.0) - (q - D)**(1.0/3.0)
+        # use real cube roots for negative values of q - D
+        B = i/3.0 - np.cbrt(q + D) - np.cbrt(q - D)
+        # clip rounding errors where m and n are nearly equal
         t = np.sqrt(np.sqrt(B**2-k) - (B + i)/2.0) - \
-            np.sign(m - n)*np.sqrt((B - i)/2.0)
-        wi = w/(t + l)
+            np.sign(m - n)*np.sqrt(np.maximum((B - i)/2.0, 0.0))
+        wi = w[ind]/(t + l)
         zi = (1.0 - e12)*z[ind]/(t - l)
         # calculate latitude and height
         lat[ind] = np.arctan2(zi, ((1.0 - e12)*wi))/dtr
-        h[ind] = np.sign(t-1.0+l)*np.sqrt((w-wi)**2.0 + (z[ind]-zi)**2.0)
+        h[ind] = np.sign(t-1.0+l)*np.sqrt((w[ind]-wi)**2.0 + (z[ind]-zi)**2.0)
     # return longitude, latitude and height
     return (lon, lat, h)
 
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 tools.py
-Written by Tyler Sutterley (09/2024)
+Written by Tyler Sutterley (10/2024)
 Jupyter notebook, user interface and plotting tools
 
 PYTHON DEPENDENCIES:
@@ -17,6 +17,7 @@ PYTHON DEPENDENCIES:
         https://github.com/matplotlib/matplotlib
 
 UPDATE HISTORY:
+    Updated 10/2024: use cached transformers for coordinate conversions
     Updated 09/2024: removed widget for ATLAS following database update
         added widget for setting constituent to plot in a cotidal chart
     Updated 07/2024: renamed format for netcdf to ATLAS-netcdf
@@ -39,6 +40,7 @@ import base64
 import logging
 import datetime
 import numpy as np
+import pyTMD.crs
 import pyTMD.io.model
 from pyTMD.utilities import import_dependency
 
@@ -266,9 +268,7 @@ class leaflet:
     # convert points to EPSG:4326
     def transform(self, x, y, proj4def):
         # convert geolocation variable to EPSG:4326
-        crs1 = pyproj.CRS.from_string(proj4def)
-        crs2 = pyproj.CRS.from_string('EPSG:4326')
-        trans = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
+        trans = pyTMD.crs().get_transformer(proj4def, 4326)
         return trans.transform(x, y)
 
     # fix longitudes to be -180:180
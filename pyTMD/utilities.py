@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 utilities.py
-Written by Tyler Sutterley (08/2024)
+Written by Tyler Sutterley (10/2024)
 Download and management utilities for syncing time and auxiliary files
 
 PYTHON DEPENDENCIES:
@@ -9,6 +9,8 @@ PYTHON DEPENDENCIES:
         https://pypi.python.org/pypi/lxml
 
 UPDATE HISTORY:
+    Updated 10/2024: add functions for running batches of files in parallel
+        add pipeline for overlapping file input/output with computation
     Updated 08/2024: generalize hash function to use any available algorithm
     Updated 07/2024: added function to parse JSON responses from https
     Updated 06/2024: make default case for an import exception be a class
@@ -49,6 +51,7 @@ import os
 import re
 import io
 import ssl
+import glob
 import json
 import netrc
 import ftplib
@@ -59,15 +62,20 @@ import getpass
 import inspect
 import hashlib
 import logging
+import traceback
 import pathlib
 import builtins
+import threading
+import collections
 import warnings
 import importlib
 import posixpath
 import subprocess
 import lxml.etree
 import calendar, time
+import queue
 import dateutil.parser
+import concurrent.futures
 if sys.version_info[0] == 2:
     from urllib import quote_plus
     from cookielib import CookieJar
@@ -93,6 +101,10 @@ __all__ = [
     "even",
     "ceil",
     "copy",
+    "expand_files",
+    "is_newer",
+    "batch",
+    "pipeline",
     "check_ftp_connection",
     "ftp_list",
     "from_ftp",
@@ -480,6 +492,314 @@ def copy(
     if move:
         source.unlink()
 
+# PURPOSE: expand glob patterns into lists of files
+def expand_files(*args: str | pathlib.Path):
+    """
+    Expand file names and glob patterns into a list of files
+
+    Parameters
+    ----------
+    *args: str or pathlib.Path
+        file names or glob patterns
+
+    Returns
+    -------
+    files: list
+        unique files in order of input
+    """
+    files = []
+    for arg in args:
+        pattern = str(pathlib.Path(arg).expanduser())
+        # expand patterns with wildcards or character ranges
+        if re.search(r'[\*\?\[]', pattern):
+            files.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            files.append(pattern)
+    # return the list of unique files
+    return [pathlib.Path(f) for f in dict.fromkeys(files)]
+
+# PURPOSE: check if an output file is newer than its inputs
+def is_newer(
+        output_file: str | pathlib.Path,
+        *input_files: str | pathlib.Path
+    ) -> bool:
+    """
+    Check if an output file exists and is newer than the input files
+
+    Parameters
+    ----------
+    output_file: str or pathlib.Path
+        output file
+    *input_files: str or pathlib.Path
+        input files
+    """
+    output_file = pathlib.Path(output_file).expanduser().absolute()
+    if not output_file.exists():
+        return False
+    # check modification times of input files
+    mtime = output_file.stat().st_mtime
+    return all((mtime >= pathlib.Path(f).expanduser().stat().st_mtime)
+        for f in input_files)
+
+# PURPOSE: run a function for a single input and output file
+def _batch_task(function, input_file, output_file, kwargs):
+    try:
+        function(input_file, output_file, **kwargs)
+    except Exception as exc:
+        # remove incomplete output files
+        output_file = pathlib.Path(output_file).expanduser().absolute()
+        if output_file.exists():
+            output_file.unlink()
+        raise
+    return output_file
+
+# PURPOSE: run a function over a set of files using a pool of workers
+def batch(
+        function,
+        input_files: list,
+        output_files: list,
+        processes: int = 1,
+        clobber: bool = False,
+        initializer=None,
+        initargs: tuple = (),
+        **kwargs
+    ):
+    """
+    Run a function over a set of input and output files
+
+    Files are processed concurrently with a pool of worker processes,
+    skipping outputs that are newer than their inputs and isolating
+    errors for each file
+
+    Parameters
+    ----------
+    function: obj
+        function with input and output files as the first arguments
+    input_files: list
+        input files to run
+    output_files: list
+        output files for each input file
+    processes: int, default 1
+        number of worker processes
+    clobber: bool, default False
+        overwrite existing output files that are newer than inputs
+    initializer: obj or NoneType, default None
+        function run at the start of each worker process
+    initargs: tuple, default ()
+        arguments for the initializer function
+    **kwargs: dict
+        keyword arguments for the function
+
+    Returns
+    -------
+    status: dict
+        processing status for each input file
+
+            - ``'completed'``
+            - ``'skipped'``
+            - ``'failed'``
+    """
+    if (len(input_files) != len(output_files)):
+        raise ValueError('Input and output files have incompatible lengths')
+    # build list of files to run
+    status = {}
+    tasks = []
+    for input_file, output_file in zip(input_files, output_files):
+        if not clobber and is_newer(output_file, input_file):
+            logging.info(f'Skipping {str(input_file)} (output is up to date)')
+            status[str(input_file)] = 'skipped'
+        else:
+            tasks.append((input_file, output_file))
+    # total number of files to run
+    ntasks = len(tasks)
+    # run files either in the current process or with a pool of workers
+    if (processes == 1):
+        if initializer is not None:
+            initializer(*initargs)
+        results = []
+        for input_file, output_file in tasks:
+            try:
+                _batch_task(function, input_file, output_file, kwargs)
+            except Exception as exc:
+                results.append((input_file, exc))
+            else:
+                results.append((input_file, None))
+            _batch_status(status, *results[-1], len(results), ntasks)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes,
+            initializer=initializer, initargs=initargs) as executor:
+            futures = {executor.submit(_batch_task, function,
+                input_file, output_file, kwargs): input_file
+                for input_file, output_file in tasks}
+            for count, future in enumerate(
+                concurrent.futures.as_completed(futures), start=1):
+                exc = future.exception()
+                _batch_status(status, futures[future], exc, count, ntasks)
+    # log summary of batch
+    counts = collections.Counter(status.values())
+    logging.info(', '.join(f'{v:d} {k}' for k, v in counts.items()))
+    return status
+
+# PURPOSE: update and log the status for a file in a batch
+def _batch_status(status, input_file, exc, count, ntasks):
+    if exc is None:
+        logging.info(f'[{count:d}/{ntasks:d}] Completed {str(input_file)}')
+        status[str(input_file)] = 'completed'
+    else:
+        logging.critical(f'[{count:d}/{ntasks:d}] Failed {str(input_file)}')
+        logging.error(''.join(traceback.format_exception(
+            type(exc), exc, exc.__traceback__)))
+        status[str(input_file)] = 'failed'
+
+# PURPOSE: run stages of a function over a set of files in a pipeline
+def pipeline(
+        reader,
+        compute,
+        writer,
+        input_files: list,
+        output_files: list,
+        workers: int = 1,
+        maxsize: int = 2,
+        clobber: bool = False,
+    ):
+    """
+    Run a function over a set of input and output files as a
+    pipeline of reading, computing and writing stages
+
+    The reader and writer run in separate threads connected to the
+    compute workers with bounded queues, so that reading the next file
+    and writing the previous file overlap with computation
+
+    The compute function is run concurrently when using multiple
+    workers, so it must be safe to call from separate threads
+
+    Parameters
+    ----------
+    reader: obj
+        function that reads an input file and returns data
+    compute: obj
+        function that computes results from the data
+    writer: obj
+        function that writes the results to an output file
+    input_files: list
+        input files to run
+    output_files: list
+        output files for each input file
+    workers: int, default 1
+        number of compute threads
+    maxsize: int, default 2
+        maximum number of files waiting in each queue
+    clobber: bool, default False
+        overwrite existing output files that are newer than inputs
+
+    Returns
+    -------
+    status: dict
+        processing status for each input file
+
+            - ``'completed'``
+            - ``'skipped'``
+            - ``'failed'``
+    timing: dict
+        cumulative time in seconds spent in each stage
+
+            - ``'read'``: reading input files
+            - ``'compute'``: computing results (summed over workers)
+            - ``'write'``: writing output files
+            - ``'wait'``: writer waiting for computed results
+            - ``'total'``: elapsed time of the pipeline
+    """
+    if (len(input_files) != len(output_files)):
+        raise ValueError('Input and output files have incompatible lengths')
+    # build list of files to run
+    status = {}
+    tasks = []
+    for input_file, output_file in zip(input_files, output_files):
+        if not clobber and is_newer(output_file, input_file):
+            logging.info(f'Skipping {str(input_file)} (output is up to date)')
+            status[str(input_file)] = 'skipped'
+        else:
+            tasks.append((input_file, output_file))
+    # total number of files to run
+    ntasks = len(tasks)
+    # bounded queues between stages
+    read_queue = queue.Queue(maxsize=maxsize)
+    write_queue = queue.Queue(maxsize=maxsize)
+    # cumulative time spent in each stage
+    timing = dict(read=0.0, compute=0.0, write=0.0, wait=0.0)
+    lock = threading.Lock()
+    def _update(stage, start):
+        with lock:
+            timing[stage] += time.perf_counter() - start
+    # read input files in order
+    def _read():
+        for input_file, output_file in tasks:
+            start = time.perf_counter()
+            try:
+                data, exc = (reader(input_file), None)
+            except Exception as e:
+                data, exc = (None, e)
+            _update('read', start)
+            read_queue.put((input_file, output_file, data, exc))
+        # signal the end of the inputs for each compute worker
+        for _ in range(workers):
+            read_queue.put(None)
+    # compute results for each set of data
+    def _compute():
+        while True:
+            item = read_queue.get()
+            if item is None:
+                write_queue.put(None)
+                break
+            input_file, output_file, data, exc = item
+            if exc is None:
+                start = time.perf_counter()
+                try:
+                    data = compute(data)
+                except Exception as e:
+                    data, exc = (None, e)
+                _update('compute', start)
+            write_queue.put((input_file, output_file, data, exc))
+    # start the reader and compute threads
+    start_time = time.perf_counter()
+    threads = [threading.Thread(target=_read, daemon=True)]
+    for _ in range(workers):
+        threads.append(threading.Thread(target=_compute, daemon=True))
+    for thread in threads:
+        thread.start()
+    # write results in the current thread as they are computed
+    count = 0
+    finished = 0
+    while (finished < workers):
+        start = time.perf_counter()
+        item = write_queue.get()
+        _update('wait', start)
+        if item is None:
+            finished += 1
+            continue
+        input_file, output_file, data, exc = item
+        if exc is None:
+            start = time.perf_counter()
+            try:
+                writer(data, output_file)
+            except Exception as e:
+                exc = e
+                # remove incomplete output files
+                output_file = pathlib.Path(output_file).expanduser().absolute()
+                if output_file.exists():
+                    output_file.unlink()
+            _update('write', start)
+        count += 1
+        _batch_status(status, input_file, exc, count, ntasks)
+    for thread in threads:
+        thread.join()
+    timing['total'] = time.perf_counter() - start_time
+    # log summary of pipeline
+    counts = collections.Counter(status.values())
+    logging.info(', '.join(f'{v:d} {k}' for k, v in counts.items()))
+    logging.info(', '.join(f'{k}: {v:0.3f}s' for k, v in timing.items()))
+    return (status, timing)
+
 # PURPOSE: check ftp connection
 def check_ftp_connection(
         HOST: str,
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 compute_LPET_elevations.py
-Written by Tyler Sutterley (08/2024)
+Written by Tyler Sutterley (10/2024)
 Calculates long-period equilibrium tidal elevations for an input file
 
 INPUTS:
@@ -70,6 +70,7 @@ PROGRAM DEPENDENCIES:
     predict.py: calculates long-period equilibrium ocean tides
 
 UPDATE HISTORY:
+    Updated 10/2024: use cached transformers for coordinate conversions
     Updated 08/2024: changed from 'geotiff' to 'GTiff' and 'cog' formats
     Updated 07/2024: assert that data type is a known value
     Updated 06/2024: include attributes in output parquet files
@@ -185,8 +186,7 @@ def compute_LPET_elevations(input_file, output_file,
 
     # converting x,y from projection to latitude/longitude
     crs1 = get_projection(attributes, PROJECTION)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
+    transformer = pyTMD.crs().get_transformer(crs1, 4326)
     assert TYPE.lower() in ('grid', 'drift', 'time series')
     if (TYPE == 'grid'):
         ny, nx = (len(dinput['y']), len(dinput['x']))
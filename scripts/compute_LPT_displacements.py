@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 compute_LPT_displacements.py
-Written by Tyler Sutterley (08/2024)
+Written by Tyler Sutterley (10/2024)
 Calculates radial load pole tide displacements for an input file
     following IERS Convention (2010) guidelines
     https://iers-conventions.obspm.fr/chapter7.php
@@ -79,6 +79,7 @@ PROGRAM DEPENDENCIES:
     utilities.py: download and management utilities for syncing files
 
 UPDATE HISTORY:
+    Updated 10/2024: use cached transformers for coordinate conversions
     Updated 08/2024: changed from 'geotiff' to 'GTiff' and 'cog' formats
         drop use of heights when converting to cartesian coordinates
         use prediction function to calculate cartesian tide displacements
@@ -209,8 +210,7 @@ def compute_LPT_displacements(input_file, output_file,
 
     # converting x,y from projection to latitude/longitude
     crs1 = get_projection(attributes, PROJECTION)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
+    transformer = pyTMD.crs().get_transformer(crs1, 4326)
     assert TYPE.lower() in ('grid', 'drift', 'time series')
     if (TYPE == 'grid'):
         ny, nx = (len(dinput['y']), len(dinput['x']))
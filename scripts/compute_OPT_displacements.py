@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 compute_OPT_displacements.py
-Written by Tyler Sutterley (08/2024)
+Written by Tyler Sutterley (10/2024)
 Calculates radial ocean pole load tide displacements for an input file
     following IERS Convention (2010) guidelines
     https://iers-conventions.obspm.fr/chapter7.php
@@ -91,6 +91,7 @@ REFERENCES:
         doi: 10.1007/s00190-015-0848-7
 
 UPDATE HISTORY:
+    Updated 10/2024: use cached transformers for coordinate conversions
     Updated 08/2024: changed from 'geotiff' to 'GTiff' and 'cog' formats
         drop use of heights when converting to cartesian coordinates
         use io function to extract ocean pole tide values at coordinates
@@ -229,8 +230,7 @@ def compute_OPT_displacements(input_file, output_file,
 
     # converting x,y from projection to latitude/longitude
     crs1 = get_projection(attributes, PROJECTION)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
+    transformer = pyTMD.crs().get_transformer(crs1, 4326)
     if (TYPE == 'grid'):
         ny, nx = (len(dinput['y']), len(dinput['x']))
         gridx, gridy = np.meshgrid(dinput['x'], dinput['y'])
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 compute_SET_displacements.py
-Written by Tyler Sutterley (08/2024)
+Written by Tyler Sutterley (10/2024)
 Calculates radial solid earth tide displacements for an input file
     following IERS Convention (2010) guidelines
     https://iers-conventions.obspm.fr/chapter7.php
@@ -50,6 +50,10 @@ COMMAND LINE OPTIONS:
         approximate: low-resolution ephemerides (default)
         JPL: computed solar and lunar ephemerides from JPL kernels
     -f X, --fill-value X: Invalid value for spatial fields
+    --batch X: Input files or glob patterns to run in batch mode
+    --output-directory X: Output directory for batch mode
+    --processes X: Number of worker processes for batch mode
+    --clobber: Overwrite existing output files in batch mode
     -V, --verbose: Verbose output of processing run
     -M X, --mode X: Permission mode of output file
 
@@ -99,6 +103,8 @@ REFERENCES:
         doi: 10.1111/j.1365-246X.1981.tb02690.x
 
 UPDATE HISTORY:
+    Updated 10/2024: use cached transformers for coordinate conversions
+        added batch mode to run multiple files in parallel
     Updated 08/2024: changed from 'geotiff' to 'GTiff' and 'cog' formats
         drop use of heights when converting to cartesian coordinates
         use rotation matrix to convert from cartesian to spherical
@@ -142,6 +148,15 @@ def info(args):
         logging.debug(f'parent process: {os.getppid():d}')
     logging.debug(f'process id: {os.getpid():d}')
 
+# PURPOSE: set the default output file from the input filename
+def output_filename(input_file, directory=None):
+    vars = (input_file.stem, 'solid_earth_tide', input_file.suffix)
+    output_file = input_file.with_name('{0}_{1}{2}'.format(*vars))
+    # place output file in a separate directory if specified
+    if directory is not None:
+        output_file = pathlib.Path(directory).joinpath(output_file.name)
+    return output_file
+
 # PURPOSE: try to get the projection information for the input file
 def get_projection(attributes, PROJECTION):
     # coordinate reference system string from file
@@ -207,8 +222,7 @@ def compute_SET_displacements(input_file, output_file,
 
     # converting x,y from projection to latitude/longitude
     crs1 = get_projection(attributes, PROJECTION)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
+    transformer = pyTMD.crs().get_transformer(crs1, 4326)
     assert TYPE.lower() in ('grid', 'drift', 'time series')
     if (TYPE == 'grid'):
         ny, nx = (len(dinput['y']), len(dinput['x']))
@@ -454,6 +468,19 @@ def arguments():
     parser.add_argument('--fill-value','-f',
         type=float, default=-9999.0,
         help='Invalid value for spatial fields')
+    # run multiple input files
+    parser.add_argument('--batch',
+        metavar='FILE', type=str, nargs='+',
+        help='Input files or glob patterns to run in batch mode')
+    parser.add_argument('--output-directory',
+        type=pathlib.Path,
+        help='Output directory for batch mode')
+    parser.add_argument('--processes',
+        type=int, default=1,
+        help='Number of worker processes for batch mode')
+    parser.add_argument('--clobber',
+        default=False, action='store_true',
+        help='Overwrite existing output files in batch mode')
     # verbose output of processing run
     # print information about processing run
     parser.add_argument('--verbose','-V',
@@ -476,29 +503,41 @@ def main():
     loglevels = [logging.CRITICAL, logging.INFO, logging.DEBUG]
     logging.basicConfig(level=loglevels[args.verbose])
 
+    # keyword arguments for computing solid earth tides
+    kwargs = dict(FORMAT=args.format,
+        VARIABLES=args.variables,
+        HEADER=args.header,
+        DELIMITER=args.delimiter,
+        TYPE=args.type,
+        TIME_UNITS=args.epoch,
+        TIME=args.deltatime,
+        TIME_STANDARD=args.standard,
+        PROJECTION=args.projection,
+        ELLIPSOID=args.ellipsoid,
+        TIDE_SYSTEM=args.tide_system,
+        EPHEMERIDES=args.ephemerides,
+        FILL_VALUE=args.fill_value,
+        MODE=args.mode)
+
+    # run solid earth tide program for multiple input files
+    if args.batch:
+        info(args)
+        input_files = pyTMD.utilities.expand_files(*args.batch)
+        output_files = [output_filename(f,
+            directory=args.output_directory) for f in input_files]
+        pyTMD.utilities.batch(compute_SET_displacements,
+            input_files, output_files, processes=args.processes,
+            clobber=args.clobber, **kwargs)
+        return
+
     # set output file from input filename if not entered
     if not args.outfile:
-        vars = (args.infile.stem,'solid_earth_tide',args.infile.suffix)
-        args.outfile = args.infile.with_name('{0}_{1}{2}'.format(*vars))
+        args.outfile = output_filename(args.infile)
 
     # try to run solid earth tide program for input file
     try:
         info(args)
-        compute_SET_displacements(args.infile, args.outfile,
-            FORMAT=args.format,
-            VARIABLES=args.variables,
-            HEADER=args.header,
-            DELIMITER=args.delimiter,
-            TYPE=args.type,
-            TIME_UNITS=args.epoch,
-            TIME=args.deltatime,
-            TIME_STANDARD=args.standard,
-            PROJECTION=args.projection,
-            ELLIPSOID=args.ellipsoid,
-            TIDE_SYSTEM=args.tide_system,
-            EPHEMERIDES=args.ephemerides,
-            FILL_VALUE=args.fill_value,
-            MODE=args.mode)
+        compute_SET_displacements(args.infile, args.outfile, **kwargs)
     except Exception as exc:
         # if there has been an error exception
         # print the type, value, and stack trace of the
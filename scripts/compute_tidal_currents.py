@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 compute_tidal_currents.py
-Written by Tyler Sutterley (09/2024)
+Written by Tyler Sutterley (10/2024)
 Calculates zonal and meridional tidal currents for an input file
 
 Uses OTIS format tidal solutions provided by Oregon State University and ESR
@@ -60,6 +60,10 @@ COMMAND LINE OPTIONS:
     --infer-minor: Infer values for minor constituents
     --minor-constituents: Minor constituents to infer
     -f X, --fill-value X: Invalid value for spatial fields
+    --batch X: Input files or glob patterns to run in batch mode
+    --output-directory X: Output directory for batch mode
+    --processes X: Number of worker processes for batch mode
+    --clobber: Overwrite existing output files in batch mode
     -V, --verbose: Verbose output of processing run
     -M X, --mode X: Permission mode of output file
 
@@ -98,6 +102,9 @@ PROGRAM DEPENDENCIES:
     predict.py: predict tidal values using harmonic constants
 
 UPDATE HISTORY:
+    Updated 10/2024: use cached transformers for coordinate conversions
+        added batch mode to run multiple files with a preloaded model
+        reuse fitted splines of the preloaded model between files
     Updated 09/2024: use JSON database for known model parameters
         use model name in default output filename for definition file case
         drop support for the ascii definition file format
@@ -207,7 +214,57 @@ def get_projection(attributes, PROJECTION):
     # no projection can be made
     raise pyproj.exceptions.CRSError
 
-# PURPOSE: read csv, netCDF or HDF5 data
+# PURPOSE: read tidal constants for the complete tide model
+def read_tide_model(tide_dir,
+    TIDE_MODEL=None,
+    GZIP=True,
+    DEFINITION_FILE=None):
+    # get parameters for tide model
+    if DEFINITION_FILE is not None:
+        model = pyTMD.io.model(tide_dir).from_file(DEFINITION_FILE)
+    else:
+        model = pyTMD.io.model(tide_dir, compressed=GZIP).current(TIDE_MODEL)
+    # read tidal constants from the tide model for u and v currents
+    constituents = {}
+    for t in model.type:
+        if model.format in ('OTIS','ATLAS-compact','TMD3'):
+            constituents[t] = pyTMD.io.OTIS.read_constants(
+                model.grid_file, model.model_file['u'], model.projection,
+                type=t, grid=model.file_format)
+        elif (model.format == 'ATLAS-netcdf'):
+            constituents[t] = pyTMD.io.ATLAS.read_constants(
+                model.grid_file, model.model_file[t], type=t,
+                compressed=model.compressed)
+        elif (model.format == 'FES-netcdf'):
+            constituents[t] = pyTMD.io.FES.read_constants(
+                model.model_file[t], type=t, version=model.version,
+                compressed=model.compressed)
+    return constituents
+
+# PURPOSE: tidal constants shared by worker processes in batch mode
+_constituents = None
+
+# PURPOSE: read the tide model once for each worker process
+def _init_worker(*args, **kwargs):
+    global _constituents
+    # constituents are inherited from the parent if forked
+    if _constituents is None:
+        _constituents = read_tide_model(*args, **kwargs)
+
+# PURPOSE: compute currents for a file using the preloaded tidal constants
+def _batch_worker(input_file, output_file, tide_dir=None, **kwargs):
+    compute_tidal_currents(tide_dir, input_file, output_file,
+        CONSTITUENTS=_constituents, **kwargs)
+
+# PURPOSE: set the default output file from the input filename
+def output_filename(input_file, model, directory=None):
+    vars = (input_file.stem, model.name, '_currents', input_file.suffix)
+    output_file = input_file.with_name('{0}_{1}{2}{3}'.format(*vars))
+    # place output file in a separate directory if specified
+    if directory is not None:
+        output_file = pathlib.Path(directory).joinpath(output_file.name)
+    return output_file
+
 # compute tides at points and times using tidal model driver algorithms
 def compute_tidal_currents(tide_dir, input_file, output_file,
     TIDE_MODEL=None,
@@ -230,6 +287,7 @@ def compute_tidal_currents(tide_dir, input_file, output_file,
     INFER_MINOR=False,
     MINOR_CONSTITUENTS=None,
     FILL_VALUE=-9999.0,
+    CONSTITUENTS=None,
     MODE=0o775):
 
     # get parameters for tide model
@@ -266,8 +324,7 @@ def compute_tidal_currents(tide_dir, input_file, output_file,
 
     # converting x,y from projection to latitude/longitude
     crs1 = get_projection(attributes, PROJECTION)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
+    transformer = pyTMD.crs().get_transformer(crs1, 4326)
     assert TYPE.lower() in ('grid', 'drift', 'time series')
     if (TYPE == 'grid'):
         ny, nx = (len(dinput['y']), len(dinput['x']))
@@ -302,8 +359,32 @@ def compute_tidal_currents(tide_dir, input_file, output_file,
     tide = {}
     # iterate over u and v currents
     for t in model.type:
+        # interpolate preloaded tidal constants to grid points
+        if (CONSTITUENTS is not None) and \
+            model.format in ('OTIS','ATLAS-compact','TMD3'):
+            amp,ph,D = pyTMD.io.OTIS.interpolate_constants(np.ravel(lon),
+                np.ravel(lat), CONSTITUENTS[t], type=t, method=METHOD,
+                extrapolate=EXTRAPOLATE, cutoff=CUTOFF, cache=True)
+            c = CONSTITUENTS[t].fields
+            deltat = np.zeros((nt))
+        elif (CONSTITUENTS is not None) and (model.format == 'ATLAS-netcdf'):
+            amp,ph,D = pyTMD.io.ATLAS.interpolate_constants(np.ravel(lon),
+                np.ravel(lat), CONSTITUENTS[t], type=t, method=METHOD,
+                extrapolate=EXTRAPOLATE, cutoff=CUTOFF, scale=model.scale,
+            cache=True)
+            c = CONSTITUENTS[t].fields
+            deltat = np.zeros((nt))
+        elif (CONSTITUENTS is not None) and (model.format == 'FES-netcdf'):
+            amp,ph = pyTMD.io.FES.interpolate_constants(np.ravel(lon),
+                np.ravel(lat), CONSTITUENTS[t], method=METHOD,
+                extrapolate=EXTRAPOLATE, cutoff=CUTOFF, scale=model.scale,
+            cache=True)
+            # available model constituents
+            c = model.constituents
+            # delta time (TT - UT1)
+            deltat = ts.tt_ut1
         # read tidal constants and interpolate to grid points
-        if model.format in ('OTIS','ATLAS-compact','TMD3'):
+        elif model.format in ('OTIS','ATLAS-compact','TMD3'):
             amp,ph,D,c = pyTMD.io.OTIS.extract_constants(np.ravel(lon), np.ravel(lat),
                 model.grid_file, model.model_file['u'], model.projection,
                 type=t, grid=model.file_format, crop=CROP, method=METHOD,
@@ -567,6 +648,19 @@ def arguments():
     parser.add_argument('--fill-value','-f',
         type=float, default=-9999.0,
         help='Invalid value for spatial fields')
+    # run multiple input files with a preloaded tide model
+    parser.add_argument('--batch',
+        metavar='FILE', type=str, nargs='+',
+        help='Input files or glob patterns to run in batch mode')
+    parser.add_argument('--output-directory',
+        type=pathlib.Path,
+        help='Output directory for batch mode')
+    parser.add_argument('--processes',
+        type=int, default=1,
+        help='Number of worker processes for batch mode')
+    parser.add_argument('--clobber',
+        default=False, action='store_true',
+        help='Overwrite existing output files in batch mode')
     # verbose output of processing run
     # print information about processing run
     parser.add_argument('--verbose','-V',
@@ -595,36 +689,54 @@ def main():
     else:
         model = pyTMD.io.model(verify=False).current(args.tide)
 
+    # keyword arguments for computing tidal currents
+    kwargs = dict(TIDE_MODEL=args.tide,
+        GZIP=args.gzip,
+        DEFINITION_FILE=args.definition_file,
+        CROP=args.crop,
+        FORMAT=args.format,
+        VARIABLES=args.variables,
+        HEADER=args.header,
+        DELIMITER=args.delimiter,
+        TYPE=args.type,
+        TIME_UNITS=args.epoch,
+        TIME=args.deltatime,
+        TIME_STANDARD=args.standard,
+        PROJECTION=args.projection,
+        METHOD=args.interpolate,
+        EXTRAPOLATE=args.extrapolate,
+        CUTOFF=args.cutoff,
+        CORRECTIONS=args.nodal_corrections,
+        INFER_MINOR=args.infer_minor,
+        MINOR_CONSTITUENTS=args.minor_constituents,
+        FILL_VALUE=args.fill_value,
+        MODE=args.mode)
+
+    # run tidal current program for multiple input files
+    if args.batch:
+        info(args)
+        input_files = pyTMD.utilities.expand_files(*args.batch)
+        output_files = [output_filename(f, model,
+            directory=args.output_directory) for f in input_files]
+        # read the tide model once (inherited by forked workers)
+        initargs = (args.directory, args.tide, args.gzip,
+            args.definition_file)
+        _init_worker(*initargs)
+        pyTMD.utilities.batch(_batch_worker, input_files, output_files,
+            processes=args.processes, clobber=args.clobber,
+            initializer=_init_worker, initargs=initargs,
+            tide_dir=args.directory, **kwargs)
+        return
+
     # set output file from input filename if not entered
     if not args.outfile:
-        vars = (args.infile.stem,model.name,'_currents',args.infile.suffix)
-        args.outfile = args.infile.with_name('{0}_{1}{2}{3}'.format(*vars))
+        args.outfile = output_filename(args.infile, model)
 
     # try to run tidal current program for input file
     try:
         info(args)
         compute_tidal_currents(args.directory, args.infile, args.outfile,
-            TIDE_MODEL=args.tide,
-            GZIP=args.gzip,
-            DEFINITION_FILE=args.definition_file,
-            CROP=args.crop,
-            FORMAT=args.format,
-            VARIABLES=args.variables,
-            HEADER=args.header,
-            DELIMITER=args.delimiter,
-            TYPE=args.type,
-            TIME_UNITS=args.epoch,
-            TIME=args.deltatime,
-            TIME_STANDARD=args.standard,
-            PROJECTION=args.projection,
-            METHOD=args.interpolate,
-            EXTRAPOLATE=args.extrapolate,
-            CUTOFF=args.cutoff,
-            CORRECTIONS=args.nodal_corrections,
-            INFER_MINOR=args.infer_minor,
-            MINOR_CONSTITUENTS=args.minor_constituents,
-            FILL_VALUE=args.fill_value,
-            MODE=args.mode)
+            **kwargs)
     except Exception as exc:
         # if there has been an error exception
         # print the type, value, and stack trace of the
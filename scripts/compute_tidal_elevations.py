@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 compute_tidal_elevations.py
-Written by Tyler Sutterley (09/2024)
+Written by Tyler Sutterley (10/2024)
 Calculates tidal elevations for an input file
 
 Uses OTIS format tidal solutions provided by Oregon State University and ESR
@@ -63,6 +63,18 @@ COMMAND LINE OPTIONS:
     --apply-flexure: Apply ice flexure scaling factor to height values
         Only valid for models containing flexure fields
     -f X, --fill-value X: Invalid value for spatial fields
+    --batch X: Input files or glob patterns to run in batch mode
+    --output-directory X: Output directory for batch mode
+    --processes X: Number of worker processes for batch mode
+    --clobber: Overwrite existing output files in batch mode
+    --pipeline: Overlap file input/output with computation in batch mode
+        not compatible with incremental writes, blocks or chunks
+    --block-size X: Predict geotiff grids in blocks of X rows and columns
+    --chunk-size X: Predict drift data in chunks of X records
+        for netCDF4, HDF5 and parquet files
+    --incremental: Write and resume time slices of grids
+        for netCDF4 and HDF5 outputs
+        not compatible with batch mode
     -V, --verbose: Verbose output of processing run
     -M X, --mode X: Permission mode of output file
 
@@ -101,6 +113,16 @@ PROGRAM DEPENDENCIES:
     predict.py: predict tidal values using harmonic constants
 
 UPDATE HISTORY:
+    Updated 10/2024: use cached transformers for coordinate conversions
+        added batch mode to run multiple files with a preloaded model
+        added incremental mode to write and resume time slices of grids
+        added pipeline option to overlap input/output with computation
+        added option to predict geotiff grids in windowed blocks
+        reuse fitted splines of the preloaded model between files and blocks
+        reject incremental writes in batch mode
+        reject predicting geotiff blocks in pipeline mode
+        added option to predict drift data in chunks of records
+        stream record batches of parquet files when predicting in chunks
     Updated 09/2024: use JSON database for known model parameters
         use model name in default output filename for definition file case
         drop support for the ascii definition file format
@@ -173,7 +195,10 @@ from __future__ import print_function
 
 import sys
 import os
+import copy
 import logging
+import functools
+import itertools
 import pathlib
 import argparse
 import traceback
@@ -212,38 +237,125 @@ def get_projection(attributes, PROJECTION):
     # no projection can be made
     raise pyproj.exceptions.CRSError
 
-# compute tides at points and times using tidal model driver algorithms
-def compute_tidal_elevations(tide_dir, input_file, output_file,
+# PURPOSE: read tidal constants for the complete tide model
+def read_tide_model(tide_dir,
     TIDE_MODEL=None,
     GZIP=True,
     DEFINITION_FILE=None,
-    CROP=False,
+    APPLY_FLEXURE=False):
+    # get parameters for tide model
+    if DEFINITION_FILE is not None:
+        model = pyTMD.io.model(tide_dir).from_file(DEFINITION_FILE)
+    else:
+        model = pyTMD.io.model(tide_dir, compressed=GZIP).elevation(TIDE_MODEL)
+    # read tidal constants from the tide model
+    if model.format in ('OTIS','ATLAS-compact','TMD3'):
+        constituents = pyTMD.io.OTIS.read_constants(
+            model.grid_file, model.model_file, model.projection,
+            type=model.type, grid=model.file_format,
+            apply_flexure=APPLY_FLEXURE)
+    elif (model.format == 'ATLAS-netcdf'):
+        constituents = pyTMD.io.ATLAS.read_constants(
+            model.grid_file, model.model_file, type=model.type,
+            compressed=model.compressed)
+    elif model.format in ('GOT-ascii', 'GOT-netcdf'):
+        constituents = pyTMD.io.GOT.read_constants(
+            model.model_file, grid=model.file_format,
+            compressed=model.compressed)
+    elif (model.format == 'FES-netcdf'):
+        constituents = pyTMD.io.FES.read_constants(
+            model.model_file, type=model.type, version=model.version,
+            compressed=model.compressed)
+    return constituents
+
+# PURPOSE: tidal constants shared by worker processes in batch mode
+_constituents = None
+
+# PURPOSE: read the tide model once for each worker process
+def _init_worker(*args, **kwargs):
+    global _constituents
+    # constituents are inherited from the parent if forked
+    if _constituents is None:
+        _constituents = read_tide_model(*args, **kwargs)
+
+# PURPOSE: compute tides for a file using the preloaded tidal constants
+def _batch_worker(input_file, output_file, tide_dir=None, **kwargs):
+    compute_tidal_elevations(tide_dir, input_file, output_file,
+        CONSTITUENTS=_constituents, **kwargs)
+
+# PURPOSE: compute stage of the batch pipeline
+def _pipeline_compute(tide_dir, data, **kwargs):
+    dinput, attributes = data
+    output, attrib = tidal_elevations(tide_dir, dinput, attributes, **kwargs)
+    return (output, attrib, attributes)
+
+# PURPOSE: write stage of the batch pipeline
+def _pipeline_writer(result, output_file, **kwargs):
+    output, attrib, attributes = result
+    write_output_file(output, attrib, attributes, output_file, **kwargs)
+
+# PURPOSE: set the default output file from the input filename
+def output_filename(input_file, model, APPLY_FLEXURE=False, directory=None):
+    flexure_flag = '_flexure' if APPLY_FLEXURE else ''
+    vars = (input_file.stem, model.name, flexure_flag, input_file.suffix)
+    output_file = input_file.with_name('{0}_{1}{2}{3}'.format(*vars))
+    # place output file in a separate directory if specified
+    if directory is not None:
+        output_file = pathlib.Path(directory).joinpath(output_file.name)
+    return output_file
+
+# PURPOSE: predict tidal elevations for a single time slice of a grid
+def predict_grid(t, hc, c, shape,
+    deltat=0.0,
+    corrections='OTIS',
+    INFER_MINOR=False,
+    MINOR_CONSTITUENTS=None):
+    TIDE = pyTMD.predict.map(t, hc, c,
+        deltat=deltat, corrections=corrections)
+    # calculate values for minor constituents by inferrence
+    if INFER_MINOR:
+        MINOR = pyTMD.predict.infer_minor(t, hc, c,
+            deltat=deltat, corrections=corrections,
+            minor=MINOR_CONSTITUENTS)
+    else:
+        MINOR = np.ma.zeros_like(TIDE)
+    # add major and minor components and reform grid
+    tide = np.ma.zeros(shape)
+    tide.data[:] = np.reshape((TIDE.data + MINOR.data), shape)
+    tide.mask = np.reshape((TIDE.mask | MINOR.mask), shape)
+    return tide
+
+# PURPOSE: get the number of completed time slices in an output file
+def completed_slices(output_file, FORMAT, times):
+    # check that the output file exists
+    if not output_file.exists():
+        return 0
+    try:
+        attributes = pyTMD.spatial.read_attributes(output_file, FORMAT)
+        start = int(attributes['time_slices_completed'])
+        # verify that the written times match the input times
+        doutput = pyTMD.spatial.from_file(output_file, FORMAT,
+            field_mapping=dict(time='time'))
+        assert (start <= len(times))
+        assert np.allclose(doutput['time'][:start], times[:start])
+    except Exception as exc:
+        logging.info(f'Unable to resume from {str(output_file)}: {exc}')
+        return 0
+    else:
+        logging.info(f'Resuming {str(output_file)} at time slice {start:d}')
+        return start
+
+# PURPOSE: read input file to extract time, spatial coordinates and data
+def read_input_file(input_file,
     FORMAT='csv',
     VARIABLES=[],
     HEADER=0,
     DELIMITER=',',
-    TYPE='drift',
-    TIME_UNITS='days since 1858-11-17T00:00:00',
     TIME_STANDARD='UTC',
     TIME=None,
-    PROJECTION='4326',
-    METHOD='spline',
-    EXTRAPOLATE=False,
-    CUTOFF=None,
-    CORRECTIONS=None,
-    INFER_MINOR=False,
-    MINOR_CONSTITUENTS=None,
-    APPLY_FLEXURE=False,
-    FILL_VALUE=-9999.0,
-    MODE=0o775):
+    **kwargs):
 
-    # get parameters for tide model
-    if DEFINITION_FILE is not None:
-        model = pyTMD.io.model(tide_dir).from_file(DEFINITION_FILE)
-    else:
-        model = pyTMD.io.model(tide_dir, compressed=GZIP).elevation(TIDE_MODEL)
-
-    # read input file to extract time, spatial coordinates and data
+    # read input file for format
     if (FORMAT == 'csv'):
         parse_dates = (TIME_STANDARD.lower() == 'datetime')
         dinput = pyTMD.spatial.from_ascii(input_file, columns=VARIABLES,
@@ -268,11 +380,43 @@ def compute_tidal_elevations(tide_dir, input_file, output_file,
     # update time variable if entered as argument
     if TIME is not None:
         dinput['time'] = np.copy(TIME)
+    # return the input data and attributes
+    return (dinput, attributes)
+
+# PURPOSE: calculate tidal elevations for the input data
+def tidal_elevations(tide_dir, dinput, attributes,
+    output_file=None,
+    TIDE_MODEL=None,
+    GZIP=True,
+    DEFINITION_FILE=None,
+    CROP=False,
+    FORMAT='csv',
+    TYPE='drift',
+    TIME_UNITS='days since 1858-11-17T00:00:00',
+    TIME_STANDARD='UTC',
+    PROJECTION='4326',
+    METHOD='spline',
+    EXTRAPOLATE=False,
+    CUTOFF=None,
+    CORRECTIONS=None,
+    INFER_MINOR=False,
+    MINOR_CONSTITUENTS=None,
+    APPLY_FLEXURE=False,
+    FILL_VALUE=-9999.0,
+    CONSTITUENTS=None,
+    INCREMENTAL=False,
+    MODE=0o775,
+    **kwargs):
+
+    # get parameters for tide model
+    if DEFINITION_FILE is not None:
+        model = pyTMD.io.model(tide_dir).from_file(DEFINITION_FILE)
+    else:
+        model = pyTMD.io.model(tide_dir, compressed=GZIP).elevation(TIDE_MODEL)
 
     # converting x,y from projection to latitude/longitude
     crs1 = get_projection(attributes, PROJECTION)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
+    transformer = pyTMD.crs().get_transformer(crs1, 4326)
     assert TYPE.lower() in ('grid', 'drift', 'time series')
     if (TYPE == 'grid'):
         ny, nx = (len(dinput['y']), len(dinput['x']))
@@ -303,8 +447,41 @@ def compute_tidal_elevations(tide_dir, input_file, output_file,
     # number of time points
     nt = len(ts)
 
+    # interpolate preloaded tidal constants to grid points
+    if (CONSTITUENTS is not None) and \
+        model.format in ('OTIS','ATLAS-compact','TMD3'):
+        amp,ph,D = pyTMD.io.OTIS.interpolate_constants(np.ravel(lon),
+            np.ravel(lat), CONSTITUENTS, type=model.type, method=METHOD,
+            extrapolate=EXTRAPOLATE, cutoff=CUTOFF, cache=True)
+        c = CONSTITUENTS.fields
+        deltat = np.zeros((nt))
+    elif (CONSTITUENTS is not None) and (model.format == 'ATLAS-netcdf'):
+        amp,ph,D = pyTMD.io.ATLAS.interpolate_constants(np.ravel(lon),
+            np.ravel(lat), CONSTITUENTS, type=model.type, method=METHOD,
+            extrapolate=EXTRAPOLATE, cutoff=CUTOFF, scale=model.scale,
+            cache=True)
+        c = CONSTITUENTS.fields
+        deltat = np.zeros((nt))
+    elif (CONSTITUENTS is not None) and \
+        model.format in ('GOT-ascii', 'GOT-netcdf'):
+        amp,ph = pyTMD.io.GOT.interpolate_constants(np.ravel(lon),
+            np.ravel(lat), CONSTITUENTS, method=METHOD,
+            extrapolate=EXTRAPOLATE, cutoff=CUTOFF, scale=model.scale,
+            cache=True)
+        c = CONSTITUENTS.fields
+        # delta time (TT - UT1)
+        deltat = ts.tt_ut1
+    elif (CONSTITUENTS is not None) and (model.format == 'FES-netcdf'):
+        amp,ph = pyTMD.io.FES.interpolate_constants(np.ravel(lon),
+            np.ravel(lat), CONSTITUENTS, method=METHOD,
+            extrapolate=EXTRAPOLATE, cutoff=CUTOFF, scale=model.scale,
+            cache=True)
+        # available model constituents
+        c = model.constituents
+        # delta time (TT - UT1)
+        deltat = ts.tt_ut1
     # read tidal constants and interpolate to grid points
-    if model.format in ('OTIS','ATLAS-compact','TMD3'):
+    elif model.format in ('OTIS','ATLAS-compact','TMD3'):
         amp,ph,D,c = pyTMD.io.OTIS.extract_constants(np.ravel(lon), np.ravel(lat),
             model.grid_file, model.model_file, model.projection,
             type=model.type, grid=model.file_format, crop=CROP, method=METHOD,
@@ -338,27 +515,77 @@ def compute_tidal_elevations(tide_dir, input_file, output_file,
     # calculate constituent oscillation
     hc = amp*np.exp(cph)
 
+    # output netCDF4 and HDF5 file attributes
+    # will be added to YAML header in csv files
+    attrib = {}
+    # latitude
+    attrib['lat'] = {}
+    attrib['lat']['long_name'] = 'Latitude'
+    attrib['lat']['units'] = 'Degrees_North'
+    # longitude
+    attrib['lon'] = {}
+    attrib['lon']['long_name'] = 'Longitude'
+    attrib['lon']['units'] = 'Degrees_East'
+    # tides
+    output_variable = model.variable
+    attrib[output_variable] = {}
+    attrib[output_variable]['description'] = model.description
+    attrib[output_variable]['reference'] = model.reference
+    attrib[output_variable]['model'] = model.name
+    attrib[output_variable]['units'] = 'meters'
+    attrib[output_variable]['long_name'] = model.long_name
+    attrib[output_variable]['_FillValue'] = FILL_VALUE
+    # time
+    attrib['time'] = {}
+    attrib['time']['long_name'] = 'Time'
+    attrib['time']['calendar'] = 'standard'
+
     # nodal corrections to apply
     nodal_corrections = CORRECTIONS or model.corrections
     # minor constituents to infer
     minor_constituents = MINOR_CONSTITUENTS or model.minor
+    # predict and write tidal elevations one time slice at a time
+    if INCREMENTAL and (output_file is not None) and (TYPE == 'grid') and \
+        FORMAT in ('netCDF4','HDF5'):
+        # number of time slices already written to the output file
+        start = completed_slices(output_file, FORMAT, ts.tide)
+        attrib['time']['units'] = 'days since 1992-01-01T00:00:00'
+        for i in range(start, nt):
+            tide = np.ma.zeros((ny,nx,1), fill_value=FILL_VALUE)
+            tide.mask = np.zeros((ny,nx,1),dtype=bool)
+            tide[:,:,0] = predict_grid(ts.tide[i], hc, c, (ny,nx),
+                deltat=deltat[i], corrections=nodal_corrections,
+                INFER_MINOR=INFER_MINOR,
+                MINOR_CONSTITUENTS=minor_constituents)
+            # replace invalid values with fill value
+            tide.data[tide.mask] = tide.fill_value
+            # output data dictionary for time slice
+            output = {output_variable:tide, 'time':ts.tide[i:i+1]}
+            if (i == 0):
+                output.update(lon=lon, lat=lat)
+            # record the number of completed time slices
+            attrs = copy.deepcopy(attrib)
+            attrs['ROOT'] = dict(time_slices_completed=i+1,
+                time_slices_total=nt)
+            mode = 'w' if (i == 0) else 'a'
+            if (FORMAT == 'netCDF4'):
+                pyTMD.spatial.to_netCDF4(output, attrs, output_file,
+                    mode=mode, data_type=TYPE, offset=i)
+            elif (FORMAT == 'HDF5'):
+                pyTMD.spatial.to_HDF5(output, attrs, output_file,
+                    mode=mode, offset=i)
+        # change the permissions level to MODE
+        output_file.chmod(mode=MODE)
+        return None
     # predict tidal elevations at time
     if (TYPE == 'grid'):
         tide = np.ma.zeros((ny,nx,nt), fill_value=FILL_VALUE)
         tide.mask = np.zeros((ny,nx,nt),dtype=bool)
         for i in range(nt):
-            TIDE = pyTMD.predict.map(ts.tide[i], hc, c,
-                deltat=deltat[i], corrections=nodal_corrections)
-            # calculate values for minor constituents by inferrence
-            if INFER_MINOR:
-                MINOR = pyTMD.predict.infer_minor(ts.tide[i], hc, c,
-                    deltat=deltat[i], corrections=nodal_corrections,
-                    minor=minor_constituents)
-            else:
-                MINOR = np.ma.zeros_like(TIDE)
-            # add major and minor components and reform grid
-            tide[:,:,i] = np.reshape((TIDE+MINOR), (ny,nx))
-            tide.mask[:,:,i] = np.reshape((TIDE.mask | MINOR.mask), (ny,nx))
+            tide[:,:,i] = predict_grid(ts.tide[i], hc, c, (ny,nx),
+                deltat=deltat[i], corrections=nodal_corrections,
+                INFER_MINOR=INFER_MINOR,
+                MINOR_CONSTITUENTS=minor_constituents)
     elif (TYPE == 'drift'):
         tide = np.ma.zeros((nt), fill_value=FILL_VALUE)
         tide.mask = np.any(hc.mask,axis=1)
@@ -391,31 +618,6 @@ def compute_tidal_elevations(tide_dir, input_file, output_file,
     # replace invalid values with fill value
     tide.data[tide.mask] = tide.fill_value
 
-    # output netCDF4 and HDF5 file attributes
-    # will be added to YAML header in csv files
-    attrib = {}
-    # latitude
-    attrib['lat'] = {}
-    attrib['lat']['long_name'] = 'Latitude'
-    attrib['lat']['units'] = 'Degrees_North'
-    # longitude
-    attrib['lon'] = {}
-    attrib['lon']['long_name'] = 'Longitude'
-    attrib['lon']['units'] = 'Degrees_East'
-    # tides
-    output_variable = model.variable
-    attrib[output_variable] = {}
-    attrib[output_variable]['description'] = model.description
-    attrib[output_variable]['reference'] = model.reference
-    attrib[output_variable]['model'] = model.name
-    attrib[output_variable]['units'] = 'meters'
-    attrib[output_variable]['long_name'] = model.long_name
-    attrib[output_variable]['_FillValue'] = FILL_VALUE
-    # time
-    attrib['time'] = {}
-    attrib['time']['long_name'] = 'Time'
-    attrib['time']['calendar'] = 'standard'
-
     # output data dictionary
     output = {'lon':lon, 'lat':lat, output_variable:tide}
     if (FORMAT == 'csv') and (TIME_STANDARD.lower() == 'datetime'):
@@ -423,7 +625,19 @@ def compute_tidal_elevations(tide_dir, input_file, output_file,
     else:
         attrib['time']['units'] = 'days since 1992-01-01T00:00:00'
         output['time'] = ts.tide
+    # return the output data and attributes
+    return (output, attrib)
+
+# PURPOSE: write tidal elevations to the output file
+def write_output_file(output, attrib, attributes, output_file,
+    FORMAT='csv',
+    DELIMITER=',',
+    TYPE='drift',
+    MODE=0o775,
+    **kwargs):
 
+    # tide variable in the output data dictionary
+    output_variable, = set(output.keys()) - set(['lon','lat','time'])
     # output to file
     if (FORMAT == 'csv'):
         # write columnar data to ascii
@@ -453,6 +667,253 @@ def compute_tidal_elevations(tide_dir, input_file, output_file,
     # change the permissions level to MODE
     output_file.chmod(mode=MODE)
 
+# PURPOSE: compute tides for blocks of a geotiff file
+def compute_geotiff_blocks(tide_dir, input_file, output_file,
+    BLOCK_SIZE=512,
+    TIDE_MODEL=None,
+    GZIP=True,
+    DEFINITION_FILE=None,
+    FORMAT='cog',
+    TIME=None,
+    APPLY_FLEXURE=False,
+    FILL_VALUE=-9999.0,
+    CONSTITUENTS=None,
+    MODE=0o775,
+    **kwargs):
+
+    # get parameters for tide model
+    if DEFINITION_FILE is not None:
+        model = pyTMD.io.model(tide_dir).from_file(DEFINITION_FILE)
+    else:
+        model = pyTMD.io.model(tide_dir, compressed=GZIP).elevation(TIDE_MODEL)
+    # read the tide model once for all blocks
+    if CONSTITUENTS is None:
+        CONSTITUENTS = read_tide_model(tide_dir, TIDE_MODEL=TIDE_MODEL,
+            GZIP=GZIP, DEFINITION_FILE=DEFINITION_FILE,
+            APPLY_FLEXURE=APPLY_FLEXURE)
+    # image attributes of the input file
+    attributes = pyTMD.spatial.read_attributes(input_file, FORMAT)
+    # output geotiff attributes
+    output_variable = model.variable
+    attrib = {output_variable: dict(_FillValue=FILL_VALUE)}
+    # copy global geotiff attributes for projection and grid parameters
+    for att_name in ['projection','wkt','spacing','extent']:
+        attrib[att_name] = attributes[att_name]
+
+    # predict tidal elevations for each block of the input file
+    def predict_blocks():
+        for dinput in pyTMD.spatial.iter_geotiff(input_file,
+            block_size=BLOCK_SIZE):
+            # update time variable if entered as argument
+            if TIME is not None:
+                dinput['time'] = np.copy(TIME)
+            output, _ = tidal_elevations(tide_dir, dinput,
+                dinput['attributes'], TIDE_MODEL=TIDE_MODEL, GZIP=GZIP,
+                DEFINITION_FILE=DEFINITION_FILE, FORMAT=FORMAT, TYPE='grid',
+                APPLY_FLEXURE=APPLY_FLEXURE, FILL_VALUE=FILL_VALUE,
+                CONSTITUENTS=CONSTITUENTS, **kwargs)
+            yield {output_variable:output[output_variable],
+                'window':dinput['window']}
+
+    # write blocks to a tiled (cloud optimized) geotiff
+    pyTMD.spatial.to_geotiff_stream(predict_blocks(), attrib, output_file,
+        attributes['shape'], varname=output_variable, driver=FORMAT)
+    # change the permissions level to MODE
+    output_file.chmod(mode=MODE)
+
+# PURPOSE: compute tides for chunks of a drift file
+def compute_drift_chunks(tide_dir, input_file, output_file,
+    CHUNK_SIZE=100000,
+    TIDE_MODEL=None,
+    GZIP=True,
+    DEFINITION_FILE=None,
+    FORMAT='netCDF4',
+    VARIABLES=[],
+    TIME=None,
+    APPLY_FLEXURE=False,
+    CONSTITUENTS=None,
+    MODE=0o775,
+    **kwargs):
+
+    # read the tide model once for all chunks
+    if CONSTITUENTS is None:
+        CONSTITUENTS = read_tide_model(tide_dir, TIDE_MODEL=TIDE_MODEL,
+            GZIP=GZIP, DEFINITION_FILE=DEFINITION_FILE,
+            APPLY_FLEXURE=APPLY_FLEXURE)
+    # keyword arguments for reading chunks of the input file
+    if (FORMAT == 'parquet'):
+        reader_kwargs = dict(columns=VARIABLES)
+    else:
+        field_mapping = pyTMD.spatial.default_field_mapping(VARIABLES)
+        reader_kwargs = dict(field_mapping=field_mapping)
+
+    # predict tidal elevations for each chunk of the input file
+    def predict_chunks():
+        for dinput in pyTMD.spatial.iter_file(input_file, FORMAT,
+            chunk_size=CHUNK_SIZE, **reader_kwargs):
+            # update time variable if entered as argument
+            if TIME is not None:
+                dinput['time'] = np.copy(TIME)
+            output, attrib = tidal_elevations(tide_dir, dinput,
+                dinput['attributes'], TIDE_MODEL=TIDE_MODEL, GZIP=GZIP,
+                DEFINITION_FILE=DEFINITION_FILE, FORMAT=FORMAT,
+                TYPE='drift', APPLY_FLEXURE=APPLY_FLEXURE,
+                CONSTITUENTS=CONSTITUENTS, **kwargs)
+            yield (output, attrib, dinput['attributes'])
+
+    # write record batches to a streaming (geo)parquet writer
+    if (FORMAT == 'parquet'):
+        chunks = predict_chunks()
+        # attributes of the first chunk are written to the file metadata
+        first = next(chunks, None)
+        if first is None:
+            return
+        output, attrib, attributes = first
+        batches = itertools.chain([output], (c[0] for c in chunks))
+        pyTMD.spatial.to_parquet_stream(batches, attrib, output_file,
+            geoparquet=attributes.get('geoparquet', False),
+            geometry_encoding=attributes.get('geometry_encoding', 'WKB'),
+            crs=4326)
+        # change the permissions level to MODE
+        output_file.chmod(mode=MODE)
+        return
+
+    # number of records written to the output file
+    offset = 0
+    for output, attrib, _ in predict_chunks():
+        # write the chunk along the time dimension of the output file
+        mode = 'w' if (offset == 0) else 'a'
+        if (FORMAT == 'netCDF4'):
+            pyTMD.spatial.to_netCDF4(output, attrib, output_file,
+                mode=mode, data_type='drift', offset=offset)
+        elif (FORMAT == 'HDF5'):
+            pyTMD.spatial.to_HDF5(output, attrib, output_file,
+                mode=mode, offset=offset)
+        offset += len(output['time'])
+    # change the permissions level to MODE
+    output_file.chmod(mode=MODE)
+
+# compute tides at points and times using tidal model driver algorithms
+def compute_tidal_elevations(tide_dir, input_file, output_file,
+    TIDE_MODEL=None,
+    GZIP=True,
+    DEFINITION_FILE=None,
+    CROP=False,
+    FORMAT='csv',
+    VARIABLES=[],
+    HEADER=0,
+    DELIMITER=',',
+    TYPE='drift',
+    TIME_UNITS='days since 1858-11-17T00:00:00',
+    TIME_STANDARD='UTC',
+    TIME=None,
+    PROJECTION='4326',
+    METHOD='spline',
+    EXTRAPOLATE=False,
+    CUTOFF=None,
+    CORRECTIONS=None,
+    INFER_MINOR=False,
+    MINOR_CONSTITUENTS=None,
+    APPLY_FLEXURE=False,
+    FILL_VALUE=-9999.0,
+    CONSTITUENTS=None,
+    INCREMENTAL=False,
+    BLOCK_SIZE=None,
+    CHUNK_SIZE=None,
+    MODE=0o775):
+
+    # predict tides for blocks of a geotiff grid
+    if BLOCK_SIZE and (TYPE == 'grid') and FORMAT in ('GTiff','cog'):
+        compute_geotiff_blocks(tide_dir, input_file, output_file,
+            BLOCK_SIZE=BLOCK_SIZE,
+            TIDE_MODEL=TIDE_MODEL,
+            GZIP=GZIP,
+            DEFINITION_FILE=DEFINITION_FILE,
+            FORMAT=FORMAT,
+            TIME=TIME,
+            TIME_UNITS=TIME_UNITS,
+            TIME_STANDARD=TIME_STANDARD,
+            PROJECTION=PROJECTION,
+            METHOD=METHOD,
+            EXTRAPOLATE=EXTRAPOLATE,
+            CUTOFF=CUTOFF,
+            CORRECTIONS=CORRECTIONS,
+            INFER_MINOR=INFER_MINOR,
+            MINOR_CONSTITUENTS=MINOR_CONSTITUENTS,
+            APPLY_FLEXURE=APPLY_FLEXURE,
+            FILL_VALUE=FILL_VALUE,
+            CONSTITUENTS=CONSTITUENTS,
+            MODE=MODE)
+        return
+
+    # predict tides for chunks of a drift file
+    if CHUNK_SIZE and (TYPE == 'drift') and \
+        FORMAT in ('netCDF4','HDF5','parquet'):
+        compute_drift_chunks(tide_dir, input_file, output_file,
+            CHUNK_SIZE=CHUNK_SIZE,
+            TIDE_MODEL=TIDE_MODEL,
+            GZIP=GZIP,
+            DEFINITION_FILE=DEFINITION_FILE,
+            FORMAT=FORMAT,
+            VARIABLES=VARIABLES,
+            TIME=TIME,
+            TIME_UNITS=TIME_UNITS,
+            TIME_STANDARD=TIME_STANDARD,
+            PROJECTION=PROJECTION,
+            METHOD=METHOD,
+            EXTRAPOLATE=EXTRAPOLATE,
+            CUTOFF=CUTOFF,
+            CORRECTIONS=CORRECTIONS,
+            INFER_MINOR=INFER_MINOR,
+            MINOR_CONSTITUENTS=MINOR_CONSTITUENTS,
+            APPLY_FLEXURE=APPLY_FLEXURE,
+            FILL_VALUE=FILL_VALUE,
+            CONSTITUENTS=CONSTITUENTS,
+            MODE=MODE)
+        return
+
+    # read input file to extract time, spatial coordinates and data
+    dinput, attributes = read_input_file(input_file,
+        FORMAT=FORMAT,
+        VARIABLES=VARIABLES,
+        HEADER=HEADER,
+        DELIMITER=DELIMITER,
+        TIME_STANDARD=TIME_STANDARD,
+        TIME=TIME)
+    # calculate tidal elevations
+    result = tidal_elevations(tide_dir, dinput, attributes,
+        output_file=output_file,
+        TIDE_MODEL=TIDE_MODEL,
+        GZIP=GZIP,
+        DEFINITION_FILE=DEFINITION_FILE,
+        CROP=CROP,
+        FORMAT=FORMAT,
+        TYPE=TYPE,
+        TIME_UNITS=TIME_UNITS,
+        TIME_STANDARD=TIME_STANDARD,
+        PROJECTION=PROJECTION,
+        METHOD=METHOD,
+        EXTRAPOLATE=EXTRAPOLATE,
+        CUTOFF=CUTOFF,
+        CORRECTIONS=CORRECTIONS,
+        INFER_MINOR=INFER_MINOR,
+        MINOR_CONSTITUENTS=MINOR_CONSTITUENTS,
+        APPLY_FLEXURE=APPLY_FLEXURE,
+        FILL_VALUE=FILL_VALUE,
+        CONSTITUENTS=CONSTITUENTS,
+        INCREMENTAL=INCREMENTAL,
+        MODE=MODE)
+    # check if time slices were written incrementally
+    if result is None:
+        return
+    # write tidal elevations to the output file
+    output, attrib = result
+    write_output_file(output, attrib, attributes, output_file,
+        FORMAT=FORMAT,
+        DELIMITER=DELIMITER,
+        TYPE=TYPE,
+        MODE=MODE)
+
 # PURPOSE: create argument parser
 def arguments():
     parser = argparse.ArgumentParser(
@@ -568,6 +1029,36 @@ def arguments():
     parser.add_argument('--fill-value','-f',
         type=float, default=-9999.0,
         help='Invalid value for spatial fields')
+    # run multiple input files with a preloaded tide model
+    parser.add_argument('--batch',
+        metavar='FILE', type=str, nargs='+',
+        help='Input files or glob patterns to run in batch mode')
+    parser.add_argument('--output-directory',
+        type=pathlib.Path,
+        help='Output directory for batch mode')
+    parser.add_argument('--processes',
+        type=int, default=1,
+        help='Number of worker processes for batch mode')
+    parser.add_argument('--clobber',
+        default=False, action='store_true',
+        help='Overwrite existing output files in batch mode')
+    parser.add_argument('--pipeline',
+        default=False, action='store_true',
+        help='Overlap file input/output with computation in batch mode '
+        '(not compatible with --incremental, --block-size or --chunk-size)')
+    # predict grids in blocks of the input and output geotiff files
+    parser.add_argument('--block-size',
+        type=int,
+        help='Predict geotiff grids in blocks of rows and columns')
+    # predict drift data in chunks of the input and output files
+    parser.add_argument('--chunk-size',
+        type=int,
+        help='Predict drift data in chunks of records')
+    # write time slices of grids to the output file as they are computed
+    parser.add_argument('--incremental',
+        default=False, action='store_true',
+        help='Write and resume time slices of grids '
+        '(not compatible with --batch)')
     # verbose output of processing run
     # print information about processing run
     parser.add_argument('--verbose','-V',
@@ -585,6 +1076,17 @@ def main():
     # Read the system arguments listed after the program
     parser = arguments()
     args,_ = parser.parse_known_args()
+    # time slices are written within the compute stage when incremental
+    if args.pipeline and args.incremental:
+        parser.error('--pipeline cannot be used with --incremental')
+    # the pipeline reads and writes complete files
+    if args.pipeline and args.block_size:
+        parser.error('--pipeline cannot be used with --block-size')
+    if args.pipeline and args.chunk_size:
+        parser.error('--pipeline cannot be used with --chunk-size')
+    # batch mode skips and removes partially written output files
+    if args.batch and args.incremental:
+        parser.error('--batch cannot be used with --incremental')
 
     # create logger
     loglevels = [logging.CRITICAL, logging.INFO, logging.DEBUG]
@@ -596,38 +1098,70 @@ def main():
     else:
         model = pyTMD.io.model(verify=False).elevation(args.tide)
 
+    # keyword arguments for computing tidal elevations
+    kwargs = dict(TIDE_MODEL=args.tide,
+        GZIP=args.gzip,
+        DEFINITION_FILE=args.definition_file,
+        CROP=args.crop,
+        FORMAT=args.format,
+        VARIABLES=args.variables,
+        HEADER=args.header,
+        DELIMITER=args.delimiter,
+        TYPE=args.type,
+        TIME_UNITS=args.epoch,
+        TIME=args.deltatime,
+        TIME_STANDARD=args.standard,
+        PROJECTION=args.projection,
+        METHOD=args.interpolate,
+        EXTRAPOLATE=args.extrapolate,
+        CUTOFF=args.cutoff,
+        CORRECTIONS=args.nodal_corrections,
+        INFER_MINOR=args.infer_minor,
+        MINOR_CONSTITUENTS=args.minor_constituents,
+        APPLY_FLEXURE=args.apply_flexure,
+        FILL_VALUE=args.fill_value,
+        INCREMENTAL=args.incremental,
+        BLOCK_SIZE=args.block_size,
+        CHUNK_SIZE=args.chunk_size,
+        MODE=args.mode)
+
+    # run tidal elevation program for multiple input files
+    if args.batch:
+        info(args)
+        input_files = pyTMD.utilities.expand_files(*args.batch)
+        output_files = [output_filename(f, model,
+            APPLY_FLEXURE=args.apply_flexure,
+            directory=args.output_directory) for f in input_files]
+        # read the tide model once (inherited by forked workers)
+        initargs = (args.directory, args.tide, args.gzip,
+            args.definition_file, args.apply_flexure)
+        _init_worker(*initargs)
+        # run reading, computing and writing stages in separate threads
+        if args.pipeline:
+            reader = functools.partial(read_input_file, **kwargs)
+            compute = functools.partial(_pipeline_compute, args.directory,
+                CONSTITUENTS=_constituents, **kwargs)
+            writer = functools.partial(_pipeline_writer, **kwargs)
+            pyTMD.utilities.pipeline(reader, compute, writer,
+                input_files, output_files, workers=args.processes,
+                clobber=args.clobber)
+            return
+        pyTMD.utilities.batch(_batch_worker, input_files, output_files,
+            processes=args.processes, clobber=args.clobber,
+            initializer=_init_worker, initargs=initargs,
+            tide_dir=args.directory, **kwargs)
+        return
+
     # set output file from input filename if not entered
     if not args.outfile:
-        flexure_flag = '_flexure' if args.apply_flexure else ''
-        vars = (args.infile.stem,model.name,flexure_flag,args.infile.suffix)
-        args.outfile = args.infile.with_name('{0}_{1}{2}{3}'.format(*vars))
+        args.outfile = output_filename(args.infile, model,
+            APPLY_FLEXURE=args.apply_flexure)
 
     # try to run tidal elevation program for input file
     try:
         info(args)
         compute_tidal_elevations(args.directory, args.infile, args.outfile,
-            TIDE_MODEL=args.tide,
-            GZIP=args.gzip,
-            DEFINITION_FILE=args.definition_file,
-            CROP=args.crop,
-            FORMAT=args.format,
-            VARIABLES=args.variables,
-            HEADER=args.header,
-            DELIMITER=args.delimiter,
-            TYPE=args.type,
-            TIME_UNITS=args.epoch,
-            TIME=args.deltatime,
-            TIME_STANDARD=args.standard,
-            PROJECTION=args.projection,
-            METHOD=args.interpolate,
-            EXTRAPOLATE=args.extrapolate,
-            CUTOFF=args.cutoff,
-            CORRECTIONS=args.nodal_corrections,
-            INFER_MINOR=args.infer_minor,
-            MINOR_CONSTITUENTS=args.minor_constituents,
-            APPLY_FLEXURE=args.apply_flexure,
-            FILL_VALUE=args.fill_value,
-            MODE=args.mode)
+            **kwargs)
     except Exception as exc:
         # if there has been an error exception
         # print the type, value, and stack trace of the
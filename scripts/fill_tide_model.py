@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+u"""
+fill_tide_model.py
+Written by Tyler Sutterley (10/2024)
+Extrapolates valid tide model constituents into adjacent invalid cells
+    (such as land or ice shelves) within a cutoff distance
+Writes the filled model constituents with a provenance mask and a
+    model definition file so that the filled model can be used with
+    plain interpolation in place of extrapolating at runtime
+
+Only GOT and FES models are supported. The OTIS and ATLAS formats are
+    excluded because the validity of their constituents is set by the
+    land mask and bathymetry of a separate grid file that is shared with
+    the transport constituents, ATLAS-compact models combine a global
+    grid with local high-resolution patches, and OTIS models are often
+    on projected grids where extrapolation distances are not geodesic
+
+CALLING SEQUENCE:
+    python fill_tide_model.py --directory <path> --tide GOT5.6 \
+        --cutoff 20 --output-directory <path>
+
+COMMAND LINE OPTIONS:
+    --help: list the command line options
+    -D X, --directory X: working data directory
+    -T X, --tide X: Tide model to use
+    --definition-file X: Model definition file for use
+    -O X, --output-directory X: output directory for filled model
+    -c X, --cutoff X: Extrapolation cutoff in kilometers
+    -E X, --extrapolation X: Extrapolation method
+        nearest: nearest-neighbor
+        idw: inverse-distance weighting of nearest neighbors
+        gaussian: Gaussian weighting of nearest neighbors
+    -k X, --neighbors X: Number of nearest neighbors for weighted methods
+    -V, --verbose: Verbose output of processing run
+    -M X, --mode X: Permission mode of output files
+
+PYTHON DEPENDENCIES:
+    numpy: Scientific Computing Tools For Python
+        https://numpy.org
+        https://numpy.org/doc/stable/user/numpy-for-matlab-users.html
+    scipy: Scientific Tools for Python
+        https://docs.scipy.org/doc/
+    netCDF4: Python interface to the netCDF C library
+        https://unidata.github.io/netcdf4-python/netCDF4/index.html
+
+PROGRAM DEPENDENCIES:
+    io/model.py: retrieves tide model parameters for named tide models
+    io/GOT.py: extract tidal harmonic constants from GSFC GOT models
+    io/FES.py: extract tidal harmonic constants from FES tide models
+    interpolate.py: interpolation routines for spatial data
+    utilities.py: download and management utilities for syncing files
+
+UPDATE HISTORY:
+    Updated 10/2024: describe why OTIS and ATLAS formats are not supported
+    Written 10/2024
+"""
+from __future__ import print_function, annotations
+
+import sys
+import os
+import json
+import logging
+import pathlib
+import argparse
+import traceback
+import numpy as np
+import pyTMD.io
+import pyTMD.interpolate
+import pyTMD.utilities
+
+# PURPOSE: keep track of threads
+def info(args):
+    logging.debug(pathlib.Path(sys.argv[0]).name)
+    logging.debug(args)
+    logging.debug(f'module name: {__name__}')
+    if hasattr(os, 'getppid'):
+        logging.debug(f'parent process: {os.getppid():d}')
+    logging.debug(f'process id: {os.getpid():d}')
+
+# PURPOSE: extrapolate a constituent into invalid cells within a cutoff
+def fill_constituent(
+        hc: np.ndarray,
+        lon: np.ndarray,
+        lat: np.ndarray,
+        CUTOFF: int | float = 10.0,
+        EXTRAPOLATION: str = 'nearest',
+        NEIGHBORS: int = 4
+    ):
+    """
+    Extrapolates a tide model constituent into invalid cells
+
+    Parameters
+    ----------
+    hc: np.ndarray
+        complex form of tidal constituent
+    lon: np.ndarray
+        longitude of tidal model
+    lat: np.ndarray
+        latitude of tidal model
+    CUTOFF: int or float, default 10.0
+        Extrapolation cutoff in kilometers
+    EXTRAPOLATION: str, default 'nearest'
+        Extrapolation method
+    NEIGHBORS: int, default 4
+        Number of nearest neighbors for weighted extrapolation
+
+    Returns
+    -------
+    filled: np.ndarray
+        filled tidal constituent
+    provenance: np.ndarray
+        provenance of values in the filled constituent
+
+            - ``0``: invalid
+            - ``1``: original model value
+            - ``2``: extrapolated value
+    """
+    # find invalid cells in the model constituent
+    invalid = np.ma.getmaskarray(hc) | np.isnan(hc.data)
+    filled = np.ma.array(hc.data, mask=invalid, fill_value=hc.fill_value)
+    filled.data[invalid] = np.nan
+    provenance = np.logical_not(invalid).astype(np.uint8)
+    # return if there are no cells to fill
+    if not np.any(invalid):
+        return (filled, provenance)
+    # coordinates of invalid cells
+    gridlon, gridlat = np.meshgrid(lon, lat)
+    indy, indx = np.nonzero(invalid)
+    # extrapolate valid cells into invalid cells within cutoff
+    hci = pyTMD.interpolate.extrapolate(lon, lat, filled,
+        gridlon[indy, indx], gridlat[indy, indx], dtype=hc.dtype,
+        cutoff=CUTOFF, method=EXTRAPOLATION, k=NEIGHBORS)
+    # update filled values and provenance
+    filled.data[indy, indx] = hci.data
+    filled.mask[indy, indx] = hci.mask
+    provenance[indy, indx] = np.where(hci.mask, 0, 2)
+    filled.data[filled.mask] = filled.fill_value
+    return (filled, provenance)
+
+# PURPOSE: fill tide model constituents and write to output directory
+def fill_tide_model(tide_dir, TIDE_MODEL,
+        DEFINITION_FILE=None,
+        OUTPUT_DIRECTORY=None,
+        CUTOFF=10.0,
+        EXTRAPOLATION='nearest',
+        NEIGHBORS=4,
+        MODE=0o775
+    ):
+    # get parameters for tide model
+    if DEFINITION_FILE is not None:
+        model = pyTMD.io.model(tide_dir).from_file(DEFINITION_FILE)
+    else:
+        model = pyTMD.io.model(tide_dir).elevation(TIDE_MODEL)
+    # verify that the model can be output after filling
+    # OTIS and ATLAS constituents are masked using a separate grid file
+    if model.format not in ('GOT-ascii', 'GOT-netcdf', 'FES-netcdf'):
+        raise ValueError(f'Unsupported model format {model.format} '
+            '(only GOT and FES models can be filled)')
+    if (model.format == 'FES-netcdf') and \
+        model.version not in ('FES2014', 'FES2022', 'EOT20'):
+        raise ValueError(f'Unsupported model version {model.version}')
+    # create output directory if non-existent
+    OUTPUT_DIRECTORY = pathlib.Path(OUTPUT_DIRECTORY).expanduser().absolute()
+    OUTPUT_DIRECTORY.mkdir(mode=MODE, parents=True, exist_ok=True)
+
+    # dictionaries of model files for each type
+    if isinstance(model.model_file, dict):
+        model_files = model.model_file
+    else:
+        model_files = {model.type: model.model_file}
+    # parse constituents from model files
+    model.parse_constituents()
+    # filled model files
+    output_files = {}
+    for t, files in model_files.items():
+        output_files[t] = []
+        # use subdirectories for models with multiple types
+        if isinstance(model.model_file, dict):
+            output_dir = OUTPUT_DIRECTORY.joinpath(t)
+            output_dir.mkdir(mode=MODE, parents=True, exist_ok=True)
+        else:
+            output_dir = OUTPUT_DIRECTORY
+        for i, model_file in enumerate(files):
+            # output file name for filled constituent
+            output_file = output_dir.joinpath(model_file.name)
+            if model.compressed:
+                output_file = output_file.with_suffix('')
+            if (model.format == 'GOT-ascii'):
+                output_file = output_file.with_suffix('.nc')
+            # read and fill constituent
+            if model.format in ('GOT-ascii', 'GOT-netcdf'):
+                reader = getattr(pyTMD.io.GOT,
+                    f'read_{model.file_format}_file')
+                hc, lon, lat, cons = reader(model_file,
+                    compressed=model.compressed)
+                filled, provenance = fill_constituent(hc, lon, lat,
+                    CUTOFF=CUTOFF, EXTRAPOLATION=EXTRAPOLATION,
+                    NEIGHBORS=NEIGHBORS)
+                pyTMD.io.GOT.output_netcdf_file(output_file, filled,
+                    lon, lat, cons, provenance=provenance)
+            elif (model.format == 'FES-netcdf'):
+                hc, lon, lat = pyTMD.io.FES.read_netcdf_file(model_file,
+                    type=t, version=model.version,
+                    compressed=model.compressed)
+                cons = model.constituents[i]
+                filled, provenance = fill_constituent(hc, lon, lat,
+                    CUTOFF=CUTOFF, EXTRAPOLATION=EXTRAPOLATION,
+                    NEIGHBORS=NEIGHBORS)
+                pyTMD.io.FES.output_netcdf_file(output_file, filled,
+                    lon, lat, cons, type=t, provenance=provenance)
+            # log the number of filled cells
+            logging.info(f'{cons}: {np.count_nonzero(provenance == 2):d} '
+                'cells filled')
+            # change the permissions level to MODE
+            output_file.chmod(mode=MODE)
+            output_files[t].append(output_file)
+
+    # update model parameters for filled model
+    if isinstance(model.model_file, dict):
+        model.model_file = output_files
+    else:
+        model.model_file = output_files[model.type]
+    model.format = model.format.replace('ascii', 'netcdf')
+    model.compressed = False
+    # output model definition file for filled model
+    attrs = ['name', 'format', 'type', 'model_file', 'variable',
+        'version', 'scale', 'compressed', 'reference']
+    d = model.to_dict(fields=attrs, serialize=True)
+    output_file = OUTPUT_DIRECTORY.joinpath(f'model_{model.name}.json')
+    with output_file.open(mode='w', encoding='utf8') as fid:
+        json.dump(d, fid)
+    # change the permissions level to MODE
+    output_file.chmod(mode=MODE)
+    # return the model definition file
+    return output_file
+
+# PURPOSE: create argument parser
+def arguments():
+    parser = argparse.ArgumentParser(
+        description="""Extrapolates valid tide model constituents into
+            adjacent invalid cells within a cutoff distance
+            """,
+        fromfile_prefix_chars="@"
+    )
+    parser.convert_arg_line_to_args = pyTMD.utilities.convert_arg_line_to_args
+    # command line options
+    # set data directory containing the tidal data
+    parser.add_argument('--directory','-D',
+        type=pathlib.Path,
+        help='Working data directory')
+    # tide model to use
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--tide','-T',
+        metavar='TIDE', type=str,
+        help='Tide model to use')
+    # tide model definition file to set an undefined model
+    group.add_argument('--definition-file',
+        type=pathlib.Path,
+        help='Tide model definition file')
+    # output directory for filled model
+    parser.add_argument('--output-directory','-O',
+        type=pathlib.Path, required=True,
+        help='Output directory for filled model')
+    # extrapolation cutoff in kilometers
+    parser.add_argument('--cutoff','-c',
+        type=np.float64, default=10.0,
+        help='Extrapolation cutoff in kilometers')
+    # extrapolation method
+    parser.add_argument('--extrapolation','-E',
+        type=str, default='nearest',
+        choices=('nearest','idw','gaussian'),
+        help='Extrapolation method')
+    # number of nearest neighbors for weighted extrapolation
+    parser.add_argument('--neighbors','-k',
+        type=int, default=4,
+        help='Number of nearest neighbors for weighted extrapolation')
+    # verbose output of processing run
+    # print information about processing run
+    parser.add_argument('--verbose','-V',
+        action='count', default=0,
+        help='Verbose output of processing run')
+    # permissions mode of output files (number in octal)
+    parser.add_argument('--mode','-M',
+        type=lambda x: int(x,base=8), default=0o775,
+        help='Permission mode of the output files')
+    # return the parser
+    return parser
+
+# This is the main part of the program that calls the individual functions
+def main():
+    # Read the system arguments listed after the program
+    parser = arguments()
+    args,_ = parser.parse_known_args()
+
+    # create logger
+    loglevels = [logging.CRITICAL, logging.INFO, logging.DEBUG]
+    logging.basicConfig(level=loglevels[args.verbose])
+
+    # try to run fill program
+    try:
+        info(args)
+        fill_tide_model(args.directory, args.tide,
+            DEFINITION_FILE=args.definition_file,
+            OUTPUT_DIRECTORY=args.output_directory,
+            CUTOFF=args.cutoff,
+            EXTRAPOLATION=args.extrapolation,
+            NEIGHBORS=args.neighbors,
+            MODE=args.mode)
+    except Exception as exc:
+        # if there has been an error exception
+        # print the type, value, and stack trace of the
+        # current exception being handled
+        logging.critical(f'process id {os.getpid():d} failed')
+        logging.error(traceback.format_exc())
+
+# run main program
+if __name__ == '__main__':
+    main()
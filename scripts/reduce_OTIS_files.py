@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 u"""
 reduce_OTIS_files.py
-Written by Tyler Sutterley (07/2024)
+Written by Tyler Sutterley (10/2024)
 Read OTIS-format tidal files and reduce to a regional subset
 
 COMMAND LINE OPTIONS:
@@ -28,6 +28,7 @@ PROGRAM DEPENDENCIES:
     crs.py: Coordinate Reference System (CRS) routines
 
 UPDATE HISTORY:
+    Updated 10/2024: use cached transformers for coordinate conversions
     Updated 07/2024: renamed format for ATLAS to ATLAS-compact
     Updated 04/2024: add debug mode printing input arguments
         use wrapper to importlib for optional dependencies
@@ -106,9 +107,7 @@ def make_regional_OTIS_files(tide_dir, TIDE_MODEL,
         xi,yi,hz,mz,iob,dt = pyTMD.io.OTIS.read_otis_grid(model.grid_file)
 
     # converting bounds x,y from projection to latitude/longitude
-    crs1 = pyTMD.crs().from_input(PROJECTION)
-    crs2 = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(crs1, crs2, always_xy=True)
+    transformer = pyTMD.crs().get_transformer(PROJECTION, 4326)
     xbox = np.array([BOUNDS[0],BOUNDS[1],BOUNDS[1],BOUNDS[0],BOUNDS[0]])
     ybox = np.array([BOUNDS[2],BOUNDS[2],BOUNDS[3],BOUNDS[3],BOUNDS[2]])
     lon,lat = transformer.transform(xbox,ybox)
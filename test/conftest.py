@@ -6,6 +6,21 @@ def pytest_addoption(parser):
     parser.addoption("--aws-access", action="store", help="AWS Access Key ID")
     parser.addoption("--aws-secret", action="store", help="AWS Secret Key")
     parser.addoption("--aws-region", action="store", help="AWS Region Name")
+    parser.addoption("--run-slow", action="store_true", default=False,
+        help="Run slow benchmark tests")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers",
+        "slow: slow benchmark tests that only run with --run-slow")
+
+def pytest_collection_modifyitems(config, items):
+    # skip slow tests unless requested
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="need --run-slow option to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
 
 @pytest.fixture(scope="session")
 def username(request):
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+u"""
+test_check_points.py (10/2024)
+Verify the validity raster for checking points within a model domain
+
+UPDATE HISTORY:
+    Updated 10/2024: import validity class directly from the module
+        test that validity rasters match the model grid
+        test reusing a validity raster file in a new session
+    Written 10/2024
+"""
+import json
+import numpy as np
+import pyTMD.io
+from pyTMD.check_points import check_points, validity, _validity_cache
+
+# PURPOSE: test lookups of points in a global validity raster
+def test_validity_raster(tmp_path):
+    # global grid of cell centers
+    lon = np.arange(0.5, 360, 1.0)
+    lat = np.arange(-89.5, 90, 1.0)
+    gridlon, gridlat = np.meshgrid(lon, lat)
+    # invalid block of land and an invalid column at the dateline
+    valid = np.logical_not((gridlon > 100.0) & (gridlon < 140.0) &
+        (gridlat > -20.0) & (gridlat < 20.0))
+    valid[:, -1] = False
+    raster = validity(lon, lat, valid)
+    assert raster.is_global
+    assert raster.nodes.size == np.ceil(180*361/8)
+    # points in grid cells with valid and invalid corners
+    X = np.array([120.0, 100.2, 10.0, 359.9, -0.1, 359.2, 0.0])
+    Y = np.array([0.0, 0.0, 89.9, 0.0, 0.0, 0.0, 0.0])
+    # valid if any corner of the grid cell is valid
+    obs = raster(X, Y)
+    exp = np.array([False, True, False, True, True, True, True])
+    assert np.all(obs == exp)
+    # valid if the nearest grid node is valid
+    obs = raster(X, Y, nearest=True)
+    exp = np.array([False, False, True, False, False, False, True])
+    assert np.all(obs == exp)
+    # write and read the validity raster
+    raster.to_file(tmp_path.joinpath('validity.npz'))
+    temp = validity.from_file(
+        tmp_path.joinpath('validity.npz'))
+    assert np.all(temp(X, Y) == raster(X, Y))
+    # validity raster matches the model grid
+    assert temp.matches(lon, lat, valid.shape)
+    # validity raster does not match a different grid
+    assert not temp.matches(lon[:-1], lat, (180, 359))
+    assert not temp.matches(lon + 0.25, lat, valid.shape)
+    assert not temp.matches(lon, lat[::-1], valid.shape)
+
+# PURPOSE: test reusing a validity raster file
+def test_validity_file(tmp_path):
+    # global one-degree grid with an invalid polar cap
+    lon = np.arange(0.0, 360.0, 1.0)
+    lat = np.arange(-90.0, 91.0, 1.0)
+    gridlon, gridlat = np.meshgrid(lon, lat)
+    hc = np.ma.ones(gridlon.shape, dtype=np.complex128)
+    hc.mask = (gridlat > 80.0)
+    model_file = tmp_path.joinpath('m2.nc')
+    pyTMD.io.GOT.output_netcdf_file(model_file, hc, lon, lat, 'm2')
+    # write the model definition file
+    definition_file = tmp_path.joinpath('model_synthetic.json')
+    with definition_file.open(mode='w', encoding='utf8') as fid:
+        json.dump(dict(format='GOT-netcdf', name='synthetic',
+            model_file=[str(model_file)], type='z', variable='tide_ocean',
+            version='synthetic', scale=0.01, compressed=False,
+            reference=''), fid)
+    # points inside and outside of the model domain
+    x = np.array([10.0, 200.0, -45.0, 30.0])
+    y = np.array([0.0, -60.0, 85.0, 89.0])
+    validity_file = tmp_path.joinpath('validity.npz')
+    # create the validity raster file
+    _validity_cache.clear()
+    expected = check_points(x, y,
+        DEFINITION_FILE=definition_file, EPSG=4326,
+        VALIDITY_FILE=validity_file)
+    assert validity_file.exists()
+    assert np.all(expected == [True, True, False, False])
+    # read the validity raster file without the in-memory cache
+    _validity_cache.clear()
+    valid = check_points(x, y,
+        DEFINITION_FILE=definition_file, EPSG=4326,
+        VALIDITY_FILE=validity_file)
+    assert np.all(valid == expected)
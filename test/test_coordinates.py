@@ -1,9 +1,10 @@
 #!/usr/bin/env python
 u"""
-test_coordinates.py (09/2024)
+test_coordinates.py (10/2024)
 Verify forward and backwards coordinate conversions
 
 UPDATE HISTORY:
+    Updated 10/2024: add test for cached coordinate transformers
     Updated 09/2024: add test for Arctic regions with new projection
         using new JSON dictionary format for model projections
     Updated 07/2024: add check for if projections are geographic
@@ -86,3 +87,30 @@ def test_arctic_projection():
     # test that forward and backwards conversions are within tolerance
     eps = np.finfo(np.float32).eps
     assert np.all(cdist < eps)
+
+# PURPOSE: verify that coordinate transformers are cached for each thread
+def test_transformer_cache():
+    import threading
+    # get transformers for a projection
+    model = pyTMD.models.elevation['CATS2008']
+    t1 = pyTMD.crs().get_transformer(model['projection'], 4326)
+    t2 = pyTMD.crs().get_transformer(model['projection'], 4326)
+    assert t1 is t2
+    # transformers for different axis orders are cached separately
+    t3 = pyTMD.crs().get_transformer(model['projection'], 4326,
+        always_xy=False)
+    assert t3 is not t1
+    # transformers are not shared between threads
+    output = []
+    thread = threading.Thread(target=lambda: output.append(
+        pyTMD.crs().get_transformer(model['projection'], 4326)))
+    thread.start()
+    thread.join()
+    assert output[0] is not t1
+    # verify cached transformers give the same outputs
+    x = np.linspace(-1e6, 1e6, 11)
+    y = np.linspace(-2e6, 2e6, 11)
+    lon1, lat1 = t1.transform(x, y)
+    lon2, lat2 = output[0].transform(x, y)
+    assert np.isclose(lon1, lon2).all()
+    assert np.isclose(lat1, lat2).all()
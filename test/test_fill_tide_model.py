@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+u"""
+test_fill_tide_model.py (10/2024)
+Tests filling a synthetic tide model with extrapolated values
+Verifies the provenance of the filled values and the definition file
+    of the filled model
+
+PYTHON DEPENDENCIES:
+    numpy: Scientific Computing Tools For Python
+        https://numpy.org
+        https://numpy.org/doc/stable/user/numpy-for-matlab-users.html
+    netCDF4: Python interface to the netCDF C library
+        https://unidata.github.io/netcdf4-python/netCDF4/index.html
+
+UPDATE HISTORY:
+    Written 10/2024
+"""
+import json
+import inspect
+import pathlib
+import importlib.util
+import numpy as np
+import pyTMD.io
+import pyTMD.utilities
+
+# attempt imports
+netCDF4 = pyTMD.utilities.import_dependency('netCDF4')
+
+# current file path
+filename = inspect.getframeinfo(inspect.currentframe()).filename
+filepath = pathlib.Path(filename).absolute().parent
+
+# PURPOSE: import the fill program from the scripts directory
+def import_script(name):
+    script = filepath.parent.joinpath('scripts', f'{name}.py')
+    spec = importlib.util.spec_from_file_location(name, script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# PURPOSE: test filling a synthetic GOT model with a band of invalid cells
+def test_fill_tide_model(tmp_path):
+    fill_tide_model = import_script('fill_tide_model')
+    # synthetic model grid with a band of invalid cells at the equator
+    lon = np.arange(0, 360, 2.0)
+    lat = np.arange(-89, 90, 2.0)
+    gridlon, gridlat = np.meshgrid(lon, lat)
+    invalid = (np.abs(gridlat) < 6.0)
+    # write synthetic constituents
+    model_dir = tmp_path.joinpath('synthetic')
+    model_dir.mkdir()
+    model_files = []
+    for i, c in enumerate(['m2', 'k1']):
+        amp = (i + 1.0)*(10.0 + np.cos(np.radians(gridlat)))
+        ph = np.radians(gridlon)
+        hc = np.ma.array(amp*np.exp(-1j*ph), mask=invalid)
+        model_file = model_dir.joinpath(f'{c}.nc')
+        pyTMD.io.GOT.output_netcdf_file(model_file, hc, lon, lat, c)
+        model_files.append(str(model_file.relative_to(tmp_path)))
+    # write the model definition file
+    definition_file = tmp_path.joinpath('model_synthetic.json')
+    with definition_file.open(mode='w', encoding='utf8') as fid:
+        json.dump(dict(format='GOT-netcdf', name='synthetic',
+            model_file=model_files, type='z', variable='tide_ocean',
+            version='synthetic', scale=0.01, compressed=False,
+            reference=''), fid)
+    # fill the model within a cutoff of 500 km
+    output_dir = tmp_path.joinpath('filled')
+    output_file = fill_tide_model.fill_tide_model(tmp_path, None,
+        DEFINITION_FILE=definition_file, OUTPUT_DIRECTORY=output_dir,
+        CUTOFF=500.0, EXTRAPOLATION='nearest')
+    # check the definition file of the filled model
+    with output_file.open(mode='r', encoding='utf8') as fid:
+        d = json.load(fid)
+    assert (d['name'] == 'synthetic')
+    assert (d['format'] == 'GOT-netcdf')
+    assert (d['compressed'] is False)
+    assert (d['scale'] == 0.01)
+    assert (len(d['model_file']) == len(model_files))
+    for f in d['model_file']:
+        assert pathlib.Path(f).parent == output_dir
+        assert pathlib.Path(f).exists()
+    # expected provenance of the filled values
+    # cells within 500 km of the valid cells are extrapolated
+    expected = np.ones_like(gridlat, dtype=np.uint8)
+    expected[np.abs(gridlat) < 6.0] = 2
+    expected[np.abs(gridlat) < 2.0] = 0
+    # check the filled constituents
+    for f in d['model_file']:
+        hc, ilon, ilat, cons = pyTMD.io.GOT.read_netcdf_file(f)
+        with netCDF4.Dataset(f, 'r') as fileID:
+            provenance = fileID.variables['provenance'][:]
+        assert np.all(provenance == expected)
+        # filled cells are valid and cells beyond the cutoff are invalid
+        assert np.all(hc.mask == (expected == 0))
+        # original values are unchanged
+        original, _, _, _ = pyTMD.io.GOT.read_netcdf_file(
+            tmp_path.joinpath('synthetic', pathlib.Path(f).name))
+        valid = (expected == 1)
+        assert np.allclose(hc.data[valid], original.data[valid], atol=1e-3)
+        # extrapolated values are from the nearest valid latitudes
+        filled = (expected == 2)
+        assert np.allclose(np.abs(hc.data[filled]),
+            np.abs(original.data[np.abs(gridlat) == 7.0]).mean(), atol=1e-3)
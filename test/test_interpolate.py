@@ -1,20 +1,33 @@
 #!/usr/bin/env python
 u"""
-test_interpolate.py (04/2023)
+test_interpolate.py (10/2024)
 Test the interpolation and extrapolation routines
 
 UPDATE HISTORY:
+    Updated 10/2024: add test for cached KD-trees of valid model points
+        add test for weighted extrapolation of valid model points
+        add test for cached and cropped spline interpolation
+        add test for interpolation using windows of the model grid
+        add test for nearest neighbor queries from multiple threads
+        add test that spline caches are optional and limited by size
+        add benchmark of tide predictions with spatially sorted points
+        add test for gaussian extrapolation with underflowing weights
     Updated 04/2023: test geodetic conversion additionally as arrays
         using pathlib to define and expand paths
     Updated 12/2022: refactored interpolation routines into new module
     Updated 11/2022: use f-strings for formatting verbose or ascii output
     Written 03/2021
 """
+import json
+import time
 import pytest
+import logging
 import inspect
 import pathlib
 import numpy as np
 import scipy.io
+import pyTMD.io
+import pyTMD.compute
 import pyTMD.interpolate
 import pyTMD.spatial
 import pyTMD.utilities
@@ -179,3 +192,277 @@ def test_extrapolation_checks(N=324):
     # in case where there are no points to be extrapolated
     test = pyTMD.interpolate.extrapolate(LON,LAT,FI,[],[])
     assert np.logical_not(test)
+
+# PURPOSE: test that KD-trees are cached and reused between fields
+def test_extrapolation_cache(tmp_path):
+    # calculate model grid (standard lat/lon grid)
+    dlon,dlat = (1.0,1.0)
+    LON = np.arange(0,360+dlon,dlon)
+    LAT = np.arange(90,-90-dlat,-dlat)
+    ny,nx = (len(LAT),len(LON))
+    gridlon,gridlat = np.meshgrid(LON,LAT)
+    X,Y,Z = pyTMD.spatial.to_cartesian(gridlon,gridlat,
+        a_axis=1.0,flat=0.0)
+    # calculate functional values with a band of invalid points
+    FI = np.ma.zeros((ny,nx))
+    FI.data[:] = franke_3d(X,Y,Z)
+    FI.mask = (np.abs(gridlat) < 10.0)
+    # output points within the invalid band
+    lon = np.arange(0,360,15.0)
+    lat = np.zeros_like(lon) + 2.0
+    # clear cached KD-trees
+    pyTMD.interpolate._tree_cache.clear()
+    test1 = pyTMD.interpolate.extrapolate(LON,LAT,FI,lon,lat)
+    assert len(pyTMD.interpolate._tree_cache) == 1
+    # extrapolate a second field with the same valid points
+    test2 = pyTMD.interpolate.extrapolate(LON,LAT,2.0*FI,lon,lat)
+    assert len(pyTMD.interpolate._tree_cache) == 1
+    assert np.all(np.isclose(2.0*test1,test2))
+    # verify that values are from the nearest valid points
+    dd,ii = pyTMD.interpolate.nearest_neighbors(LON,LAT,~FI.mask,lon,lat)
+    assert np.all(np.isfinite(dd))
+    assert np.all(np.abs(gridlat.flat[ii]) == 10.0)
+    assert np.all(np.isclose(test1,FI.data.flat[ii]))
+    # save and reload the cached KD-trees
+    index_file = tmp_path.joinpath('index.npz')
+    pyTMD.interpolate.save_index(index_file)
+    pyTMD.interpolate._tree_cache.clear()
+    pyTMD.interpolate.load_index(index_file)
+    assert len(pyTMD.interpolate._tree_cache) == 1
+    test3 = pyTMD.interpolate.extrapolate(LON,LAT,FI,lon,lat)
+    assert np.all(np.isclose(test1,test3))
+
+# PURPOSE: test that nearest neighbor queries are safe between threads
+def test_nearest_neighbors_threads():
+    import threading
+    # calculate model grid (standard lat/lon grid)
+    dlon,dlat = (1.0,1.0)
+    LON = np.arange(0,360+dlon,dlon)
+    LAT = np.arange(90,-90-dlat,-dlat)
+    gridlon,gridlat = np.meshgrid(LON,LAT)
+    valid = (np.abs(gridlat) >= 10.0)
+    # different sets of output points for each thread
+    points = [(np.arange(0,360,15.0), np.zeros((24)) + 2.0*i)
+        for i in range(-4,5)]
+    # expected neighbors for each set of points
+    expected = [pyTMD.interpolate.nearest_neighbors(LON,LAT,valid,lon,lat)
+        for lon,lat in points]
+    # query each set of points repeatedly from separate threads
+    output = [None]*len(points)
+    def query(i):
+        lon, lat = points[i]
+        for _ in range(20):
+            dd,ii = pyTMD.interpolate.nearest_neighbors(LON,LAT,valid,lon,lat)
+            if not np.all(ii == expected[i][1]):
+                output[i] = False
+                return
+        output[i] = True
+    threads = [threading.Thread(target=query, args=(i,))
+        for i in range(len(points))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(output)
+
+# parameterize weighting method
+@pytest.mark.parametrize("METHOD", ['idw','gaussian'])
+# PURPOSE: test weighted extrapolation of nearest neighbors
+def test_weighted_extrapolation(METHOD, k=4):
+    # calculate model grid (standard lat/lon grid)
+    dlon,dlat = (1.0,1.0)
+    LON = np.arange(0,360+dlon,dlon)
+    LAT = np.arange(90,-90-dlat,-dlat)
+    ny,nx = (len(LAT),len(LON))
+    gridlon,gridlat = np.meshgrid(LON,LAT)
+    X,Y,Z = pyTMD.spatial.to_cartesian(gridlon,gridlat,
+        a_axis=1.0,flat=0.0)
+    # calculate functional values with a band of invalid points
+    FI = np.ma.zeros((ny,nx))
+    FI.data[:] = franke_3d(X,Y,Z)
+    FI.mask = (np.abs(gridlat) < 10.0)
+    # output points within the invalid band
+    lon = np.arange(0,360,15.0)
+    lat = np.zeros_like(lon) + 2.0
+    # weighted values are within the range of the neighbors
+    test = pyTMD.interpolate.extrapolate(LON,LAT,FI,lon,lat,
+        method=METHOD,k=k)
+    dd,ii = pyTMD.interpolate.nearest_neighbors(LON,LAT,~FI.mask,lon,lat,k=k)
+    assert np.all(test >= np.min(FI.data.flat[ii],axis=1))
+    assert np.all(test <= np.max(FI.data.flat[ii],axis=1))
+    # weighted values of a constant field are constant
+    CONST = np.ma.array(np.ones((ny,nx)), mask=FI.mask)
+    test = pyTMD.interpolate.extrapolate(LON,LAT,CONST,lon,lat,
+        method=METHOD,k=k)
+    assert np.all(np.isclose(test,1.0))
+    # a single neighbor is equivalent to nearest-neighbor extrapolation
+    test = pyTMD.interpolate.extrapolate(LON,LAT,FI,lon,lat,
+        method=METHOD,k=1)
+    valid = pyTMD.interpolate.extrapolate(LON,LAT,FI,lon,lat)
+    assert np.all(np.isclose(test,valid))
+    # no extrapolation for points beyond the cutoff
+    test = pyTMD.interpolate.extrapolate(LON,LAT,FI,lon,lat,
+        method=METHOD,k=k,cutoff=10.0)
+    assert np.all(test.mask)
+    # use nearest neighbors if all gaussian weights underflow
+    if (METHOD == 'gaussian'):
+        test = pyTMD.interpolate.extrapolate(LON,LAT,FI,lon,lat,
+            method=METHOD,k=k,sigma=1e-3)
+        assert np.all(np.isfinite(test)) and not np.any(test.mask)
+        assert np.all(np.isclose(test,valid))
+
+# PURPOSE: test that fitted splines are cached and cropped fits are valid
+def test_spline_cache():
+    # calculate model grid (standard lat/lon grid)
+    dlon,dlat = (1.0,1.0)
+    LON = np.arange(0,360+dlon,dlon)
+    LAT = np.arange(-90,90+dlat,dlat)
+    ny,nx = (len(LAT),len(LON))
+    gridlon,gridlat = np.meshgrid(LON,LAT)
+    X,Y,Z = pyTMD.spatial.to_cartesian(gridlon,gridlat,
+        a_axis=1.0,flat=0.0)
+    # calculate complex functional values at output points
+    FI = np.ma.zeros((ny,nx),dtype=np.complex128)
+    FI.data[:] = franke_3d(X,Y,Z)*np.exp(1j*np.radians(gridlon))
+    FI.mask = (gridlat > 80.0)
+    # output points within a small region
+    lon = np.linspace(20.0,30.0,11)
+    lat = np.linspace(-40.0,-30.0,11)
+    # clear cached splines
+    pyTMD.interpolate._spline_cache.clear()
+    test1 = pyTMD.interpolate.spline(LON,LAT,FI,lon,lat,
+        dtype=FI.dtype,crop=False,cache=True)
+    assert len(pyTMD.interpolate._spline_cache) == 1
+    # interpolate again using the cached splines
+    test2 = pyTMD.interpolate.spline(LON,LAT,FI,lon,lat,
+        dtype=FI.dtype,crop=False,cache=True)
+    assert len(pyTMD.interpolate._spline_cache) == 1
+    assert np.all(np.isclose(test1,test2))
+    # interpolate a different field
+    FJ = 2.0*FI
+    test3 = pyTMD.interpolate.spline(LON,LAT,FJ,lon,lat,
+        dtype=FI.dtype,crop=False,cache=True)
+    assert len(pyTMD.interpolate._spline_cache) == 2
+    assert np.all(np.isclose(2.0*test1,test3))
+    # splines of model data that no longer exists are removed
+    del FJ
+    test3 = pyTMD.interpolate.spline(LON,LAT,FI.copy(),lon,lat,
+        dtype=FI.dtype,crop=False,cache=True)
+    assert len(pyTMD.interpolate._spline_cache) == 2
+    assert np.all(np.isclose(test1,test3))
+    # fit splines to only the sub-grid covering the points
+    test4 = pyTMD.interpolate.spline(LON,LAT,FI,lon,lat,
+        dtype=FI.dtype,crop=True,cache=True)
+    assert len(pyTMD.interpolate._spline_cache) == 2
+    assert np.all(np.isclose(test1,test4))
+    assert np.all(test1.mask == test4.mask)
+    # cached splines are identified by the window of the model grid
+    test4 = pyTMD.interpolate.spline(LON,LAT,FI,lon,lat,
+        dtype=FI.dtype,crop=True,cache=True)
+    assert len(pyTMD.interpolate._spline_cache) == 2
+    assert np.all(np.isclose(test1,test4))
+    # splines are not cached by default
+    test5 = pyTMD.interpolate.spline(LON,LAT,3.0*FI,lon,lat,
+        dtype=FI.dtype)
+    assert len(pyTMD.interpolate._spline_cache) == 2
+    assert np.all(np.isclose(3.0*test1,test5))
+    # cached splines are limited by size
+    max_bytes = pyTMD.interpolate._max_spline_cache_bytes
+    pyTMD.interpolate._max_spline_cache_bytes = \
+        max(v[1] for v in pyTMD.interpolate._spline_cache.values())
+    FK = 4.0*FI
+    test6 = pyTMD.interpolate.spline(LON,LAT,FK,lon,lat,
+        dtype=FI.dtype,crop=False,cache=True)
+    assert len(pyTMD.interpolate._spline_cache) == 1
+    assert np.all(np.isclose(4.0*test1,test6))
+    pyTMD.interpolate._max_spline_cache_bytes = max_bytes
+    pyTMD.interpolate._spline_cache.clear()
+
+# parameterize interpolation method
+@pytest.mark.parametrize("METHOD", ['spline','linear','nearest'])
+# PURPOSE: test interpolation using windows of the model grid
+def test_interpolation_windows(METHOD):
+    # calculate model grid (standard lat/lon grid)
+    dlon,dlat = (1.0,1.0)
+    LON = np.arange(-dlon,360+2.0*dlon,dlon)
+    LAT = np.arange(-90,90+dlat,dlat)
+    ny,nx = (len(LAT),len(LON))
+    gridlon,gridlat = np.meshgrid(LON,LAT)
+    X,Y,Z = pyTMD.spatial.to_cartesian(gridlon,gridlat,
+        a_axis=1.0,flat=0.0)
+    # calculate functional values with a region of invalid points
+    FI = np.ma.zeros((ny,nx))
+    FI.data[:] = franke_3d(X,Y,Z)
+    FI.mask = (gridlat > 80.0)
+    # output points on either side of the dateline
+    lon = np.array([0.25,0.5,1.75,358.25,359.5,359.75])
+    lat = np.array([-20.5,-19.25,81.5,10.75,11.0,12.5])
+    # windows are split at the dateline
+    windows = pyTMD.interpolate._windows(LON,LAT,lon,lat)
+    assert len(windows) == 2
+    for ind,xs,ys in windows:
+        assert np.all((lon[ind] >= LON[xs][0]) & (lon[ind] <= LON[xs][-1]))
+        assert np.all((lat[ind] >= LAT[ys][0]) & (lat[ind] <= LAT[ys][-1]))
+    # compare windowed and full grid interpolation
+    if (METHOD == 'spline'):
+        test = pyTMD.interpolate.spline(LON,LAT,FI,lon,lat)
+        valid = pyTMD.interpolate.spline(LON,LAT,FI,lon,lat,
+            crop=False,cache=False)
+    else:
+        test = pyTMD.interpolate.regulargrid(LON,LAT,FI,lon,lat,
+            method=METHOD,window=True)
+        valid = pyTMD.interpolate.regulargrid(LON,LAT,FI,lon,lat,
+            method=METHOD,window=False)
+    assert np.all(test.mask == valid.mask)
+    assert np.all(np.isclose(test.data[~test.mask],valid.data[~valid.mask]))
+
+# parameterize interpolation method and number of points
+@pytest.mark.parametrize("METHOD", ['spline','linear'])
+@pytest.mark.parametrize("N", [10000,
+    pytest.param(100000, marks=pytest.mark.slow)])
+# PURPOSE: benchmark tide predictions at unsorted and spatially sorted points
+def test_sorted_benchmark(tmp_path, METHOD, N):
+    # calculate model grid (quarter-degree lat/lon grid)
+    dlon,dlat = (0.25,0.25)
+    LON = np.arange(0,360,dlon)
+    LAT = np.arange(-90,90+dlat,dlat)
+    gridlon,gridlat = np.meshgrid(LON,LAT)
+    X,Y,Z = pyTMD.spatial.to_cartesian(gridlon,gridlat,
+        a_axis=1.0,flat=0.0)
+    # write synthetic model constituents with an invalid region
+    model_files = []
+    for i,c in enumerate(['m2','s2','k1','o1']):
+        hc = np.ma.zeros(gridlon.shape,dtype=np.complex128)
+        hc.data[:] = (i + 1.0)*franke_3d(X,Y,Z)*np.exp(1j*np.radians(gridlon))
+        hc.mask = (gridlat > 80.0)
+        model_file = tmp_path.joinpath(f'{c}.nc')
+        pyTMD.io.GOT.output_netcdf_file(model_file, hc, LON, LAT, c)
+        model_files.append(str(model_file))
+    # write the model definition file
+    definition_file = tmp_path.joinpath('model_synthetic.json')
+    with definition_file.open(mode='w', encoding='utf8') as fid:
+        json.dump(dict(format='GOT-netcdf', name='synthetic',
+            model_file=model_files, type='z', variable='tide_ocean',
+            version='synthetic', scale=0.01, compressed=False,
+            reference=''), fid)
+    # random points and times in the order they were acquired
+    rng = np.random.default_rng(seed=2024)
+    lon = -180.0 + 360.0*rng.random(N)
+    lat = -90.0 + 180.0*rng.random(N)
+    delta_time = 86400.0*365.0*rng.random(N)
+    # predict tides at points in the input order and in Morton order
+    elapsed = {}
+    output = {}
+    for SORT in [False, True]:
+        t0 = time.perf_counter()
+        output[SORT] = pyTMD.compute.tide_elevations(lon, lat, delta_time,
+            DEFINITION_FILE=definition_file, EPSG=4326, TYPE='drift',
+            METHOD=METHOD, SORT=SORT)
+        elapsed[SORT] = time.perf_counter() - t0
+    # sorted and unsorted outputs are equivalent
+    assert np.all(output[True].mask == output[False].mask)
+    assert np.allclose(output[True].data[~output[True].mask],
+        output[False].data[~output[False].mask])
+    logging.info(f'{METHOD} N={N:d}: '
+        f'unsorted {elapsed[False]:0.6f} s, '
+        f'sorted {elapsed[True]:0.6f} s')
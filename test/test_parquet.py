@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 u"""
-test_parquet.py (06/2024)
+test_parquet.py (10/2024)
 Verify (geo)parquet file read and write with spatial utilities
 """
 import inspect
@@ -134,3 +134,58 @@ def test_geoparquet():
     assert np.all((np.abs(v-gdf[k].values) < eps) for k,v in output.items())
     # remove the test file
     output_file.unlink()
+
+# PURPOSE: test the streaming read and write of geoparquet files
+def test_geoparquet_stream():
+    # number of data points
+    n_time = 30000
+    # create a test dataset
+    output = {}
+    # random number generator
+    rng = np.random.default_rng()
+    # randomly generated data and times
+    output['data'] = 1000.0*(3.0 - rng.standard_normal(n_time))
+    output['time'] = rng.uniform(0.0, high=31557600.0, size=n_time)
+    # use range of Bamber 1km Antarctic DEM
+    output['y'] = rng.uniform(-560.*5e3, high=560.*5e3, size=n_time)
+    output['x'] = rng.uniform(-560.*5e3, high=560.*5e3, size=n_time)
+    # coordinate reference system
+    crs = 3031
+    crs2 = pyTMD.crs().from_input(crs)
+    # validation tolerance
+    eps = np.finfo(np.float64).eps
+
+    # output file attributes
+    attrib = {}
+    for key in output.keys():
+        attrib[key] = {}
+        attrib[key]['long_name'] = key
+    # create test geoparquet file from batches of data
+    output_file = filepath.joinpath('test.parquet')
+    batches = ({k:v[i:i+7000] for k,v in output.items()}
+        for i in range(0, n_time, 7000))
+    n_rows = pyTMD.spatial.to_parquet_stream(batches, attrib, output_file,
+        geoparquet=True, geometry_encoding='WKB', crs=crs)
+    assert (n_rows == n_time)
+    # read test geoparquet file in batches
+    batches = list(pyTMD.spatial.iter_file(output_file, 'parquet',
+        chunk_size=10000))
+    assert [len(b['time']) for b in batches] == [10000, 10000, 10000]
+    # check that the crs is valid (retrieved from geo metadata)
+    crs1 = pyTMD.crs().from_input(batches[0]['attributes']['wkt'])
+    assert crs1.equals(crs2)
+    # check that data is valid
+    for k,v in output.items():
+        test = np.concatenate([b[k] for b in batches])
+        assert np.all(np.abs(v - test) < eps)
+    # check that the vectorized decoding matches shapely
+    test = pyTMD.spatial.from_file(output_file, format='parquet')
+    for k,v in output.items():
+        assert np.all(np.abs(v - test[k].values) < eps)
+    # test that geoparquet file can be read by geopandas
+    gdf = geopandas.read_parquet(output_file)
+    # check that the crs is valid
+    crs1 = pyTMD.crs().from_input(gdf.crs.to_wkt())
+    assert crs1.equals(crs2)
+    # remove the test file
+    output_file.unlink()
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 u"""
-test_perth3_read.py (09/2024)
+test_perth3_read.py (10/2024)
 Tests that GOT4.7 data can be downloaded from AWS S3 bucket
 Tests the read program to verify that constituents are being extracted
 Tests that interpolated results are comparable to NASA PERTH3 program
@@ -13,8 +13,15 @@ PYTHON DEPENDENCIES:
         https://docs.scipy.org/doc/
     boto3: Amazon Web Services (AWS) SDK for Python
         https://boto3.amazonaws.com/v1/documentation/api/latest/index.html
+    xarray: N-D labeled arrays and datasets in Python
+        https://docs.xarray.dev/en/stable/
+    dask: Parallel computing with task scheduling
+        https://docs.dask.org/en/stable/
 
 UPDATE HISTORY:
+    Updated 10/2024: add test for preloaded predictor class
+        add test for lazy predictions with xarray and dask
+        add benchmark of single point predictions with the predictor
     Updated 09/2024: drop support for the ascii definition file format
         use model class attributes for file format and corrections
     Updated 08/2024: increased tolerance for comparing with GOT4.7 tests
@@ -36,10 +43,12 @@ UPDATE HISTORY:
 import io
 import gzip
 import json
+import time
 import boto3
 import shutil
 import pytest
 import inspect
+import logging
 import pathlib
 import posixpath
 import numpy as np
@@ -266,6 +275,91 @@ def test_Ross_Ice_Shelf(METHOD, EXTRAPOLATE):
         EPSG=3031, METHOD=METHOD, EXTRAPOLATE=EXTRAPOLATE)
     assert np.any(tide)
 
+# parameterize interpolation method
+@pytest.mark.parametrize("METHOD", ['spline','bilinear'])
+# PURPOSE: test that the preloaded predictor matches the wrapper function
+def test_predictor(METHOD):
+    # coordinates and times of points
+    lon = np.array([178.0, -170.0, 0.5, 45.0])
+    lat = np.array([-45.0, -60.0, 10.0, 30.0])
+    delta_time = np.array([0.0, 86400.0, 1e6, 1e8])
+    # calculate tides using the wrapper function
+    exp = pyTMD.compute.tide_elevations(lon, lat, delta_time,
+        DIRECTORY=filepath, MODEL='GOT4.7', GZIP=True,
+        EPOCH=timescale.time._atlas_sdp_epoch, TYPE='drift', TIME='UTC',
+        EPSG=4326, METHOD=METHOD)
+    # calculate tides using the preloaded predictor
+    predictor = pyTMD.compute.predictor(DIRECTORY=filepath,
+        MODEL='GOT4.7', GZIP=True, EPOCH=timescale.time._atlas_sdp_epoch,
+        TIME='UTC', EPSG=4326, METHOD=METHOD)
+    obs = predictor(lon, lat, delta_time)
+    assert np.all(obs.mask == exp.mask)
+    assert np.ma.allclose(obs, exp)
+    # verify single point predictions
+    for i, t in enumerate(delta_time):
+        assert np.ma.allclose(predictor(lon[i], lat[i], t), exp[i])
+    # verify broadcasting a time series at a point
+    ts = predictor(lon[0], lat[0], delta_time)
+    assert np.shape(ts) == np.shape(delta_time)
+
+# parameterize interpolation method
+@pytest.mark.parametrize("METHOD", ['spline','bilinear'])
+# PURPOSE: benchmark single point predictions with the preloaded predictor
+def test_predictor_latency(METHOD, N=10):
+    # coordinates and times of points
+    lon = -170.0 + 0.5*np.random.rand(N)
+    lat = -60.0 + 0.5*np.random.rand(N)
+    delta_time = 86400.0*np.random.rand(N)
+    # time single point predictions using the wrapper function
+    t0 = time.perf_counter()
+    exp = pyTMD.compute.tide_elevations(lon[0], lat[0], delta_time[0],
+        DIRECTORY=filepath, MODEL='GOT4.7', GZIP=True,
+        EPOCH=timescale.time._atlas_sdp_epoch, TYPE='drift', TIME='UTC',
+        EPSG=4326, METHOD=METHOD)
+    wrapper = time.perf_counter() - t0
+    # preload the model and warm up the cached interpolations
+    predictor = pyTMD.compute.predictor(DIRECTORY=filepath,
+        MODEL='GOT4.7', GZIP=True, EPOCH=timescale.time._atlas_sdp_epoch,
+        TIME='UTC', EPSG=4326, METHOD=METHOD)
+    assert np.ma.allclose(predictor(lon[0], lat[0], delta_time[0]), exp)
+    # time single point predictions after warming up
+    elapsed = np.zeros((N))
+    for i in range(N):
+        t0 = time.perf_counter()
+        predictor(lon[i], lat[i], delta_time[i])
+        elapsed[i] = time.perf_counter() - t0
+    logging.info(f'{METHOD} tide_elevations: {wrapper:0.6f} s, '
+        f'predictor median: {np.median(elapsed):0.6f} s')
+    # preloaded predictions avoid reading the model for each call
+    assert np.median(elapsed) < wrapper
+
+# PURPOSE: test lazy predictions for chunks of xarray and dask arrays
+def test_predictor_map_blocks():
+    xr = pytest.importorskip('xarray')
+    dask = pytest.importorskip('dask')
+    # grid of points and times
+    x = xr.DataArray(np.arange(-180.0, 180.0, 15.0), dims='x')
+    y = xr.DataArray(np.arange(-60.0, 61.0, 10.0), dims='y')
+    delta_time = xr.DataArray(np.arange(0.0, 86400.0, 3600.0), dims='time')
+    # preloaded predictor
+    predictor = pyTMD.compute.predictor(DIRECTORY=filepath,
+        MODEL='GOT4.7', GZIP=True, EPOCH=timescale.time._atlas_sdp_epoch,
+        TIME='UTC', EPSG=4326, METHOD='bilinear')
+    # lazily predict tides for chunks of the grid
+    tide = predictor.map_blocks(x.chunk(8), y, delta_time.chunk(6))
+    assert isinstance(tide.data, dask.array.Array)
+    assert tide.dims == ('x', 'y', 'time')
+    assert (tide.data.numblocks[0] == 3) and (tide.data.numblocks[2] == 4)
+    # compute with the local scheduler and compare with eager predictions
+    obs = tide.compute(scheduler='threads')
+    exp = predictor(*np.meshgrid(x, y, delta_time, indexing='ij'))
+    assert np.allclose(obs.values, exp.filled(np.nan), equal_nan=True)
+    # verify predictions with dask arrays
+    tide = predictor.map_blocks(x.data, y.data[:,None], 0.0, chunks=4)
+    assert isinstance(tide, dask.array.Array)
+    assert np.allclose(tide.compute(scheduler='processes'),
+        exp[:,:,0].filled(np.nan).T, equal_nan=True)
+
 # PURPOSE: test definition file functionality
 @pytest.mark.parametrize("MODEL", ['GOT4.7'])
 def test_definition_file(MODEL):
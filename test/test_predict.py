@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+u"""
+test_predict.py (10/2024)
+Verify tidal predictions with plain arrays and validity masks match
+    predictions calculated using numpy masked arrays
+Benchmark the time and memory of the tidal predictions
+
+UPDATE HISTORY:
+    Written 10/2024
+"""
+import time
+import pytest
+import logging
+import tracemalloc
+import numpy as np
+import pyTMD.arguments
+import pyTMD.predict
+
+# PURPOSE: reference drift prediction using masked array operations
+def masked_drift(t, hc, constituents, deltat=0.0, corrections='OTIS'):
+    nt = len(t)
+    pu, pf, G = pyTMD.arguments.arguments(t + pyTMD.predict._mjd_tide,
+        constituents, deltat=deltat, corrections=corrections)
+    ht = np.ma.zeros((nt))
+    ht.mask = np.zeros((nt), dtype=bool)
+    for k,c in enumerate(constituents):
+        if corrections in ('OTIS', 'ATLAS', 'TMD3', 'netcdf'):
+            amp, ph, omega, alpha, species = \
+                pyTMD.arguments._constituent_parameters(c)
+            th = omega*t*86400.0 + ph + pu[:,k]
+        else:
+            th = G[:,k]*np.pi/180.0 + pu[:,k]
+        ht.data[:] += pf[:,k]*hc.real[:,k]*np.cos(th) - \
+            pf[:,k]*hc.imag[:,k]*np.sin(th)
+        ht.mask[:] |= (hc.real.mask[:,k] | hc.imag.mask[:,k])
+    return ht
+
+# PURPOSE: create a random set of masked harmonic constants
+def random_constants(N, constituents, fraction=0.1):
+    nc = len(constituents)
+    amp = np.random.rand(N, nc)
+    ph = 2.0*np.pi*np.random.rand(N, nc)
+    mask = np.random.rand(N, nc) < (fraction/nc)
+    hc = np.ma.array(amp*np.exp(-1j*ph), mask=mask)
+    hc.data[hc.mask] = hc.fill_value
+    return hc
+
+# PURPOSE: verify drift predictions and the propagation of masks
+@pytest.mark.parametrize("corrections", ['OTIS', 'GOT'])
+def test_drift(corrections):
+    # major constituents and a constituent not used for inference
+    constituents = ['q1','o1','p1','k1','n2','m2','s2','k2','m4']
+    N = 1000
+    hc = random_constants(N, constituents)
+    # invalidate only the constituent not used for inference at a point
+    hc.mask[0,:] = False
+    hc[0,-1] = np.ma.masked
+    # random times in days relative to 1992-01-01
+    t = 365.25*30.0*np.random.rand(N)
+    # predict with plain arrays and with masked arrays
+    obs = pyTMD.predict.drift(t, hc, constituents,
+        corrections=corrections)
+    exp = masked_drift(t, hc, constituents, corrections=corrections)
+    # verify the output type, mask and values
+    assert isinstance(obs, np.ma.MaskedArray)
+    assert np.all(obs.mask == exp.mask)
+    assert np.allclose(obs.data[~obs.mask], exp.data[~exp.mask])
+    # verify inferred minor constituents are masked only where
+    # the major constituents used for inference are invalid
+    minor = pyTMD.predict.infer_minor(t, hc, constituents,
+        corrections=corrections)
+    assert isinstance(minor, np.ma.MaskedArray)
+    assert np.all(minor.mask == np.any(hc.mask[:,:-1], axis=1))
+    assert obs.mask[0] and not minor.mask[0]
+    # verify time series predictions broadcast the mask
+    ts = pyTMD.predict.time_series(t, hc[0,None,:], constituents,
+        corrections=corrections)
+    assert np.all(ts.mask == np.any(hc.mask[0,:]))
+
+# PURPOSE: benchmark time and memory of drift predictions
+@pytest.mark.parametrize("N", [10000,
+    pytest.param(100000, marks=pytest.mark.slow)])
+def test_drift_benchmark(N):
+    # major constituents
+    constituents = ['q1','o1','p1','k1','n2','m2','s2','k2']
+    hc = random_constants(N, constituents)
+    t = 365.25*30.0*np.random.rand(N)
+    # for each prediction method
+    for name, func in [('masked', masked_drift),
+        ('plain', pyTMD.predict.drift)]:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        ht = func(t, hc, constituents, corrections='OTIS')
+        elapsed = time.perf_counter() - t0
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        logging.info(f'{name} N={N:d}: {elapsed:0.6f} s, '
+            f'peak memory {peak/1e6:0.3f} MB')
+        assert (len(ht) == N)
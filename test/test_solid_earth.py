@@ -1,5 +1,5 @@
 """
-test_solid_earth.py (07/2024)
+test_solid_earth.py (10/2024)
 Tests the steps for calculating the solid earth tides
 
 PYTHON DEPENDENCIES:
@@ -10,6 +10,9 @@ PYTHON DEPENDENCIES:
         https://pypi.org/project/timescale/
 
 UPDATE HISTORY:
+    Updated 10/2024: add test for solid earth tide grids and time series
+        add test for reusing geometry of points between corrections
+        add test for computing multiple corrections in a single pass
     Updated 07/2024: use normalize_angle from pyTMD astro module
     Updated 04/2024: use timescale for temporal operations
     Updated 01/2024: refactored lunisolar ephemerides functions
@@ -288,6 +291,116 @@ def test_solid_earth_radial(EPHEMERIDES):
     assert np.isclose(tide_earth_free2mean, predicted, atol=5e-4).all()
     assert np.isclose(tide_mean-tide_free, predicted, atol=5e-4).all()
 
+# parameterize data type
+@pytest.mark.parametrize("TYPE", ['grid','time series'])
+def test_solid_earth_broadcast(TYPE):
+    """Test that solid earth tides for grids and time series match
+    predictions for drift data
+    """
+    # coordinates and times
+    longitudes = np.array([-136.79534534, -71.77356870, 15.0, 120.0])
+    latitudes = np.array([68.95910366, -79.00591611, 0.0])
+    # use coordinates as stations for time series
+    if (TYPE == 'time series'):
+        latitudes = np.resize(latitudes, len(longitudes))
+    times = np.arange('2018-10-14T00', '2018-10-15T00',
+        np.timedelta64(3, 'h'), dtype='datetime64[s]')
+    # predict radial solid earth tides for grids or time series
+    tide_se = pyTMD.compute.SET_displacements(longitudes, latitudes, times,
+        EPSG=4326, TYPE=TYPE, TIME='datetime', ELLIPSOID='WGS84')
+    # verify output dimensions
+    if (TYPE == 'grid'):
+        assert tide_se.shape == (3, 4, len(times))
+    elif (TYPE == 'time series'):
+        assert tide_se.shape == (4, len(times))
+    # reshape grids to list of points
+    if (TYPE == 'grid'):
+        x, y = np.meshgrid(longitudes, latitudes)
+        x, y = x.flatten(), y.flatten()
+        tide_se = tide_se.reshape(-1, len(times))
+    else:
+        x, y = longitudes, latitudes
+    # predict radial solid earth tides at each point as drift
+    for i, (lon, lat) in enumerate(zip(x, y)):
+        expected = pyTMD.compute.SET_displacements(
+            np.full(len(times), lon), np.full(len(times), lat), times,
+            EPSG=4326, TYPE='drift', TIME='datetime', ELLIPSOID='WGS84')
+        assert np.isclose(expected, tide_se[i,:]).all()
+
+def test_solid_earth_geometry():
+    """Test that precomputed geometry of points can be reused
+    """
+    # coordinates and times
+    longitudes = np.array([-136.79534534, -71.77356870, 15.0, 120.0])
+    latitudes = np.array([68.95910366, -79.00591611, 0.0, 45.0])
+    times = np.arange('2018-10-14T00', '2018-10-15T00',
+        np.timedelta64(6, 'h'), dtype='datetime64[s]')
+    # calculate geometry of points
+    geometry = pyTMD.compute.geometry.from_input(longitudes, latitudes,
+        EPSG=4326, ELLIPSOID='WGS84')
+    # verify rotation to cartesian coordinates is the inverse of
+    # the projection onto the radial unit vectors
+    local = np.random.randn(3, len(longitudes))
+    dxi = geometry.from_local(*local)
+    assert np.isclose(geometry.to_radial(dxi), local[2]).all()
+    assert np.isclose(np.linalg.norm(dxi, axis=-1),
+        np.linalg.norm(local, axis=0)).all()
+    # predict radial solid earth tides with and without geometry
+    expected = pyTMD.compute.SET_displacements(longitudes, latitudes, times,
+        EPSG=4326, TYPE='time series', TIME='datetime', ELLIPSOID='WGS84')
+    tide_se = pyTMD.compute.SET_displacements(longitudes, latitudes, times,
+        EPSG=4326, TYPE='time series', TIME='datetime', ELLIPSOID='WGS84',
+        GEOMETRY=geometry)
+    assert np.isclose(expected, tide_se).all()
+    # verify that geometries of other points or ellipsoids are rejected
+    with pytest.raises(AssertionError):
+        pyTMD.compute.SET_displacements(longitudes[:2], latitudes[:2],
+            times, EPSG=4326, TYPE='time series', TIME='datetime',
+            ELLIPSOID='WGS84', GEOMETRY=geometry)
+    with pytest.raises(AssertionError):
+        pyTMD.compute.SET_displacements(longitudes, latitudes, times,
+            EPSG=4326, TYPE='time series', TIME='datetime',
+            ELLIPSOID='GRS80', GEOMETRY=geometry)
+    with pytest.raises(AssertionError):
+        pyTMD.compute.LPET_elevations(longitudes[:2], latitudes[:2],
+            times, EPSG=4326, TYPE='time series', TIME='datetime',
+            GEOMETRY=geometry)
+
+# parameterize data type
+@pytest.mark.parametrize("TYPE", ['drift','grid','time series'])
+def test_all_corrections(TYPE):
+    """Test that multiple corrections match individual corrections
+    """
+    # coordinates and times
+    longitudes = np.array([-136.79534534, -71.77356870, 15.0, 120.0])
+    latitudes = np.array([68.95910366, -79.00591611, 0.0, 45.0])
+    times = np.arange('2018-10-14T00', '2018-10-15T00',
+        np.timedelta64(6, 'h'), dtype='datetime64[s]')
+    # use a subset of coordinates for grids
+    if (TYPE == 'grid'):
+        latitudes = latitudes[:3]
+    # compute multiple corrections in a single pass
+    CORRECTION = ['LPET', 'SET']
+    output = pyTMD.compute.all_corrections(longitudes, latitudes, times,
+        CORRECTION=CORRECTION, EPSG=4326, TYPE=TYPE, TIME='datetime',
+        ELLIPSOID='WGS84')
+    assert sorted(output.keys()) == sorted(CORRECTION)
+    # compare with each individual correction
+    for c in CORRECTION:
+        expected = pyTMD.compute.corrections(longitudes, latitudes, times,
+            CORRECTION=c, EPSG=4326, TYPE=TYPE, TIME='datetime',
+            ELLIPSOID='WGS84')
+        assert np.shape(output[c]) == np.shape(expected)
+        assert np.isclose(expected, output[c]).all()
+    # check that the default corrections do not require a model
+    output = pyTMD.compute.all_corrections(longitudes, latitudes, times,
+        EPSG=4326, TYPE=TYPE, TIME='datetime')
+    assert sorted(output.keys()) == sorted(['LPET', 'LPT', 'OPT', 'SET'])
+    # check that ocean and load tides require a model
+    with pytest.raises(ValueError):
+        pyTMD.compute.all_corrections(longitudes, latitudes, times,
+            CORRECTION=['ocean'], EPSG=4326, TYPE=TYPE, TIME='datetime')
+
 # PURPOSE: Download JPL ephemerides from Solar System Dynamics server
 @pytest.fixture(scope="module", autouse=True)
 def download_jpl_ephemerides():
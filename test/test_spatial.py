@@ -3,8 +3,10 @@ u"""
 test_spatial.py (11/2020)
 Verify file read and write with spatial utilities
 """
+import time
 import boto3
 import pytest
+import logging
 import shutil
 import inspect
 import pathlib
@@ -249,6 +251,166 @@ def test_HDF5(TYPE):
     # remove the test file
     output_file.unlink()
 
+# PURPOSE: test the chunked read and write of drift files
+@pytest.mark.parametrize("FORMAT", ['ascii','netCDF4','HDF5'])
+def test_chunked(FORMAT):
+    # number of data points
+    n_time = 3000
+    # create a test dataset
+    output = {}
+    output['y'] = np.random.randint(-90,90,size=n_time).astype(np.float64)
+    output['x'] = np.random.randint(-180,180,size=n_time).astype(np.float64)
+    output['data'] = np.random.randn(n_time)
+    output['time'] = np.random.randint(0,31557600,size=n_time).astype(np.float64)
+    # output file attributes
+    attrib = {}
+    for key in output.keys():
+        attrib[key] = {}
+        attrib[key]['long_name'] = key
+    # keyword arguments for reading test files
+    if (FORMAT == 'ascii'):
+        output_file = filepath.joinpath('test.csv')
+        pyTMD.spatial.to_ascii(output, attrib, output_file,
+            columns=['time','y','x','data'])
+        kwargs = dict(columns=['time','y','x','data'])
+    else:
+        output_file = filepath.joinpath('test_chunked')
+        kwargs = dict(timename='time', xname='x', yname='y', varname='data')
+        # write the test dataset in chunks
+        for offset in range(0, n_time, 700):
+            chunk = {k:v[offset:offset+700] for k,v in output.items()}
+            pyTMD.spatial.to_file(chunk, attrib, output_file, FORMAT,
+                mode='a' if offset else 'w', offset=offset)
+    # read the test file in chunks
+    chunks = list(pyTMD.spatial.iter_file(output_file, FORMAT,
+        chunk_size=1000, **kwargs))
+    assert [len(c['time']) for c in chunks] == [1000, 1000, 1000]
+    # check that data is valid and matches reading the full file
+    test = pyTMD.spatial.from_file(output_file, FORMAT, **kwargs)
+    eps = np.finfo(np.float32).eps
+    for k,v in output.items():
+        assert np.all(np.abs(v - np.concatenate([c[k] for c in chunks])) < eps)
+        assert np.all(np.abs(v - test[k]) < eps)
+    # remove the test file
+    output_file.unlink()
+
+# PURPOSE: test writing and reading gridded time slices
+@pytest.mark.parametrize("FORMAT", ['netCDF4','HDF5'])
+def test_incremental_grid(FORMAT):
+    # grid dimensions
+    ny, nx, nt = (20, 30, 5)
+    # create a test dataset
+    output = {}
+    output['y'] = np.linspace(-90, 90, ny)
+    output['x'] = np.linspace(-180, 180, nx)
+    output['data'] = np.random.randn(ny, nx, nt)
+    output['time'] = np.arange(nt, dtype=np.float64)
+    # output file attributes
+    attrib = {}
+    for key in output.keys():
+        attrib[key] = {}
+        attrib[key]['long_name'] = key
+    output_file = filepath.joinpath('test_incremental')
+    # write the test dataset one time slice at a time
+    for i in range(nt):
+        chunk = dict(data=output['data'][:,:,i:i+1],
+            time=output['time'][i:i+1])
+        if (i == 0):
+            chunk.update(x=output['x'], y=output['y'])
+        attrib['ROOT'] = dict(time_slices_completed=i+1)
+        pyTMD.spatial.to_file(chunk, attrib, output_file, FORMAT,
+            mode='a' if i else 'w', data_type='grid', offset=i)
+        # check the progress recorded in the file
+        attributes = pyTMD.spatial.read_attributes(output_file, FORMAT)
+        assert (attributes['time_slices_completed'] == (i+1))
+    # check that data is valid
+    test = pyTMD.spatial.from_file(output_file, FORMAT,
+        timename='time', xname='x', yname='y', varname='data')
+    eps = np.finfo(np.float32).eps
+    for k,v in output.items():
+        assert np.shape(test[k]) == np.shape(v)
+        assert np.all(np.abs(v - test[k]) < eps)
+    # remove the test file
+    output_file.unlink()
+
+# PURPOSE: test writing preallocated and chunked datasets
+@pytest.mark.parametrize("FORMAT", ['netCDF4','HDF5'])
+@pytest.mark.parametrize("COMPRESSION", [None,'gzip'])
+def test_chunked_writers(FORMAT, COMPRESSION):
+    # number of data points
+    n_time = 3000
+    # create a test dataset
+    output = {}
+    output['y'] = np.random.randint(-90,90,size=n_time).astype(np.float64)
+    output['x'] = np.random.randint(-180,180,size=n_time).astype(np.float64)
+    output['data'] = np.random.randn(n_time)
+    output['time'] = np.random.randint(0,31557600,size=n_time).astype(np.float64)
+    # output file attributes
+    attrib = {}
+    for key in output.keys():
+        attrib[key] = {}
+        attrib[key]['long_name'] = key
+    # chunk shapes for each format
+    if (FORMAT == 'netCDF4'):
+        chunks = dict(time=500)
+    elif (FORMAT == 'HDF5'):
+        chunks = (500,)
+    # write the test dataset in blocks to a preallocated file
+    output_file = filepath.joinpath('test_chunked_writers')
+    for offset in range(0, n_time, 1000):
+        block = {k:v[offset:offset+1000] for k,v in output.items()}
+        pyTMD.spatial.to_file(block, attrib, output_file, FORMAT,
+            mode='a' if offset else 'w', offset=offset, size=n_time,
+            chunks=chunks, compression=COMPRESSION)
+    # check the chunk shapes and compression of the output variables
+    if (FORMAT == 'netCDF4'):
+        with pyTMD.spatial.netCDF4.Dataset(output_file) as fileID:
+            filters = fileID.variables['data'].filters()
+            assert fileID.variables['data'].chunking() == [500]
+            assert filters['zlib'] == (COMPRESSION == 'gzip')
+    elif (FORMAT == 'HDF5'):
+        with pyTMD.spatial.h5py.File(output_file) as fileID:
+            assert fileID['data'].chunks == (500,)
+            assert fileID['data'].compression == COMPRESSION
+    # check that data is valid
+    test = pyTMD.spatial.from_file(output_file, FORMAT,
+        timename='time', xname='x', yname='y', varname='data')
+    eps = np.finfo(np.float32).eps
+    for k,v in output.items():
+        assert np.all(np.abs(v - test[k]) < eps)
+    # remove the test file
+    output_file.unlink()
+
+# PURPOSE: test that netCDF4 compression plugins are available
+@pytest.mark.parametrize("COMPRESSION", ['lz4','blosc','zstd'])
+def test_netCDF4_plugins(COMPRESSION):
+    # create a test dataset
+    output = {}
+    output['y'] = np.arange(-90,90,10).astype(np.float64)
+    output['x'] = np.arange(-180,180,20).astype(np.float64)
+    output['data'] = np.random.randn(len(output['x']))
+    output['time'] = np.arange(len(output['x'])).astype(np.float64)
+    attrib = {key:dict(long_name=key) for key in output.keys()}
+    output_file = filepath.joinpath('test_netCDF4_plugins.nc')
+    # check if the compression plugin is available
+    codec = pyTMD.spatial._netCDF4_codecs[COMPRESSION]
+    plugin = pyTMD.spatial._netCDF4_plugins[codec]
+    with pyTMD.spatial.netCDF4.Dataset(output_file, 'w') as fileID:
+        available = getattr(fileID, plugin)()
+    if available:
+        pyTMD.spatial.to_netCDF4(output, attrib, output_file,
+            compression=COMPRESSION)
+        with pyTMD.spatial.netCDF4.Dataset(output_file) as fileID:
+            filters = fileID.variables['data'].filters()
+            assert filters[codec.split('_')[0]]
+    else:
+        # unavailable plugins raise an error naming the codec
+        with pytest.raises(ValueError, match=codec):
+            pyTMD.spatial.to_netCDF4(output, attrib, output_file,
+                compression=COMPRESSION)
+    # remove the test file
+    output_file.unlink()
+
 # PURPOSE: Download IODEM3 from NSIDC
 @pytest.fixture(scope="module", autouse=False)
 def nsidc_IODEM3(username, password):
@@ -324,6 +486,40 @@ def test_geotiff():
     # remove the test files
     output_file.unlink()
 
+# PURPOSE: test the windowed read and tiled write of geotiff files
+@pytest.mark.parametrize("DRIVER", ['GTiff','cog'])
+def test_geotiff_blocks(DRIVER):
+    # read IODEM3 geotiff file
+    granule = filepath.joinpath('IODEM3_20091025_212618_02720_DEM.tif')
+    dinput = pyTMD.spatial.from_geotiff(granule)
+    attributes = pyTMD.spatial.read_attributes(granule, 'GTiff')
+    ny, nx, nband = attributes['shape']
+    assert (len(dinput['y']), len(dinput['x'])) == (ny, nx)
+    # copy global geotiff attributes for projection and grid parameters
+    attrib = {a:dinput['attributes'][a] for a in ['wkt','spacing','extent']}
+    attrib['data'] = dict(_FillValue=-9999.0)
+    # read and write the image in blocks
+    blocks = []
+    for block in pyTMD.spatial.iter_geotiff(granule, block_size=(300, 200)):
+        xoff, yoff, xcount, ycount = block['window']
+        assert np.all(block['x'] == dinput['x'][xoff:xoff+xcount])
+        assert np.all(block['y'] == dinput['y'][yoff:yoff+ycount])
+        assert np.all(block['data'] == dinput['data'][yoff:yoff+ycount,
+            xoff:xoff+xcount])
+        blocks.append(dict(data=block['data'].astype(np.float64),
+            window=block['window']))
+    output_file = filepath.joinpath('test_blocks.tif')
+    n_blocks = pyTMD.spatial.to_geotiff_stream(blocks, attrib, output_file,
+        (ny, nx), driver=DRIVER, tile_size=256)
+    assert (n_blocks == len(blocks))
+    # check that data is valid
+    test = pyTMD.spatial.from_geotiff(output_file)
+    eps = np.finfo(np.float32).eps
+    assert np.all(np.abs(dinput['data'] - test['data']) < eps)
+    assert np.all(dinput['x'] == test['x']) and np.all(dinput['y'] == test['y'])
+    # remove the test files
+    output_file.unlink()
+
 # PURPOSE: test the default field mapping function
 def test_field_mapping():
     # test without data variable
@@ -377,6 +573,28 @@ def test_convert_ellipsoid():
     assert np.isclose([minlatdel,maxlatdel],explatdel).all()
     assert np.isclose([minelevdel,maxelevdel],expelevdel,atol=1e-5).all()
 
+# PURPOSE: verify that ellipsoid conversions are independent for each point
+def test_convert_ellipsoid_vectorized():
+    # semimajor axis (a) and flattening (f) for TP and WGS84 ellipsoids
+    atop,ftop = (6378136.3,1.0/298.257)
+    awgs,fwgs = (6378137.0,1.0/298.257223563)
+    # random latitudes (including special cases) and heights
+    rng = np.random.default_rng()
+    lat = np.concatenate([rng.uniform(-90.0, 90.0, size=1000),
+        [-95.0, -90.0, -45.0, 0.0, 45.0, 90.0, 95.0]])
+    elev = rng.uniform(-100.0, 5000.0, size=len(lat))
+    # convert all points at once
+    phi,h = pyTMD.spatial.convert_ellipsoid(lat, elev,
+        awgs, fwgs, atop, ftop, eps=1e-12, itmax=10)
+    # convert each point individually
+    for i in range(len(lat)):
+        p,e = pyTMD.spatial.convert_ellipsoid(lat[i:i+1], elev[i:i+1],
+            awgs, fwgs, atop, ftop, eps=1e-12, itmax=10)
+        assert np.isclose(phi[i], p[0], rtol=0, atol=1e-12)
+        assert np.isclose(h[i], e[0], rtol=0, atol=1e-6)
+    # check that latitudes are within range
+    assert np.all(np.abs(phi) <= 90.0)
+
 # PURPOSE: verify cartesian to geodetic conversions
 def test_convert_geodetic():
     # choose a random set of locations
@@ -409,6 +627,41 @@ def test_convert_geodetic():
     assert np.isclose(latitude, lt3).all()
     assert np.isclose(height, h3).all()
 
+# PURPOSE: benchmark speed and accuracy of cartesian to geodetic conversions
+@pytest.mark.parametrize("N", [1000, 100000,
+    pytest.param(1000000, marks=pytest.mark.slow)])
+def test_geodetic_benchmark(N):
+    # choose a random set of locations
+    latitude = -90.0 + 180.0*np.random.rand(N)
+    longitude = -180.0 + 360.0*np.random.rand(N)
+    height = -1000.0 + 10000.0*np.random.rand(N)
+    # ellipsoidal parameters
+    a_axis = pyTMD.spatial._wgs84.a_axis
+    flat = pyTMD.spatial._wgs84.flat
+    # convert to cartesian coordinates
+    x, y, z = pyTMD.spatial.to_cartesian(longitude, latitude, h=height,
+        a_axis=a_axis, flat=flat)
+    # absolute height tolerance for each conversion method [m]
+    # the closed-form solution loses precision near 45 degrees latitude
+    atol = dict(moritz=1e-6, bowring=1e-6, zhu=1e-1)
+    # for each conversion method
+    for method in ['moritz', 'bowring', 'zhu']:
+        # convert back to geodetic coordinates
+        t0 = time.perf_counter()
+        ln, lt, h = pyTMD.spatial.to_geodetic(x, y, z,
+            a_axis=a_axis, flat=flat, method=method)
+        elapsed = time.perf_counter() - t0
+        # maximum errors in latitude and height
+        dlat = np.max(np.abs(lt - latitude))
+        dh = np.max(np.abs(h - height))
+        logging.info(f'{method} N={N:d}: {elapsed:0.6f} s, '
+            f'max latitude error {dlat:0.3e} deg, '
+            f'max height error {dh:0.3e} m')
+        # validate outputs
+        assert np.isclose(longitude, ln).all()
+        assert np.isclose(latitude, lt).all()
+        assert np.isclose(height, h, rtol=0.0, atol=atol[method]).all()
+
 # PURPOSE: test wrap longitudes
 def test_wrap_longitudes():
     # number of data points
@@ -420,6 +673,27 @@ def test_wrap_longitudes():
     exp[181:] = np.arange(-179,0)
     assert np.isclose(obs,exp).all()
 
+# PURPOSE: test sorting points along a Morton curve
+def test_morton_order():
+    # points on a regular grid in random order
+    gridx, gridy = np.meshgrid(np.arange(4), np.arange(4))
+    rng = np.random.default_rng(seed=2024)
+    indices = rng.permutation(16)
+    x, y = (gridx.flatten()[indices], gridy.flatten()[indices])
+    isort = pyTMD.spatial.morton_order(x, y, bits=2)
+    # sorted points are a permutation of the input points
+    assert np.all(np.sort(isort) == np.arange(16))
+    # expected Z-order curve of the grid
+    exp_x = [0,1,0,1,2,3,2,3,0,1,0,1,2,3,2,3]
+    exp_y = [0,0,1,1,0,0,1,1,2,2,3,3,2,2,3,3]
+    assert np.all(x[isort] == exp_x)
+    assert np.all(y[isort] == exp_y)
+    # invalid points are at the end of the curve
+    x = np.array([np.nan, 1.0, 0.0])
+    y = np.array([0.0, 1.0, 0.0])
+    isort = pyTMD.spatial.morton_order(x, y)
+    assert np.all(isort == [2, 1, 0])
+
 # PURPOSE: test the conversion of degrees to DMS
 def test_degrees_to_DMS():
     # test a range of angles
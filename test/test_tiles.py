@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+u"""
+test_tiles.py (10/2024)
+Verify reading and interpolating tiled tide model constituents
+
+UPDATE HISTORY:
+    Updated 10/2024: test that projected models are not tiled
+        test that the full grid is read once for unbounded extrapolation
+    Written 10/2024
+"""
+import pytest
+import numpy as np
+import pyTMD.io
+import pyTMD.interpolate
+
+# PURPOSE: create a synthetic global model with land cells
+@pytest.fixture(scope="module")
+def synthetic_model():
+    # global grid of cell centers
+    dlon, dlat = (1.0, 1.0)
+    lon = np.arange(dlon/2.0, 360, dlon)
+    lat = np.arange(-90 + dlat/2.0, 90, dlat)
+    gridlon, gridlat = np.meshgrid(lon, lat)
+    # synthetic constituents with a block of land cells
+    land = (gridlon > 100.0) & (gridlon < 140.0) & \
+        (gridlat > -20.0) & (gridlat < 20.0)
+    c = pyTMD.io.constituents(longitude=lon, latitude=lat)
+    for i, cons in enumerate(['m2', 's2']):
+        amp = (i + 1.0)*np.cos(np.radians(gridlat))
+        ph = np.radians(gridlon)
+        hc = np.ma.array(amp*np.exp(-1j*ph), mask=land)
+        c.append(cons, hc)
+    return c
+
+# PURPOSE: test that tiled interpolation matches the full grid
+@pytest.mark.parametrize("METHOD", ['spline','linear','bilinear'])
+def test_tiled_interpolation(synthetic_model, tmp_path, METHOD):
+    # write constituents to tiles
+    tiled_file = tmp_path.joinpath('tiles.nc')
+    pyTMD.io.tiles.output_tiles(tiled_file, synthetic_model, tile_size=32)
+    header = pyTMD.io.tiles.read_header(tiled_file)
+    assert header['constituents'] == ['m2', 's2']
+    assert header['is_global']
+    assert header['valid'].shape == (6, 12)
+    assert np.sum(header['valid']) == np.count_nonzero(~synthetic_model.m2.mask)
+    # points on either side of tiles and the dateline
+    ilon = np.array([-179.9, -0.2, 0.2, 31.9, 32.1, 120.0, 141.2, 359.9])
+    ilat = np.array([-60.3, 10.1, 10.1, 45.0, 45.0, 0.0, 19.7, -31.9])
+    pyTMD.io.tiles._tile_cache.clear()
+    pyTMD.io.tiles._axes_cache.clear()
+    amp, ph, c = pyTMD.io.tiles.extract_constants(ilon, ilat, tiled_file,
+        method=METHOD)
+    # only tiles containing points are read
+    assert len(pyTMD.io.tiles._tile_cache) <= len(ilon)
+    # expected values for valid points
+    valid = np.logical_not(amp.mask[:,0])
+    assert np.count_nonzero(amp.mask[:,0]) == 1
+    assert amp.mask[5,0]
+    for i, cons in enumerate(c):
+        expected = (i + 1.0)*np.cos(np.radians(ilat[valid]))
+        assert np.allclose(amp[valid,i], expected, atol=0.01*(i + 1.0))
+        phase = np.mod(ilon[valid], 360.0)
+        dph = np.mod(ph[valid,i] - phase + 180.0, 360.0) - 180.0
+        assert np.all(np.abs(dph) < 0.01)
+    # model coordinates are read once for the file
+    assert len(pyTMD.io.tiles._axes_cache) == 1
+    # extrapolate into land cells within tiles
+    pyTMD.io.tiles._tile_cache.clear()
+    amp, ph, c = pyTMD.io.tiles.extract_constants(ilon, ilat, tiled_file,
+        method=METHOD, extrapolate=True, cutoff=np.inf)
+    assert not np.any(amp.mask)
+    # the full grid is read once for an unbounded cutoff
+    assert len(pyTMD.io.tiles._tile_cache) == 1
+    # extrapolated values match a bounded cutoff
+    bounded, _, _ = pyTMD.io.tiles.extract_constants(ilon, ilat, tiled_file,
+        method=METHOD, extrapolate=True, cutoff=1000.0)
+    assert np.allclose(amp, bounded)
+
+# PURPOSE: test that models on projected grids are not tiled
+def test_projected_tiles(tmp_path):
+    # polar stereographic grid
+    x = np.arange(-1000e3, 1000e3, 50e3)
+    y = np.arange(-1000e3, 1000e3, 50e3)
+    crs = pyTMD.crs().get(3031)
+    c = pyTMD.io.constituents(x=x, y=y, crs=crs)
+    c.append('m2', np.ma.ones((len(y), len(x)), dtype=np.complex128))
+    with pytest.raises(ValueError):
+        pyTMD.io.tiles.output_tiles(tmp_path.joinpath('tiles.nc'), c)
+
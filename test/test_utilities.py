@@ -60,3 +60,70 @@ def test_token(username, password):
     assert (token['access_token'] in access_tokens)
     # revoke the access token
     pyTMD.utilities.revoke_token(token['access_token'], build=False)
+
+# PURPOSE: copy the contents of a file and fail for empty files
+def _copy_file(input_file, output_file, suffix=''):
+    contents = input_file.read_text()
+    output_file.write_text(contents + suffix)
+    if not contents:
+        raise ValueError('Empty input file')
+
+# PURPOSE: test running batches of files
+@pytest.mark.parametrize("processes", [1, 2])
+def test_batch(tmp_path, processes):
+    # create a set of input files (including one that fails)
+    for i in range(5):
+        tmp_path.joinpath(f'input_{i:d}.txt').write_text(f'{i:d}' if i else '')
+    # expand glob patterns of input files
+    input_files = pyTMD.utilities.expand_files(tmp_path.joinpath('input_*.txt'))
+    assert (len(input_files) == 5)
+    output_files = [f.with_name(f.name.replace('input','output'))
+        for f in input_files]
+    # run the batch of files
+    status = pyTMD.utilities.batch(_copy_file, input_files, output_files,
+        processes=processes, suffix='\n')
+    assert (status[str(input_files[0])] == 'failed')
+    assert all(status[str(f)] == 'completed' for f in input_files[1:])
+    # incomplete output files are removed
+    assert not output_files[0].exists()
+    assert (output_files[1].read_text() == '1\n')
+    assert pyTMD.utilities.is_newer(output_files[1], input_files[1])
+    # outputs that are newer than inputs are skipped
+    status = pyTMD.utilities.batch(_copy_file, input_files, output_files,
+        processes=processes)
+    assert all(status[str(f)] == 'skipped' for f in input_files[1:])
+    # outputs are overwritten if clobbering
+    status = pyTMD.utilities.batch(_copy_file, input_files, output_files,
+        processes=processes, clobber=True)
+    assert all(status[str(f)] == 'completed' for f in input_files[1:])
+    assert (output_files[1].read_text() == '1')
+
+# PURPOSE: test running files through a pipeline of stages
+@pytest.mark.parametrize("workers", [1, 3])
+def test_pipeline(tmp_path, workers):
+    # create a set of input files
+    for i in range(10):
+        tmp_path.joinpath(f'input_{i:d}.txt').write_text(f'{i:d}')
+    input_files = pyTMD.utilities.expand_files(tmp_path.joinpath('input_*.txt'))
+    output_files = [f.with_name(f.name.replace('input','output'))
+        for f in input_files]
+    # stages for reading, computing and writing (with one failure)
+    def compute(data):
+        if (data == '3'):
+            raise ValueError('Invalid input')
+        return 2*int(data)
+    def writer(data, output_file):
+        output_file.write_text(f'{data:d}')
+    # run the files through the pipeline
+    status, timing = pyTMD.utilities.pipeline(lambda f: f.read_text(),
+        compute, writer, input_files, output_files, workers=workers)
+    assert (status[str(tmp_path.joinpath('input_3.txt'))] == 'failed')
+    assert (sum(v == 'completed' for v in status.values()) == 9)
+    for input_file, output_file in zip(input_files, output_files):
+        if (input_file.read_text() != '3'):
+            assert (int(output_file.read_text()) == 2*int(input_file.read_text()))
+    assert all(timing[k] >= 0 for k in ('read','compute','write','total'))
+    # outputs that are newer than inputs are skipped
+    status, timing = pyTMD.utilities.pipeline(lambda f: f.read_text(),
+        compute, writer, input_files, output_files, workers=workers)
+    assert (sum(v == 'skipped' for v in status.values()) == 9)